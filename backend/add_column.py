@@ -4,8 +4,8 @@ from sqlalchemy import text
 
 with app.app_context():
     try:
-        # Add request_type column to tickets table
-        db.session.execute(text("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS request_type VARCHAR(100)"))
+        # Add request_type column to tickets table (a key into ticket_request_types since migration 012)
+        db.session.execute(text("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS request_type_id SMALLINT"))
         db.session.execute(text("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS is_service_request BOOLEAN DEFAULT FALSE"))
         db.session.commit()
         print("Column request_type added successfully.")
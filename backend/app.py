@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_migrate import Migrate
 from models.ticket import db
@@ -8,24 +8,40 @@ from models.modules import Project, ProjectMember, CustomerContact, Contact, Ala
 from models.alarm import AlarmNote as AlarmNoteV2, AlarmHistory
 from models.worklog import Worklog
 from models.time_spent import TechTimeSpent
+from models.data_version import DataVersion
+from models.report import MonthlyReport, ReportJob
+from models.rollup import TicketDailyRollup
 from routes.alarm_routes import alarm_bp
 from routes.report_routes import report_bp
 from routes.time_spent_routes import time_spent_bp
+from routes.batch_routes import batch_bp
+from routes.cmdb_routes import cmdb_relationship_bp
 from services.itsm_service import ITSMService
+from services.export_service import ExportService
+from services.report_params import (
+    parse_ticket_list_args, parse_ticket_search_args, parse_ticket_filters, parse_engine_arg,
+    parse_report_range, parse_alarm_list_args
+)
+from services.alarm_list import alarm_list, LEGACY_FIELDS as LEGACY_ALARM_FIELDS
+from services.id_allocator import id_allocator
 from services.auth_service import create_access_token, login_required, leader_required
 from services.sync_worker import sync_data
+from services.alert_queue import alert_queue
+from services.alarm_actions import alarm_actions
 from services.worklog_sync import run_worklog_sync
 from config import Config
 import threading
 
 app = Flask(__name__)
 app.config.from_object(Config)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 # Register Blueprints
 app.register_blueprint(alarm_bp)
 app.register_blueprint(report_bp)
 app.register_blueprint(time_spent_bp)
+app.register_blueprint(batch_bp)
+app.register_blueprint(cmdb_relationship_bp)
 
 # Initialize DB
 db.init_app(app)
@@ -37,8 +53,13 @@ with app.app_context():
     db.create_all()
     # Trigger initial sync in background thread
     threading.Thread(target=sync_data, args=(app,), daemon=True).start()
+    # Background ingestion of queued Alertmanager webhooks
+    alert_queue.start_workers(app)
+    # Tickets and notifications queued by alarm rules
+    alarm_actions.start_workers(app)
 
 itsm_service = ITSMService()
+export_service = ExportService(itsm_service)
 
 # Root welcome
 @app.route('/', methods=['GET'])
@@ -205,20 +226,25 @@ def delete_user(user_id):
 def get_summary():
     # Hardcode engineer filter for now (remove login requirement temporarily)
     engineer_name = request.args.get('engineer_name', 'Anh. Vo Thi Hong - CTS ITS.MS.2 HCM')
-    return jsonify(itsm_service.get_summary(engineer_name))
+    return jsonify(itsm_service.get_summary(engineer_name, use_engine=parse_engine_arg(request.args)))
 
 # Customer APIs
 @app.route('/api/report/customers', methods=['GET'])
 def get_customers():
+    """Per-customer totals.
+    Query params: engineer_name (optional), period = 1d | 7d | 30d | 90d | 365d | all
+    (default: 30d), or from/to (ISO dates), quarter (2026-Q3) or year (2026)
+    """
     # Get engineer_name from query param (optional)
     engineer_name = request.args.get('engineer_name')
-    
-    # Get period from query param (1d, 7d, 30d)
-    period = request.args.get('period', '30d')
-    if period not in ['1d', '7d', '30d']:
-        period = '30d'
-    
-    return jsonify(itsm_service.get_customers(engineer_name, period))
+    try:
+        window = parse_report_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.get_customers(
+        engineer_name, window['period'], use_engine=parse_engine_arg(request.args),
+        date_from=window['start'], date_to=window['end']
+    ))
 
 @app.route('/api/report/customers/<customer_id>', methods=['GET'])
 def get_customer_detail(customer_id):
@@ -229,22 +255,41 @@ def get_customer_detail(customer_id):
 
 @app.route('/api/report/customers/<customer_id>/tickets', methods=['GET'])
 def get_customer_tickets(customer_id):
-    return jsonify(itsm_service.get_customer_tickets(customer_id))
+    """Keyset-paginated ticket list.
+    Query params: status, priority (comma separated), from, to (ISO dates),
+    sort = -created_at | created_at, cursor, limit (default 50, max 500)
+    """
+    try:
+        params = parse_ticket_list_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.get_customer_tickets(customer_id, **params))
 
 @app.route('/api/report/customers/<customer_id>/performance', methods=['GET'])
 def get_customer_performance(customer_id):
     """Get customer performance metrics with time filter.
-    Query params: period = 1d | 7d | 30d (default: 30d)
+    Query params: period = 1d | 7d | 30d | 90d | 365d | all (default: 30d),
+    or from/to (ISO dates), quarter (2026-Q3) or year (2026)
     """
-    period = request.args.get('period', '30d')
-    if period not in ['1d', '7d', '30d']:
-        period = '30d'
-    return jsonify(itsm_service.get_customer_performance(customer_id, period))
+    try:
+        window = parse_report_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.get_customer_performance(
+        customer_id, window['period'], date_from=window['start'], date_to=window['end']
+    ))
 
 # Engineer APIs
 @app.route('/api/report/engineers', methods=['GET'])
 def get_engineers():
-    return jsonify(itsm_service.get_engineers())
+    """customers_supported is estimated from sketches; ?exact=true counts it over all tickets (audits)"""
+    exact = request.args.get('exact', 'false').lower() == 'true'
+    return jsonify(itsm_service.get_engineers(use_engine=parse_engine_arg(request.args), exact=exact))
+
+@app.route('/api/report/engineers/workload', methods=['GET'])
+def get_engineer_workload():
+    """Rolling 1d/7d/30d ticket counts and effort hours of every engineer, with overload flags"""
+    return jsonify(itsm_service.get_engineer_workload())
 
 @app.route('/api/report/engineers/<engineer_id>', methods=['GET'])
 def get_engineer_detail(engineer_id):
@@ -255,17 +300,92 @@ def get_engineer_detail(engineer_id):
 
 @app.route('/api/report/engineers/<engineer_id>/tickets', methods=['GET'])
 def get_engineer_tickets(engineer_id):
-    return jsonify(itsm_service.get_engineer_tickets(engineer_id))
+    """Keyset-paginated ticket list (same query params as customer tickets)"""
+    try:
+        params = parse_ticket_list_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.get_engineer_tickets(engineer_id, **params))
 
 @app.route('/api/report/engineers/<engineer_id>/performance', methods=['GET'])
 def get_engineer_performance(engineer_id):
     """Get engineer performance metrics with time filter.
-    Query params: period = 1d | 7d | 30d (default: 30d)
+    Query params: period = 1d | 7d | 30d | 90d | 365d | all (default: 30d),
+    or from/to (ISO dates), quarter (2026-Q3) or year (2026)
+    """
+    try:
+        window = parse_report_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.get_engineer_performance(
+        engineer_id, window['period'], date_from=window['start'], date_to=window['end']
+    ))
+
+@app.route('/api/report/percentiles', methods=['GET'])
+def get_percentiles():
+    """Resolve/response time percentiles from the daily rollups.
+    Query params: group_by = customer | engineer | priority (optional),
+    period = 1d | 7d | 30d | 90d | 365d | all (default: 30d), or from/to (ISO dates),
+    quarter (2026-Q3) or year (2026), customer_id, engineer_id, priority
     """
-    period = request.args.get('period', '30d')
-    if period not in ['1d', '7d', '30d']:
-        period = '30d'
-    return jsonify(itsm_service.get_engineer_performance(engineer_id, period))
+    try:
+        window = parse_report_range(request.args)
+        return jsonify(itsm_service.get_percentiles(
+            group_by=request.args.get('group_by'),
+            period=window['period'],
+            date_from=window['start'],
+            date_to=window['end'],
+            customer_id=request.args.get('customer_id'),
+            engineer_id=request.args.get('engineer_id'),
+            priority=request.args.get('priority')
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/report/export', methods=['GET'])
+def export_report():
+    """Stream tickets or report rows as a file download.
+    Query params: dataset = tickets | customers | engineers | percentiles (default: tickets),
+    format = csv | parquet (default: csv), description=true (tickets),
+    filters as the report endpoints: customer_id, engineer_id, engineer_name, status,
+    priority, period / from / to / quarter / year (default: all tickets, 30d for
+    report datasets), group_by (percentiles)
+    """
+    fmt = request.args.get('format', 'csv')
+    dataset = request.args.get('dataset', 'tickets')
+    try:
+        filters = parse_ticket_filters(request.args)
+        window = parse_report_range(request.args, default_period='all' if dataset == 'tickets' else '30d')
+        filename, stream = export_service.export(
+            dataset, fmt,
+            include_description=request.args.get('description') == 'true',
+            period=window['period'],
+            group_by=request.args.get('group_by'),
+            customer_id=request.args.get('customer_id'),
+            engineer_id=request.args.get('engineer_id'),
+            engineer_name=request.args.get('engineer_name'),
+            status=filters['status'],
+            priority=filters['priority'],
+            date_from=window['start'],
+            date_to=window['end']
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mimetype = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/vnd.apache.parquet'
+    return Response(stream_with_context(stream), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/api/report/tickets/search', methods=['GET'])
+def search_tickets():
+    """Ranked full-text search over ticket title/description.
+    Query params: q (required; supports "phrases", OR and -exclusion), customer_id,
+    engineer_id, status, priority, from, to, cursor, limit (default 50, max 500)
+    """
+    try:
+        params = parse_ticket_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(itsm_service.search_tickets(**params))
 
 @app.route('/api/report/tickets/<ticket_id>', methods=['GET'])
 def get_ticket_detail(ticket_id):
@@ -622,8 +742,22 @@ def remove_contact(customer_id, contact_id):
 
 @app.route('/api/alarms', methods=['GET'])
 def get_all_alarms():
-    alarms = AlarmNote.query.order_by(AlarmNote.updated_at.desc()).all()
-    return jsonify([a.to_dict() for a in alarms])
+    """Keyset-paginated alarm notes, most recently updated first.
+    Query params: status, severity (comma separated), from, to (ISO dates, on updated_at),
+    fields, cursor, limit (default 50, max 500). The cursor of the next page is
+    returned in the X-Next-Cursor header (the body stays a list).
+    """
+    try:
+        params = parse_alarm_list_args(request.args, LEGACY_ALARM_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    data, next_cursor = alarm_list.list_legacy_alarms(
+        **{k: params[k] for k in ('status', 'severity', 'date_from', 'date_to', 'cursor', 'limit', 'fields')}
+    )
+    response = jsonify(data)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/alarms/<int:alarm_id>', methods=['GET'])
 def get_alarm(alarm_id):
@@ -636,8 +770,7 @@ def get_alarm(alarm_id):
 def create_alarm():
     data = request.get_json()
     # Generate alarm_id
-    count = AlarmNote.query.count() + 1
-    alarm_id = f"ALM-{str(count).zfill(3)}"
+    alarm_id = id_allocator.next('legacy_alarm')
     
     alarm = AlarmNote(
         alarm_id=alarm_id,
@@ -696,9 +829,7 @@ def get_asset(asset_id):
 def create_asset():
     data = request.get_json()
     asset_type = data.get('type', 'VM')
-    prefix = 'VC' if asset_type == 'vCenter' else 'HOST' if asset_type == 'Host' else 'VM'
-    count = CMDBAsset.query.filter_by(asset_type=asset_type).count() + 1
-    asset_id = f"{prefix}-{str(count).zfill(3)}"
+    asset_id = id_allocator.asset_id(asset_type)  # VC-001 / HOST-001 / VM-001
     
     asset = CMDBAsset(
         asset_id=asset_id,
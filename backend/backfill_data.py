@@ -1,10 +1,20 @@
 from app import app
 from models.ticket import db, Ticket
+from models.data_version import DataVersion
+from services.dimensions import ticket_dimensions
 from sqlalchemy import func
+from datetime import datetime
 
 def backfill_classification():
     with app.app_context():
         print("Starting backfill for classification...")
+        synced_at = datetime.utcnow()  # lets incremental readers (analytics engine) pick up the changes
+
+        # request_type / category are dimension keys
+        request_types = ticket_dimensions.request_type
+        categories = ticket_dimensions.category
+        request_types.ensure(['Service Request', 'Incident', 'Change Request'])
+        categories.ensure(['Change'])
         
         # 1. Update Service Requests based on keywords
         sr_keywords = [
@@ -20,11 +30,12 @@ def backfill_classification():
             count = Ticket.query.filter(
                 db.or_(
                     func.lower(Ticket.title).like(f'%{k}%'),
-                    func.lower(Ticket.category).like(f'%{k}%')
+                    Ticket.category_id.in_(categories.matching(k))
                 ),
                 Ticket.is_service_request == False  # only if not already set
             ).update(
-                {Ticket.is_service_request: True, Ticket.request_type: 'Service Request'},
+                {Ticket.is_service_request: True, Ticket.request_type_id: request_types.key('Service Request'),
+                 Ticket.synced_at: synced_at},
                 synchronize_session=False
             )
             updated_sr += count
@@ -45,11 +56,11 @@ def backfill_classification():
             count = Ticket.query.filter(
                 db.or_(
                     func.lower(Ticket.title).like(f'%{k}%'),
-                    func.lower(Ticket.category).like(f'%{k}%')
+                    Ticket.category_id.in_(categories.matching(k))
                 ),
                 Ticket.is_service_request == False # only if not already SR
             ).update(
-                {Ticket.request_type: 'Incident'},
+                {Ticket.request_type_id: request_types.key('Incident'), Ticket.synced_at: synced_at},
                 synchronize_session=False
             )
             updated_inc += count
@@ -60,14 +71,16 @@ def backfill_classification():
         updated_changes = Ticket.query.filter(
             db.or_(
                 func.lower(Ticket.title).like('%change%'),
-                func.lower(Ticket.category).like('%change%')
+                Ticket.category_id.in_(categories.matching('change'))
             )
         ).update(
-            {Ticket.request_type: 'Change Request', Ticket.category: 'Change'},
+            {Ticket.request_type_id: request_types.key('Change Request'), Ticket.category_id: categories.key('Change'),
+             Ticket.synced_at: synced_at},
             synchronize_session=False
         )
         print(f"Updated {updated_changes} tickets as Changes.")
 
+        DataVersion.bump('tickets')
         db.session.commit()
         print("Backfill complete.")
 
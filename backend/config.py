@@ -7,7 +7,14 @@ load_dotenv()
 class Config:
     SLA_RESPONSE_MINUTES = 30
     SLA_RESOLVE_HOURS = 4
+    # Business-hours SLA (services/sla_engine.py): the SLA of a customer's active service
+    # (models.cmdb) wins; the targets above apply on this calendar otherwise
+    SLA_DEFAULT_SUPPORT_HOURS = os.environ.get('SLA_DEFAULT_SUPPORT_HOURS', '24x7')  # 24x7, 8x5, 12x6, ...
+    SLA_BUSINESS_DAY_START_HOUR = int(os.environ.get('SLA_BUSINESS_DAY_START_HOUR', 8))
+    SLA_HOLIDAYS = [d.strip() for d in os.environ.get('SLA_HOLIDAYS', '').split(',') if d.strip()]  # YYYY-MM-DD
+    # Engineer workload (services/workload_service.py): a 1d/7d/30d window above either rate is overload
     OVERLOAD_TICKETS_PER_DAY = 15
+    OVERLOAD_EFFORT_HOURS_PER_DAY = 8
     SECRET_KEY = os.environ.get('SECRET_KEY', 'itsm-secret-key-premium')
     
     # JWT Settings
@@ -32,6 +39,68 @@ class Config:
     # Sync settings
     SYNC_INTERVAL_SECONDS = 300 # 5 minutes
     USE_MOCK_DATA = False # Set to False to use real ManageEngine API
+
+    # tickets is range-partitioned by month; the sync keeps this many future months created
+    TICKET_PARTITION_MONTHS_AHEAD = 3
+
+    # In-memory columnar engine for dashboard aggregations (summary/customers/engineers).
+    # Requests can force the SQL path with ?engine=sql.
+    ANALYTICS_ENGINE_ENABLED = os.environ.get('ANALYTICS_ENGINE_ENABLED', 'false').lower() == 'true'
+    ANALYTICS_ENGINE_MAX_STALENESS_SECONDS = 30  # How often a worker checks for syncs made by other workers
+
+    # POST /api/batch (routes/batch_routes.py): report sections per request, and the
+    # process-wide thread pool they run on (each running section holds a DB connection).
+    # Each running batch also holds one connection: keep CONCURRENT + WORKERS below the pool.
+    BATCH_MAX_SECTIONS = 12
+    BATCH_MAX_WORKERS = 4
+    BATCH_MAX_CONCURRENT = 4
+    BATCH_QUEUE_TIMEOUT_SECONDS = 30  # wait for a batch slot before answering 503
+
+    # Alertmanager webhook queue (services/alert_queue.py): payloads are queued and
+    # ingested by ALERT_QUEUE_WORKERS background threads per process (0 = ingest inline).
+    # Above the high-water mark of queued payloads the webhook answers 503 + Retry-After.
+    ALERT_QUEUE_WORKERS = int(os.environ.get('ALERT_QUEUE_WORKERS', 2))
+    ALERT_QUEUE_HIGH_WATER_MARK = int(os.environ.get('ALERT_QUEUE_HIGH_WATER_MARK', 5000))
+    ALERT_QUEUE_BATCH_SIZE = 50  # payloads per worker transaction
+    ALERT_QUEUE_POLL_SECONDS = 1
+    ALERT_QUEUE_MAX_ATTEMPTS = 5  # a payload failing this often is kept as a dead letter
+
+    # Alarm correlation (services/correlation_engine.py): alarms of dependent CIs fired
+    # within the window are grouped under the alarm of the most upstream CI.
+    ALARM_CORRELATION_WINDOW_MINUTES = int(os.environ.get('ALARM_CORRELATION_WINDOW_MINUTES', 10))
+    ALARM_CORRELATION_MAX_DEPTH = 4  # CMDB relationship hops walked
+    ALARM_CORRELATION_GRAPH_MAX_STALENESS_SECONDS = 30  # How often a worker checks for relationship changes
+
+    # Alert instance/target -> CMDB CI index (services/ci_resolver.py): how often a worker
+    # picks up CIs created or updated by other workers
+    CI_RESOLVER_MAX_STALENESS_SECONDS = 60
+
+    # Flapping alarms (services/flap_detector.py): at ALARM_FLAP_THRESHOLD firing/resolved
+    # changes within the window an alarm is held open without history churn; it stabilizes
+    # at ALARM_FLAP_CLEAR_THRESHOLD changes or fewer (checked by idle queue workers, or by
+    # the next webhook when ingesting inline).
+    ALARM_FLAP_WINDOW_MINUTES = int(os.environ.get('ALARM_FLAP_WINDOW_MINUTES', 10))
+    ALARM_FLAP_THRESHOLD = int(os.environ.get('ALARM_FLAP_THRESHOLD', 6))
+    ALARM_FLAP_CLEAR_THRESHOLD = 1
+    ALARM_FLAP_PERSIST_SECONDS = 30  # How often in-memory flap states are written to alarm_flap_state
+
+    # Alarm rules (services/alarm_rule_engine.py) and the ALARM_ACTION_WORKERS threads per
+    # process executing their tickets/webhook notifications (services/alarm_actions.py)
+    ALARM_RULES_MAX_STALENESS_SECONDS = 30  # How often a worker checks for rule changes
+    ALARM_ACTION_WORKERS = int(os.environ.get('ALARM_ACTION_WORKERS', 1))
+    ALARM_ACTION_BATCH_SIZE = 100  # actions per worker transaction
+    ALARM_ACTION_POLL_SECONDS = 2
+    ALARM_ACTION_MAX_ATTEMPTS = 5  # an action failing this often is kept as a dead letter
+    ALARM_ACTION_TIMEOUT_SECONDS = 10  # per SDP / webhook call
+    ALARM_ACTION_RETRY_SECONDS = 30  # first retry delay, doubled per failed attempt
+    ALARM_ACTION_RETRY_MAX_SECONDS = 3600
+
+    # Re-sends of firing alerts (services/alarm_dedup.py): answered from an LRU of fingerprints,
+    # trusted for the TTL; their occurrence counts are written every ALARM_DEDUP_FLUSH_SECONDS
+    # (by idle queue workers, or by the next webhook when ingesting inline)
+    ALARM_DEDUP_CACHE_SIZE = int(os.environ.get('ALARM_DEDUP_CACHE_SIZE', 50000))
+    ALARM_DEDUP_TTL_SECONDS = int(os.environ.get('ALARM_DEDUP_TTL_SECONDS', 60))
+    ALARM_DEDUP_FLUSH_SECONDS = 5
     
     # ManageEngine ServiceDesk Plus
     SDP_API_KEY = os.environ.get('SDP_API_KEY')
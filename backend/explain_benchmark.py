@@ -0,0 +1,133 @@
+"""
+EXPLAIN regression benchmark for the report queries.
+
+Runs the ITSMService report methods against the configured database, captures
+every SELECT they issue and EXPLAINs it with sequential scans disabled. A
+filtered Seq Scan in that mode means no index can answer the predicate, which
+is reported as a failure (exit code 1). Unfiltered full-table aggregates are
+listed but allowed.
+
+Usage:
+    python explain_benchmark.py [--analyze] [--customer ID] [--engineer ID]
+"""
+import argparse
+import json
+import sys
+from sqlalchemy import event
+from app import app
+from models.ticket import db, Ticket, Engineer
+from services.itsm_service import ITSMService
+
+
+def capture_statements(fn):
+    """Run fn() and return the (statement, parameters) of every SELECT it executed."""
+    captured = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+    return captured
+
+
+def walk(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk(child)
+
+
+def explain(statement, parameters, analyze=False):
+    """EXPLAIN (FORMAT JSON) with enable_seqscan off; returns the top plan node."""
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute(f'EXPLAIN ({options}) {statement}', parameters)
+        plan = cursor.fetchone()[0]
+        raw.rollback()
+    finally:
+        raw.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def check_plan(plan):
+    """Returns (indexes used, filtered seq scans, unfiltered seq scans)."""
+    indexes, filtered, full = set(), [], []
+    for node in walk(plan['Plan']):
+        if node.get('Index Name'):
+            indexes.add(node['Index Name'])
+        if node['Node Type'] == 'Seq Scan':
+            (filtered if node.get('Filter') else full).append(node.get('Relation Name'))
+    return indexes, filtered, full
+
+
+def report_cases(customer_id, engineer_id, engineer_name):
+    service = ITSMService()
+    return [
+        ('summary (engineer)', lambda: service.get_summary(engineer_name, use_engine=False)),
+        ('customers 30d', lambda: service.get_customers(None, '30d', use_engine=False)),
+        ('customers 7d (engineer)', lambda: service.get_customers(engineer_name, '7d', use_engine=False)),
+        ('customers 365d', lambda: service.get_customers(None, '365d', use_engine=False)),
+        ('engineers', lambda: service.get_engineers(use_engine=False)),
+        ('customer detail', lambda: service.get_customer_detail(customer_id)),
+        ('customer performance 7d', lambda: service.get_customer_performance(customer_id, '7d')),
+        ('customer tickets', lambda: service.get_customer_tickets(customer_id)),
+        ('engineer detail', lambda: service.get_engineer_detail(engineer_id)),
+        ('engineer performance 30d', lambda: service.get_engineer_performance(engineer_id, '30d')),
+        ('engineer performance 90d', lambda: service.get_engineer_performance(engineer_id, '90d')),
+        ('engineer tickets', lambda: service.get_engineer_tickets(engineer_id)),
+    ]
+
+
+def run(customer_id=None, engineer_id=None, analyze=False):
+    with app.app_context():
+        sample = db.session.query(Ticket.customer_id, Ticket.engineer_id).filter(
+            Ticket.customer_id.isnot(None), Ticket.engineer_id.isnot(None)
+        ).order_by(Ticket.created_at.desc()).first()
+        if not sample:
+            print("No tickets to benchmark.")
+            return 0
+        customer_id = customer_id or sample.customer_id
+        engineer_id = engineer_id or sample.engineer_id
+        engineer_name = db.session.query(Engineer.name).filter(Engineer.id == engineer_id).scalar() or engineer_id
+        db.session.rollback()
+
+        failures = 0
+        for name, fn in report_cases(customer_id, engineer_id, engineer_name):
+            statements = capture_statements(fn)
+            db.session.rollback()
+            print(f"\n== {name}: {len(statements)} queries")
+            for statement, parameters in statements:
+                plan = explain(statement, parameters, analyze)
+                indexes, filtered, full = check_plan(plan)
+                cost = plan['Plan']['Total Cost']
+                timing = f" {plan['Execution Time']:.2f}ms" if analyze else ''
+                status = 'FAIL' if filtered else 'ok'
+                summary = ', '.join(sorted(indexes)) or '-'
+                if full:
+                    summary += f" | full scan: {', '.join(full)}"
+                print(f"  [{status}] cost={cost:.0f}{timing} indexes={summary}")
+                if filtered:
+                    failures += 1
+                    print(f"         seq scan with filter on {', '.join(filtered)}: "
+                          f"{' '.join(statement.split())[:200]}")
+
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} without a usable index.")
+        return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that report queries are answered by indexes")
+    parser.add_argument('--analyze', action='store_true', help="EXPLAIN ANALYZE (executes the queries)")
+    parser.add_argument('--customer', help="customer_id to benchmark with (default: most recent ticket's)")
+    parser.add_argument('--engineer', help="engineer_id to benchmark with (default: most recent ticket's)")
+    args = parser.parse_args()
+    sys.exit(run(args.customer, args.engineer, args.analyze))
@@ -0,0 +1,41 @@
+import argparse
+from datetime import datetime
+from app import app
+from services.report_service import monthly_report_service
+
+
+def previous_month():
+    today = datetime.now()
+    if today.month == 1:
+        return today.year - 1, 12
+    return today.year, today.month - 1
+
+
+def month_number(value):
+    """argparse type for --month: same 1..12 check as the report API."""
+    month = int(value)
+    if not (1 <= month <= 12):
+        raise argparse.ArgumentTypeError("Month must be between 1 and 12")
+    return month
+
+
+def generate(year, month):
+    with app.app_context():
+        print(f"Generating monthly reports for {year:04d}-{month:02d}...")
+        job = monthly_report_service.create_job(year, month, created_by='cli')
+
+        def progress(processed, total):
+            print(f"  {processed}/{total} customers")
+
+        job = monthly_report_service.run_job(job.id, progress_callback=progress)
+        print(f"Job {job.id} {job.status}: {job.processed}/{job.total} customers" +
+              (f" ({job.error})" if job.error else ""))
+
+
+if __name__ == "__main__":
+    default_year, default_month = previous_month()
+    parser = argparse.ArgumentParser(description="Snapshot month-end reports and forecasts for every customer")
+    parser.add_argument('--year', type=int, default=default_year)
+    parser.add_argument('--month', type=month_number, default=default_month)
+    args = parser.parse_args()
+    generate(args.year, args.month)
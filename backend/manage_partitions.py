@@ -0,0 +1,39 @@
+import argparse
+from datetime import date
+from app import app
+from models.ticket import db
+from services.partition_service import ensure_partitions, detach_partitions, list_partitions
+
+
+def run(args):
+    with app.app_context():
+        connection = db.session.connection()
+        if args.command == 'list':
+            for name, bound in list_partitions(connection):
+                print(f"{name}: {bound}")
+            return
+
+        if args.command == 'ensure':
+            created = ensure_partitions(connection, months_ahead=args.months_ahead, start=args.start)
+            print(f"Created {len(created)} partitions{': ' + ', '.join(created) if created else ''}")
+        elif args.command == 'detach':
+            detached = detach_partitions(connection, args.before, archive_schema=args.archive_schema, drop=args.drop)
+            print(f"Detached {len(detached)} partitions{': ' + ', '.join(detached) if detached else ''}")
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of the tickets table")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="show attached partitions")
+
+    ensure = sub.add_parser('ensure', help="create missing monthly partitions")
+    ensure.add_argument('--months-ahead', type=int, default=app.config.get('TICKET_PARTITION_MONTHS_AHEAD', 3))
+    ensure.add_argument('--start', type=date.fromisoformat, help="first month to create (YYYY-MM-DD), default: current month")
+
+    detach = sub.add_parser('detach', help="detach partitions that end before a date")
+    detach.add_argument('--before', type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    detach.add_argument('--archive-schema', help="move detached tables into this schema")
+    detach.add_argument('--drop', action='store_true', help="drop detached tables instead of keeping them")
+
+    run(parser.parse_args())
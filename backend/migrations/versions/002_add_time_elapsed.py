@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '002_add_time_elapsed'
-down_revision = '001_increase_ticket_id_size'
+down_revision = '001_ticket_id'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,34 @@
+"""Add (customer|engineer, created_at, id) indexes for keyset pagination of ticket lists
+
+Revision ID: 003_ticket_keyset_indexes
+Revises: 002_add_time_elapsed
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '003_ticket_keyset_indexes'
+down_revision = '002_add_time_elapsed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_customer_created_id', 'tickets',
+                        ['customer_id', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tickets_engineer_created_id', 'tickets',
+                        ['engineer_id', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tickets_engineer_created_id', table_name='tickets',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tickets_customer_created_id', table_name='tickets',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""Add tickets.synced_at for incremental refresh of the analytics engine
+
+Revision ID: 004_ticket_synced_at
+Revises: 003_ticket_keyset_indexes
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_ticket_synced_at'
+down_revision = '003_ticket_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('tickets', sa.Column('synced_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_synced_at', 'tickets', ['synced_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tickets_synced_at', table_name='tickets',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('tickets', 'synced_at')
@@ -0,0 +1,50 @@
+"""Add ticket_daily_rollup with resolve/response percentile digests
+
+Revision ID: 005_ticket_daily_rollup
+Revises: 004_ticket_synced_at
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_ticket_daily_rollup'
+down_revision = '004_ticket_synced_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ticket_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('customer_id', sa.String(length=50), nullable=False),
+        sa.Column('engineer_id', sa.String(length=50), nullable=False),
+        sa.Column('priority', sa.String(length=100), nullable=False),
+        sa.Column('customer_name', sa.String(length=255), nullable=True),
+        sa.Column('engineer_name', sa.String(length=255), nullable=True),
+        sa.Column('ticket_count', sa.Integer(), nullable=False),
+        sa.Column('breached_count', sa.Integer(), nullable=False),
+        sa.Column('resolve_hours_sum', sa.Float(), nullable=False),
+        sa.Column('resolve_count', sa.Integer(), nullable=False),
+        sa.Column('response_minutes_sum', sa.Float(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False),
+        sa.Column('resolve_digest', sa.LargeBinary(), nullable=True),
+        sa.Column('response_digest', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('day', 'customer_id', 'engineer_id', 'priority'),
+        if_not_exists=True
+    )
+    op.create_index('ix_ticket_daily_rollup_customer_day', 'ticket_daily_rollup',
+                    ['customer_id', 'day'], if_not_exists=True)
+    op.create_index('ix_ticket_daily_rollup_engineer_day', 'ticket_daily_rollup',
+                    ['engineer_id', 'day'], if_not_exists=True)
+    # Populate with: python rebuild_rollups.py
+
+
+def downgrade():
+    op.drop_index('ix_ticket_daily_rollup_engineer_day', table_name='ticket_daily_rollup', if_exists=True)
+    op.drop_index('ix_ticket_daily_rollup_customer_day', table_name='ticket_daily_rollup', if_exists=True)
+    op.drop_table('ticket_daily_rollup', if_exists=True)
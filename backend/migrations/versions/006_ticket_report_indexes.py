@@ -0,0 +1,60 @@
+"""Add composite, covering and partial ticket indexes matched to the report queries
+
+Revision ID: 006_ticket_report_indexes
+Revises: 005_ticket_daily_rollup
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '006_ticket_report_indexes'
+down_revision = '005_ticket_daily_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_engineer_name_created', 'tickets',
+                        ['engineer_name', 'created_at'],
+                        postgresql_include=['status', 'is_overdue', 'priority', 'category',
+                                            'resolve_time_hours', 'customer_id', 'customer_name'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tickets_created_at_cov', 'tickets', ['created_at'],
+                        postgresql_include=['customer_id', 'customer_name', 'status',
+                                            'is_overdue', 'resolve_time_hours'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tickets_open_engineer_created', 'tickets',
+                        ['engineer_id', 'created_at'],
+                        postgresql_where="status IN ('Open', 'In Progress')",
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tickets_overdue_customer_created', 'tickets',
+                        ['customer_id', 'created_at'],
+                        postgresql_where='is_overdue',
+                        postgresql_concurrently=True, if_not_exists=True)
+        # Customer detail looks up contacts by the ticket's customer_name
+        op.create_index('ix_customer_contacts_name', 'customer_contacts', ['name'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+        # Superseded by the (customer|engineer, created_at, id) indexes from 003;
+        # fewer indexes to maintain on every sync upsert
+        op.drop_index('ix_tickets_customer_id', table_name='tickets',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tickets_engineer_id', table_name='tickets',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_engineer_id', 'tickets', ['engineer_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tickets_customer_id', 'tickets', ['customer_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_customer_contacts_name', table_name='customer_contacts',
+                      postgresql_concurrently=True, if_exists=True)
+        for name in ('ix_tickets_overdue_customer_created', 'ix_tickets_open_engineer_created',
+                     'ix_tickets_created_at_cov', 'ix_tickets_engineer_name_created'):
+            op.drop_index(name, table_name='tickets', postgresql_concurrently=True, if_exists=True)
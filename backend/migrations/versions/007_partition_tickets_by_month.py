@@ -0,0 +1,111 @@
+"""Range-partition tickets by month on created_at
+
+Revision ID: 007_partition_tickets
+Revises: 006_ticket_report_indexes
+Create Date: 2026-10-19 14:00:00.000000
+
+Rebuilds `tickets` as a partitioned table (PRIMARY KEY (id, created_at)) with
+one partition per month from the oldest ticket to three months ahead, plus a
+default partition, and moves the existing rows. Runs in one transaction: the
+table is locked while rows are copied, schedule it outside sync windows.
+
+The worklogs.ticket_id foreign key is dropped: a partitioned table can only be
+referenced through a unique key that contains the partition key.
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_partition_tickets'
+down_revision = '006_ticket_report_indexes'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+INDEXES = [
+    "CREATE INDEX ix_tickets_customer_created_id ON tickets (customer_id, created_at, id)",
+    "CREATE INDEX ix_tickets_engineer_created_id ON tickets (engineer_id, created_at, id)",
+    "CREATE INDEX ix_tickets_engineer_name_created ON tickets (engineer_name, created_at) "
+    "INCLUDE (status, is_overdue, priority, category, resolve_time_hours, customer_id, customer_name)",
+    "CREATE INDEX ix_tickets_created_at_cov ON tickets (created_at) "
+    "INCLUDE (customer_id, customer_name, status, is_overdue, resolve_time_hours)",
+    "CREATE INDEX ix_tickets_open_engineer_created ON tickets (engineer_id, created_at) "
+    "WHERE status IN ('Open', 'In Progress')",
+    "CREATE INDEX ix_tickets_overdue_customer_created ON tickets (customer_id, created_at) WHERE is_overdue",
+    "CREATE INDEX ix_tickets_status ON tickets (status)",
+    "CREATE INDEX ix_tickets_priority ON tickets (priority)",
+    "CREATE INDEX ix_tickets_category ON tickets (category)",
+    "CREATE INDEX ix_tickets_request_type ON tickets (request_type)",
+    "CREATE INDEX ix_tickets_synced_at ON tickets (synced_at)",
+]
+
+
+def _drop_indexes(conn, table):
+    names = conn.execute(sa.text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :t"
+    ), {'t': table}).scalars().all()
+    for name in names:
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+def _months(first, last):
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    op.execute('ALTER TABLE worklogs DROP CONSTRAINT IF EXISTS worklogs_ticket_id_fkey')
+    op.execute('ALTER TABLE tickets RENAME TO tickets_legacy')
+    op.execute('ALTER TABLE tickets_legacy DROP CONSTRAINT IF EXISTS tickets_pkey')
+    _drop_indexes(conn, 'tickets_legacy')
+    op.execute('UPDATE tickets_legacy SET created_at = COALESCE(synced_at, now()) WHERE created_at IS NULL')
+
+    op.execute('CREATE TABLE tickets (LIKE tickets_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    op.execute('ALTER TABLE tickets ADD CONSTRAINT tickets_pkey PRIMARY KEY (id, created_at)')
+    op.execute('CREATE TABLE tickets_default PARTITION OF tickets DEFAULT')
+
+    today = date.today()
+    oldest = conn.execute(sa.text('SELECT min(created_at) FROM tickets_legacy')).scalar() or today
+    last_year, last_month = divmod(today.year * 12 + today.month - 1 + MONTHS_AHEAD, 12)
+    for year, month in _months(oldest, date(last_year, last_month + 1, 1)):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        op.execute(
+            f"CREATE TABLE tickets_p{year:04d}{month:02d} PARTITION OF tickets "
+            f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{next_year:04d}-{next_month:02d}-01')"
+        )
+
+    for statement in INDEXES:
+        op.execute(statement)
+
+    op.execute('INSERT INTO tickets SELECT * FROM tickets_legacy')
+    op.execute('DROP TABLE tickets_legacy')
+    op.execute('ANALYZE tickets')
+
+
+def downgrade():
+    conn = op.get_bind()
+
+    op.execute('ALTER TABLE tickets RENAME TO tickets_partitioned')
+    op.execute('ALTER TABLE tickets_partitioned DROP CONSTRAINT IF EXISTS tickets_pkey')
+    _drop_indexes(conn, 'tickets_partitioned')
+
+    op.execute('CREATE TABLE tickets (LIKE tickets_partitioned INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO tickets SELECT * FROM tickets_partitioned')
+    op.execute('DROP TABLE tickets_partitioned CASCADE')
+    op.execute('ALTER TABLE tickets ADD CONSTRAINT tickets_pkey PRIMARY KEY (id)')
+    op.execute('ALTER TABLE tickets ALTER COLUMN created_at DROP NOT NULL')
+
+    for statement in INDEXES:
+        op.execute(statement)
+
+    op.execute(
+        'ALTER TABLE worklogs ADD CONSTRAINT worklogs_ticket_id_fkey '
+        'FOREIGN KEY (ticket_id) REFERENCES tickets (id) NOT VALID'
+    )
@@ -0,0 +1,31 @@
+"""Full-text search over ticket title/description: unaccent, generated tsvector, GIN index
+
+Revision ID: 008_ticket_search_vector
+Revises: 007_partition_tickets
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+# Shared with Ticket.search_vector and the create_all() path of models/ticket.py
+from models.ticket import UNACCENT_FUNCTION_DDL, SEARCH_VECTOR_SQL
+
+
+# revision identifiers, used by Alembic.
+revision = '008_ticket_search_vector'
+down_revision = '007_partition_tickets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(UNACCENT_FUNCTION_DDL)
+    # Rewrites every partition once to compute the stored column
+    op.execute(f'ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector '
+               f'GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_tickets_search_vector ON tickets USING gin (search_vector)')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_tickets_search_vector')
+    op.execute('ALTER TABLE tickets DROP COLUMN IF EXISTS search_vector')
+    op.execute('DROP FUNCTION IF EXISTS immutable_unaccent(text)')
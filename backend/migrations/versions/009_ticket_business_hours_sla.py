@@ -0,0 +1,94 @@
+"""Business-hours SLA columns on tickets and the SLA catalogue tables
+
+Revision ID: 009_ticket_sla
+Revises: 008_ticket_search_vector
+Create Date: 2026-10-19 16:00:00.000000
+
+Adds the SLA fields computed by services/sla_engine.py to tickets and creates
+sla / service / customer_service (models/cmdb.py) that hold per-customer targets.
+Backfill with: python recompute_sla.py
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_ticket_sla'
+down_revision = '008_ticket_search_vector'
+branch_labels = None
+depends_on = None
+
+TICKET_COLUMNS = [
+    ('sla_id', sa.String(length=50)),
+    ('sla_response_business_minutes', sa.Integer()),
+    ('sla_resolve_business_hours', sa.Float()),
+    ('sla_response_breached', sa.Boolean()),
+    ('sla_resolve_breached', sa.Boolean()),
+]
+
+
+def upgrade():
+    op.create_table(
+        'sla',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('response_critical', sa.Integer(), nullable=True),
+        sa.Column('response_high', sa.Integer(), nullable=True),
+        sa.Column('response_medium', sa.Integer(), nullable=True),
+        sa.Column('response_low', sa.Integer(), nullable=True),
+        sa.Column('resolution_critical', sa.Integer(), nullable=True),
+        sa.Column('resolution_high', sa.Integer(), nullable=True),
+        sa.Column('resolution_medium', sa.Integer(), nullable=True),
+        sa.Column('resolution_low', sa.Integer(), nullable=True),
+        sa.Column('uptime_target', sa.Float(), nullable=True),
+        sa.Column('support_hours', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'service',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('type', sa.String(length=50), nullable=True),
+        sa.Column('sla_id', sa.String(length=50), sa.ForeignKey('sla.id'), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('pricing_model', sa.String(length=50), nullable=True),
+        sa.Column('base_price', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'customer_service',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.String(length=50), nullable=False),
+        sa.Column('service_id', sa.String(length=50), sa.ForeignKey('service.id'), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('custom_sla_id', sa.String(length=50), sa.ForeignKey('sla.id'), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_customer_service_customer_id', 'customer_service', ['customer_id'], if_not_exists=True)
+
+    # Added to the partitioned parent, so every partition gets them
+    for name, type_ in TICKET_COLUMNS:
+        op.add_column('tickets', sa.Column(name, type_, nullable=True), if_not_exists=True)
+
+
+def downgrade():
+    for name, _ in reversed(TICKET_COLUMNS):
+        op.drop_column('tickets', name, if_exists=True)
+    op.drop_index('ix_customer_service_customer_id', table_name='customer_service', if_exists=True)
+    op.drop_table('customer_service', if_exists=True)
+    op.drop_table('service', if_exists=True)
+    op.drop_table('sla', if_exists=True)
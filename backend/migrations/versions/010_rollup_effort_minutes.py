@@ -0,0 +1,27 @@
+"""Add ticket_daily_rollup.effort_minutes_sum for engineer workload
+
+Revision ID: 010_rollup_effort_minutes
+Revises: 009_ticket_sla
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_rollup_effort_minutes'
+down_revision = '009_ticket_sla'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ticket_daily_rollup',
+                  sa.Column('effort_minutes_sum', sa.Integer(), nullable=False, server_default='0'),
+                  if_not_exists=True)
+    # Existing rows read as 0 effort until rebuilt: python rebuild_rollups.py
+
+
+def downgrade():
+    op.drop_column('ticket_daily_rollup', 'effort_minutes_sum', if_exists=True)
@@ -0,0 +1,63 @@
+"""Status counts on the daily rollups and ticket_monthly_rollup for long ranges
+
+Revision ID: 011_ticket_monthly_rollup
+Revises: 010_rollup_effort_minutes
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_ticket_monthly_rollup'
+down_revision = '010_rollup_effort_minutes'
+branch_labels = None
+depends_on = None
+
+STATUS_COUNTS = ('open_count', 'in_progress_count', 'resolved_count')
+
+
+def upgrade():
+    for name in STATUS_COUNTS:
+        op.add_column('ticket_daily_rollup',
+                      sa.Column(name, sa.Integer(), nullable=False, server_default='0'),
+                      if_not_exists=True)
+
+    op.create_table(
+        'ticket_monthly_rollup',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('customer_id', sa.String(length=50), nullable=False),
+        sa.Column('engineer_id', sa.String(length=50), nullable=False),
+        sa.Column('priority', sa.String(length=100), nullable=False),
+        sa.Column('customer_name', sa.String(length=255), nullable=True),
+        sa.Column('engineer_name', sa.String(length=255), nullable=True),
+        sa.Column('ticket_count', sa.Integer(), nullable=False),
+        sa.Column('breached_count', sa.Integer(), nullable=False),
+        sa.Column('open_count', sa.Integer(), nullable=False),
+        sa.Column('in_progress_count', sa.Integer(), nullable=False),
+        sa.Column('resolved_count', sa.Integer(), nullable=False),
+        sa.Column('resolve_hours_sum', sa.Float(), nullable=False),
+        sa.Column('resolve_count', sa.Integer(), nullable=False),
+        sa.Column('response_minutes_sum', sa.Float(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False),
+        sa.Column('effort_minutes_sum', sa.Integer(), nullable=False),
+        sa.Column('resolve_digest', sa.LargeBinary(), nullable=True),
+        sa.Column('response_digest', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('month', 'customer_id', 'engineer_id', 'priority'),
+        if_not_exists=True
+    )
+    op.create_index('ix_ticket_monthly_rollup_customer_month', 'ticket_monthly_rollup',
+                    ['customer_id', 'month'], if_not_exists=True)
+    op.create_index('ix_ticket_monthly_rollup_engineer_month', 'ticket_monthly_rollup',
+                    ['engineer_id', 'month'], if_not_exists=True)
+    # Populate (and fill the new status counts) with: python rebuild_rollups.py
+
+
+def downgrade():
+    op.drop_index('ix_ticket_monthly_rollup_engineer_month', table_name='ticket_monthly_rollup', if_exists=True)
+    op.drop_index('ix_ticket_monthly_rollup_customer_month', table_name='ticket_monthly_rollup', if_exists=True)
+    op.drop_table('ticket_monthly_rollup', if_exists=True)
+    for name in reversed(STATUS_COUNTS):
+        op.drop_column('ticket_daily_rollup', name, if_exists=True)
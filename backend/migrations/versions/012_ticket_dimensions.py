@@ -0,0 +1,140 @@
+"""Normalize ticket names into dimension tables with SMALLINT keys
+
+Revision ID: 012_ticket_dimensions
+Revises: 011_ticket_monthly_rollup
+Create Date: 2026-10-19 19:00:00.000000
+
+status, priority, category and request_type move to the lookup tables
+ticket_statuses / ticket_priorities / ticket_categories / ticket_request_types
+and tickets keep SMALLINT keys; customer_name / engineer_name are read from
+customers / engineers (filled here from the newest ticket of each id). The
+covering and partial indexes are rebuilt on the keys.
+
+Dropped columns keep using space in the existing rows until they are rewritten:
+run `VACUUM FULL ANALYZE tickets` in a maintenance window to reclaim it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_ticket_dimensions'
+down_revision = '011_ticket_monthly_rollup'
+branch_labels = None
+depends_on = None
+
+# (ticket column, lookup table, key column)
+DIMENSIONS = [
+    ('status', 'ticket_statuses', 'status_id'),
+    ('priority', 'ticket_priorities', 'priority_id'),
+    ('category', 'ticket_categories', 'category_id'),
+    ('request_type', 'ticket_request_types', 'request_type_id'),
+]
+# Same fixed keys as models.ticket.STATUS_KEYS
+STATUS_KEYS = {'Open': 1, 'In Progress': 2, 'Resolved': 3, 'Closed': 4}
+
+NAME_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_tickets_engineer_name_created ON tickets (engineer_name, created_at) "
+    "INCLUDE (status, is_overdue, priority, category, resolve_time_hours, customer_id, customer_name)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_created_at_cov ON tickets (created_at) "
+    "INCLUDE (customer_id, customer_name, status, is_overdue, resolve_time_hours)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_open_engineer_created ON tickets (engineer_id, created_at) "
+    "WHERE status IN ('Open', 'In Progress')",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_status ON tickets (status)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_priority ON tickets (priority)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_category ON tickets (category)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_request_type ON tickets (request_type)",
+]
+KEY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_tickets_engineer_created_cov ON tickets (engineer_id, created_at) "
+    "INCLUDE (status_id, is_overdue, priority_id, category_id, resolve_time_hours, customer_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_created_at_cov ON tickets (created_at) "
+    "INCLUDE (customer_id, status_id, is_overdue, resolve_time_hours)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_open_engineer_created ON tickets (engineer_id, created_at) "
+    f"WHERE status_id IN ({STATUS_KEYS['Open']}, {STATUS_KEYS['In Progress']})",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_status_id ON tickets (status_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_priority_id ON tickets (priority_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_category_id ON tickets (category_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_request_type_id ON tickets (request_type_id)",
+]
+
+
+def _index_name(statement):
+    return statement.split(' ON ')[0].split()[-1]
+
+
+def upgrade():
+    for _, table, _ in DIMENSIONS:
+        op.create_table(
+            table,
+            sa.Column('id', sa.SmallInteger(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+            if_not_exists=True
+        )
+    for name, key in STATUS_KEYS.items():
+        op.execute(f"INSERT INTO ticket_statuses (id, name) VALUES ({key}, '{name}') ON CONFLICT DO NOTHING")
+    op.execute("SELECT setval(pg_get_serial_sequence('ticket_statuses', 'id'), "
+               f"(SELECT greatest(max(id), {max(STATUS_KEYS.values())}) FROM ticket_statuses))")
+
+    for column, table, key in DIMENSIONS:
+        op.execute(f"INSERT INTO {table} (name) SELECT DISTINCT {column} FROM tickets "
+                   f"WHERE {column} IS NOT NULL ORDER BY 1 ON CONFLICT (name) DO NOTHING")
+        op.add_column('tickets', sa.Column(key, sa.SmallInteger(), nullable=True), if_not_exists=True)
+
+    # Names of the customers/engineers that only ever appeared on tickets (newest ticket wins)
+    op.execute("""
+        INSERT INTO customers (id, name)
+        SELECT DISTINCT ON (customer_id) customer_id, customer_name FROM tickets
+        WHERE customer_id IS NOT NULL AND customer_name IS NOT NULL
+        ORDER BY customer_id, created_at DESC
+        ON CONFLICT (id) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO engineers (id, name, "group")
+        SELECT DISTINCT ON (engineer_id) engineer_id, engineer_name, 'Support' FROM tickets
+        WHERE engineer_id IS NOT NULL AND engineer_id <> 'Unassigned' AND engineer_name IS NOT NULL
+        ORDER BY engineer_id, created_at DESC
+        ON CONFLICT (id) DO NOTHING
+    """)
+
+    op.execute("UPDATE tickets SET " + ", ".join(
+        f"{key} = (SELECT d.id FROM {table} d WHERE d.name = tickets.{column})"
+        for column, table, key in DIMENSIONS
+    ))
+
+    for statement in NAME_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {_index_name(statement)}')
+    for column in ('customer_name', 'engineer_name') + tuple(column for column, _, _ in DIMENSIONS):
+        op.drop_column('tickets', column, if_exists=True)
+
+    for _, table, key in DIMENSIONS:
+        op.create_foreign_key(f'tickets_{key}_fkey', 'tickets', table, [key], ['id'])
+    for statement in KEY_INDEXES:
+        op.execute(statement)
+    op.execute('ANALYZE tickets')
+
+
+def downgrade():
+    for statement in KEY_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {_index_name(statement)}')
+    for _, _, key in DIMENSIONS:
+        op.execute(f'ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_{key}_fkey')
+
+    op.add_column('tickets', sa.Column('customer_name', sa.String(length=255), nullable=True), if_not_exists=True)
+    op.add_column('tickets', sa.Column('engineer_name', sa.String(length=255), nullable=True), if_not_exists=True)
+    for column, _, _ in DIMENSIONS:
+        op.add_column('tickets', sa.Column(column, sa.String(length=100), nullable=True), if_not_exists=True)
+
+    op.execute("UPDATE tickets SET "
+               "customer_name = (SELECT c.name FROM customers c WHERE c.id = tickets.customer_id), "
+               "engineer_name = coalesce((SELECT e.name FROM engineers e WHERE e.id = tickets.engineer_id), engineer_id), " +
+               ", ".join(f"{column} = (SELECT d.name FROM {table} d WHERE d.id = tickets.{key})"
+                         for column, table, key in DIMENSIONS))
+
+    for _, table, key in DIMENSIONS:
+        op.drop_column('tickets', key, if_exists=True)
+        op.drop_table(table, if_exists=True)
+    for statement in NAME_INDEXES:
+        op.execute(statement)
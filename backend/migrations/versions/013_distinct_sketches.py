@@ -0,0 +1,51 @@
+"""HyperLogLog sketches for distinct customers per engineer and tickets per technician
+
+Revision ID: 013_distinct_sketches
+Revises: 012_ticket_dimensions
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_distinct_sketches'
+down_revision = '012_ticket_dimensions'
+branch_labels = None
+depends_on = None
+
+ENGINEER_SKETCHES = [('engineer_daily_sketch', 'day'), ('engineer_monthly_sketch', 'month')]
+
+
+def upgrade():
+    for table, bucket in ENGINEER_SKETCHES:
+        op.create_table(
+            table,
+            sa.Column(bucket, sa.Date(), nullable=False),
+            sa.Column('engineer_id', sa.String(length=50), nullable=False),
+            sa.Column('customer_hll', sa.LargeBinary(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint(bucket, 'engineer_id'),
+            if_not_exists=True
+        )
+
+    op.create_table(
+        'tech_time_spent_rollup',
+        sa.Column('technician', sa.String(length=255), nullable=False),
+        sa.Column('group_name', sa.String(length=100), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('minutes_sum', sa.BigInteger(), nullable=False),
+        sa.Column('request_hll', sa.LargeBinary(), nullable=False),
+        sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('technician', 'group_name', 'category'),
+        if_not_exists=True
+    )
+    # Populate with: python rebuild_rollups.py
+
+
+def downgrade():
+    op.drop_table('tech_time_spent_rollup', if_exists=True)
+    for table, _ in reversed(ENGINEER_SKETCHES):
+        op.drop_table(table, if_exists=True)
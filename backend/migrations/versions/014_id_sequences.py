@@ -0,0 +1,40 @@
+"""Sequences for alarm and asset ids
+
+Revision ID: 014_id_sequences
+Revises: 013_distinct_sketches
+Create Date: 2026-10-19 21:00:00.000000
+
+One sequence per id prefix (services/id_allocator.py), started past the
+highest number already used so existing ids are never handed out again.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '014_id_sequences'
+down_revision = '013_distinct_sketches'
+branch_labels = None
+depends_on = None
+
+# (sequence, table, id column, id prefix)
+SEQUENCES = [
+    ('alarm_note_v2_alarm_id_seq', 'alarm_note_v2', 'alarm_id', 'ALM'),
+    ('alarm_notes_alarm_id_seq', 'alarm_notes', 'alarm_id', 'ALM'),
+    ('cmdb_assets_vc_id_seq', 'cmdb_assets', 'asset_id', 'VC'),
+    ('cmdb_assets_host_id_seq', 'cmdb_assets', 'asset_id', 'HOST'),
+    ('cmdb_assets_vm_id_seq', 'cmdb_assets', 'asset_id', 'VM'),
+]
+
+
+def upgrade():
+    for sequence, table, column, prefix in SEQUENCES:
+        op.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+        op.execute(f"""
+            SELECT setval('{sequence}', coalesce(max(substring({column} FROM '[0-9]+$')::bigint), 0) + 1, false)
+            FROM {table} WHERE {column} ~ '^{prefix}-[0-9]+$'
+        """)
+
+
+def downgrade():
+    for sequence, _, _, _ in SEQUENCES:
+        op.execute(f"DROP SEQUENCE IF EXISTS {sequence}")
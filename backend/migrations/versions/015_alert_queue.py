@@ -0,0 +1,34 @@
+"""alert_queue for asynchronous Alertmanager webhook ingestion
+
+Revision ID: 015_alert_queue
+Revises: 014_id_sequences
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_alert_queue'
+down_revision = '014_id_sequences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'alert_queue',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('alert_count', sa.Integer(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('alert_queue', if_exists=True)
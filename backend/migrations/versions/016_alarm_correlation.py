@@ -0,0 +1,26 @@
+"""parent_alarm_id on alarm_note_v2 for topology-aware alarm correlation
+
+Revision ID: 016_alarm_correlation
+Revises: 015_alert_queue
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_alarm_correlation'
+down_revision = '015_alert_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('alarm_note_v2', sa.Column('parent_alarm_id', sa.String(50), nullable=True), if_not_exists=True)
+    op.create_index('ix_alarm_note_v2_parent_alarm_id', 'alarm_note_v2', ['parent_alarm_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_alarm_note_v2_parent_alarm_id', table_name='alarm_note_v2', if_exists=True)
+    op.drop_column('alarm_note_v2', 'parent_alarm_id')
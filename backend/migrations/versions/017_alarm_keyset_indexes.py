@@ -0,0 +1,49 @@
+"""(filter, created_at, id) indexes for keyset pagination of alarm lists
+
+Revision ID: 017_alarm_keyset_indexes
+Revises: 016_alarm_correlation
+Create Date: 2026-10-20 09:00:00.000000
+
+The single-column status / customer_id indexes of alarm_note_v2 are replaced
+by the composite ones, whose leading column serves the same lookups.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '017_alarm_keyset_indexes'
+down_revision = '016_alarm_correlation'
+branch_labels = None
+depends_on = None
+
+# (index, table, columns)
+INDEXES = [
+    ('ix_alarm_note_v2_created_id', 'alarm_note_v2', ['created_at', 'id']),
+    ('ix_alarm_note_v2_status_created_id', 'alarm_note_v2', ['status', 'created_at', 'id']),
+    ('ix_alarm_note_v2_severity_created_id', 'alarm_note_v2', ['severity', 'created_at', 'id']),
+    ('ix_alarm_note_v2_customer_created_id', 'alarm_note_v2', ['customer_id', 'created_at', 'id']),
+    ('ix_alarm_notes_updated_id', 'alarm_notes', ['updated_at', 'id']),
+    ('ix_alarm_notes_status_updated_id', 'alarm_notes', ['status', 'updated_at', 'id']),
+]
+
+REPLACED = [
+    ('ix_alarm_note_v2_status', 'alarm_note_v2', ['status']),
+    ('ix_alarm_note_v2_customer_id', 'alarm_note_v2', ['customer_id']),
+]
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
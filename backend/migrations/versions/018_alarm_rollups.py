@@ -0,0 +1,62 @@
+"""alarm_hourly_rollup / alarm_daily_rollup for alarm MTTA / MTTR statistics
+
+Revision ID: 018_alarm_rollups
+Revises: 017_alarm_keyset_indexes
+Create Date: 2026-10-20 10:00:00.000000
+
+Run rebuild_rollups.py after upgrading to fill them from the existing alarms.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '018_alarm_rollups'
+down_revision = '017_alarm_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def metric_columns():
+    return [
+        sa.Column('customer_id', sa.String(length=50), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('customer_name', sa.String(length=255), nullable=True),
+        sa.Column('alarm_count', sa.Integer(), nullable=False),
+        sa.Column('acknowledged_count', sa.Integer(), nullable=False),
+        sa.Column('ack_seconds_sum', sa.Float(), nullable=False),
+        sa.Column('resolved_count', sa.Integer(), nullable=False),
+        sa.Column('resolve_seconds_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'alarm_hourly_rollup',
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('ci_id', sa.String(length=50), nullable=False),
+        *metric_columns(),
+        sa.PrimaryKeyConstraint('hour', 'customer_id', 'ci_id', 'severity', 'source', 'status'),
+        if_not_exists=True
+    )
+    op.create_index('ix_alarm_hourly_rollup_customer_hour', 'alarm_hourly_rollup', ['customer_id', 'hour'],
+                    if_not_exists=True)
+    op.create_index('ix_alarm_hourly_rollup_ci_hour', 'alarm_hourly_rollup', ['ci_id', 'hour'], if_not_exists=True)
+
+    op.create_table(
+        'alarm_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        *metric_columns(),
+        sa.PrimaryKeyConstraint('day', 'customer_id', 'severity', 'source', 'status'),
+        if_not_exists=True
+    )
+    op.create_index('ix_alarm_daily_rollup_customer_day', 'alarm_daily_rollup', ['customer_id', 'day'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table('alarm_daily_rollup', if_exists=True)
+    op.drop_table('alarm_hourly_rollup', if_exists=True)
@@ -0,0 +1,39 @@
+"""flapping flag on alarm_note_v2 and alarm_flap_state for flap detection
+
+Revision ID: 019_alarm_flapping
+Revises: 018_alarm_rollups
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '019_alarm_flapping'
+down_revision = '018_alarm_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('alarm_note_v2', sa.Column('flapping', sa.Boolean(), nullable=False, server_default=sa.false()),
+                  if_not_exists=True)
+    op.create_table(
+        'alarm_flap_state',
+        sa.Column('fingerprint', sa.String(length=255), nullable=False),
+        sa.Column('observed', sa.String(length=20), nullable=False),
+        sa.Column('transitions', sa.JSON(), nullable=False),
+        sa.Column('flapping', sa.Boolean(), nullable=False),
+        sa.Column('flapping_since', sa.DateTime(), nullable=True),
+        sa.Column('flag_changed_at', sa.DateTime(), nullable=True),
+        sa.Column('suppressed', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('fingerprint'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('alarm_flap_state', if_exists=True)
+    op.drop_column('alarm_note_v2', 'flapping')
@@ -0,0 +1,36 @@
+"""alarm_action_queue for the actions of alarm rules
+
+Revision ID: 020_alarm_actions
+Revises: 019_alarm_flapping
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '020_alarm_actions'
+down_revision = '019_alarm_flapping'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'alarm_action_queue',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('alarm_id', sa.String(length=50), nullable=False),
+        sa.Column('rule_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('alarm_action_queue', if_exists=True)
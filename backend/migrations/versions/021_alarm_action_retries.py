@@ -0,0 +1,29 @@
+"""next_attempt_at and claimed_until on alarm_action_queue for retry backoff and leases
+
+Revision ID: 021_alarm_action_retries
+Revises: 020_alarm_actions
+Create Date: 2026-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '021_alarm_action_retries'
+down_revision = '020_alarm_actions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('alarm_action_queue', sa.Column('next_attempt_at', sa.DateTime(), nullable=False,
+                                                  server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+                  if_not_exists=True)
+    op.add_column('alarm_action_queue', sa.Column('claimed_until', sa.DateTime(), nullable=True),
+                  if_not_exists=True)
+
+
+def downgrade():
+    op.drop_column('alarm_action_queue', 'claimed_until')
+    op.drop_column('alarm_action_queue', 'next_attempt_at')
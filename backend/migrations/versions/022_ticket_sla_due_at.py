@@ -0,0 +1,29 @@
+"""Add tickets.sla_due_at so the sync only re-evaluates tickets whose SLA can breach
+
+Revision ID: 022_ticket_sla_due_at
+Revises: 021_alarm_action_retries
+Create Date: 2026-10-21 10:00:00.000000
+
+Existing open tickets start with NULL, which the sync always re-evaluates, so
+the column fills in on the first sync after the upgrade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '022_ticket_sla_due_at'
+down_revision = '021_alarm_action_retries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Added to the partitioned parent, so every partition gets the column and the index
+    op.add_column('tickets', sa.Column('sla_due_at', sa.DateTime(), nullable=True), if_not_exists=True)
+    op.create_index('ix_tickets_sla_due_at', 'tickets', ['sla_due_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_tickets_sla_due_at', table_name='tickets', if_exists=True)
+    op.drop_column('tickets', 'sla_due_at', if_exists=True)
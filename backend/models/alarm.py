@@ -13,6 +13,15 @@ from models.ticket import db
 class AlarmNote(db.Model):
     """Alarm Notes - tracks Critical (auto) and Warning (manual) alerts"""
     __tablename__ = 'alarm_note_v2'
+    __table_args__ = (
+        # Keyset pagination of alarm lists on (created_at, id), alone or after an
+        # equality filter; the status/customer ones also serve plain lookups, so
+        # the open-alarm view never scans resolved history
+        db.Index('ix_alarm_note_v2_created_id', 'created_at', 'id'),
+        db.Index('ix_alarm_note_v2_status_created_id', 'status', 'created_at', 'id'),
+        db.Index('ix_alarm_note_v2_severity_created_id', 'severity', 'created_at', 'id'),
+        db.Index('ix_alarm_note_v2_customer_created_id', 'customer_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     alarm_id = db.Column(db.String(50), unique=True, index=True)  # ALM-001
@@ -34,11 +43,11 @@ class AlarmNote(db.Model):
     
     # CMDB linkage
     ci_id = db.Column(db.String(50), index=True)
-    customer_id = db.Column(db.String(50), index=True)
+    customer_id = db.Column(db.String(50))
     customer_name = db.Column(db.String(255))
     
     # Lifecycle
-    status = db.Column(db.String(20), default='open', index=True)  # open | in_progress | resolved
+    status = db.Column(db.String(20), default='open')  # open | in_progress | resolved
     
     # Ticketing integration
     ticket_id = db.Column(db.String(50))
@@ -64,6 +73,35 @@ class AlarmNote(db.Model):
     occurrence_count = db.Column(db.Integer, default=1)
     last_occurrence = db.Column(db.DateTime)
     
+    # Correlation: alarm_id of the root-cause alarm (services/correlation_engine.py), NULL for roots
+    parent_alarm_id = db.Column(db.String(50), index=True)
+    
+    # Flapping (services/flap_detector.py): held open, without history churn, until it stabilizes
+    flapping = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
+    # Fields of to_dict(), selectable with ?fields= on alarm lists (all are plain columns)
+    LIST_FIELDS = (
+        'id', 'alarm_id', 'source', 'alertname', 'severity', 'target', 'instance',
+        'ci_id', 'customer_id', 'customer_name', 'status', 'ticket_id', 'note', 'root_cause',
+        'resolution', 'assigned_to', 'created_by', 'fired_at', 'acknowledged_at', 'resolved_at',
+        'created_at', 'updated_at', 'occurrence_count', 'parent_alarm_id', 'flapping',
+    )
+    
+    @classmethod
+    def list_columns(cls, fields=None):
+        """Columns selected for alarm lists: `fields` (default all) plus the keyset key."""
+        names = list(fields or cls.LIST_FIELDS)
+        names += [name for name in ('created_at', 'id') if name not in names]
+        return [getattr(cls, name) for name in names]
+    
+    @classmethod
+    def list_row_to_dict(cls, row, fields=None):
+        """Serialize a row selected with list_columns(fields), same values as to_dict()"""
+        return {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in ((name, getattr(row, name)) for name in fields or cls.LIST_FIELDS)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -89,6 +127,8 @@ class AlarmNote(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'occurrence_count': self.occurrence_count,
+            'parent_alarm_id': self.parent_alarm_id,
+            'flapping': self.flapping,
         }
 
 
@@ -116,3 +156,107 @@ class AlarmHistory(db.Model):
             'changed_at': self.changed_at.isoformat() if self.changed_at else None,
             'comment': self.comment,
         }
+
+
+class AlertQueueEntry(db.Model):
+    """
+    One Alertmanager webhook payload waiting to be ingested (services/alert_queue.py).
+    Rows are deleted by the worker that ingests them, in the same transaction.
+    """
+    __tablename__ = 'alert_queue'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # failed ingestion attempts
+    last_error = db.Column(db.Text)
+
+
+class AlarmAction(db.Model):
+    """
+    One outbound action of an alarm rule (services/alarm_rule_engine.py) waiting to be
+    executed by services/alarm_actions.py: 'create_ticket' or 'notify_webhook'.
+    Queued in the ingestion transaction, leased by a worker while it executes,
+    deleted once executed.
+    """
+    __tablename__ = 'alarm_action_queue'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    alarm_id = db.Column(db.String(50), nullable=False)
+    rule_id = db.Column(db.Integer)
+    action = db.Column(db.String(20), nullable=False)  # create_ticket | notify_webhook
+    params = db.Column(db.JSON, nullable=False, default=dict)  # ticket fields / webhook url of the rule
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # failed executions
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # retry backoff
+    claimed_until = db.Column(db.DateTime)  # lease of the worker executing it
+
+
+class AlarmFlapState(db.Model):
+    """
+    Sliding-window flap state of one Alertmanager fingerprint, the persisted copy of
+    the in-memory state of services/flap_detector.py (written every
+    ALARM_FLAP_PERSIST_SECONDS, read by workers that have not seen the fingerprint).
+    """
+    __tablename__ = 'alarm_flap_state'
+
+    fingerprint = db.Column(db.String(255), primary_key=True)
+    observed = db.Column(db.String(20), nullable=False)  # last alert status: firing | resolved
+    transitions = db.Column(db.JSON, nullable=False, default=list)  # ISO times of status changes in the window
+    flapping = db.Column(db.Boolean, nullable=False, default=False)
+    flapping_since = db.Column(db.DateTime)
+    flag_changed_at = db.Column(db.DateTime)  # last start/end of flapping, to merge copies of other workers
+    suppressed = db.Column(db.Integer, nullable=False, default=0)  # status changes held back while flapping
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AlarmRollupMetrics:
+    """
+    Dimension and metric columns shared by the hourly and daily alarm rollups
+    (services/alarm_rollup.py). Alarms are bucketed by creation time and keyed by
+    their current status; NULL dimension values are stored as ''. Counters are
+    kept up to date incrementally as alarms change, and sums/counts give MTTA and
+    MTTR for any range and grouping.
+    """
+    customer_id = db.Column(db.String(50), primary_key=True, default='')
+    severity = db.Column(db.String(20), primary_key=True, default='')
+    source = db.Column(db.String(20), primary_key=True, default='')
+    status = db.Column(db.String(20), primary_key=True, default='')
+    customer_name = db.Column(db.String(255))
+
+    alarm_count = db.Column(db.Integer, nullable=False, default=0)
+    acknowledged_count = db.Column(db.Integer, nullable=False, default=0)
+    ack_seconds_sum = db.Column(db.Float, nullable=False, default=0)  # acknowledged_at - created_at
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)  # status resolved, with resolved_at
+    resolve_seconds_sum = db.Column(db.Float, nullable=False, default=0)  # resolved_at - created_at
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AlarmHourlyRollup(AlarmRollupMetrics, db.Model):
+    """One row per (creation hour, customer, CI, severity, source, current status)."""
+    __tablename__ = 'alarm_hourly_rollup'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('hour', 'customer_id', 'ci_id', 'severity', 'source', 'status'),
+        db.Index('ix_alarm_hourly_rollup_customer_hour', 'customer_id', 'hour'),
+        db.Index('ix_alarm_hourly_rollup_ci_hour', 'ci_id', 'hour'),
+    )
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    ci_id = db.Column(db.String(50), primary_key=True, default='')
+
+
+class AlarmDailyRollup(AlarmRollupMetrics, db.Model):
+    """
+    The hourly rollup per (creation day, customer, severity, source, current status),
+    without the CI dimension, so long ranges read one row per day.
+    """
+    __tablename__ = 'alarm_daily_rollup'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('day', 'customer_id', 'severity', 'source', 'status'),
+        db.Index('ix_alarm_daily_rollup_customer_day', 'customer_id', 'day'),
+    )
+
+    day = db.Column(db.Date, primary_key=True)
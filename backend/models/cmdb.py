@@ -1,9 +1,5 @@
-import os
-import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from datetime import datetime
-from database import db
+from models.ticket import db
 
 class CI(db.Model):
     """Configuration Item - Core CMDB entity"""
@@ -263,3 +259,22 @@ class AlarmRule(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'alertname_pattern': self.alertname_pattern,
+            'severity': self.severity,
+            'customer_id': self.customer_id,
+            'ci_type': self.ci_type,
+            'create_ticket': self.create_ticket,
+            'ticket_priority': self.ticket_priority,
+            'ticket_category': self.ticket_category,
+            'assign_to': self.assign_to,
+            'notify_webhook': self.notify_webhook,
+            'enabled': self.enabled,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
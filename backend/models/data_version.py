@@ -0,0 +1,34 @@
+"""
+DataVersion Model
+Monotonic version counters used to invalidate in-process caches across workers.
+"""
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.ticket import db
+
+
+class DataVersion(db.Model):
+    """One row per dataset (e.g. 'tickets'), bumped whenever that dataset changes."""
+    __tablename__ = 'data_version'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def current(cls, name):
+        """Return the current version of a dataset (0 if it was never bumped)."""
+        return db.session.query(cls.version).filter(cls.name == name).scalar() or 0
+
+    @classmethod
+    def bump(cls, name, connection=None):
+        """Increment the version of a dataset (on `connection` if given). Caller is responsible for commit."""
+        stmt = pg_insert(cls).values(name=name, version=1, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={
+                'version': cls.version + 1,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        (connection or db.session).execute(stmt)
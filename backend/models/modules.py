@@ -67,7 +67,7 @@ class ProjectMember(db.Model):
 class CustomerContact(db.Model):
     __tablename__ = 'customer_contacts'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)  # Looked up by ticket customer_name
     industry = db.Column(db.String(100))
     address = db.Column(db.String(500))
     website = db.Column(db.String(255))
@@ -127,6 +127,11 @@ class Contact(db.Model):
 
 class AlarmNote(db.Model):
     __tablename__ = 'alarm_notes'
+    __table_args__ = (
+        # Keyset pagination of GET /api/alarms (app.py) on (updated_at, id)
+        db.Index('ix_alarm_notes_updated_id', 'updated_at', 'id'),
+        db.Index('ix_alarm_notes_status_updated_id', 'status', 'updated_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     alarm_id = db.Column(db.String(20), unique=True)  # ALM-001
     alarm_name = db.Column(db.String(255), nullable=False)
@@ -0,0 +1,69 @@
+"""
+Monthly Report Models
+Immutable month-end report snapshots and the batch jobs that generate them.
+"""
+from datetime import datetime
+from models.ticket import db
+
+
+class MonthlyReport(db.Model):
+    """
+    Snapshot of the monthly report + forecast for one customer.
+    Rows are never updated: regenerating a month inserts a new revision.
+    """
+    __tablename__ = 'monthly_report'
+    __table_args__ = (
+        db.UniqueConstraint('customer_id', 'year', 'month', 'revision', name='uq_monthly_report_revision'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    customer_id = db.Column(db.String(50), nullable=False, index=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False, default=1)
+
+    report = db.Column(db.JSON, nullable=False)  # Same payload as /api/v1/reports/itsm/monthly
+    forecast = db.Column(db.JSON)  # Same payload as /api/v1/reports/itsm/forecast
+
+    job_id = db.Column(db.Integer, db.ForeignKey('report_job.id'), index=True)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def snapshot_info(self):
+        return {
+            'revision': self.revision,
+            'job_id': self.job_id,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
+
+
+class ReportJob(db.Model):
+    """Progress tracking for a batch report generation run"""
+    __tablename__ = 'report_job'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='pending', index=True)  # pending | running | completed | failed
+    total = db.Column(db.Integer, default=0)
+    processed = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_by = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'year': self.year,
+            'month': self.month,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'progress_percent': round(self.processed / self.total * 100, 1) if self.total else 0,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,96 @@
+"""
+Ticket Rollup Models
+Pre-aggregated ticket metrics per day (and per month), rebuilt by the sync for
+the days it touched, plus per-engineer distinct-customer sketches on the same
+buckets.
+"""
+from datetime import datetime
+from models.ticket import db
+
+
+class RollupMetrics:
+    """
+    Dimension and metric columns shared by the daily and monthly rollups.
+    NULL dimension values are stored as '' so they can be part of the key.
+    Sums/counts give averages; the digests (serialized services.sketch.DDSketch)
+    merge across rows to give percentiles for any period and grouping.
+    """
+    customer_id = db.Column(db.String(50), primary_key=True, default='')
+    engineer_id = db.Column(db.String(50), primary_key=True, default='')
+    priority = db.Column(db.String(100), primary_key=True, default='')
+    customer_name = db.Column(db.String(255))
+    engineer_name = db.Column(db.String(255))
+
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+    breached_count = db.Column(db.Integer, nullable=False, default=0)
+    # Current status of the tickets created in the bucket
+    open_count = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)  # Resolved or Closed
+
+    resolve_hours_sum = db.Column(db.Float, nullable=False, default=0)
+    resolve_count = db.Column(db.Integer, nullable=False, default=0)
+    response_minutes_sum = db.Column(db.Float, nullable=False, default=0)
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    effort_minutes_sum = db.Column(db.Integer, nullable=False, default=0)  # time_elapsed_minutes (engineer workload)
+
+    resolve_digest = db.Column(db.LargeBinary)  # DDSketch of resolve_time_hours
+    response_digest = db.Column(db.LargeBinary)  # DDSketch of response_time_minutes
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TicketDailyRollup(RollupMetrics, db.Model):
+    """One row per (day, customer, engineer, priority) of ticket creation."""
+    __tablename__ = 'ticket_daily_rollup'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('day', 'customer_id', 'engineer_id', 'priority'),
+        db.Index('ix_ticket_daily_rollup_customer_day', 'customer_id', 'day'),
+        db.Index('ix_ticket_daily_rollup_engineer_day', 'engineer_id', 'day'),
+    )
+
+    day = db.Column(db.Date, primary_key=True)
+
+
+class TicketMonthlyRollup(RollupMetrics, db.Model):
+    """
+    The daily rollups of one calendar month merged per (customer, engineer, priority),
+    so long ranges read one row per month instead of one per day.
+    """
+    __tablename__ = 'ticket_monthly_rollup'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('month', 'customer_id', 'engineer_id', 'priority'),
+        db.Index('ix_ticket_monthly_rollup_customer_month', 'customer_id', 'month'),
+        db.Index('ix_ticket_monthly_rollup_engineer_month', 'engineer_id', 'month'),
+    )
+
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
+
+
+class EngineerCustomerSketch:
+    """
+    HyperLogLog (serialized services.sketch.HyperLogLog) of the customer ids of
+    the tickets an engineer got in the bucket; merged across rows it gives
+    count(distinct customer_id) per engineer (or group of engineers) for any period.
+    """
+    engineer_id = db.Column(db.String(50), primary_key=True)
+    customer_hll = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class EngineerDailySketch(EngineerCustomerSketch, db.Model):
+    __tablename__ = 'engineer_daily_sketch'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('day', 'engineer_id'),
+    )
+
+    day = db.Column(db.Date, primary_key=True)
+
+
+class EngineerMonthlySketch(EngineerCustomerSketch, db.Model):
+    __tablename__ = 'engineer_monthly_sketch'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('month', 'engineer_id'),
+    )
+
+    month = db.Column(db.Date, primary_key=True)  # first day of the month
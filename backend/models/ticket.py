@@ -1,57 +1,161 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, DDL
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# immutable_unaccent(text): accent folding usable in generated columns and indexes.
+# Wraps the unaccent extension when it can be installed, otherwise folds Vietnamese
+# diacritics with translate(). Also run by migration 008.
+UNACCENT_FUNCTION_DDL = """
+DO $do$
+BEGIN
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS
+            $f$ SELECT public.unaccent('public.unaccent', $1) $f$
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+    EXCEPTION WHEN others THEN
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS
+            $f$ SELECT translate($1,
+                'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđÀÁẢÃẠĂẰẮẲẴẶÂẦẤẨẪẬÈÉẺẼẸÊỀẾỂỄỆÌÍỈĨỊÒÓỎÕỌÔỒỐỔỖỘƠỜỚỞỠỢÙÚỦŨỤƯỪỨỬỮỰỲÝỶỸỴĐ',
+                'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyydAAAAAAAAAAAAAAAAAEEEEEEEEEEEIIIIIOOOOOOOOOOOOOOOOOUUUUUUUUUUUYYYYYD') $f$
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+    END;
+END
+$do$;
+"""
+
+# Full-text search document: title (weight A) + description (weight B). The 'simple'
+# configuration does no stemming, which suits mixed Vietnamese/English text.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, immutable_unaccent(coalesce(title, ''))), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, immutable_unaccent(coalesce(description, ''))), 'B')"
+)
+
+# Fixed keys of the statuses reports and partial indexes refer to (seeded with the
+# ticket_statuses table, migration 012); other values get keys as the sync sees them
+STATUS_KEYS = {'Open': 1, 'In Progress': 2, 'Resolved': 3, 'Closed': 4}
+OPEN_STATUS_KEYS_SQL = f"{STATUS_KEYS['Open']}, {STATUS_KEYS['In Progress']}"
+
+
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        # Keyset pagination of ticket lists: (customer|engineer, created_at, id).
+        # Also serve customer_id / engineer_id equality lookups (no single-column indexes).
+        db.Index('ix_tickets_customer_created_id', 'customer_id', 'created_at', 'id'),
+        db.Index('ix_tickets_engineer_created_id', 'engineer_id', 'created_at', 'id'),
+        # Dashboard filtered by engineer (+ created_at window); INCLUDE columns
+        # let the summary aggregates run as index-only scans
+        db.Index('ix_tickets_engineer_created_cov', 'engineer_id', 'created_at',
+                 postgresql_include=['status_id', 'is_overdue', 'priority_id', 'category_id',
+                                     'resolve_time_hours', 'customer_id']),
+        # Period windows over all tickets (customers list, 1d/7d/30d)
+        db.Index('ix_tickets_created_at_cov', 'created_at',
+                 postgresql_include=['customer_id', 'status_id', 'is_overdue', 'resolve_time_hours']),
+        # Partial indexes: open backlog per engineer, SLA breaches per customer
+        db.Index('ix_tickets_open_engineer_created', 'engineer_id', 'created_at',
+                 postgresql_where=db.text(f"status_id IN ({OPEN_STATUS_KEYS_SQL})")),
+        db.Index('ix_tickets_overdue_customer_created', 'customer_id', 'created_at',
+                 postgresql_where=db.text('is_overdue')),
+        # Full-text search (/api/report/tickets/search)
+        db.Index('ix_tickets_search_vector', 'search_vector', postgresql_using='gin'),
+        # Monthly range partitions (services/partition_service.py); the partition key
+        # is part of the primary key, so upserts conflict on (id, created_at)
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
     id = db.Column(db.String(100), primary_key=True)
     title = db.Column(db.String(255), nullable=False)
-    customer_id = db.Column(db.String(50), index=True)
-    customer_name = db.Column(db.String(255))
-    engineer_id = db.Column(db.String(50), index=True)
-    engineer_name = db.Column(db.String(255))
-    status = db.Column(db.String(100), index=True)
-    priority = db.Column(db.String(100), index=True)
-    category = db.Column(db.String(100), index=True)
-    request_type = db.Column(db.String(100), index=True)
+    # Names live in the dimension tables (customers, engineers, ticket_statuses, ...);
+    # the sync encodes them through services.dimensions and reports join at the edge
+    customer_id = db.Column(db.String(50))
+    engineer_id = db.Column(db.String(50))
+    status_id = db.Column(db.SmallInteger, db.ForeignKey('ticket_statuses.id'), index=True)
+    priority_id = db.Column(db.SmallInteger, db.ForeignKey('ticket_priorities.id'), index=True)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey('ticket_categories.id'), index=True)
+    request_type_id = db.Column(db.SmallInteger, db.ForeignKey('ticket_request_types.id'), index=True)
     is_service_request = db.Column(db.Boolean, default=False)
     description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
     response_time_minutes = db.Column(db.Integer)
     resolve_time_hours = db.Column(db.Float)
     time_elapsed_minutes = db.Column(db.Integer)  # Actual workload time from ITSM
-    is_overdue = db.Column(db.Boolean, default=False)  # SLA status from ManageEngine
+    is_overdue = db.Column(db.Boolean, default=False)  # SLA breached (response or resolution), services/sla_engine.py
+    # Business-hours SLA evaluation; for open tickets the elapsed business time so far
+    sla_id = db.Column(db.String(50))  # models.cmdb.SLA applied, NULL = Config defaults
+    sla_response_business_minutes = db.Column(db.Integer)
+    sla_resolve_business_hours = db.Column(db.Float)
+    sla_response_breached = db.Column(db.Boolean)
+    sla_resolve_breached = db.Column(db.Boolean)
+    sla_due_at = db.Column(db.DateTime, index=True)  # Earliest time a running SLA clock can breach (NULL: re-evaluated by every sync)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # Last upsert by sync (incremental readers)
+    # Maintained by Postgres on every insert/upsert; deferred so ticket loads don't fetch it
+    search_vector = deferred(db.Column(TSVECTOR, db.Computed(SEARCH_VECTOR_SQL, persisted=True)))
     
-    @property
-    def sla_status(self):
-        # Use is_overdue from ManageEngine API
-        # is_overdue: true = Breached, is_overdue: false = Met
-        if self.is_overdue:
-            return "Breached"
-        return "Met"
-
-    def to_dict(self):
-        return {
-            "ticket_id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "customer_id": self.customer_id,
-            "customer_name": self.customer_name,
-            "engineer_id": self.engineer_id,
-            "engineer_name": self.engineer_name,
-            "status": self.status,
-            "priority": self.priority,
-            "category": self.category,
-            "request_type": self.request_type,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "response_time_minutes": self.response_time_minutes,
-            "resolve_time_hours": self.resolve_time_hours,
-            "time_elapsed_minutes": self.time_elapsed_minutes,
-            "time_elapsed_hours": round(self.time_elapsed_minutes / 60, 2) if self.time_elapsed_minutes else None,
-            "is_overdue": self.is_overdue,
-            "sla_status": self.sla_status
+    @classmethod
+    def list_columns(cls):
+        """
+        Columns selected for ticket lists (everything except the description body).
+        Names are read from the dimension tables: use together with join_dimensions().
+        """
+        return (
+            cls.id, cls.title,
+            cls.customer_id, db.func.coalesce(Customer.name, cls.customer_id).label('customer_name'),
+            cls.engineer_id, db.func.coalesce(Engineer.name, cls.engineer_id).label('engineer_name'),
+            TicketStatus.name.label('status'), TicketPriority.name.label('priority'),
+            TicketCategory.name.label('category'), TicketRequestType.name.label('request_type'),
+            cls.created_at, cls.response_time_minutes, cls.resolve_time_hours,
+            cls.time_elapsed_minutes, cls.is_overdue
+        )
+
+    @classmethod
+    def join_dimensions(cls, query):
+        """Outer-join the dimension tables list_columns() reads names from (Query or select)."""
+        return query.outerjoin(Customer, Customer.id == cls.customer_id)\
+            .outerjoin(Engineer, Engineer.id == cls.engineer_id)\
+            .outerjoin(TicketStatus, TicketStatus.id == cls.status_id)\
+            .outerjoin(TicketPriority, TicketPriority.id == cls.priority_id)\
+            .outerjoin(TicketCategory, TicketCategory.id == cls.category_id)\
+            .outerjoin(TicketRequestType, TicketRequestType.id == cls.request_type_id)
+
+    @staticmethod
+    def list_row_to_dict(row):
+        """Serialize a row selected with list_columns() (plus `description` when selected)"""
+        data = {
+            "ticket_id": row.id,
+            "title": row.title,
+            "customer_id": row.customer_id,
+            "customer_name": row.customer_name,
+            "engineer_id": row.engineer_id,
+            "engineer_name": row.engineer_name,
+            "status": row.status,
+            "priority": row.priority,
+            "category": row.category,
+            "request_type": row.request_type,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "response_time_minutes": row.response_time_minutes,
+            "resolve_time_hours": row.resolve_time_hours,
+            "time_elapsed_minutes": row.time_elapsed_minutes,
+            "time_elapsed_hours": round(row.time_elapsed_minutes / 60, 2) if row.time_elapsed_minutes else None,
+            "is_overdue": row.is_overdue,
+            "sla_status": "Breached" if row.is_overdue else "Met"
         }
+        if 'description' in row._fields:
+            data["description"] = row.description
+        return data
+
+event.listen(Ticket.__table__, 'before_create', DDL(UNACCENT_FUNCTION_DDL))
+
+
+@event.listens_for(Ticket.__table__, 'after_create')
+def create_ticket_partitions(target, connection, **kw):
+    # create_all() only creates the partitioned parent: add the default partition and upcoming months
+    from services.partition_service import ensure_partitions
+    ensure_partitions(connection)
+
 
 class Customer(db.Model):
     __tablename__ = 'customers'
@@ -65,3 +169,33 @@ class Engineer(db.Model):
     group = db.Column(db.String(100))
     level = db.Column(db.String(20))
     shift = db.Column(db.String(50))
+
+
+class DimensionMixin:
+    """Lookup table of one low-cardinality ticket attribute: SMALLINT key <-> name."""
+    id = db.Column(db.SmallInteger, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+
+class TicketStatus(DimensionMixin, db.Model):
+    __tablename__ = 'ticket_statuses'
+
+
+class TicketPriority(DimensionMixin, db.Model):
+    __tablename__ = 'ticket_priorities'
+
+
+class TicketCategory(DimensionMixin, db.Model):
+    __tablename__ = 'ticket_categories'
+
+
+class TicketRequestType(DimensionMixin, db.Model):
+    __tablename__ = 'ticket_request_types'
+
+
+@event.listens_for(TicketStatus.__table__, 'after_create')
+def seed_ticket_statuses(target, connection, **kw):
+    connection.execute(target.insert(), [{'id': key, 'name': name} for name, key in STATUS_KEYS.items()])
+    connection.execute(db.text(
+        f"SELECT setval(pg_get_serial_sequence('{target.name}', 'id'), {max(STATUS_KEYS.values())})"
+    ))
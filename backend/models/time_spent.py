@@ -1,6 +1,7 @@
 """
 TechTimeSpent Model
-Stores time spent data fetched from ITSM WO_TECH_INFO table.
+Stores time spent data fetched from ITSM WO_TECH_INFO table, and its rollup per
+technician / group / category.
 """
 from datetime import datetime
 from models.ticket import db
@@ -75,3 +76,25 @@ class TechTimeSpent(db.Model):
             'time_spent_formatted': self.time_spent_formatted,
             'synced_at': self.synced_at.isoformat() if self.synced_at else None
         }
+
+
+class TechTimeSpentRollup(db.Model):
+    """
+    Time spent per (technician, group, category), rebuilt after each time spent
+    sync. NULL values are stored as '' so they can be part of the key.
+    request_hll is a serialized services.sketch.HyperLogLog of the request ids:
+    merged across rows it gives the distinct ticket count of any grouping.
+    """
+    __tablename__ = 'tech_time_spent_rollup'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('technician', 'group_name', 'category'),
+    )
+
+    technician = db.Column(db.String(255), primary_key=True, default='')
+    group_name = db.Column(db.String(100), primary_key=True, default='')
+    category = db.Column(db.String(100), primary_key=True, default='')
+
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    minutes_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    request_hll = db.Column(db.LargeBinary, nullable=False)
+    last_synced_at = db.Column(db.DateTime)  # max(synced_at) of the entries
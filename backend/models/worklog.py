@@ -5,7 +5,7 @@ class Worklog(db.Model):
     __tablename__ = 'worklogs'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    ticket_id = db.Column(db.String(100), db.ForeignKey('tickets.id'), index=True, nullable=False)
+    ticket_id = db.Column(db.String(100), index=True, nullable=False)  # tickets.id (no FK: tickets is partitioned)
     technician_name = db.Column(db.String(255))
     time_spent_seconds = db.Column(db.Integer, default=0)
     description = db.Column(db.Text)
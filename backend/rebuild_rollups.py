@@ -0,0 +1,37 @@
+import argparse
+from datetime import date
+from app import app
+from models.ticket import db
+from services.rollup_service import rollup_service
+from services.time_spent_rollup import time_spent_rollup
+from services.alarm_rollup import alarm_rollup
+
+
+def rebuild(start_day=None, end_day=None):
+    with app.app_context():
+        print("Rebuilding ticket daily rollups...")
+
+        def progress(done, total):
+            print(f"  {done}/{total} days")
+
+        written = rollup_service.rebuild(start_day, end_day, progress_callback=progress)
+        print(f"Rollup rebuild complete: {written} rows.")
+
+        print("Rebuilding time spent rollup...")
+        written = time_spent_rollup.refresh()
+        db.session.commit()
+        print(f"Time spent rollup rebuild complete: {written} rows.")
+
+        print("Rebuilding alarm hourly/daily rollups...")
+        written = alarm_rollup.rebuild()
+        print(f"Alarm rollup rebuild complete: {written} hourly rows.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily and monthly ticket rollups (counts, percentile digests, "
+                                                 "engineer customer sketches) from tickets, and the time spent "
+                                                 "and alarm rollups")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help="last day, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+    rebuild(args.start, args.end)
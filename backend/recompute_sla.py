@@ -0,0 +1,30 @@
+import argparse
+from datetime import date, datetime, timedelta
+from app import app
+from models.ticket import db, Ticket
+from services.rollup_service import rollup_service
+from services.sla_engine import sla_engine
+
+
+def recompute(start_day=None, end_day=None):
+    with app.app_context():
+        criteria = []
+        if start_day:
+            criteria.append(Ticket.created_at >= datetime.combine(start_day, datetime.min.time()))
+        if end_day:
+            criteria.append(Ticket.created_at < datetime.combine(end_day + timedelta(days=1), datetime.min.time()))
+
+        print("Recomputing business-hours SLA...")
+        updated, changed_days = sla_engine.recompute(*criteria)
+        # Breach counts in the daily rollups follow is_overdue
+        rollup_service.refresh_days(changed_days)
+        db.session.commit()
+        print(f"SLA recompute complete: {updated} tickets, {len(changed_days)} days with changed breaches.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute business-hours SLA fields of stored tickets")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help="first creation day (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help="last creation day, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+    recompute(args.start, args.end)
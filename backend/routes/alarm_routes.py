@@ -1,18 +1,28 @@
 """
 Alarm Routes - Alertmanager webhook and Alarm Notes API
 """
-from flask import Blueprint, jsonify, request
-from datetime import datetime
+import re
+from flask import Blueprint, jsonify, request, current_app
+from datetime import datetime, timedelta
 from models.ticket import db
 from models.alarm import AlarmNote, AlarmHistory
+from models.cmdb import AlarmRule
+from services.alarm_actions import alarm_actions
+from services.alarm_dedup import alarm_dedup
+from services.alarm_list import alarm_list
+from services.alarm_rollup import alarm_rollup, snapshot
+from services.alarm_rule_engine import alarm_rule_engine
+from services.alert_queue import alert_queue, QueueFull
+from services.ci_resolver import ci_resolver
+from services.id_allocator import id_allocator
+from services.report_params import parse_alarm_list_args, parse_datetime_arg
 
 alarm_bp = Blueprint('alarm', __name__, url_prefix='/api')
 
 
 def generate_alarm_id():
-    """Generate sequential alarm ID like ALM-001"""
-    count = AlarmNote.query.count() + 1
-    return f"ALM-{str(count).zfill(4)}"
+    """Generate sequential alarm ID like ALM-0001 (from a sequence, see services/id_allocator.py)"""
+    return id_allocator.next('alarm')
 
 
 def add_history(alarm_id, action, old_value=None, new_value=None, changed_by='system', comment=None):
@@ -36,120 +46,86 @@ def alertmanager_webhook():
     Receive alerts from Alertmanager.
     Only CRITICAL alerts are auto-created as Alarm Notes.
     Warning alerts are ignored (monitored via Grafana only).
+    The payload is queued and ingested in the background (202); with
+    ALERT_QUEUE_WORKERS=0 it is ingested before answering.
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     
-    if not data or 'alerts' not in data:
+    if not data or not isinstance(data.get('alerts'), list) \
+            or not all(isinstance(alert, dict) for alert in data['alerts']):
         return jsonify({'error': 'Invalid payload'}), 400
     
-    created = 0
-    updated = 0
-    skipped = 0
+    config = current_app.config
+    if config.get('ALERT_QUEUE_WORKERS', 0) > 0:
+        try:
+            queue_id = alert_queue.enqueue(data, config['ALERT_QUEUE_HIGH_WATER_MARK'],
+                                           config.get('ALERT_QUEUE_MAX_ATTEMPTS', 5))
+        except QueueFull as e:
+            # Backpressure: Alertmanager retries the notification later
+            response = jsonify({'error': str(e)})
+            response.headers['Retry-After'] = '30'
+            return response, 503
+        return jsonify({'status': 'queued', 'queue_id': queue_id, 'alerts': len(data['alerts'])}), 202
     
-    for alert in data.get('alerts', []):
-        labels = alert.get('labels', {})
-        annotations = alert.get('annotations', {})
-        severity = labels.get('severity', 'warning').lower()
-        
-        # CRITICAL ONLY - auto-create
-        if severity != 'critical':
-            skipped += 1
-            continue
-        
-        fingerprint = alert.get('fingerprint')
-        status = alert.get('status', 'firing')
-        
-        # Check for existing alarm by fingerprint
-        existing = AlarmNote.query.filter_by(external_id=fingerprint).first()
-        
-        if status == 'firing':
-            if existing:
-                # Update occurrence count
-                existing.occurrence_count += 1
-                existing.last_occurrence = datetime.utcnow()
-                
-                # Reopen if was resolved
-                if existing.status == 'resolved':
-                    existing.status = 'open'
-                    add_history(existing.alarm_id, 'reopened', 'resolved', 'open', 'alertmanager')
-                
-                updated += 1
-            else:
-                # Create new alarm note
-                alarm_id = generate_alarm_id()
-                fired_at = None
-                if alert.get('startsAt'):
-                    try:
-                        fired_at = datetime.fromisoformat(alert['startsAt'].replace('Z', '+00:00'))
-                    except:
-                        fired_at = datetime.utcnow()
-                
-                alarm = AlarmNote(
-                    alarm_id=alarm_id,
-                    source='alertmanager',
-                    external_id=fingerprint,
-                    alertname=labels.get('alertname', 'Unknown'),
-                    severity='critical',
-                    target=labels.get('instance', labels.get('host', '')),
-                    instance=labels.get('instance'),
-                    job=labels.get('job'),
-                    labels=labels,
-                    annotations=annotations,
-                    status='open',
-                    fired_at=fired_at,
-                    note=annotations.get('description', annotations.get('summary', '')),
-                    created_by='alertmanager',
-                    last_occurrence=datetime.utcnow()
-                )
-                db.session.add(alarm)
-                add_history(alarm_id, 'created', None, 'open', 'alertmanager', f"Auto-created from {labels.get('alertname')}")
-                created += 1
-                
-        elif status == 'resolved':
-            if existing and existing.status != 'resolved':
-                old_status = existing.status
-                existing.status = 'resolved'
-                existing.resolved_at = datetime.utcnow()
-                add_history(existing.alarm_id, 'resolved', old_status, 'resolved', 'alertmanager', 'Auto-resolved by Alertmanager')
-                updated += 1
+    # Whole payload in a few multi-row statements (services/alarm_ingest.py),
+    # serialized per fingerprint like the queue workers
+    result = alert_queue.ingest_inline(data['alerts'])
     
     db.session.commit()
     
     return jsonify({
         'status': 'ok',
-        'created': created,
-        'updated': updated,
-        'skipped': skipped
+        'created': result['created'],
+        'updated': result['updated'],
+        'skipped': result['skipped'],
+        'correlated': result['correlated'],
+        'suppressed': result['suppressed'],
+        'actions': result['actions'],
+        'deduplicated': result['deduplicated']
+    })
+
+
+@alarm_bp.route('/webhooks/alertmanager/queue', methods=['GET'])
+def get_alert_queue_metrics():
+    """Depth, lag and dead letters of the webhook queue"""
+    config = current_app.config
+    return jsonify({
+        **alert_queue.metrics(config.get('ALERT_QUEUE_MAX_ATTEMPTS', 5)),
+        'high_water_mark': config.get('ALERT_QUEUE_HIGH_WATER_MARK'),
     })
 
 
+@alarm_bp.route('/webhooks/alertmanager/queue/dead-letters', methods=['POST', 'DELETE'])
+def manage_alert_queue_dead_letters():
+    """
+    Requeue (POST) or purge (DELETE) dead-lettered payloads.
+    Optional body: {"ids": [...]} to limit the operation to some payloads.
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        return jsonify({'error': 'ids must be a list of integers'}), 400
+    max_attempts = current_app.config.get('ALERT_QUEUE_MAX_ATTEMPTS', 5)
+    if request.method == 'POST':
+        return jsonify({'requeued': alert_queue.requeue_dead_letters(max_attempts, ids)})
+    return jsonify({'purged': alert_queue.purge_dead_letters(max_attempts, ids)})
+
+
 # ==================== ALARM NOTES CRUD ====================
 
 @alarm_bp.route('/alarms', methods=['GET'])
 def get_alarms():
-    """Get all alarms with optional filters"""
-    status = request.args.get('status')
-    severity = request.args.get('severity')
-    source = request.args.get('source')
-    customer_id = request.args.get('customer_id')
-    
-    query = AlarmNote.query
-    
-    if status:
-        query = query.filter(AlarmNote.status == status)
-    if severity:
-        query = query.filter(AlarmNote.severity == severity)
-    if source:
-        query = query.filter(AlarmNote.source == source)
-    if customer_id:
-        query = query.filter(AlarmNote.customer_id == customer_id)
-    
-    alarms = query.order_by(AlarmNote.created_at.desc()).all()
-    
-    return jsonify({
-        'count': len(alarms),
-        'data': [a.to_dict() for a in alarms]
-    })
+    """
+    Keyset-paginated alarm list, newest first.
+    Query params: status, severity (comma separated), source, customer_id,
+    roots_only=true (hide correlated child alarms), from, to (ISO dates, on created_at),
+    fields (comma separated subset of the alarm fields), cursor, limit (default 50, max 500)
+    """
+    try:
+        params = parse_alarm_list_args(request.args, AlarmNote.LIST_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(alarm_list.list_alarms(**params))
 
 
 @alarm_bp.route('/alarms/<alarm_id>', methods=['GET'])
@@ -170,6 +146,8 @@ def create_alarm():
         return jsonify({'error': 'alertname is required'}), 400
     
     alarm_id = generate_alarm_id()
+    # CI and customer default to the CMDB CI matching ci_id / instance / target
+    ci = ci_resolver.resolve(data.get('ci_id'), data.get('instance'), data.get('target'))
     
     alarm = AlarmNote(
         alarm_id=alarm_id,
@@ -178,9 +156,9 @@ def create_alarm():
         severity=data.get('severity', 'warning'),
         target=data.get('target'),
         instance=data.get('instance'),
-        ci_id=data.get('ci_id'),
-        customer_id=data.get('customer_id'),
-        customer_name=data.get('customer_name'),
+        ci_id=ci.ci_id if ci else data.get('ci_id'),
+        customer_id=data.get('customer_id') or (ci.customer_id if ci else None),
+        customer_name=data.get('customer_name') or (ci.customer_name if ci else None),
         status='open',
         note=data.get('note'),
         assigned_to=data.get('assigned_to'),
@@ -190,6 +168,8 @@ def create_alarm():
     
     db.session.add(alarm)
     add_history(alarm_id, 'created', None, 'open', data.get('created_by', 'user'), 'Manual alarm note created')
+    db.session.flush()
+    alarm_rollup.apply([(None, snapshot(alarm))])
     db.session.commit()
     
     return jsonify(alarm.to_dict()), 201
@@ -198,12 +178,14 @@ def create_alarm():
 @alarm_bp.route('/alarms/<alarm_id>', methods=['PUT'])
 def update_alarm(alarm_id):
     """Update alarm note"""
-    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).first()
+    # Locked: the rollup deltas are computed from this snapshot (services/alarm_rollup.py)
+    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).with_for_update().first()
     if not alarm:
         return jsonify({'error': 'Alarm not found'}), 404
     
     data = request.get_json()
     changed_by = data.get('changed_by', 'user')
+    before = snapshot(alarm)
     
     # Track status change
     if 'status' in data and data['status'] != alarm.status:
@@ -216,12 +198,15 @@ def update_alarm(alarm_id):
             alarm.resolved_at = datetime.utcnow()
         
         add_history(alarm_id, 'status_changed', old_status, data['status'], changed_by)
+        # Re-sends must see the new status (services/alarm_dedup.py)
+        alarm_dedup.forget(alarm.external_id)
     
     # Update other fields
     for field in ['note', 'root_cause', 'resolution', 'assigned_to', 'ticket_id', 'ticket_url', 'ci_id', 'customer_id']:
         if field in data:
             setattr(alarm, field, data[field])
     
+    alarm_rollup.apply([(before, snapshot(alarm))])
     db.session.commit()
     return jsonify(alarm.to_dict())
 
@@ -229,17 +214,20 @@ def update_alarm(alarm_id):
 @alarm_bp.route('/alarms/<alarm_id>/acknowledge', methods=['PUT'])
 def acknowledge_alarm(alarm_id):
     """Set alarm status to in_progress"""
-    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).first()
+    # Locked: the rollup deltas are computed from this snapshot (services/alarm_rollup.py)
+    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).with_for_update().first()
     if not alarm:
         return jsonify({'error': 'Alarm not found'}), 404
     
     data = request.get_json() or {}
+    before = snapshot(alarm)
     old_status = alarm.status
     alarm.status = 'in_progress'
     alarm.acknowledged_at = datetime.utcnow()
     alarm.assigned_to = data.get('assigned_to', alarm.assigned_to)
     
     add_history(alarm_id, 'acknowledged', old_status, 'in_progress', data.get('changed_by', 'user'))
+    alarm_rollup.apply([(before, snapshot(alarm))])
     db.session.commit()
     
     return jsonify(alarm.to_dict())
@@ -248,11 +236,13 @@ def acknowledge_alarm(alarm_id):
 @alarm_bp.route('/alarms/<alarm_id>/resolve', methods=['PUT'])
 def resolve_alarm(alarm_id):
     """Set alarm status to resolved"""
-    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).first()
+    # Locked: the rollup deltas are computed from this snapshot (services/alarm_rollup.py)
+    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).with_for_update().first()
     if not alarm:
         return jsonify({'error': 'Alarm not found'}), 404
     
     data = request.get_json() or {}
+    before = snapshot(alarm)
     old_status = alarm.status
     alarm.status = 'resolved'
     alarm.resolved_at = datetime.utcnow()
@@ -260,6 +250,8 @@ def resolve_alarm(alarm_id):
     alarm.root_cause = data.get('root_cause', alarm.root_cause)
     
     add_history(alarm_id, 'resolved', old_status, 'resolved', data.get('changed_by', 'user'), data.get('resolution'))
+    alarm_dedup.forget(alarm.external_id)
+    alarm_rollup.apply([(before, snapshot(alarm))])
     db.session.commit()
     
     return jsonify(alarm.to_dict())
@@ -282,6 +274,16 @@ def link_ticket(alarm_id):
     return jsonify(alarm.to_dict())
 
 
+@alarm_bp.route('/alarms/<alarm_id>/children', methods=['GET'])
+def get_alarm_children(alarm_id):
+    """Alarms correlated under this root-cause alarm"""
+    children = AlarmNote.query.filter_by(parent_alarm_id=alarm_id).order_by(AlarmNote.created_at).all()
+    return jsonify({
+        'count': len(children),
+        'data': [a.to_dict() for a in children]
+    })
+
+
 @alarm_bp.route('/alarms/<alarm_id>/history', methods=['GET'])
 def get_alarm_history(alarm_id):
     """Get audit history for an alarm"""
@@ -292,31 +294,156 @@ def get_alarm_history(alarm_id):
 @alarm_bp.route('/alarms/<alarm_id>', methods=['DELETE'])
 def delete_alarm(alarm_id):
     """Delete alarm note"""
-    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).first()
+    # Locked: the rollup deltas are computed from this snapshot (services/alarm_rollup.py)
+    alarm = AlarmNote.query.filter_by(alarm_id=alarm_id).with_for_update().first()
     if not alarm:
         return jsonify({'error': 'Alarm not found'}), 404
     
     # Also delete history
     AlarmHistory.query.filter_by(alarm_id=alarm_id).delete()
+    alarm_rollup.apply([(snapshot(alarm), None)])
+    alarm_dedup.forget(alarm.external_id)
     db.session.delete(alarm)
     db.session.commit()
     
     return jsonify({'message': 'Alarm deleted'})
 
 
+# ==================== CORRELATION ====================
+
+@alarm_bp.route('/alarms/incidents', methods=['GET'])
+def get_alarm_incidents():
+    """
+    Unresolved root-cause alarms with the number of alarms correlated under them
+    (services/correlation_engine.py), largest incidents first.
+    """
+    children = db.session.query(
+        AlarmNote.parent_alarm_id.label('root_id'),
+        db.func.count(AlarmNote.id).label('child_count'),
+        db.func.count(AlarmNote.id).filter(AlarmNote.status != 'resolved').label('open_child_count')
+    ).filter(AlarmNote.parent_alarm_id.isnot(None)).group_by(AlarmNote.parent_alarm_id).subquery()
+    rows = db.session.query(AlarmNote, children.c.child_count, children.c.open_child_count).join(
+        children, children.c.root_id == AlarmNote.alarm_id
+    ).filter(AlarmNote.status != 'resolved').order_by(
+        children.c.child_count.desc(), AlarmNote.created_at.desc()
+    ).all()
+    
+    return jsonify({
+        'count': len(rows),
+        'data': [{**alarm.to_dict(), 'child_count': child_count, 'open_child_count': open_child_count}
+                 for alarm, child_count, open_child_count in rows]
+    })
+
+
 # ==================== STATISTICS ====================
 
 @alarm_bp.route('/alarms/stats', methods=['GET'])
 def get_alarm_stats():
-    """Get alarm statistics"""
-    total = AlarmNote.query.count()
-    by_status = db.session.query(AlarmNote.status, db.func.count(AlarmNote.id)).group_by(AlarmNote.status).all()
-    by_severity = db.session.query(AlarmNote.severity, db.func.count(AlarmNote.id)).group_by(AlarmNote.severity).all()
-    by_source = db.session.query(AlarmNote.source, db.func.count(AlarmNote.id)).group_by(AlarmNote.source).all()
+    """Alarm counts by status, severity and source, with MTTA / MTTR (from the daily rollup)"""
+    return jsonify(alarm_rollup.stats())
+
+
+@alarm_bp.route('/alarms/stats/timeseries', methods=['GET'])
+def get_alarm_timeseries():
+    """
+    Alarm volume, MTTA and MTTR over time, from the hourly/daily rollups.
+    Query params: from, to (ISO dates or datetimes; default the last 24 hours),
+    interval = hour | day | week | month (default hour),
+    group_by = customer | ci | severity | source | status, customer_id, ci_id, severity, source
+    """
+    try:
+        now = datetime.utcnow()
+        end = parse_datetime_arg(request.args.get('to'), 'to', end_of_day=True) or now
+        start = parse_datetime_arg(request.args.get('from'), 'from') or end - timedelta(days=1)
+        return jsonify(alarm_rollup.timeseries(
+            start, end,
+            interval=request.args.get('interval', 'hour'),
+            group_by=request.args.get('group_by'),
+            customer_id=request.args.get('customer_id'),
+            ci_id=request.args.get('ci_id'),
+            severity=request.args.get('severity'),
+            source=request.args.get('source'),
+        ))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# ==================== ALARM RULES ====================
+
+RULE_FIELDS = ('name', 'description', 'alertname_pattern', 'severity', 'customer_id', 'ci_type',
+               'create_ticket', 'ticket_priority', 'ticket_category', 'assign_to', 'notify_webhook', 'enabled')
+
+
+def apply_rule_fields(rule, data):
+    """Copy the rule fields present in `data`; ValueError on a missing name or a bad pattern."""
+    for field in RULE_FIELDS:
+        if field in data:
+            setattr(rule, field, data[field])
+    if not rule.name:
+        raise ValueError('name is required')
+    if rule.alertname_pattern:
+        try:
+            re.compile(rule.alertname_pattern)
+        except re.error as e:
+            raise ValueError(f'invalid alertname_pattern: {e}')
+
+
+@alarm_bp.route('/alarm-rules', methods=['GET'])
+def get_alarm_rules():
+    """Auto-ticket rules, evaluated in id order against new Alertmanager alarms"""
+    rules = AlarmRule.query.order_by(AlarmRule.id).all()
+    return jsonify({'count': len(rules), 'data': [r.to_dict() for r in rules]})
+
+
+@alarm_bp.route('/alarm-rules', methods=['POST'])
+def create_alarm_rule():
+    """Create alarm rule"""
+    rule = AlarmRule()
+    try:
+        apply_rule_fields(rule, request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'total': total,
-        'by_status': dict(by_status),
-        'by_severity': dict(by_severity),
-        'by_source': dict(by_source)
-    })
+    db.session.add(rule)
+    # Ingestion evaluates a compiled copy of the rules: rebuild it
+    alarm_rule_engine.invalidate()
+    db.session.commit()
+    
+    return jsonify(rule.to_dict()), 201
+
+
+@alarm_bp.route('/alarm-rules/<int:rule_id>', methods=['PUT'])
+def update_alarm_rule(rule_id):
+    """Update alarm rule"""
+    rule = AlarmRule.query.get(rule_id)
+    if not rule:
+        return jsonify({'error': 'Rule not found'}), 404
+    
+    try:
+        apply_rule_fields(rule, request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    alarm_rule_engine.invalidate()
+    db.session.commit()
+    return jsonify(rule.to_dict())
+
+
+@alarm_bp.route('/alarm-rules/<int:rule_id>', methods=['DELETE'])
+def delete_alarm_rule(rule_id):
+    """Delete alarm rule"""
+    rule = AlarmRule.query.get(rule_id)
+    if not rule:
+        return jsonify({'error': 'Rule not found'}), 404
+    
+    db.session.delete(rule)
+    alarm_rule_engine.invalidate()
+    db.session.commit()
+    
+    return jsonify({'message': 'Rule deleted'})
+
+
+@alarm_bp.route('/alarm-rules/actions', methods=['GET'])
+def get_alarm_action_metrics():
+    """Pending and dead-letter rule actions (tickets, webhook notifications)"""
+    return jsonify(alarm_actions.metrics(current_app.config.get('ALARM_ACTION_MAX_ATTEMPTS', 5)))
@@ -0,0 +1,181 @@
+"""
+Batch API Route
+Answers several read-only report sections in one round trip, e.g. a dashboard
+page load:
+
+    POST /api/batch
+    {"sections": [{"section": "summary"},
+                  {"id": "perf", "section": "customer_performance",
+                   "params": {"customer_id": "C1", "period": "90d"}}]}
+
+Each section is dispatched to its regular GET endpoint (same parameters, same
+auth header, same payload), so results are identical to the separate calls.
+Sections run concurrently on a process-wide bounded pool and read one exported
+PostgreSQL snapshot (pg_export_snapshot), so they all see the same committed
+data even while a sync is writing.
+
+The exporting connection stays checked out while the sections wait for the
+pool, so at most BATCH_MAX_CONCURRENT batches run at once per process (at most
+BATCH_MAX_CONCURRENT + BATCH_MAX_WORKERS connections); the others wait for a
+slot without holding a connection, and get 503 + Retry-After after
+BATCH_QUEUE_TIMEOUT_SECONDS.
+"""
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.routing import BuildError
+from models.ticket import db
+
+logger = logging.getLogger(__name__)
+
+batch_bp = Blueprint('batch', __name__)
+
+# section name -> GET endpoint answering it (path parameters come from `params`)
+SECTIONS = {
+    'summary': 'get_summary',
+    'customers': 'get_customers',
+    'customer_detail': 'get_customer_detail',
+    'customer_tickets': 'get_customer_tickets',
+    'customer_performance': 'get_customer_performance',
+    'engineers': 'get_engineers',
+    'engineer_workload': 'get_engineer_workload',
+    'engineer_detail': 'get_engineer_detail',
+    'engineer_tickets': 'get_engineer_tickets',
+    'engineer_performance': 'get_engineer_performance',
+    'percentiles': 'get_percentiles',
+    'alarms': 'alarm.get_alarms',
+    'alarm_stats': 'alarm.get_alarm_stats',
+    'alarm_timeseries': 'alarm.get_alarm_timeseries',
+    'time_spent': 'time_spent.get_time_spent',
+    'time_spent_stats': 'time_spent.get_stats',
+    'time_spent_summary': 'time_spent.get_time_spent_summary',
+    'time_spent_by_category': 'time_spent.get_time_spent_by_category',
+    'time_spent_by_group': 'time_spent.get_time_spent_by_group',
+    'monthly_report': 'report.get_monthly_report',
+    'forecast': 'report.get_report_forecast',
+}
+
+SNAPSHOT_ID = re.compile(r'^[0-9A-F]+-[0-9A-F]+(-[0-9A-F]+)?$')
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(app):
+    """The process-wide section pool (BATCH_MAX_WORKERS threads)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config.get('BATCH_MAX_WORKERS', 4),
+                                           thread_name_prefix='batch')
+        return _executor
+
+
+def get_slots(app):
+    """The process-wide semaphore of running batches (BATCH_MAX_CONCURRENT)."""
+    global _slots
+    with _executor_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(app.config.get('BATCH_MAX_CONCURRENT', 4))
+        return _slots
+
+
+def parse_sections(body, max_sections):
+    """
+    Validate the batch body into [(id, section name, params)].
+    Raises ValueError with a client-facing message.
+    """
+    sections = (body or {}).get('sections') if isinstance(body, dict) else None
+    if not isinstance(sections, list) or not sections:
+        raise ValueError("sections must be a non-empty list")
+    if len(sections) > max_sections:
+        raise ValueError(f"at most {max_sections} sections per batch")
+
+    parsed = []
+    for entry in sections:
+        if isinstance(entry, str):
+            entry = {'section': entry}
+        if not isinstance(entry, dict) or entry.get('section') not in SECTIONS:
+            raise ValueError(f"section must be one of: {', '.join(SECTIONS)}")
+        params = entry.get('params') or {}
+        if not isinstance(params, dict):
+            raise ValueError("params must be an object")
+        section_id = str(entry.get('id') or entry['section'])
+        if any(section_id == p[0] for p in parsed):
+            raise ValueError(f"duplicate section id '{section_id}'")
+        parsed.append((section_id, entry['section'], params))
+    return parsed
+
+
+def _run_section(app, url, headers, snapshot_id):
+    """Dispatch one section as a GET request in its own request context (and DB session)."""
+    with app.test_request_context(url, method='GET', headers=headers):
+        try:
+            if snapshot_id:
+                # Must be the first statements of the session's transaction
+                db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+                db.session.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+            response = app.full_dispatch_request()
+            return response.status_code, response.get_json(silent=True)
+        except Exception as e:
+            logger.exception(f"Batch section {url} failed")
+            return 500, {'error': str(e)}
+        finally:
+            db.session.rollback()
+
+
+def _export_snapshot(connection):
+    try:
+        connection.execute(text('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY'))
+        snapshot_id = connection.execute(text('SELECT pg_export_snapshot()')).scalar()
+    except SQLAlchemyError as e:
+        logger.warning(f"Batch snapshot unavailable, sections read independently: {e}")
+        return None
+    return snapshot_id if SNAPSHOT_ID.match(snapshot_id or '') else None
+
+
+@batch_bp.route('/api/batch', methods=['POST'])
+def run_batch():
+    """
+    Run several report sections in one request.
+    Body: {"sections": [{"section": <name>, "id": <optional result key>, "params": {...}}, ...]}
+    (a bare section name is accepted for a section without parameters).
+    Returns {"results": {<id>: {"status": <HTTP status>, "data": <payload>}}}.
+    """
+    app = current_app._get_current_object()
+    try:
+        sections = parse_sections(request.get_json(silent=True), app.config.get('BATCH_MAX_SECTIONS', 12))
+        adapter = app.url_map.bind(request.host)
+        urls = [(section_id, adapter.build(SECTIONS[name], params, method='GET'))
+                for section_id, name, params in sections]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except BuildError as e:
+        return jsonify({"error": f"missing path parameter for {e.endpoint}"}), 400
+
+    headers = {k: v for k, v in request.headers.items() if k in ('Authorization', 'Accept-Language')}
+    executor = get_executor(app)
+    slots = get_slots(app)
+    if not slots.acquire(timeout=app.config.get('BATCH_QUEUE_TIMEOUT_SECONDS', 30)):
+        response = jsonify({"error": "too many concurrent batches"})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    try:
+        # The exporting transaction must stay open until every section has imported the snapshot
+        with db.engine.connect() as connection:
+            snapshot_id = _export_snapshot(connection)
+            futures = {section_id: executor.submit(_run_section, app, url, headers, snapshot_id)
+                       for section_id, url in urls}
+            results = {}
+            for section_id, future in futures.items():
+                status, data = future.result()
+                results[section_id] = {"status": status, "data": data}
+            connection.rollback()
+    finally:
+        slots.release()
+    return jsonify({"results": results})
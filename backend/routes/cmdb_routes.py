@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-from database import db
+from models.ticket import db
 from models.cmdb import CI, CIRelationship, Location, Service, SLA, Alarm
+from services.ci_resolver import ci_resolver
+from services.correlation_engine import correlation_engine
 
 cmdb_bp = Blueprint('cmdb', __name__, url_prefix='/api/cmdb')
+# Relationships are registered on their own: alarm correlation depends on them
+cmdb_relationship_bp = Blueprint('cmdb_relationships', __name__, url_prefix='/api/cmdb')
 
 # ==================== CI (Assets) ====================
 
@@ -111,6 +115,8 @@ def delete_asset(ci_id):
         return jsonify({'success': False, 'error': 'CI not found'}), 404
     
     db.session.delete(ci)
+    # Alarm enrichment indexes CIs in memory: deletes force a reload
+    ci_resolver.invalidate()
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'CI deleted'})
@@ -118,7 +124,7 @@ def delete_asset(ci_id):
 
 # ==================== Relationships ====================
 
-@cmdb_bp.route('/relationships', methods=['GET'])
+@cmdb_relationship_bp.route('/relationships', methods=['GET'])
 def get_relationships():
     """Get all CI relationships"""
     relationships = CIRelationship.query.all()
@@ -136,7 +142,7 @@ def get_relationships():
     })
 
 
-@cmdb_bp.route('/relationships', methods=['POST'])
+@cmdb_relationship_bp.route('/relationships', methods=['POST'])
 def create_relationship():
     """Create CI relationship"""
     data = request.get_json()
@@ -150,11 +156,27 @@ def create_relationship():
     )
     
     db.session.add(rel)
+    # Alarm correlation walks these relationships: rebuild its graph
+    correlation_engine.invalidate()
     db.session.commit()
     
     return jsonify({'success': True, 'id': rel.id}), 201
 
 
+@cmdb_relationship_bp.route('/relationships/<int:rel_id>', methods=['DELETE'])
+def delete_relationship(rel_id):
+    """Delete CI relationship"""
+    rel = CIRelationship.query.get(rel_id)
+    if not rel:
+        return jsonify({'success': False, 'error': 'Relationship not found'}), 404
+    
+    db.session.delete(rel)
+    correlation_engine.invalidate()
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Relationship deleted'})
+
+
 # ==================== Locations ====================
 
 @cmdb_bp.route('/locations', methods=['GET'])
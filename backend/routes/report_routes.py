@@ -1,7 +1,9 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
+from models.report import ReportJob
 from services.itsm_service import ITSMService
-import calendar
+from services.report_service import monthly_report_service, run_monthly_report_job
 from datetime import datetime
+import threading
 
 report_bp = Blueprint('report', __name__)
 itsm_service = ITSMService()
@@ -23,55 +25,13 @@ def get_monthly_report():
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
-    # Calculate last day of the month
-    _, last_day = calendar.monthrange(year, month)
-
-    weeks = []
-    ranges = [
-        (1, 7),
-        (8, 14),
-        (15, 21),
-        (22, 28)
-    ]
-    
-    # Handle up to Week 4
-    for i, (start, end) in enumerate(ranges, 1):
-        weeks.append({
-            "week_number": i,
-            "from_date": f"{year:04d}-{month:02d}-{start:02d}",
-            "to_date": f"{year:04d}-{month:02d}-{end:02d}"
-        })
-    
-    # Handle Week 5
-    if last_day >= 29:
-        weeks.append({
-            "week_number": 5,
-            "from_date": f"{year:04d}-{month:02d}-29",
-            "to_date": f"{year:04d}-{month:02d}-{last_day:02d}"
-        })
-
-    # Prepare complete response data
-    report_data = {
-        "customer_id": customer_id,
-        "year": year,
-        "month": month,
-        "total_days": last_day,
-        "weekly_breakdown": []
-    }
-
-    # Fetch data for each week
-    for week in weeks:
-        from_dt = datetime.strptime(week['from_date'], '%Y-%m-%d')
-        # End date should be end of day
-        to_dt = datetime.strptime(week['to_date'], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-        
-        # Get data from service
-        stats = itsm_service.get_stats_for_range(customer_id, from_dt, to_dt)
-        
-        report_data['weekly_breakdown'].append({
-            **week,
-            "summary": stats
-        })
+    if request.args.get('live', 'false').lower() != 'true':
+        snapshot = monthly_report_service.get_snapshot(customer_id, year, month)
+        if snapshot:
+            return jsonify({**snapshot.report, "snapshot": snapshot.snapshot_info()})
+
+    # Weekly breakdown for this customer in one grouped query
+    report_data = monthly_report_service.build_monthly_reports(year, month, [customer_id])[customer_id]
 
     return jsonify(report_data)
 
@@ -84,10 +44,51 @@ def get_report_forecast():
     if not all([customer_id, year_str, month_str]):
         return jsonify({"error": "customer_id, year, and month are required"}), 400
 
+    seasonal = request.args.get('seasonal', 'false').lower() == 'true'
+
     try:
         year = int(year_str)
         month = int(month_str)
-        forecast = itsm_service.get_forecast(customer_id, year, month)
+        if not seasonal and request.args.get('live', 'false').lower() != 'true':
+            snapshot = monthly_report_service.get_snapshot(customer_id, year, month)
+            if snapshot and snapshot.forecast:
+                return jsonify({**snapshot.forecast, "snapshot": snapshot.snapshot_info()})
+        forecast = itsm_service.get_forecast(customer_id, year, month, seasonal=seasonal)
         return jsonify(forecast)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@report_bp.route('/api/v1/reports/itsm/monthly/generate', methods=['POST'])
+def generate_monthly_reports():
+    """
+    Start a background job that snapshots the monthly report + forecast of every customer.
+    Body: {"year": 2026, "month": 1} (default: previous month)
+    """
+    data = request.get_json(silent=True) or {}
+    today = datetime.now()
+    default_year, default_month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+    try:
+        year = int(data.get('year', default_year))
+        month = int(data.get('month', default_month))
+        if not (1 <= month <= 12):
+            raise ValueError("Month must be between 1 and 12")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = monthly_report_service.create_job(year, month, data.get('created_by', 'api'))
+    threading.Thread(
+        target=run_monthly_report_job,
+        args=(current_app._get_current_object(), job.id),
+        daemon=True
+    ).start()
+
+    return jsonify({"message": "Report generation started in background", "job": job.to_dict()}), 202
+
+@report_bp.route('/api/v1/reports/itsm/jobs/<int:job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """Progress of a report generation job"""
+    job = ReportJob.query.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
@@ -7,10 +7,19 @@ from sqlalchemy import func, desc
 from models.ticket import db
 from models.time_spent import TechTimeSpent
 from services.time_spent_sync import TimeSpentSyncService
+from services.time_spent_rollup import time_spent_rollup
 
 time_spent_bp = Blueprint('time_spent', __name__)
 
 
+def exact_requested():
+    """
+    Distinct ticket counts come from the rollup's HyperLogLog sketches (about 1.6%
+    error on large counts); ?exact=true counts them over tech_time_spent (audits).
+    """
+    return request.args.get('exact', 'false').lower() == 'true'
+
+
 @time_spent_bp.route('/api/time-spent', methods=['GET'])
 def get_time_spent():
     """
@@ -69,36 +78,24 @@ def get_time_spent_summary():
     Get summary of time spent grouped by technician.
     Query params:
         - group: Filter by group name
+        - exact: true to count distinct tickets exactly
     """
     try:
         group_filter = request.args.get('group')
         
-        query = db.session.query(
-            TechTimeSpent.technician,
-            TechTimeSpent.group_name,
-            func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
-            func.count(TechTimeSpent.id).label('entry_count'),
-            func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
-        ).filter(TechTimeSpent.technician.isnot(None))
-        
-        if group_filter:
-            query = query.filter(TechTimeSpent.group_name.ilike(f'%{group_filter}%'))
-        
-        query = query.group_by(
-            TechTimeSpent.technician,
-            TechTimeSpent.group_name
-        ).order_by(desc('total_minutes'))
-        
-        results = query.all()
+        if exact_requested():
+            results = _summary_exact(group_filter)
+        else:
+            results = time_spent_rollup.summary(group_filter)
         
         data = []
         for row in results:
-            total_mins = row.total_minutes or 0
+            total_mins = row['total_minutes'] or 0
             data.append({
-                'technician': row.technician,
-                'group_name': row.group_name,
-                'ticket_count': row.ticket_count,
-                'entry_count': row.entry_count,
+                'technician': row['technician'],
+                'group_name': row['group_name'],
+                'ticket_count': row['ticket_count'],
+                'entry_count': row['entry_count'],
                 'total_minutes': total_mins,
                 'total_hours': round(total_mins / 60, 2),
                 'formatted': f"{total_mins // 60}:{total_mins % 60:02d}"
@@ -124,26 +121,49 @@ def get_time_spent_summary():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _summary_exact(group_filter):
+    query = db.session.query(
+        TechTimeSpent.technician,
+        TechTimeSpent.group_name,
+        func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
+        func.count(TechTimeSpent.id).label('entry_count'),
+        func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
+    ).filter(TechTimeSpent.technician.isnot(None))
+    
+    if group_filter:
+        query = query.filter(TechTimeSpent.group_name.ilike(f'%{group_filter}%'))
+    
+    query = query.group_by(
+        TechTimeSpent.technician,
+        TechTimeSpent.group_name
+    ).order_by(desc('total_minutes'))
+    
+    return [row._asdict() for row in query.all()]
+
+
 @time_spent_bp.route('/api/time-spent/by-category', methods=['GET'])
 def get_time_spent_by_category():
-    """Get time spent breakdown by category."""
+    """Get time spent breakdown by category (?exact=true counts distinct tickets exactly)."""
     try:
-        query = db.session.query(
-            TechTimeSpent.category,
-            func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
-            func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
-        ).filter(TechTimeSpent.category.isnot(None))
-        
-        query = query.group_by(TechTimeSpent.category).order_by(desc('total_minutes'))
-        
-        results = query.all()
+        if exact_requested():
+            query = db.session.query(
+                TechTimeSpent.category,
+                func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
+                func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
+            ).filter(TechTimeSpent.category.isnot(None))
+            
+            query = query.group_by(TechTimeSpent.category).order_by(desc('total_minutes'))
+            
+            results = [row._asdict() for row in query.all()]
+        else:
+            results = time_spent_rollup.by_category()
         
         data = []
         for row in results:
-            total_mins = row.total_minutes or 0
+            total_mins = row['total_minutes'] or 0
             data.append({
-                'category': row.category,
-                'ticket_count': row.ticket_count,
+                'category': row['category'],
+                'ticket_count': row['ticket_count'],
                 'total_minutes': total_mins,
                 'total_hours': round(total_mins / 60, 2),
                 'formatted': f"{total_mins // 60}:{total_mins % 60:02d}"
@@ -160,26 +180,29 @@ def get_time_spent_by_category():
 
 @time_spent_bp.route('/api/time-spent/by-group', methods=['GET'])
 def get_time_spent_by_group():
-    """Get time spent breakdown by group/queue."""
+    """Get time spent breakdown by group/queue (?exact=true counts distinct tickets exactly)."""
     try:
-        query = db.session.query(
-            TechTimeSpent.group_name,
-            func.count(func.distinct(TechTimeSpent.technician)).label('technician_count'),
-            func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
-            func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
-        ).filter(TechTimeSpent.group_name.isnot(None))
-        
-        query = query.group_by(TechTimeSpent.group_name).order_by(desc('total_minutes'))
-        
-        results = query.all()
+        if exact_requested():
+            query = db.session.query(
+                TechTimeSpent.group_name,
+                func.count(func.distinct(TechTimeSpent.technician)).label('technician_count'),
+                func.count(func.distinct(TechTimeSpent.request_id)).label('ticket_count'),
+                func.sum(TechTimeSpent.time_spent_minutes).label('total_minutes')
+            ).filter(TechTimeSpent.group_name.isnot(None))
+            
+            query = query.group_by(TechTimeSpent.group_name).order_by(desc('total_minutes'))
+            
+            results = [row._asdict() for row in query.all()]
+        else:
+            results = time_spent_rollup.by_group()
         
         data = []
         for row in results:
-            total_mins = row.total_minutes or 0
+            total_mins = row['total_minutes'] or 0
             data.append({
-                'group_name': row.group_name,
-                'technician_count': row.technician_count,
-                'ticket_count': row.ticket_count,
+                'group_name': row['group_name'],
+                'technician_count': row['technician_count'],
+                'ticket_count': row['ticket_count'],
                 'total_minutes': total_mins,
                 'total_hours': round(total_mins / 60, 2),
                 'formatted': f"{total_mins // 60}:{total_mins % 60:02d}"
@@ -207,22 +230,30 @@ def trigger_sync():
 
 @time_spent_bp.route('/api/time-spent/stats', methods=['GET'])
 def get_stats():
-    """Get overall statistics for time spent data."""
+    """Get overall statistics for time spent data (?exact=true counts over every entry)."""
     try:
-        total_records = TechTimeSpent.query.count()
-        total_tickets = db.session.query(
-            func.count(func.distinct(TechTimeSpent.request_id))
-        ).scalar() or 0
-        total_technicians = db.session.query(
-            func.count(func.distinct(TechTimeSpent.technician))
-        ).scalar() or 0
-        total_minutes = db.session.query(
-            func.sum(TechTimeSpent.time_spent_minutes)
-        ).scalar() or 0
-        
-        last_sync = db.session.query(
-            func.max(TechTimeSpent.synced_at)
-        ).scalar()
+        if exact_requested():
+            total_records = TechTimeSpent.query.count()
+            total_tickets = db.session.query(
+                func.count(func.distinct(TechTimeSpent.request_id))
+            ).scalar() or 0
+            total_technicians = db.session.query(
+                func.count(func.distinct(TechTimeSpent.technician))
+            ).scalar() or 0
+            total_minutes = db.session.query(
+                func.sum(TechTimeSpent.time_spent_minutes)
+            ).scalar() or 0
+            
+            last_sync = db.session.query(
+                func.max(TechTimeSpent.synced_at)
+            ).scalar()
+        else:
+            stats = time_spent_rollup.stats()
+            total_records = stats['entry_count']
+            total_tickets = stats['ticket_count']
+            total_technicians = stats['technician_count']
+            total_minutes = stats['total_minutes']
+            last_sync = stats['last_sync']
         
         return jsonify({
             'success': True,
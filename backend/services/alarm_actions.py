@@ -0,0 +1,299 @@
+"""
+Alarm Actions
+Executes the actions queued by services/alarm_rule_engine.py in alarm_action_queue,
+in three steps so no row lock or transaction is held during the HTTP calls:
+
+1. claim: a worker thread takes a batch of due actions with FOR UPDATE SKIP LOCKED
+   (like services/alert_queue.py), leases them (claimed_until) and commits;
+2. execute, outside any transaction:
+   - create_ticket: one ServiceDesk Plus request per alarm (POST {SDP_BASE_URL}/requests);
+     alarms that already have a ticket, or were deleted, are skipped.
+   - notify_webhook: one POST per URL carrying every alarm of the batch for it,
+     {"alarms": [alarm + "rule"]}, instead of one call per alarm.
+3. record, one transaction per ticket / webhook call: the request id becomes the
+   alarm's ticket_id (with a 'ticket_linked' history row) and executed actions are
+   deleted; failed ones keep attempts + 1 and the error, and are retried after
+   ALARM_ACTION_RETRY_SECONDS doubling per attempt (at most
+   ALARM_ACTION_RETRY_MAX_SECONDS). After ALARM_ACTION_MAX_ATTEMPTS failures an
+   action is kept as a dead letter.
+
+An action whose lease expired (the worker died, or recording failed) is claimed
+again. Ticket creation is idempotent: the subject carries the alarm id, and a
+retried or re-claimed action first looks the request up in SDP. Webhook delivery
+is at least once.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+from models.ticket import db
+from models.alarm import AlarmAction, AlarmNote, AlarmHistory
+
+logger = logging.getLogger(__name__)
+
+SDP_PRIORITIES = {'critical': 'High', 'warning': 'Medium'}
+
+# A claimed action, copied out of the claiming transaction
+Claim = namedtuple('Claim', ['id', 'alarm_id', 'action', 'params', 'attempts', 'reclaimed'])
+
+
+def retry_delay(attempts, base, cap):
+    """Seconds before retrying an action that failed `attempts` times: base, 2 x base, 4 x base, ... up to cap."""
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+def lease_seconds(claims, timeout):
+    """
+    How long a batch is leased: every HTTP call it can make timing out, plus one
+    timeout of slack. A retried or re-claimed create_ticket makes two calls
+    (find_ticket, create_ticket), others at most one.
+    """
+    calls = sum(2 if claim.action == 'create_ticket' and (claim.attempts or claim.reclaimed) else 1
+                for claim in claims)
+    return timeout * (calls + 1)
+
+
+def ticket_marker(alarm_id):
+    """Part of the ticket subject identifying its alarm (looked up before re-creating a ticket)."""
+    return f"[{alarm_id}]"
+
+
+def ticket_request(alarm, params):
+    """ServiceDesk Plus v3 `request` of an alarm (AlarmNote.to_dict())."""
+    target = alarm['target'] or alarm['ci_id'] or ''
+    request = {
+        'subject': f"[{alarm['severity'].upper()}] {alarm['alertname']} - {target}".rstrip(' -')
+                   + f" {ticket_marker(alarm['alarm_id'])}",
+        'description': (f"{alarm['note'] or ''}<br>Alarm {alarm['alarm_id']}, customer {alarm['customer_name'] or '-'}, "
+                        f"CI {alarm['ci_id'] or '-'}, rule {params.get('rule')}"),
+        'priority': {'name': params.get('ticket_priority') or SDP_PRIORITIES.get(alarm['severity'], 'Medium')},
+    }
+    if params.get('ticket_category'):
+        request['category'] = {'name': params['ticket_category']}
+    if params.get('assign_to'):
+        request['technician'] = {'email_id' if '@' in params['assign_to'] else 'name': params['assign_to']}
+    return request
+
+
+def sdp_headers(api_key):
+    return {'authtoken': api_key, 'Accept': 'application/vnd.manageengine.sdp.v3+json'}
+
+
+def find_ticket(base_url, api_key, alarm_id, timeout):
+    """Id of the SDP request already created for an alarm, or None."""
+    r = requests.get(
+        f"{base_url}/requests",
+        headers=sdp_headers(api_key),
+        params={'input_data': json.dumps({'list_info': {
+            'row_count': 1,
+            'search_criteria': {'field': 'subject', 'condition': 'contains', 'value': ticket_marker(alarm_id)},
+            'fields_required': ['subject'],
+        }})},
+        timeout=timeout
+    )
+    if r.status_code != 200:
+        raise ValueError(f"HTTP {r.status_code}: {r.text[:500]}")
+    found = r.json().get('requests') or []
+    return str(found[0]['id']) if found else None
+
+
+def create_ticket(base_url, api_key, alarm, params, timeout):
+    """Create the SDP request of an alarm and return its id."""
+    r = requests.post(
+        f"{base_url}/requests",
+        headers=sdp_headers(api_key),
+        data={'input_data': json.dumps({'request': ticket_request(alarm, params)})},
+        timeout=timeout
+    )
+    if r.status_code not in (200, 201):
+        raise ValueError(f"HTTP {r.status_code}: {r.text[:500]}")
+    return str(r.json()['request']['id'])
+
+
+class AlarmActionQueue:
+    def __init__(self):
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def metrics(self, max_attempts):
+        """Pending actions per type, age of the oldest one, actions waiting for a retry and dead letters."""
+        pending = db.session.query(AlarmAction.action, db.func.count(AlarmAction.id)).filter(
+            AlarmAction.attempts < max_attempts
+        ).group_by(AlarmAction.action).all()
+        row = db.session.query(
+            db.func.min(AlarmAction.created_at).filter(AlarmAction.attempts < max_attempts).label('oldest'),
+            db.func.count(AlarmAction.id).filter(
+                AlarmAction.attempts > 0, AlarmAction.attempts < max_attempts
+            ).label('retrying'),
+            db.func.count(AlarmAction.id).filter(AlarmAction.attempts >= max_attempts).label('dead'),
+        ).one()
+        return {
+            'pending': dict(pending),
+            'lag_seconds': round((datetime.utcnow() - row.oldest).total_seconds(), 3) if row.oldest else 0,
+            'retrying': row.retrying,
+            'dead_letters': row.dead,
+            'workers': sum(1 for w in self._workers if w.is_alive()),
+        }
+
+    def drain_once(self, config):
+        """
+        Claim up to ALARM_ACTION_BATCH_SIZE due actions (oldest first), execute them
+        and record each result.
+
+        Returns:
+            number of actions claimed
+        """
+        claims, alarms = self._claim(config)
+        if not claims:
+            return 0
+        by_type = defaultdict(list)
+        for claim in claims:
+            by_type[claim.action].append(claim)
+        self._create_tickets(by_type.pop('create_ticket', []), alarms, config)
+        self._notify_webhooks(by_type.pop('notify_webhook', []), alarms, config)
+        for claim in (c for rest in by_type.values() for c in rest):
+            self._record([claim], config, error=f"unknown action {claim.action}")
+        return len(claims)
+
+    @staticmethod
+    def _claim(config):
+        """
+        Lease a batch of due actions and commit.
+
+        Returns:
+            ([Claim], {alarm_id: AlarmNote.to_dict()})
+        """
+        now = datetime.utcnow()
+        actions = AlarmAction.query.filter(
+            AlarmAction.attempts < config.get('ALARM_ACTION_MAX_ATTEMPTS', 5),
+            AlarmAction.next_attempt_at <= now,
+            db.or_(AlarmAction.claimed_until.is_(None), AlarmAction.claimed_until < now)
+        ).order_by(AlarmAction.id).limit(config.get('ALARM_ACTION_BATCH_SIZE', 100))\
+            .with_for_update(skip_locked=True).all()
+        if not actions:
+            db.session.rollback()
+            return [], {}
+
+        claims = [Claim(a.id, a.alarm_id, a.action, a.params or {}, a.attempts, a.claimed_until is not None)
+                  for a in actions]
+        lease = timedelta(seconds=lease_seconds(claims, config.get('ALARM_ACTION_TIMEOUT_SECONDS', 10)))
+        for action in actions:
+            action.claimed_until = now + lease
+        alarms = {a.alarm_id: a.to_dict() for a in AlarmNote.query.filter(
+            AlarmNote.alarm_id.in_({claim.alarm_id for claim in claims})
+        )}
+        db.session.commit()
+        return claims, alarms
+
+    @staticmethod
+    def _record(claims, config, error=None, ticket_id=None):
+        """
+        Record the outcome of executed actions in one transaction: link the created
+        ticket, then delete the actions, or count the failure and schedule the retry.
+        When this fails the lease expires and the actions are claimed again.
+        """
+        now = datetime.utcnow()
+        try:
+            if ticket_id:
+                claim = claims[0]
+                table = AlarmNote.__table__
+                linked = db.session.execute(
+                    table.update()
+                    .where(table.c.alarm_id == claim.alarm_id, table.c.ticket_id.is_(None))
+                    .values(ticket_id=ticket_id, updated_at=now)
+                ).rowcount
+                if linked:
+                    db.session.add(AlarmHistory(alarm_id=claim.alarm_id, action='ticket_linked', new_value=ticket_id,
+                                                changed_by='alarm_rule',
+                                                comment=f"Auto-ticket by rule {claim.params.get('rule')}"))
+            if error is None:
+                AlarmAction.query.filter(AlarmAction.id.in_([c.id for c in claims])).delete(synchronize_session=False)
+            else:
+                for claim in claims:
+                    delay = retry_delay(claim.attempts + 1, config.get('ALARM_ACTION_RETRY_SECONDS', 30),
+                                        config.get('ALARM_ACTION_RETRY_MAX_SECONDS', 3600))
+                    AlarmAction.query.filter(AlarmAction.id == claim.id).update({
+                        'attempts': claim.attempts + 1,
+                        'last_error': error[:2000],
+                        'next_attempt_at': now + timedelta(seconds=delay),
+                        'claimed_until': None,
+                    }, synchronize_session=False)
+                    logger.warning(f"Alarm action {claim.id} ({claim.action} {claim.alarm_id}) failed: {error}")
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Recording alarm actions {[c.id for c in claims]} failed: {e}")
+
+    def _create_tickets(self, claims, alarms, config):
+        api_key = config.get('SDP_API_KEY')
+        base_url = config.get('SDP_BASE_URL')
+        timeout = config.get('ALARM_ACTION_TIMEOUT_SECONDS', 10)
+        created = 0
+        for claim in claims:
+            alarm = alarms.get(claim.alarm_id)
+            if alarm is None or alarm['ticket_id']:
+                self._record([claim], config)
+                continue
+            if not api_key or api_key == 'YOUR_SDP_API_KEY_HERE' or not base_url:
+                self._record([claim], config, error='SDP API key not configured')
+                continue
+            try:
+                # An earlier attempt may have created the request before failing
+                ticket_id = find_ticket(base_url, api_key, claim.alarm_id, timeout) \
+                    if claim.attempts or claim.reclaimed else None
+                if ticket_id is None:
+                    ticket_id = create_ticket(base_url, api_key, alarm, claim.params, timeout)
+                    created += 1
+            except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+                self._record([claim], config, error=str(e))
+                continue
+            self._record([claim], config, ticket_id=ticket_id)
+        if created:
+            logger.info(f"Alarm rules created {created} tickets")
+
+    def _notify_webhooks(self, claims, alarms, config):
+        by_url = defaultdict(list)
+        for claim in claims:
+            alarm = alarms.get(claim.alarm_id)
+            if alarm is None:
+                self._record([claim], config)
+            else:
+                by_url[claim.params.get('url')].append((claim, alarm))
+        for url, batch in by_url.items():
+            try:
+                r = requests.post(url, json={'alarms': [{**alarm, 'rule': claim.params.get('rule')}
+                                                        for claim, alarm in batch]},
+                                  timeout=config.get('ALARM_ACTION_TIMEOUT_SECONDS', 10))
+                error = None if r.ok else f"HTTP {r.status_code}"
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+            self._record([claim for claim, _ in batch], config, error=error)
+
+    def start_workers(self, app):
+        """Start ALARM_ACTION_WORKERS daemon threads executing queued actions (once per process)."""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(app.config.get('ALARM_ACTION_WORKERS', 0)):
+                worker = threading.Thread(target=self._run, args=(app,), name=f'alarm-actions-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self, app):
+        config = app.config
+        while True:
+            drained = 0
+            try:
+                with app.app_context():
+                    drained = self.drain_once(config)
+            except Exception as e:
+                logger.error(f"Alarm action worker error: {e}")
+            if not drained:
+                time.sleep(config.get('ALARM_ACTION_POLL_SECONDS', 2))
+
+
+alarm_actions = AlarmActionQueue()
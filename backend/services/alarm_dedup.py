@@ -0,0 +1,199 @@
+"""
+Alarm Dedup Cache
+Most Alertmanager deliveries re-send alerts that are already firing (every
+repeat_interval, for every group update). services/alarm_ingest.py answers
+those from this cache instead of looking the fingerprint up:
+
+- an LRU of fingerprint -> (alarm_id, status, flapping), at most
+  ALARM_DEDUP_CACHE_SIZE entries, each trusted for ALARM_DEDUP_TTL_SECONDS;
+- per alarm, the occurrences and last occurrence seen since the last flush,
+  written for all alarms in one UPDATE ... FROM (VALUES ...) every
+  ALARM_DEDUP_FLUSH_SECONDS (by the next batch, or an idle queue worker).
+
+A fingerprint is absorbed only when every alert of it in the batch repeats the
+status its alarm already has; anything else takes the regular path, which
+refreshes the entry. Changes made elsewhere are seen within the TTL (the alarm
+routes of this process forget the entry right away). Pending occurrences of a
+crashed process are lost, so occurrence_count is best effort.
+
+Cache entries, absorbed occurrences and flushed counts are staged on the
+current session and only applied once its transaction commits (after_commit);
+a batch that rolls back (and is retried payload by payload) leaves no entry
+for an alarm whose insert was rolled back, forgets the fingerprints it was
+about to cache, puts the counts it was writing back into pending and does not
+count its re-sends twice.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import event
+from models.ticket import db
+from models.alarm import AlarmNote
+
+logger = logging.getLogger(__name__)
+
+CachedAlarm = namedtuple('CachedAlarm', ['alarm_id', 'status', 'flapping', 'cached_at'])
+
+
+def merge_counts(into, counts):
+    """Add {alarm_id: [occurrences, last occurrence]} counts into another such dict."""
+    for alarm_id, (count, last) in counts.items():
+        pending = into.setdefault(alarm_id, [0, last])
+        pending[0] += count
+        pending[1] = max(pending[1], last)
+    return into
+
+
+class AlarmDedupCache:
+    def __init__(self):
+        self.entries = OrderedDict()  # fingerprint -> CachedAlarm, least recently used first
+        self.pending = {}  # alarm_id -> [occurrences, last occurrence] not yet written
+        self.last_flush = time.time()
+        self._lock = threading.Lock()
+        self._key = ('alarm_dedup', id(self))
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_transaction_end', self._after_transaction_end)
+
+    def _stage(self):
+        """
+        Changes of the current transaction: 'puts' (fingerprint -> cache entry),
+        'counted' (absorbed occurrences not written yet) and 'taken' (pending
+        occurrences written by this transaction).
+        """
+        session = db.session()
+        if not session.in_transaction():
+            session.begin()  # so that a rollback without any statement still ends a transaction
+        return session.info.setdefault(self._key, {'puts': {}, 'counted': {}, 'taken': {}})
+
+    def _after_commit(self, session):
+        if session.in_nested_transaction():
+            return
+        stage = session.info.pop(self._key, None)
+        if not stage:
+            return
+        for fingerprint, entry in stage['puts'].items():
+            self.put(fingerprint, *entry)
+        with self._lock:
+            merge_counts(self.pending, stage['counted'])
+
+    def _after_transaction_end(self, session, transaction):
+        if transaction.parent is not None:
+            return
+        # Still staged: rolled back (or the session was closed). Absorbed re-sends are counted again by the retry
+        stage = session.info.pop(self._key, None)
+        if not stage:
+            return
+        with self._lock:
+            for fingerprint in stage['puts']:
+                self.entries.pop(fingerprint, None)
+            merge_counts(self.pending, stage['taken'])
+
+    def get(self, fingerprint):
+        """Cached alarm of a fingerprint, None when unknown or older than the TTL."""
+        ttl = current_app.config.get('ALARM_DEDUP_TTL_SECONDS', 60)
+        with self._lock:
+            entry = self.entries.get(fingerprint)
+            if entry is None:
+                return None
+            if time.time() - entry.cached_at >= ttl:
+                del self.entries[fingerprint]
+                return None
+            self.entries.move_to_end(fingerprint)
+            return entry
+
+    def put(self, fingerprint, alarm_id, status, flapping=False):
+        max_size = current_app.config.get('ALARM_DEDUP_CACHE_SIZE', 50000)
+        with self._lock:
+            self.entries[fingerprint] = CachedAlarm(alarm_id, status, flapping, time.time())
+            self.entries.move_to_end(fingerprint)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def put_on_commit(self, fingerprint, alarm_id, status, flapping=False):
+        """Cache an alarm written by the current transaction once it commits."""
+        self._stage()['puts'][fingerprint] = (alarm_id, status, flapping)
+
+    def forget(self, fingerprint):
+        """Drop an alarm changed outside ingestion."""
+        if fingerprint:
+            with self._lock:
+                self.entries.pop(fingerprint, None)
+
+    def absorb(self, alerts, now):
+        """
+        Take the repeats out of a batch of critical alerts: fingerprints whose alerts
+        all repeat the status of their cached alarm. Their firing alerts are counted
+        as pending occurrences when the current transaction commits.
+
+        Returns:
+            (alerts still to ingest, firing repeats absorbed)
+        """
+        statuses = {}
+        for alert in alerts:
+            statuses.setdefault(alert.get('fingerprint'), set()).add(alert.get('status', 'firing'))
+        absorbed = {}  # fingerprint -> alarm_id
+        for fingerprint, seen in statuses.items():
+            entry = self.get(fingerprint) if fingerprint else None
+            if entry and not entry.flapping and seen == {'resolved' if entry.status == 'resolved' else 'firing'}:
+                absorbed[fingerprint] = entry.alarm_id
+        if not absorbed:
+            return alerts, 0
+
+        rest = []
+        firing = 0
+        counted = self._stage()['counted']
+        for alert in alerts:
+            fingerprint = alert.get('fingerprint')
+            if fingerprint not in absorbed:
+                rest.append(alert)
+            elif alert.get('status', 'firing') == 'firing':
+                merge_counts(counted, {absorbed[fingerprint]: [1, now]})
+                firing += 1
+        return rest, firing
+
+    def flush(self, now, force=False):
+        """
+        Write the pending occurrences and those absorbed by the current transaction
+        (one UPDATE), at most every ALARM_DEDUP_FLUSH_SECONDS unless forced. The caller
+        commits; on rollback the pending occurrences are put back.
+
+        Returns:
+            number of alarms updated
+        """
+        if not force and time.time() - self.last_flush < current_app.config.get('ALARM_DEDUP_FLUSH_SECONDS', 5):
+            return 0
+        with self._lock:
+            self.last_flush = time.time()
+            taken, self.pending = self.pending, {}
+        counted = (db.session().info.get(self._key) or {}).get('counted')
+        if not taken and not counted:
+            return 0
+        stage = self._stage()
+        merge_counts(stage['taken'], taken)
+        pending = merge_counts(merge_counts({}, taken), stage['counted'])
+        stage['counted'] = {}
+
+        table = AlarmNote.__table__
+        values = db.values(
+            db.column('alarm_id', db.String),
+            db.column('occurrences', db.Integer),
+            db.column('last_occurrence', db.DateTime),
+            name='occurrences'
+        ).data([(alarm_id, count, last) for alarm_id, (count, last) in sorted(pending.items())])
+        last = db.cast(values.c.last_occurrence, db.DateTime)
+        db.session.execute(
+            table.update()
+            .where(table.c.alarm_id == values.c.alarm_id)
+            .values(
+                occurrence_count=db.func.coalesce(table.c.occurrence_count, 0) + db.cast(values.c.occurrences, db.Integer),
+                last_occurrence=db.func.greatest(table.c.last_occurrence, last),
+                updated_at=db.func.greatest(table.c.updated_at, last)
+            )
+        )
+        logger.debug(f"Flushed {sum(c for c, _ in pending.values())} occurrences of {len(pending)} alarms")
+        return len(pending)
+
+
+alarm_dedup = AlarmDedupCache()
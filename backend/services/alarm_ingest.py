@@ -0,0 +1,314 @@
+"""
+Alarm Ingest Service
+Turns Alertmanager webhook payloads into AlarmNote rows (critical alerts only;
+warnings are monitored via Grafana only).
+
+A payload is applied as a batch: every fingerprint is resolved with a single
+IN query, the alerts are applied in payload order to in-memory alarm states,
+and the result is written with one multi-row INSERT for new alarms, one
+UPDATE ... FROM (VALUES ...) for existing ones and one multi-row INSERT of
+history rows. Alarm ids of the new alarms are reserved from their sequence
+in one round trip. A 500-alert storm costs a handful of statements instead of
+three per alert. Re-sends of alerts whose alarm already has their status are
+answered from services/alarm_dedup.py without touching the database; their
+occurrences are written in batches.
+
+New alarms are matched to their CMDB CI (and customer) from their ci_id label,
+instance or target by the in-memory services/ci_resolver.py, then correlated with the open alarms of related
+CIs before they are inserted (services/correlation_engine.py). The enabled alarm
+rules queue their tickets and notifications for them in one INSERT
+(services/alarm_rule_engine.py). The hourly and daily alarm rollups get the
+deltas of the batch in one upsert each (services/alarm_rollup.py).
+
+Alarms whose alert keeps going firing <-> resolved are flagged flapping by
+services/flap_detector.py and held open: their status changes are counted in
+memory instead of reopening/resolving the alarm and writing history each time,
+until the alert stabilizes.
+"""
+from datetime import datetime
+from models.ticket import db
+from models.alarm import AlarmNote, AlarmHistory
+from services.id_allocator import id_allocator
+from services.ci_resolver import ci_resolver
+from services.correlation_engine import correlation_engine
+from services.alarm_rule_engine import alarm_rule_engine
+from services.alarm_dedup import alarm_dedup
+from services.alarm_rollup import SNAPSHOT_FIELDS, alarm_rollup, snapshot
+from services.flap_detector import alert_time, flap_detector
+
+SOURCE = 'alertmanager'
+
+
+def parse_fired_at(alert, now):
+    """startsAt of an alert (None when absent, `now` when unparseable)."""
+    if not alert.get('startsAt'):
+        return None
+    try:
+        return datetime.fromisoformat(alert['startsAt'].replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return now
+
+
+def new_alarm_row(alert, fingerprint, now):
+    labels = alert.get('labels', {})
+    annotations = alert.get('annotations', {})
+    return {
+        'source': SOURCE,
+        'external_id': fingerprint,
+        'alertname': labels.get('alertname', 'Unknown'),
+        'severity': 'critical',
+        'target': labels.get('instance', labels.get('host', '')),
+        'instance': labels.get('instance'),
+        'job': labels.get('job'),
+        'labels': labels,
+        'annotations': annotations,
+        'ci_id': labels.get('ci_id'),
+        'customer_id': None,
+        'customer_name': None,
+        'parent_alarm_id': None,
+        'flapping': False,
+        'status': 'open',
+        'fired_at': parse_fired_at(alert, now),
+        'note': annotations.get('description', annotations.get('summary', '')),
+        'created_by': SOURCE,
+        'created_at': now,
+        'updated_at': now,
+        'occurrence_count': 1,
+        'last_occurrence': now,
+        'resolved_at': None,
+    }
+
+
+def history_row(state, action, old_value, new_value, comment, now):
+    """History row of an alarm state; its alarm_id is filled in when the batch is written."""
+    return state, {
+        'action': action,
+        'old_value': old_value,
+        'new_value': new_value,
+        'changed_by': SOURCE,
+        'changed_at': now,
+        'comment': comment,
+    }
+
+
+def observed_status(state):
+    """Alert status ('firing' | 'resolved') an alarm state reflects."""
+    return 'resolved' if state['status'] == 'resolved' else 'firing'
+
+
+def finish_new_alarm(state, alarm_id):
+    """Fill in the row of a new alarm once its id is reserved, with the changes of later alerts of the batch."""
+    row = state['row']
+    state['alarm_id'] = row['alarm_id'] = alarm_id
+    row['status'] = state['status']
+    row['occurrence_count'] += state['occurrences']
+    row['last_occurrence'] = state['last_occurrence'] or row['last_occurrence']
+    row['resolved_at'] = state['resolved_at']
+    row['flapping'] = state['flapping']
+
+
+class AlarmIngestService:
+    def ingest(self, alerts, settle=None):
+        """
+        Apply a list of Alertmanager alerts and end the flapping of the alarms in
+        `settle` that stabilized (fingerprints, default flap_detector.settle_candidates()).
+        The caller commits.
+
+        Returns:
+            {'created', 'updated', 'skipped'} counts (same as applying them one by one),
+            'correlated', the new alarms grouped under a root-cause alarm,
+            'suppressed', the resolves of flapping alarms held back,
+            'actions', the rule actions queued for the new alarms, and
+            'deduplicated', the firing re-sends counted in memory (included in 'updated')
+        """
+        now = datetime.utcnow()
+        critical = []
+        skipped = 0
+        for alert in alerts:
+            severity = alert.get('labels', {}).get('severity', 'warning').lower()
+            if severity != 'critical':
+                skipped += 1
+                continue
+            critical.append(alert)
+        critical, deduplicated = alarm_dedup.absorb(critical, now)
+
+        if settle is None:
+            settle = flap_detector.settle_candidates(now)
+        states = self._lookup(({a.get('fingerprint') for a in critical} | set(settle)) - {None})
+        self._load_flap_states(critical, states, settle)
+        history = []
+
+        for fingerprint in settle:
+            flap = flap_detector.get(fingerprint, 'firing')
+            flap.evaluate(now, *flap_detector.settings())
+            if fingerprint in states:
+                self._sync_flapping(states[fingerprint], flap, history, now)
+
+        new_alarms, created, updated, suppressed = self._apply(critical, states, history, now)
+        updated += deduplicated
+
+        for state, alarm_id in zip(new_alarms, id_allocator.reserve('alarm', len(new_alarms))):
+            finish_new_alarm(state, alarm_id)
+        changed = [s for s in states.values() if s['changed'] and s.get('row') is None]
+        ci_resolver.enrich([s['row'] for s in new_alarms])
+        correlated = correlation_engine.correlate([s['row'] for s in new_alarms], now)
+
+        if new_alarms:
+            db.session.execute(AlarmNote.__table__.insert(), [s['row'] for s in new_alarms])
+        actions = alarm_rule_engine.evaluate([s['row'] for s in new_alarms])
+        if changed:
+            self._update(changed, now)
+        if history:
+            db.session.execute(AlarmHistory.__table__.insert(),
+                               [{**row, 'alarm_id': state['alarm_id']} for state, row in history])
+        alarm_rollup.apply(
+            [(None, snapshot(st['row'])) for st in new_alarms] +
+            [(st['before'], {**st['before'], 'status': st['status'],
+                             'resolved_at': st['resolved_at'] or st['before']['resolved_at']}) for st in changed]
+        )
+        for fingerprint, state in states.items():
+            alarm_dedup.put_on_commit(fingerprint, state['alarm_id'], state['status'], state['flapping'])
+        alarm_dedup.flush(now)
+        # Flag changes are persisted right away, other flap states every ALARM_FLAP_PERSIST_SECONDS
+        flap_detector.persist(now, force=any(row['action'] in ('flapping', 'stabilized') for _, row in history))
+
+        return {'created': created, 'updated': updated, 'skipped': skipped, 'correlated': correlated,
+                'suppressed': suppressed, 'actions': actions, 'deduplicated': deduplicated}
+
+    def _apply(self, alerts, states, history, now):
+        """
+        Apply critical alerts in payload order to the alarm states (fingerprint -> state
+        from _lookup; new alarms are added to it), appending their history rows. No
+        database access: the batch is written afterwards.
+
+        Returns:
+            (states of the new alarms, created, updated, suppressed)
+        """
+        new_alarms = []
+        created = updated = suppressed = 0
+        for alert in alerts:
+            fingerprint = alert.get('fingerprint')
+            status = alert.get('status', 'firing')
+            state = states.get(fingerprint) if fingerprint else None
+
+            if state and (state['flapping'] or status != observed_status(state)):
+                flap = flap_detector.get(fingerprint, observed_status(state))
+                flap.record(status, alert_time(alert, status, now), now, *flap_detector.settings())
+                self._sync_flapping(state, flap, history, now)
+
+            if status == 'firing':
+                if state:
+                    state['occurrences'] += 1
+                    state['last_occurrence'] = now
+                    # Reopen if was resolved
+                    if state['status'] == 'resolved':
+                        state['status'] = 'open'
+                        history.append(history_row(state, 'reopened', 'resolved', 'open', None, now))
+                    state['changed'] = True
+                    updated += 1
+                else:
+                    row = new_alarm_row(alert, fingerprint, now)
+                    # Later alerts of the same fingerprint update the row before it is inserted
+                    state = {'id': None, 'alarm_id': None, 'status': 'open', 'occurrences': 0,
+                             'last_occurrence': None, 'resolved_at': None, 'flapping': False,
+                             'changed': False, 'row': row}
+                    new_alarms.append(state)
+                    if fingerprint:
+                        states[fingerprint] = state
+                    history.append(history_row(state, 'created', None, 'open',
+                                               f"Auto-created from {alert.get('labels', {}).get('alertname')}", now))
+                    created += 1
+
+            elif status == 'resolved':
+                if state and state['flapping']:
+                    # Held open until it stabilizes (services/flap_detector.py)
+                    suppressed += 1
+                elif state and state['status'] != 'resolved':
+                    history.append(history_row(state, 'resolved', state['status'], 'resolved',
+                                               'Auto-resolved by Alertmanager', now))
+                    state['status'] = 'resolved'
+                    state['resolved_at'] = now
+                    state['changed'] = True
+                    updated += 1
+
+        return new_alarms, created, updated, suppressed
+
+    @staticmethod
+    def _load_flap_states(alerts, states, settle):
+        """Load the flap states of fingerprints whose alarm may change status (and of `settle`, forced)."""
+        fingerprints = set(settle)
+        for alert in alerts:
+            fingerprint = alert.get('fingerprint')
+            state = states.get(fingerprint)
+            observed = observed_status(state) if state else 'firing'
+            if fingerprint and ((state and state['flapping']) or alert.get('status', 'firing') != observed):
+                fingerprints.add(fingerprint)
+        flap_detector.load(fingerprints, force=set(settle))
+
+    @staticmethod
+    def _sync_flapping(state, flap, history, now):
+        """Flag/unflag an alarm as its FlapState started/stopped flapping; a stabilized alarm takes the alert's status."""
+        if state['flapping'] == flap.flapping:
+            return
+        state['flapping'] = flap.flapping
+        state['changed'] = True
+        if flap.flapping:
+            history.append(history_row(state, 'flapping', None, 'flapping',
+                                       f"{len(flap.transitions)} firing/resolved changes, held open", now))
+            return
+        history.append(history_row(state, 'stabilized', 'flapping', flap.observed,
+                                   f"{flap.suppressed} changes suppressed while flapping", now))
+        if flap.observed == 'resolved' and state['status'] != 'resolved':
+            history.append(history_row(state, 'resolved', state['status'], 'resolved',
+                                       'Auto-resolved by Alertmanager after flapping', now))
+            state['status'] = 'resolved'
+            state['resolved_at'] = now
+
+    @staticmethod
+    def _lookup(fingerprints):
+        """
+        fingerprint -> state of its alarm (the oldest one if a fingerprint was stored twice), in one
+        query. The rows stay locked until the caller commits, so the 'before' snapshots the rollup
+        deltas are computed from cannot be changed by an alarm route meanwhile.
+        """
+        if not fingerprints:
+            return {}
+        rows = db.session.query(
+            AlarmNote.id, AlarmNote.alarm_id, AlarmNote.external_id, AlarmNote.flapping,
+            *[getattr(AlarmNote, name) for name in SNAPSHOT_FIELDS]
+        ).filter(AlarmNote.external_id.in_(fingerprints)).order_by(AlarmNote.id.desc()).with_for_update().all()
+        return {r.external_id: {
+            'id': r.id, 'alarm_id': r.alarm_id, 'status': r.status, 'occurrences': 0,
+            'last_occurrence': None, 'resolved_at': None, 'flapping': r.flapping, 'changed': False,
+            'before': snapshot(r._asdict()),  # for the rollup deltas
+        } for r in rows}
+
+    @staticmethod
+    def _update(states, now):
+        """One UPDATE ... FROM (VALUES ...) for every changed existing alarm."""
+        table = AlarmNote.__table__
+        values = db.values(
+            db.column('id', db.Integer),
+            db.column('occurrences', db.Integer),
+            db.column('status', db.String),
+            db.column('last_occurrence', db.DateTime),
+            db.column('resolved_at', db.DateTime),
+            db.column('flapping', db.Boolean),
+            name='changes'
+        ).data([(s['id'], s['occurrences'], s['status'], s['last_occurrence'], s['resolved_at'], s['flapping'])
+                for s in states])
+        db.session.execute(
+            table.update()
+            .where(table.c.id == values.c.id)
+            .values(
+                occurrence_count=db.func.coalesce(table.c.occurrence_count, 0) + db.cast(values.c.occurrences, db.Integer),
+                status=db.cast(values.c.status, db.String),
+                last_occurrence=db.func.coalesce(db.cast(values.c.last_occurrence, db.DateTime), table.c.last_occurrence),
+                resolved_at=db.func.coalesce(db.cast(values.c.resolved_at, db.DateTime), table.c.resolved_at),
+                flapping=db.cast(values.c.flapping, db.Boolean),
+                updated_at=now
+            )
+        )
+
+
+alarm_ingest = AlarmIngestService()
@@ -0,0 +1,81 @@
+"""
+Alarm List Service
+Keyset-paginated alarm lists for GET /api/alarms (routes/alarm_routes.py) and
+the legacy alarm notes list of app.py.
+
+Pages are ordered newest first on (created_at, id) -- (updated_at, id) for the
+legacy notes -- and every filter combination is answered by one of the
+(filter, created_at, id) indexes of the table, so a page costs the same however
+much resolved history has accumulated. `fields` selects only those columns
+(labels/annotations JSON is never read unless asked for).
+"""
+from models.ticket import db
+from models.alarm import AlarmNote
+from models.modules import AlarmNote as LegacyAlarmNote
+from services.pagination import keyset_page, encode_cursor
+
+# Fields of the legacy AlarmNote.to_dict()
+LEGACY_FIELDS = ('id', 'alarmName', 'severity', 'target', 'status', 'ticketId', 'note', 'updatedAt')
+
+
+class AlarmListService:
+    def list_alarms(self, status=None, severity=None, source=None, customer_id=None, roots_only=False,
+                    date_from=None, date_to=None, cursor=None, limit=50, fields=None):
+        """
+        One keyset page of alarms, newest first.
+
+        Returns:
+            {"count": int, "data": [...], "next_cursor": str | None, "limit": int}
+        """
+        query = db.session.query(*AlarmNote.list_columns(fields))
+        if status:
+            query = query.filter(AlarmNote.status.in_(status))
+        if severity:
+            query = query.filter(AlarmNote.severity.in_(severity))
+        if source:
+            query = query.filter(AlarmNote.source == source)
+        if customer_id:
+            query = query.filter(AlarmNote.customer_id == customer_id)
+        if roots_only:
+            query = query.filter(AlarmNote.parent_alarm_id.is_(None))
+        if date_from:
+            query = query.filter(AlarmNote.created_at >= date_from)
+        if date_to:
+            query = query.filter(AlarmNote.created_at < date_to)
+
+        rows, has_more = keyset_page(query, [AlarmNote.created_at, AlarmNote.id], cursor, limit=limit)
+
+        return {
+            "count": len(rows),
+            "data": [AlarmNote.list_row_to_dict(r, fields) for r in rows],
+            "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+            "limit": limit
+        }
+
+    def list_legacy_alarms(self, status=None, severity=None, date_from=None, date_to=None,
+                           cursor=None, limit=50, fields=None):
+        """
+        One keyset page of legacy alarm notes, most recently updated first.
+
+        Returns:
+            ([to_dict() of each note, restricted to `fields`], next cursor or None)
+        """
+        query = LegacyAlarmNote.query
+        if status:
+            query = query.filter(LegacyAlarmNote.status.in_(status))
+        if severity:
+            query = query.filter(LegacyAlarmNote.severity.in_(severity))
+        if date_from:
+            query = query.filter(LegacyAlarmNote.updated_at >= date_from)
+        if date_to:
+            query = query.filter(LegacyAlarmNote.updated_at < date_to)
+
+        rows, has_more = keyset_page(query, [LegacyAlarmNote.updated_at, LegacyAlarmNote.id], cursor, limit=limit)
+
+        data = [a.to_dict() for a in rows]
+        if fields:
+            data = [{f: d[f] for f in fields} for d in data]
+        return data, encode_cursor(rows[-1].updated_at, rows[-1].id) if has_more else None
+
+
+alarm_list = AlarmListService()
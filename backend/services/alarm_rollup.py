@@ -0,0 +1,291 @@
+"""
+Alarm Rollup Service
+Maintains models.alarm.AlarmHourlyRollup / AlarmDailyRollup and answers alarm
+statistics (volume, MTTA, MTTR) from them for any range and grouping.
+
+The rollups are additive and kept up to date incrementally: every write path
+takes a snapshot of an alarm before and after its change, and apply() turns
+the pairs into counter deltas (the old contribution out, the new one in),
+upserted with one INSERT ... ON CONFLICT DO UPDATE per table. The "before"
+snapshot must be read with the alarm row locked (FOR UPDATE) until the commit:
+two writers changing the same alarm from the same snapshot would both take its
+old contribution out and leave the counters wrong. Rollup rows themselves are
+only added to. rebuild() recomputes both tables from alarm_note_v2
+(rebuild_rollups.py).
+
+Ranges are read from the daily rollup for whole days and from the hourly one
+for the partial days at the edges; per-CI figures always come from the hourly
+rollup (the daily one has no CI dimension).
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.ticket import db
+from models.alarm import AlarmNote, AlarmHourlyRollup, AlarmDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# Alarm fields a rollup contribution depends on
+SNAPSHOT_FIELDS = ('created_at', 'customer_id', 'customer_name', 'ci_id', 'severity', 'source', 'status',
+                   'acknowledged_at', 'resolved_at')
+
+COUNTERS = ('alarm_count', 'acknowledged_count', 'ack_seconds_sum', 'resolved_count', 'resolve_seconds_sum')
+
+HOURLY_KEY = ('hour', 'customer_id', 'ci_id', 'severity', 'source', 'status')
+DAILY_KEY = ('day', 'customer_id', 'severity', 'source', 'status')
+
+# group_by name -> rollup column
+GROUPS = {
+    'customer': 'customer_id',
+    'ci': 'ci_id',
+    'severity': 'severity',
+    'source': 'source',
+    'status': 'status',
+}
+
+INTERVALS = ('hour', 'day', 'week', 'month')
+
+
+def hour_start(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def snapshot(alarm):
+    """The rollup-relevant fields of an AlarmNote (object or row dict), or None for no alarm."""
+    if alarm is None:
+        return None
+    if isinstance(alarm, dict):
+        return {name: alarm.get(name) for name in SNAPSHOT_FIELDS}
+    return {name: getattr(alarm, name) for name in SNAPSHOT_FIELDS}
+
+
+def contribution(s):
+    """(hourly key, daily key, counters) an alarm snapshot adds to the rollups (None without created_at)."""
+    if s is None or s['created_at'] is None:
+        return None
+    created = s['created_at']
+    dims = {name: s[name] or '' for name in ('customer_id', 'ci_id', 'severity', 'source', 'status')}
+    counters = dict.fromkeys(COUNTERS, 0)
+    counters['alarm_count'] = 1
+    if s['acknowledged_at']:
+        counters['acknowledged_count'] = 1
+        counters['ack_seconds_sum'] = max(0.0, (s['acknowledged_at'] - created).total_seconds())
+    if s['status'] == 'resolved' and s['resolved_at']:
+        counters['resolved_count'] = 1
+        counters['resolve_seconds_sum'] = max(0.0, (s['resolved_at'] - created).total_seconds())
+    hourly = tuple(hour_start(created) if name == 'hour' else dims[name] for name in HOURLY_KEY)
+    daily = tuple(created.date() if name == 'day' else dims[name] for name in DAILY_KEY)
+    return hourly, daily, counters
+
+
+def rollup_deltas(changes):
+    """
+    Counter deltas of a list of (before, after) snapshots (None = no alarm).
+
+    Returns:
+        ({hourly key: counters}, {daily key: counters}, {customer_id: customer_name});
+        keys whose counters all net to zero are left out
+    """
+    hourly = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    daily = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    names = {}
+    for before, after in changes:
+        for s, sign in ((before, -1), (after, 1)):
+            c = contribution(s)
+            if c is None:
+                continue
+            hourly_key, daily_key, counters = c
+            for name, value in counters.items():
+                hourly[hourly_key][name] += sign * value
+                daily[daily_key][name] += sign * value
+            if sign > 0 and s['customer_id'] and s['customer_name']:
+                names[s['customer_id']] = s['customer_name']
+
+    def nonzero(deltas):
+        return {k: v for k, v in deltas.items() if any(v.values())}
+    return nonzero(hourly), nonzero(daily), names
+
+
+def new_group():
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def group_result(g):
+    """Counters of a group with MTTA / MTTR in minutes."""
+    return {
+        'alarm_count': int(g['alarm_count']),
+        'acknowledged_count': int(g['acknowledged_count']),
+        'mtta_minutes': round(g['ack_seconds_sum'] / g['acknowledged_count'] / 60, 2) if g['acknowledged_count'] else None,
+        'resolved_count': int(g['resolved_count']),
+        'mttr_minutes': round(g['resolve_seconds_sum'] / g['resolved_count'] / 60, 2) if g['resolved_count'] else None,
+    }
+
+
+class AlarmRollupService:
+    def apply(self, changes):
+        """
+        Add the deltas of (before, after) alarm snapshots to both rollups. The
+        caller commits, together with the alarm writes.
+
+        Returns:
+            number of hourly rollup rows touched
+        """
+        hourly, daily, names = rollup_deltas(changes)
+        # Sorted so concurrent writers lock rollup rows in the same order
+        self._upsert(AlarmHourlyRollup, HOURLY_KEY, hourly, names)
+        self._upsert(AlarmDailyRollup, DAILY_KEY, daily, names)
+        return len(hourly)
+
+    @staticmethod
+    def _upsert(model, key_columns, deltas, names):
+        if not deltas:
+            return
+        now = datetime.utcnow()
+        rows = [{
+            **dict(zip(key_columns, key)),
+            **counters,
+            'customer_name': names.get(key[key_columns.index('customer_id')]),
+            'updated_at': now,
+        } for key, counters in sorted(deltas.items())]
+        table = model.__table__
+        stmt = pg_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={
+                **{name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+                'customer_name': db.func.coalesce(stmt.excluded.customer_name, table.c.customer_name),
+                'updated_at': stmt.excluded.updated_at,
+            }
+        )
+        db.session.execute(stmt)
+
+    def rebuild(self):
+        """Recompute both rollups from alarm_note_v2 and commit. Returns the hourly rows written."""
+        created = AlarmNote.created_at
+        ack_seconds = db.func.greatest(0, db.func.extract('epoch', AlarmNote.acknowledged_at - created))
+        resolved = db.and_(AlarmNote.status == 'resolved', AlarmNote.resolved_at.isnot(None))
+        resolve_seconds = db.func.greatest(0, db.func.extract('epoch', AlarmNote.resolved_at - created))
+        dims = [db.func.coalesce(getattr(AlarmNote, name), '').label(name)
+                for name in ('customer_id', 'ci_id', 'severity', 'source', 'status')]
+        hourly = db.select(
+            db.func.date_trunc('hour', created).label('hour'), *dims,
+            db.func.max(AlarmNote.customer_name).label('customer_name'),
+            db.func.count().label('alarm_count'),
+            db.func.count(AlarmNote.acknowledged_at).label('acknowledged_count'),
+            db.func.coalesce(db.func.sum(ack_seconds), 0).label('ack_seconds_sum'),
+            db.func.count().filter(resolved).label('resolved_count'),
+            db.func.coalesce(db.func.sum(resolve_seconds).filter(resolved), 0).label('resolve_seconds_sum'),
+            db.func.now().label('updated_at'),
+        ).where(created.isnot(None)).group_by(db.text('1, 2, 3, 4, 5, 6'))
+
+        AlarmDailyRollup.query.delete(synchronize_session=False)
+        AlarmHourlyRollup.query.delete(synchronize_session=False)
+        columns = ['hour', 'customer_id', 'ci_id', 'severity', 'source', 'status', 'customer_name',
+                   *COUNTERS, 'updated_at']
+        written = db.session.execute(AlarmHourlyRollup.__table__.insert().from_select(columns, hourly)).rowcount
+
+        h = AlarmHourlyRollup
+        daily = db.select(
+            db.cast(h.hour, db.Date).label('day'), h.customer_id, h.severity, h.source, h.status,
+            db.func.max(h.customer_name).label('customer_name'),
+            *[db.func.sum(getattr(h, name)).label(name) for name in COUNTERS],
+            db.func.now().label('updated_at'),
+        ).group_by(db.text('1, 2, 3, 4, 5'))
+        columns = ['day', 'customer_id', 'severity', 'source', 'status', 'customer_name', *COUNTERS, 'updated_at']
+        db.session.execute(AlarmDailyRollup.__table__.insert().from_select(columns, daily))
+        db.session.commit()
+        return written
+
+    # ==================== QUERIES ====================
+
+    def timeseries(self, start, end, interval='hour', group_by=None, customer_id=None, ci_id=None,
+                   severity=None, source=None):
+        """
+        Alarm volume, MTTA and MTTR per `interval` bucket (hour, day, week, month) of
+        creation time over [start, end) (both rounded to whole hours).
+
+        Returns:
+            {"interval", "from", "to", "group_by", "series": [{"bucket", "group", ...}], "totals": {...}}
+        """
+        if interval not in INTERVALS:
+            raise ValueError(f"interval must be one of: {', '.join(INTERVALS)}")
+        if group_by is not None and group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}")
+        start = hour_start(start)
+        end = hour_start(end) + (timedelta(hours=1) if end != hour_start(end) else timedelta(0))
+        if start >= end:
+            raise ValueError("from must be before to")
+
+        filters = {'customer_id': customer_id, 'ci_id': ci_id, 'severity': severity, 'source': source}
+        # The daily rollup has no CI dimension; hourly buckets need the hourly one
+        use_daily = interval != 'hour' and group_by != 'ci' and not ci_id
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+        last_day = end.date()
+        parts = []
+        if use_daily and first_day < last_day:
+            parts.append((AlarmDailyRollup, 'day', first_day, last_day))
+            if start < datetime.combine(first_day, time.min):
+                parts.append((AlarmHourlyRollup, 'hour', start, datetime.combine(first_day, time.min)))
+            if datetime.combine(last_day, time.min) < end:
+                parts.append((AlarmHourlyRollup, 'hour', datetime.combine(last_day, time.min), end))
+        else:
+            parts.append((AlarmHourlyRollup, 'hour', start, end))
+
+        groups = defaultdict(new_group)
+        for model, bucket_name, low, high in parts:
+            bucket_column = getattr(model, bucket_name)
+            # date_trunc of a date would return a timestamptz
+            bucket = db.func.date_trunc(interval, db.cast(bucket_column, db.DateTime)).label('bucket')
+            key = getattr(model, GROUPS[group_by]).label('group_key') if group_by else db.null().label('group_key')
+            query = db.session.query(
+                bucket, key, *[db.func.sum(getattr(model, name)).label(name) for name in COUNTERS]
+            ).filter(bucket_column >= low, bucket_column < high)
+            for name, value in filters.items():
+                if value is not None:
+                    query = query.filter(getattr(model, name) == value)
+            for r in query.group_by(bucket, *([key] if group_by else [])):
+                g = groups[(r.bucket, r.group_key)]
+                for name in COUNTERS:
+                    g[name] += r._mapping[name] or 0
+
+        totals = new_group()
+        for g in groups.values():
+            for name in COUNTERS:
+                totals[name] += g[name]
+        return {
+            'interval': interval,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'group_by': group_by,
+            'series': [{'bucket': bucket.isoformat(), 'group': group, **group_result(g)}
+                       for (bucket, group), g in sorted(groups.items(), key=lambda i: (i[0][0], i[0][1] or ''))
+                       if g['alarm_count']],
+            'totals': group_result(totals),
+        }
+
+    def stats(self):
+        """All-time totals by current status, severity and source, with MTTA / MTTR, from the daily rollup."""
+        d = AlarmDailyRollup
+        rows = db.session.query(
+            d.status, d.severity, d.source, *[db.func.sum(getattr(d, name)).label(name) for name in COUNTERS]
+        ).group_by(d.status, d.severity, d.source).all()
+        totals = new_group()
+        by = {name: defaultdict(int) for name in ('status', 'severity', 'source')}
+        for r in rows:
+            if not r.alarm_count:
+                continue
+            for name in COUNTERS:
+                totals[name] += r._mapping[name]
+            for name in by:
+                by[name][r._mapping[name]] += int(r.alarm_count)
+        return {
+            'total': int(totals['alarm_count']),
+            'by_status': dict(by['status']),
+            'by_severity': dict(by['severity']),
+            'by_source': dict(by['source']),
+            **{k: v for k, v in group_result(totals).items() if k != 'alarm_count'},
+        }
+
+
+alarm_rollup = AlarmRollupService()
@@ -0,0 +1,171 @@
+"""
+Alarm Rule Engine
+Evaluates the enabled auto-ticket rules (models.cmdb.AlarmRule) against the
+alarms created by Alertmanager ingestion and queues their actions
+(create_ticket, notify_webhook) in alarm_action_queue, executed in batches by
+services/alarm_actions.py.
+
+Rules are loaded once and compiled: alertname_pattern becomes a compiled regex
+(matched with re.search), and the rules are bucketed by (severity, customer_id),
+None standing for "any". An alarm is only tested against the rules of its
+four buckets -- (severity, customer), (severity, any), (any, customer),
+(any, any) -- whose merged list is memoized per (severity, customer). The rule
+set is rebuilt when the 'alarm_rules' data version moves (every rule change),
+checked at most every ALARM_RULES_MAX_STALENESS_SECONDS.
+
+Correlated child alarms (parent_alarm_id set) are not evaluated: their root
+alarm carries the ticket of the outage.
+"""
+import logging
+import re
+import threading
+import time
+from flask import current_app
+from models.ticket import db
+from models.alarm import AlarmAction
+from models.cmdb import AlarmRule
+from models.data_version import DataVersion
+from services.ci_resolver import ci_resolver
+
+logger = logging.getLogger(__name__)
+
+DATASET = 'alarm_rules'
+TICKET_FIELDS = ('ticket_priority', 'ticket_category', 'assign_to')
+
+
+def normalize(value):
+    """Rule criteria and alarm values compare trimmed and lowercased; '' means any."""
+    return (value or '').strip().lower() or None
+
+
+class CompiledRule:
+    __slots__ = ('id', 'name', 'pattern', 'severity', 'customer_id', 'ci_type',
+                 'create_ticket', 'ticket', 'notify_webhook')
+
+    def __init__(self, rule):
+        """`rule`: an AlarmRule, or any object with its attributes. Raises re.error on a bad pattern."""
+        self.id = rule.id
+        self.name = rule.name
+        self.pattern = re.compile(rule.alertname_pattern) if rule.alertname_pattern else None
+        self.severity = normalize(rule.severity)
+        self.customer_id = (rule.customer_id or '').strip() or None
+        self.ci_type = normalize(rule.ci_type)
+        self.create_ticket = bool(rule.create_ticket)
+        self.ticket = {field: getattr(rule, field) for field in TICKET_FIELDS}
+        self.notify_webhook = (rule.notify_webhook or '').strip() or None
+
+    def matches(self, alertname, ci_type):
+        """Alertname and CI type criteria; severity and customer are matched by the RuleSet buckets."""
+        if self.ci_type and self.ci_type != ci_type:
+            return False
+        return self.pattern is None or self.pattern.search(alertname or '') is not None
+
+
+class RuleSet:
+    """Compiled rules bucketed by (severity, customer_id); rules apply in id order."""
+
+    def __init__(self, rules=()):
+        self.buckets = {}
+        self.count = 0
+        for rule in sorted(rules, key=lambda r: r.id):
+            try:
+                compiled = CompiledRule(rule)
+            except re.error as e:
+                logger.warning(f"Alarm rule {rule.id} ({rule.name}) skipped: bad alertname_pattern: {e}")
+                continue
+            self.buckets.setdefault((compiled.severity, compiled.customer_id), []).append(compiled)
+            self.count += 1
+        self._candidates = {}
+
+    def candidates(self, severity, customer_id):
+        """Rules that can match an alarm of this severity and customer, in id order. Memoized."""
+        key = (normalize(severity), customer_id or None)
+        if key not in self._candidates:
+            severities = {key[0], None}
+            customers = {key[1], None}
+            self._candidates[key] = sorted(
+                (rule for s in severities for c in customers for rule in self.buckets.get((s, c), ())),
+                key=lambda r: r.id
+            )
+        return self._candidates[key]
+
+    def match(self, alertname, severity, customer_id, ci_type=None):
+        """Rules matching an alarm, in id order."""
+        ci_type = normalize(ci_type)
+        return [rule for rule in self.candidates(severity, customer_id) if rule.matches(alertname, ci_type)]
+
+
+def rule_actions(alarm_id, rules):
+    """
+    Queue rows for the rules matching an alarm: one ticket (from the first rule
+    that creates one) and one notification per distinct webhook URL.
+    """
+    actions = []
+    ticket = False
+    webhooks = set()
+    for rule in rules:
+        if rule.create_ticket and not ticket:
+            ticket = True
+            actions.append({'alarm_id': alarm_id, 'rule_id': rule.id, 'action': 'create_ticket',
+                            'params': {'rule': rule.name, **rule.ticket}})
+        if rule.notify_webhook and rule.notify_webhook not in webhooks:
+            webhooks.add(rule.notify_webhook)
+            actions.append({'alarm_id': alarm_id, 'rule_id': rule.id, 'action': 'notify_webhook',
+                            'params': {'rule': rule.name, 'url': rule.notify_webhook}})
+    return actions
+
+
+class AlarmRuleEngine:
+    """Process-wide compiled RuleSet and the evaluation of new alarms."""
+
+    def __init__(self):
+        self.rules = None
+        self.version = None
+        self.last_check = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the rules changed (caller commits) and drop this process's rule set."""
+        DataVersion.bump(DATASET)
+        with self._lock:
+            self.rules = None
+
+    def get_rules(self):
+        """The compiled enabled rules, rebuilt when the rule data version moved."""
+        max_staleness = current_app.config.get('ALARM_RULES_MAX_STALENESS_SECONDS', 30)
+        with self._lock:
+            if self.rules is not None and time.time() - self.last_check < max_staleness:
+                return self.rules
+            self.last_check = time.time()
+            version = DataVersion.current(DATASET)
+            if self.rules is None or version != self.version:
+                self.rules = RuleSet(AlarmRule.query.filter(AlarmRule.enabled.is_(True)).all())
+                self.version = version
+                logger.info(f"Alarm rules loaded: {self.rules.count} enabled")
+            return self.rules
+
+    def evaluate(self, rows):
+        """
+        Match new AlarmNote rows (dicts, after CI resolution and correlation) against
+        the rules and queue their actions in one INSERT. The caller commits.
+
+        Returns:
+            number of actions queued
+        """
+        rows = [r for r in rows if not r.get('parent_alarm_id')]
+        if not rows:
+            return 0
+        rules = self.get_rules()
+        if not rules.count:
+            return 0
+        actions = []
+        for row in rows:
+            matched = rules.match(row['alertname'], row['severity'], row.get('customer_id'),
+                                  ci_resolver.ci_type(row.get('ci_id')))
+            actions.extend(rule_actions(row['alarm_id'], matched))
+        if actions:
+            db.session.execute(AlarmAction.__table__.insert(), actions)
+        return len(actions)
+
+
+alarm_rule_engine = AlarmRuleEngine()
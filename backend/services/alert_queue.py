@@ -0,0 +1,208 @@
+"""
+Alert Queue
+Decouples the Alertmanager webhook from alarm ingestion. The webhook appends
+the payload to the `alert_queue` table (one INSERT) and answers 202; worker
+threads claim queued payloads in batches with FOR UPDATE SKIP LOCKED (so any
+number of workers and processes can drain the same queue), ingest them with
+services.alarm_ingest and delete them in the same transaction. A crash before
+the commit leaves the payloads queued.
+
+Workers of different processes may hold payloads of the same fingerprint:
+each batch takes transaction-level advisory locks on its fingerprints (in a
+fixed order, so batches cannot deadlock) before looking them up, which keeps
+one alarm per fingerprint. Idle workers end the flapping of alarms that
+stabilized, persist the flap detector (services/flap_detector.py) and flush
+the occurrences counted by services/alarm_dedup.py.
+
+Backpressure: above ALERT_QUEUE_HIGH_WATER_MARK queued payloads (dead letters
+excluded), enqueue() raises QueueFull and the webhook answers 503 so
+Alertmanager retries later. Dead letters stay in the table until they are
+requeued or purged (requeue_dead_letters / purge_dead_letters).
+
+With ALERT_QUEUE_WORKERS=0 the webhook ingests inline (ingest_inline), under
+the same fingerprint locks.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from models.ticket import db
+from models.alarm import AlertQueueEntry
+from services.alarm_ingest import alarm_ingest
+from services.flap_detector import flap_detector
+from services.alarm_dedup import alarm_dedup
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """The queue is above its high-water mark."""
+
+
+class AlertQueue:
+    def __init__(self):
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, payload, high_water_mark, max_attempts):
+        """Append one webhook payload and commit. Raises QueueFull above the high-water mark."""
+        if self._depth(limit=high_water_mark, max_attempts=max_attempts) >= high_water_mark:
+            raise QueueFull(f"alert queue above its high-water mark ({high_water_mark})")
+        entry = AlertQueueEntry(payload=payload, alert_count=len(payload.get('alerts', [])))
+        db.session.add(entry)
+        db.session.commit()
+        return entry.id
+
+    @staticmethod
+    def _depth(limit=None, max_attempts=None):
+        """Queued payloads (counting stops at `limit`); dead letters excluded when max_attempts is given."""
+        query = db.session.query(AlertQueueEntry.id)
+        if max_attempts is not None:
+            query = query.filter(AlertQueueEntry.attempts < max_attempts)
+        if limit is not None:
+            query = query.limit(limit)
+        return db.session.query(db.func.count()).select_from(query.subquery()).scalar()
+
+    def metrics(self, max_attempts):
+        """Depth, lag (age of the oldest pending payload) and dead letters of the queue."""
+        row = db.session.query(
+            db.func.count(AlertQueueEntry.id).filter(AlertQueueEntry.attempts < max_attempts).label('depth'),
+            db.func.coalesce(db.func.sum(AlertQueueEntry.alert_count)
+                             .filter(AlertQueueEntry.attempts < max_attempts), 0).label('alerts'),
+            db.func.min(AlertQueueEntry.received_at).filter(AlertQueueEntry.attempts < max_attempts).label('oldest'),
+            db.func.count(AlertQueueEntry.id).filter(AlertQueueEntry.attempts >= max_attempts).label('dead'),
+        ).one()
+        return {
+            'depth': row.depth,
+            'queued_alerts': int(row.alerts),
+            'lag_seconds': round((datetime.utcnow() - row.oldest).total_seconds(), 3) if row.oldest else 0,
+            'dead_letters': row.dead,
+            'workers': sum(1 for w in self._workers if w.is_alive()),
+        }
+
+    @staticmethod
+    def _dead_letters(max_attempts, ids=None):
+        query = AlertQueueEntry.query.filter(AlertQueueEntry.attempts >= max_attempts)
+        if ids is not None:
+            query = query.filter(AlertQueueEntry.id.in_(ids))
+        return query
+
+    def requeue_dead_letters(self, max_attempts, ids=None):
+        """Give dead letters (all, or those in `ids`) a fresh set of attempts and commit. Returns the count."""
+        count = self._dead_letters(max_attempts, ids).update({
+            AlertQueueEntry.attempts: 0,
+            AlertQueueEntry.last_error: None,
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def purge_dead_letters(self, max_attempts, ids=None):
+        """Delete dead letters (all, or those in `ids`) and commit. Returns the count."""
+        count = self._dead_letters(max_attempts, ids).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def ingest_inline(self, alerts):
+        """Ingest a payload in the caller's transaction (ALERT_QUEUE_WORKERS=0). The caller commits."""
+        settle = flap_detector.settle_candidates(datetime.utcnow())
+        self._lock_fingerprints({a.get('fingerprint') for a in alerts} | set(settle))
+        return alarm_ingest.ingest(alerts, settle=settle)
+
+    def drain_once(self, batch_size, max_attempts, entry_id=None):
+        """
+        Claim up to `batch_size` queued payloads (oldest first), ingest them and delete
+        them in one transaction. When a batch fails its payloads are retried one by
+        one, so a bad payload only holds back itself: it stays queued with attempts + 1.
+
+        Returns:
+            number of payloads ingested
+        """
+        query = db.session.query(AlertQueueEntry.id, AlertQueueEntry.payload).filter(
+            AlertQueueEntry.attempts < max_attempts
+        )
+        if entry_id is not None:
+            query = query.filter(AlertQueueEntry.id == entry_id)
+        entries = query.order_by(AlertQueueEntry.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not entries:
+            db.session.rollback()
+            return 0
+
+        ids = [e.id for e in entries]
+        alerts = [alert for e in entries for alert in e.payload.get('alerts', [])]
+        settle = flap_detector.settle_candidates(datetime.utcnow())
+        try:
+            self._lock_fingerprints({a.get('fingerprint') for a in alerts} | set(settle))
+            alarm_ingest.ingest(alerts, settle=settle)
+            AlertQueueEntry.query.filter(AlertQueueEntry.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            return len(entries)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Alert queue batch {ids[0]}..{ids[-1]} failed: {e}")
+            if len(ids) > 1:
+                return sum(self.drain_once(1, max_attempts, entry_id=i) for i in ids)
+            AlertQueueEntry.query.filter(AlertQueueEntry.id == ids[0]).update({
+                AlertQueueEntry.attempts: AlertQueueEntry.attempts + 1,
+                AlertQueueEntry.last_error: str(e)[:2000],
+            }, synchronize_session=False)
+            db.session.commit()
+            return 0
+
+    def settle_flapping(self):
+        """
+        End the flapping of alarms that stabilized while no alerts came for them, and
+        persist the flap states that are due. Commits.
+        """
+        now = datetime.utcnow()
+        settle = flap_detector.settle_candidates(now)
+        if settle:
+            self._lock_fingerprints(settle)
+            alarm_ingest.ingest([], settle=settle)
+        else:
+            flap_detector.persist(now)
+        db.session.commit()
+
+    @staticmethod
+    def flush_occurrences():
+        """Write the occurrences of absorbed re-sends that are due. Commits."""
+        if alarm_dedup.flush(datetime.utcnow()):
+            db.session.commit()
+
+    @staticmethod
+    def _lock_fingerprints(fingerprints):
+        fingerprints = sorted(set(fingerprints) - {None})
+        if fingerprints:
+            keys = db.func.unnest(db.cast(fingerprints, db.ARRAY(db.Text))).table_valued('fp').render_derived()
+            db.session.execute(
+                db.select(db.func.pg_advisory_xact_lock(db.func.hashtextextended(keys.c.fp, 0)))
+                .select_from(keys).order_by(db.func.hashtextextended(keys.c.fp, 0))
+            )
+
+    def start_workers(self, app):
+        """Start ALERT_QUEUE_WORKERS daemon threads draining the queue (once per process)."""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(app.config.get('ALERT_QUEUE_WORKERS', 0)):
+                worker = threading.Thread(target=self._run, args=(app,), name=f'alert-queue-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self, app):
+        config = app.config
+        while True:
+            drained = 0
+            try:
+                with app.app_context():
+                    drained = self.drain_once(config.get('ALERT_QUEUE_BATCH_SIZE', 50),
+                                              config.get('ALERT_QUEUE_MAX_ATTEMPTS', 5))
+                    if not drained:
+                        self.settle_flapping()
+                        self.flush_occurrences()
+            except Exception as e:
+                logger.error(f"Alert queue worker error: {e}")
+            if not drained:
+                time.sleep(config.get('ALERT_QUEUE_POLL_SECONDS', 1))
+
+
+alert_queue = AlertQueue()
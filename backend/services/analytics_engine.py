@@ -0,0 +1,409 @@
+"""
+In-memory columnar ticket analytics engine.
+
+Keeps the low-cardinality columns behind the dashboard queries as NumPy arrays
+(strings dictionary-encoded to integer codes) and answers get_summary,
+get_customers and get_engineers with vectorized masks and bincount, using the
+same response schema as the SQL implementation in ITSMService.
+
+The store is refreshed incrementally from `tickets.synced_at` after each sync
+(and lazily when another worker bumped the `tickets` data version). Rows are
+only ever upserted, so the store is reloaded in full when tickets were removed
+(partitions detached, see services/partition_service.py), which bumps the
+`tickets_removed` data version. Enable with
+ANALYTICS_ENGINE_ENABLED=true; `?engine=sql` on a request falls back to SQL.
+"""
+import logging
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from flask import current_app
+from models.ticket import db, Ticket, Engineer
+from models.data_version import DataVersion
+from services.partition_service import REMOVED_DATASET
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+CLOSED_STATUSES = ('Resolved', 'Closed')
+
+
+def to_epoch(dt):
+    """Naive datetime -> int seconds, consistent with how created_at is stored in the engine."""
+    return int(np.datetime64(dt, 's').astype(np.int64))
+
+
+class Dictionary:
+    """Dictionary encoding of a string column. Code 0 is reserved for NULL."""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code_of(self, value):
+        """Code of an existing value, -1 (matches nothing) if unseen."""
+        return self.codes.get(value, -1)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class TicketColumnStore:
+    """
+    Column arrays for the ticket fields used by dashboard aggregations.
+    Arrays grow by doubling; rows are addressed by ticket id for upserts.
+    """
+    STRING_COLUMNS = ('customer_id', 'customer_name', 'engineer_id', 'engineer_name',
+                      'status', 'priority', 'category', 'request_type')
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.positions = {}
+        self.dicts = {name: Dictionary() for name in self.STRING_COLUMNS}
+        self.created = np.zeros(capacity, dtype=np.int64)
+        self.codes = {name: np.zeros(capacity, dtype=np.int32) for name in self.STRING_COLUMNS}
+        self.overdue = np.zeros(capacity, dtype=np.int8)  # -1 NULL, 0 False, 1 True
+        self.resolve_hours = np.full(capacity, np.nan)
+
+    def _grow(self, needed):
+        capacity = len(self.created)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self.created)
+        self.created = np.concatenate([self.created, np.zeros(extra, dtype=np.int64)])
+        for name in self.STRING_COLUMNS:
+            self.codes[name] = np.concatenate([self.codes[name], np.zeros(extra, dtype=np.int32)])
+        self.overdue = np.concatenate([self.overdue, np.zeros(extra, dtype=np.int8)])
+        self.resolve_hours = np.concatenate([self.resolve_hours, np.full(extra, np.nan)])
+
+    def upsert(self, rows):
+        """
+        Insert or update rows. Each row needs the attributes: id, created_at,
+        the STRING_COLUMNS, is_overdue and resolve_time_hours.
+        """
+        rows = list(rows)
+        self._grow(self.size + len(rows))
+        for r in rows:
+            pos = self.positions.get(r.id)
+            if pos is None:
+                pos = self.size
+                self.positions[r.id] = pos
+                self.size += 1
+            self.created[pos] = to_epoch(r.created_at) if r.created_at else 0
+            for name in self.STRING_COLUMNS:
+                self.codes[name][pos] = self.dicts[name].encode(getattr(r, name))
+            self.overdue[pos] = -1 if r.is_overdue is None else int(bool(r.is_overdue))
+            self.resolve_hours[pos] = np.nan if r.resolve_time_hours is None else r.resolve_time_hours
+        return len(rows)
+
+    def column(self, name):
+        return self.codes[name][:self.size]
+
+    # ==================== AGGREGATION HELPERS ====================
+
+    def _mask(self, engineer_name=None, start=None):
+        mask = np.ones(self.size, dtype=bool)
+        if engineer_name:
+            mask &= self.column('engineer_name') == self.dicts['engineer_name'].code_of(engineer_name)
+        if start is not None:
+            mask &= self.created[:self.size] >= to_epoch(start)
+        return mask
+
+    def _status_masks(self):
+        status = self.column('status')
+        d = self.dicts['status']
+        is_open = status == d.code_of('Open')
+        in_progress = status == d.code_of('In Progress')
+        closed = np.isin(status, [d.code_of(s) for s in CLOSED_STATUSES])
+        return is_open, in_progress, closed
+
+    def _group(self, keys, mask, n_groups, **flags):
+        """
+        bincount-based group aggregation.
+        Returns dict with 'total', one count per flag, and avg resolve hours.
+        """
+        keys = keys[mask]
+        out = {'total': np.bincount(keys, minlength=n_groups)}
+        for name, flag in flags.items():
+            out[name] = np.bincount(keys, weights=flag[mask], minlength=n_groups).astype(np.int64)
+        hours = self.resolve_hours[:self.size][mask]
+        has_hours = ~np.isnan(hours)
+        out['resolve_sum'] = np.bincount(keys[has_hours], weights=hours[has_hours], minlength=n_groups)
+        out['resolve_count'] = np.bincount(keys[has_hours], minlength=n_groups)
+        return out
+
+    @staticmethod
+    def _avg(group, i):
+        count = group['resolve_count'][i]
+        return float(group['resolve_sum'][i] / count) if count else None
+
+    @staticmethod
+    def _sla_percent(total, breached):
+        return round((total - breached) / total * 100, 1) if total > 0 else 100
+
+    def _pair_keys(self, first, second, mask):
+        """Dense group ids for (first, second) code pairs present under mask."""
+        combined = self.column(first).astype(np.int64) * len(self.dicts[second]) + self.column(second)
+        uniques, inverse = np.unique(combined[mask], return_inverse=True)
+        keys = np.zeros(self.size, dtype=np.int64)
+        keys[mask] = inverse
+        return uniques, keys
+
+    # ==================== REPORTS ====================
+
+    def summary(self, engineer_name=None, now=None):
+        """Same payload as ITSMService.get_summary"""
+        now = now or datetime.now()
+        mask = self._mask(engineer_name)
+        is_open, in_progress, closed = self._status_masks()
+        breached = self.overdue[:self.size] == 1
+        met = self.overdue[:self.size] == 0
+        hours = self.resolve_hours[:self.size]
+
+        valid_hours = hours[mask & ~np.isnan(hours)]
+        avg_mttr = float(valid_hours.mean()) if len(valid_hours) else 0
+
+        # Trend: last 7 calendar days
+        today = now.date()
+        first_day = datetime.combine(today - timedelta(days=6), datetime.min.time())
+        offsets = (self.created[:self.size] - to_epoch(first_day)) // SECONDS_PER_DAY
+        in_window = mask & (offsets >= 0) & (offsets < 7)
+        day_counts = np.bincount(offsets[in_window], minlength=7)
+        day_met = np.bincount(offsets[in_window & met], minlength=7)
+        trend = [{
+            "name": (today - timedelta(days=6 - i)).strftime('%a'),
+            "tickets": int(day_counts[i]),
+            "sla": int(day_met[i])
+        } for i in range(7)]
+
+        # Priority distribution (NULL priority reported as Medium)
+        priority = self.column('priority')
+        priority_values = self.dicts['priority'].values
+        priority_counts = np.bincount(priority[mask], minlength=len(priority_values))
+        priority_data = {}
+        for code in np.nonzero(priority_counts)[0]:
+            name = priority_values[code] or 'Medium'
+            priority_data[name] = priority_data.get(name, 0) + int(priority_counts[code])
+
+        # Technician performance (top 10 by volume)
+        engineer_values = self.dicts['engineer_name'].values
+        tech = self._group(self.column('engineer_name'), mask, len(engineer_values),
+                           open=is_open, closed=closed, breached=breached)
+        top_techs = [i for i in np.argsort(-tech['total'], kind='stable') if tech['total'][i] > 0][:10]
+
+        # Category distribution (top 10)
+        category_values = self.dicts['category'].values
+        category_counts = np.bincount(self.column('category')[mask], minlength=len(category_values))
+        top_categories = [i for i in np.argsort(-category_counts, kind='stable') if category_counts[i] > 0][:10]
+
+        # Top 10 high-load customers, last 30 days
+        cust_mask = mask & (self.created[:self.size] >= to_epoch(now - timedelta(days=30)))
+        pairs, pair_keys = self._pair_keys('customer_id', 'customer_name', cust_mask)
+        cust = self._group(pair_keys, cust_mask, len(pairs), breached=breached)
+        top_customers = [i for i in np.argsort(-cust['total'], kind='stable')][:10]
+        name_count = len(self.dicts['customer_name'])
+
+        # Priority SLA breakdown (all tickets, not filtered by engineer)
+        prio = self._group(priority, np.ones(self.size, dtype=bool), len(priority_values), breached=breached)
+
+        return {
+            "total": int(mask.sum()),
+            "open": int((mask & is_open).sum()),
+            "in_progress": int((mask & in_progress).sum()),
+            "resolved": int((mask & closed).sum()),
+            "sla_breached": int((mask & breached).sum()),
+            "avg_mttr_hours": round(avg_mttr, 1) if avg_mttr else 0,
+            "trend": trend,
+            "priority_distribution": [{"priority": k, "value": v} for k, v in priority_data.items()],
+            "category_distribution": [{
+                "name": category_values[i] or 'Others',
+                "value": int(category_counts[i])
+            } for i in top_categories],
+            "priority_sla": [{
+                "priority": priority_values[i] or 'Medium',
+                "sla_percent": self._sla_percent(int(prio['total'][i]), int(prio['breached'][i]))
+            } for i in np.nonzero(prio['total'])[0]],
+            "top_customers": [{
+                "id": self.dicts['customer_id'].values[int(pairs[i] // name_count)],
+                "name": self.dicts['customer_name'].values[int(pairs[i] % name_count)],
+                "total": int(cust['total'][i]),
+                "sla_percent": self._sla_percent(int(cust['total'][i]), int(cust['breached'][i]))
+            } for i in top_customers],
+            "technician_performance": [{
+                "name": engineer_values[i],
+                "open": int(tech['open'][i]),
+                "closed": int(tech['closed'][i]),
+                "sla_percent": self._sla_percent(int(tech['total'][i]), int(tech['breached'][i])),
+                "avg_mttr": round(self._avg(tech, i) or 0, 1)
+            } for i in top_techs],
+        }
+
+    def customers(self, engineer_name=None, start=None):
+        """Same payload as ITSMService.get_customers"""
+        mask = self._mask(engineer_name, start)
+        is_open, _, closed = self._status_masks()
+        breached = self.overdue[:self.size] == 1
+
+        pairs, keys = self._pair_keys('customer_id', 'customer_name', mask)
+        grp = self._group(keys, mask, len(pairs), open=is_open, closed=closed, breached=breached)
+        name_count = len(self.dicts['customer_name'])
+
+        results = []
+        for i, pair in enumerate(pairs):
+            total = int(grp['total'][i])
+            avg_reso = self._avg(grp, i)
+            results.append({
+                "customer_id": self.dicts['customer_id'].values[int(pair // name_count)],
+                "customer_name": self.dicts['customer_name'].values[int(pair % name_count)],
+                "total_tickets": total,
+                "open": int(grp['open'][i]),
+                "closed": int(grp['closed'][i]),
+                "sla_breached": int(grp['breached'][i]),
+                "sla_percent": self._sla_percent(total, int(grp['breached'][i])),
+                "avg_resolve_hours": round(avg_reso, 1) if avg_reso else 0
+            })
+        return results
+
+    def engineers(self, engineer_rows):
+        """
+        Same payload as ITSMService.get_engineers.
+        `engineer_rows` are (id, name, group, level) from the engineers table.
+        """
+        engineer_ids = self.column('engineer_id')
+        n_engineers = len(self.dicts['engineer_id'])
+        mask = np.ones(self.size, dtype=bool)
+        breached = self.overdue[:self.size] == 1
+        grp = self._group(engineer_ids, mask, n_engineers, breached=breached)
+
+        # count(distinct customer_id) per engineer, NULL customers excluded
+        customer_ids = self.column('customer_id')
+        has_customer = customer_ids > 0
+        pairs = np.unique(
+            engineer_ids[has_customer].astype(np.int64) * len(self.dicts['customer_id']) + customer_ids[has_customer]
+        )
+        distinct_customers = np.bincount(pairs // len(self.dicts['customer_id']), minlength=n_engineers)
+
+        results = []
+        for r in engineer_rows:
+            code = self.dicts['engineer_id'].code_of(r.id)
+            total = int(grp['total'][code]) if code > 0 else 0
+            breached_count = int(grp['breached'][code]) if code > 0 else 0
+            results.append({
+                "engineer_id": r.id,
+                "engineer_name": r.name,
+                "group": r.group,
+                "level": r.level,
+                "total_tickets": total,
+                "sla_percent": self._sla_percent(total, breached_count),
+                "customers_supported": int(distinct_customers[code]) if code > 0 else 0
+            })
+        return results
+
+
+class AnalyticsEngine:
+    """Process-wide column store with incremental refresh from the tickets table"""
+    LOAD_BATCH_SIZE = 10000
+    # Re-read rows synced shortly before the watermark: a long sync in another worker
+    # may commit rows stamped earlier than what this worker has already seen.
+    REFRESH_OVERLAP = timedelta(minutes=15)
+
+    def __init__(self):
+        self.store = None
+        self.version = None
+        self.removed_version = None
+        self.watermark = None
+        self.engineer_rows = []
+        self.last_check = 0
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self):
+        return current_app.config.get('ANALYTICS_ENGINE_ENABLED', False)
+
+    def _select(self):
+        # Names come from the dimension tables (the store dictionary-encodes them itself)
+        names = {c.key: c for c in Ticket.list_columns()}
+        return Ticket.join_dimensions(db.session.query(
+            Ticket.id, Ticket.created_at, *[names[name] for name in TicketColumnStore.STRING_COLUMNS],
+            Ticket.is_overdue, Ticket.resolve_time_hours, Ticket.synced_at
+        ))
+
+    def _load(self, query, store):
+        watermark = self.watermark
+        count = 0
+        result = db.session.execute(query.statement.execution_options(yield_per=self.LOAD_BATCH_SIZE))
+        for rows in result.partitions():
+            count += store.upsert(rows)
+            stamps = [r.synced_at for r in rows if r.synced_at]
+            if stamps and (watermark is None or max(stamps) > watermark):
+                watermark = max(stamps)
+        return count, watermark
+
+    def refresh(self, full=False):
+        """
+        Bring the store up to date: full load the first time or after tickets were
+        removed, then only rows synced since the watermark.
+        """
+        with self._lock:
+            version = DataVersion.current('tickets')
+            removed_version = DataVersion.current(REMOVED_DATASET)
+            started = time.time()
+            if full or self.store is None or removed_version != self.removed_version:
+                store = TicketColumnStore()
+                self.watermark = None
+                count, watermark = self._load(self._select(), store)
+                self.store = store
+            else:
+                query = self._select()
+                if self.watermark is not None:
+                    query = query.filter(Ticket.synced_at >= self.watermark - self.REFRESH_OVERLAP)
+                count, watermark = self._load(query, self.store)
+
+            self.watermark = watermark
+            self.engineer_rows = db.session.query(
+                Engineer.id, Engineer.name, Engineer.group, Engineer.level
+            ).all()
+            self.version = version
+            self.removed_version = removed_version
+            self.last_check = time.time()
+            logger.info(f"Analytics engine refreshed {count} rows in {time.time() - started:.2f}s "
+                        f"(total {self.store.size}).")
+
+    def ensure_fresh(self):
+        """Refresh when the tickets data version moved (checked at most every MAX_STALENESS seconds)."""
+        max_staleness = current_app.config.get('ANALYTICS_ENGINE_MAX_STALENESS_SECONDS', 30)
+        if self.store is not None and time.time() - self.last_check < max_staleness:
+            return
+        with self._lock:
+            self.last_check = time.time()
+            if self.store is None or DataVersion.current('tickets') != self.version:
+                self.refresh()
+
+    def summary(self, engineer_name=None):
+        self.ensure_fresh()
+        with self._lock:
+            return self.store.summary(engineer_name)
+
+    def customers(self, engineer_name=None, start=None):
+        self.ensure_fresh()
+        with self._lock:
+            return self.store.customers(engineer_name, start)
+
+    def engineers(self):
+        self.ensure_fresh()
+        with self._lock:
+            return self.store.engineers(self.engineer_rows)
+
+
+analytics_engine = AnalyticsEngine()
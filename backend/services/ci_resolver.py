@@ -0,0 +1,234 @@
+"""
+CI Resolver
+Maps the `instance` / `target` of an alert (ip:port, hostname:port, a URL, ...)
+to its CMDB CI (models.cmdb.CI) so ingested alarms get ci_id, customer_id and
+customer_name without anyone filling them in.
+
+The index lives in memory: dicts keyed by CI id, IP address and hostname (full
+and short name), plus the CIs whose ip_address is a subnet (10.0.1.0/24),
+grouped by prefix length for a longest-prefix match. A lookup is a few dict
+probes and never touches the database.
+
+Refresh is incremental: every CI_RESOLVER_MAX_STALENESS_SECONDS the CIs updated
+since the watermark are re-read. Deletes cannot be seen that way, so they bump
+the 'ci' data version, which triggers a full reload in every worker.
+"""
+import ipaddress
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from urllib.parse import urlsplit
+from flask import current_app
+from models.ticket import db
+from models.cmdb import CI
+from models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+DATASET = 'ci'
+INACTIVE_STATUSES = ('Retired',)
+
+CIEntry = namedtuple('CIEntry', ['ci_id', 'customer_id', 'customer_name'])
+
+
+def instance_host(value):
+    """
+    The host part of an alert instance/target, lowercased:
+    '10.0.0.5:9100' -> '10.0.0.5', '[fe80::1]:9100' -> 'fe80::1',
+    'https://web01.example.com/health' -> 'web01.example.com'.
+    """
+    value = (value or '').strip().lower()
+    if not value:
+        return None
+    if '://' in value:
+        value = urlsplit(value).netloc.rsplit('@', 1)[-1]
+    if value.startswith('['):
+        return value[1:].split(']', 1)[0] or None
+    if value.count(':') == 1:
+        value = value.split(':', 1)[0]
+    return value.rstrip('.') or None
+
+
+def parse_ip(value):
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+class CIIndex:
+    """Hash indexes over CIs; not thread-safe on its own (CIResolver serializes writers)."""
+
+    def __init__(self):
+        self.entries = {}  # ci_id -> CIEntry
+        self.types = {}  # ci_id -> CI type (alarm rules match on it)
+        self.keys = {}  # ci_id -> [(index, key)] it is stored under, to unindex it on update
+        self.by_ip = {}
+        self.by_host = {}
+        self.networks = {}  # (ip version, prefix length) -> {network address: ci_id}
+        self.prefixes = []  # keys of self.networks, longest prefix first
+
+    def __len__(self):
+        return len(self.entries)
+
+    def remove(self, ci_id):
+        self.entries.pop(ci_id, None)
+        self.types.pop(ci_id, None)
+        for index, key in self.keys.pop(ci_id, ()):
+            if index.get(key) == ci_id:
+                del index[key]
+
+    def add(self, ci_id, ip_address, hostname, name, customer_id, customer_name, ci_type=None):
+        """Index a CI under its IP (or subnet), hostname and name; replaces an earlier version of it."""
+        self.remove(ci_id)
+        self.entries[ci_id] = CIEntry(ci_id, customer_id, customer_name)
+        if ci_type:
+            self.types[ci_id] = ci_type
+        keys = []
+        ip_address = (ip_address or '').strip()
+        if '/' in ip_address:
+            try:
+                network = ipaddress.ip_network(ip_address, strict=False)
+                prefix = (network.version, network.prefixlen)
+                if prefix not in self.networks:
+                    self.networks[prefix] = {}
+                    self.prefixes = sorted(self.networks, key=lambda k: -k[1])
+                keys.append((self.networks[prefix], network.network_address))
+            except ValueError:
+                pass
+        elif parse_ip(ip_address):
+            keys.append((self.by_ip, parse_ip(ip_address)))
+        for host in (hostname, name):
+            host = instance_host(host)
+            if host and not parse_ip(host):
+                keys.append((self.by_host, host))
+                keys.append((self.by_host, host.split('.', 1)[0]))
+        for index, key in keys:
+            # The first CI indexed under a key keeps it
+            index.setdefault(key, ci_id)
+        self.keys[ci_id] = keys
+
+    def _network_lookup(self, ip):
+        for version, prefixlen in self.prefixes:
+            if version != ip.version:
+                continue
+            network = ipaddress.ip_network((ip, prefixlen), strict=False).network_address
+            ci_id = self.networks[(version, prefixlen)].get(network)
+            if ci_id:
+                return ci_id
+        return None
+
+    def lookup(self, value):
+        """CIEntry of an alert instance/target (exact IP, then subnet; or hostname, then short name)."""
+        host = instance_host(value)
+        if not host:
+            return None
+        ip = parse_ip(host)
+        if ip:
+            ci_id = self.by_ip.get(ip) or self._network_lookup(ip)
+        else:
+            ci_id = self.by_host.get(host) or self.by_host.get(host.split('.', 1)[0])
+        return self.entries.get(ci_id)
+
+
+class CIResolver:
+    """Process-wide CIIndex with incremental refresh from the ci table."""
+    # Re-read CIs updated shortly before the watermark (commits of other workers)
+    REFRESH_OVERLAP = timedelta(minutes=5)
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+        self.watermark = None
+        self.last_check = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark CIs deleted (caller commits): every worker reloads its index."""
+        DataVersion.bump(DATASET)
+        with self._lock:
+            self.index = None
+
+    def _load(self, index, since=None):
+        query = db.session.query(
+            CI.id, CI.ip_address, CI.hostname, CI.name, CI.customer_id, CI.customer_name, CI.type,
+            CI.status, CI.updated_at
+        )
+        if since is not None:
+            query = query.filter(CI.updated_at >= since)
+        count = 0
+        for r in query.order_by(CI.created_at, CI.id):
+            if r.status in INACTIVE_STATUSES:
+                index.remove(r.id)
+            else:
+                index.add(r.id, r.ip_address, r.hostname, r.name, r.customer_id, r.customer_name, r.type)
+            if r.updated_at and (self.watermark is None or r.updated_at > self.watermark):
+                self.watermark = r.updated_at
+            count += 1
+        return count
+
+    def ensure_fresh(self):
+        """Full load on first use or after a delete, else pick up CIs updated since the watermark."""
+        max_staleness = current_app.config.get('CI_RESOLVER_MAX_STALENESS_SECONDS', 60)
+        with self._lock:
+            if self.index is not None and time.time() - self.last_check < max_staleness:
+                return self.index
+            self.last_check = time.time()
+            version = DataVersion.current(DATASET)
+            started = time.time()
+            if self.index is None or version != self.version:
+                index = CIIndex()
+                self.watermark = None
+                count = self._load(index)
+                self.index = index
+            else:
+                since = self.watermark - self.REFRESH_OVERLAP if self.watermark else None
+                count = self._load(self.index, since)
+            self.version = version
+            if count:
+                logger.info(f"CI resolver loaded {count} CIs in {time.time() - started:.3f}s "
+                            f"(total {len(self.index)}).")
+            return self.index
+
+    @staticmethod
+    def _resolve(index, values):
+        for value in values:
+            if value:
+                entry = index.entries.get(value) or index.lookup(value)
+                if entry:
+                    return entry
+        return None
+
+    def resolve(self, *values):
+        """CIEntry of the first value (CI id, instance or target) that matches a CI, else None."""
+        return self._resolve(self.ensure_fresh(), values)
+
+    def ci_type(self, ci_id):
+        """CMDB type (Host, VM, Switch, ...) of a CI id, None when unknown."""
+        return self.ensure_fresh().types.get(ci_id) if ci_id else None
+
+    def enrich(self, rows):
+        """
+        Fill ci_id, customer_id and customer_name of AlarmNote row dicts from the CI
+        matching their ci_id label, instance or target. Values already set are kept.
+
+        Returns:
+            number of rows matched to a CI
+        """
+        if not rows:
+            return 0
+        index = self.ensure_fresh()
+        matched = 0
+        for row in rows:
+            entry = self._resolve(index, (row.get('ci_id'), row.get('instance'), row.get('target')))
+            if entry:
+                row['ci_id'] = entry.ci_id
+                row['customer_id'] = row.get('customer_id') or entry.customer_id
+                row['customer_name'] = row.get('customer_name') or entry.customer_name
+                matched += 1
+        return matched
+
+
+ci_resolver = CIResolver()
@@ -0,0 +1,255 @@
+"""
+Alarm Correlation Engine
+Groups the alarms of an outage under one root-cause alarm by walking the CMDB
+dependency graph (models.cmdb.CIRelationship): when a host goes down, the
+alarms of its VMs and services become children (AlarmNote.parent_alarm_id)
+of the host alarm, so the NOC triages one incident instead of dozens.
+
+The graph is kept in memory as adjacency sets, rebuilt when the
+'ci_relationships' data version moves (bumped by every relationship change,
+checked at most every ALARM_CORRELATION_GRAPH_MAX_STALENESS_SECONDS).
+Correlating an ingestion batch costs one query: the open alarms on the CIs
+related to the batch, inside the correlation window.
+
+Edge semantics: `source runs_on / depends_on / connects_to target` means the
+source depends on the target (direction 'forward'); 'backward' flips it and
+'bidirectional' adds both. monitored_by is not a failure dependency.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta, timezone
+from flask import current_app
+from models.ticket import db
+from models.alarm import AlarmNote
+from models.cmdb import CIRelationship
+from models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+DATASET = 'ci_relationships'
+DEPENDENCY_TYPES = ('runs_on', 'depends_on', 'connects_to')
+
+
+def as_utc_naive(value):
+    """Alarm timestamps are naive UTC; Alertmanager's startsAt may carry an offset."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class DependencyGraph:
+    """CI -> CIs it depends on (upstream) and CIs depending on it (downstream)."""
+
+    def __init__(self, edges=()):
+        self.upstream = defaultdict(set)
+        self.downstream = defaultdict(set)
+        for source, target, relationship_type, direction in edges:
+            if relationship_type not in DEPENDENCY_TYPES or source == target:
+                continue
+            if direction in (None, 'forward', 'bidirectional'):
+                self._add(source, target)
+            if direction in ('backward', 'bidirectional'):
+                self._add(target, source)
+        self._ancestors = {}
+        self._descendants = {}
+
+    def _add(self, dependent, dependency):
+        self.upstream[dependent].add(dependency)
+        self.downstream[dependency].add(dependent)
+
+    @property
+    def edge_count(self):
+        return sum(len(targets) for targets in self.upstream.values())
+
+    @staticmethod
+    def _walk(adjacency, ci_id, max_depth):
+        """{ci: hops} reachable from ci_id within max_depth hops (ci_id itself at 0), breadth first."""
+        hops = {ci_id: 0}
+        pending = deque([ci_id])
+        while pending:
+            current = pending.popleft()
+            if hops[current] >= max_depth:
+                continue
+            for neighbour in adjacency.get(current, ()):
+                if neighbour not in hops:
+                    hops[neighbour] = hops[current] + 1
+                    pending.append(neighbour)
+        return hops
+
+    def ancestors(self, ci_id, max_depth):
+        """CIs ci_id depends on (transitively), with their distance. Memoized per graph."""
+        key = (ci_id, max_depth)
+        if key not in self._ancestors:
+            self._ancestors[key] = self._walk(self.upstream, ci_id, max_depth)
+        return self._ancestors[key]
+
+    def descendants(self, ci_id, max_depth):
+        """CIs depending on ci_id (transitively), with their distance. Memoized per graph."""
+        key = (ci_id, max_depth)
+        if key not in self._descendants:
+            self._descendants[key] = self._walk(self.downstream, ci_id, max_depth)
+        return self._descendants[key]
+
+
+def correlate(graph, new_alarms, open_alarms, window, max_depth):
+    """
+    Assign root-cause parents to a batch of new alarms.
+
+    Args:
+        graph: DependencyGraph
+        new_alarms: [{'alarm_id', 'ci_id', 'at'}] in arrival order; 'parent' is set on each
+        open_alarms: [{'alarm_id', 'ci_id', 'at', 'parent'}] already stored and unresolved
+        window: timedelta; alarms further apart than this are never grouped
+        max_depth: hops walked in the graph
+
+    A new alarm becomes a child of the alarm on its most upstream CI (earliest on
+    ties; an alarm on the same CI counts as 0 hops). Without one it is a root and
+    adopts the root alarms of its downstream CIs, with their children, so a host
+    alarm arriving after its VM alarms still ends up on top. Trees stay one level
+    deep: a parent is always a root.
+
+    Returns:
+        {old root alarm_id: new root alarm_id} for stored alarms re-parented this way
+    """
+    by_ci = defaultdict(list)
+    for alarm in open_alarms:
+        by_ci[alarm['ci_id']].append(alarm)
+    adopted = {}
+
+    def within(alarm, at):
+        return abs(alarm['at'] - at) <= window
+
+    for alarm in new_alarms:
+        alarm['parent'] = None
+        if not alarm['ci_id']:
+            continue
+        best = None
+        for ci_id, hops in graph.ancestors(alarm['ci_id'], max_depth).items():
+            for candidate in by_ci.get(ci_id, ()):
+                if within(candidate, alarm['at']):
+                    rank = (-hops, candidate['at'])
+                    if best is None or rank < best[0]:
+                        best = (rank, candidate)
+        if best:
+            candidate = best[1]
+            alarm['parent'] = candidate['parent'] or candidate['alarm_id']
+        else:
+            roots = set()
+            for ci_id, hops in graph.descendants(alarm['ci_id'], max_depth).items():
+                if hops == 0:
+                    continue
+                for candidate in by_ci.get(ci_id, ()):
+                    if candidate['parent'] is None and within(candidate, alarm['at']):
+                        roots.add(candidate['alarm_id'])
+            if roots:
+                for candidates in by_ci.values():
+                    for candidate in candidates:
+                        if candidate['alarm_id'] in roots or candidate['parent'] in roots:
+                            candidate['parent'] = alarm['alarm_id']
+                for root in roots:
+                    # Stored roots are re-parented in the database, batch ones through their row
+                    adopted[root] = alarm['alarm_id']
+                for old, new in adopted.items():
+                    if new in roots:
+                        adopted[old] = alarm['alarm_id']
+        by_ci[alarm['ci_id']].append(alarm)
+
+    stored = {a['alarm_id'] for a in open_alarms}
+    return {old: new for old, new in adopted.items() if old in stored}
+
+
+class CorrelationEngine:
+    """Process-wide dependency graph and the batch correlation of new alarms."""
+
+    def __init__(self):
+        self.graph = None
+        self.version = None
+        self.last_check = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the relationships changed (caller commits) and drop this process's graph."""
+        DataVersion.bump(DATASET)
+        with self._lock:
+            self.graph = None
+
+    def get_graph(self):
+        """The dependency graph, rebuilt when the relationship data version moved."""
+        max_staleness = current_app.config.get('ALARM_CORRELATION_GRAPH_MAX_STALENESS_SECONDS', 30)
+        with self._lock:
+            if self.graph is not None and time.time() - self.last_check < max_staleness:
+                return self.graph
+            self.last_check = time.time()
+            version = DataVersion.current(DATASET)
+            if self.graph is None or version != self.version:
+                started = time.time()
+                edges = db.session.query(
+                    CIRelationship.source_ci_id, CIRelationship.target_ci_id,
+                    CIRelationship.relationship_type, CIRelationship.direction
+                ).all()
+                self.graph = DependencyGraph(edges)
+                self.version = version
+                logger.info(f"Correlation graph rebuilt: {self.graph.edge_count} dependencies "
+                            f"in {time.time() - started:.3f}s")
+            return self.graph
+
+    def correlate(self, rows, now):
+        """
+        Set 'parent_alarm_id' on new AlarmNote rows (dicts with alarm_id, ci_id and
+        fired_at) before they are inserted, and re-parent stored root alarms adopted
+        by one of them. The caller commits.
+
+        Returns:
+            number of new rows that got a parent
+        """
+        config = current_app.config
+        window = timedelta(minutes=config.get('ALARM_CORRELATION_WINDOW_MINUTES', 10))
+        max_depth = config.get('ALARM_CORRELATION_MAX_DEPTH', 4)
+        rows = [r for r in rows if r.get('ci_id')]
+        if not rows:
+            return 0
+
+        graph = self.get_graph()
+        new_alarms = [{'alarm_id': r['alarm_id'], 'ci_id': r['ci_id'],
+                       'at': as_utc_naive(r.get('fired_at')) or now} for r in rows]
+        related = set()
+        for alarm in new_alarms:
+            related.update(graph.ancestors(alarm['ci_id'], max_depth))
+            related.update(graph.descendants(alarm['ci_id'], max_depth))
+        times = [a['at'] for a in new_alarms]
+        opened_at = db.func.coalesce(AlarmNote.fired_at, AlarmNote.created_at)
+        open_alarms = [{'alarm_id': r.alarm_id, 'ci_id': r.ci_id, 'at': r.at, 'parent': r.parent_alarm_id}
+                       for r in db.session.query(
+                           AlarmNote.alarm_id, AlarmNote.ci_id, opened_at.label('at'), AlarmNote.parent_alarm_id
+                       ).filter(
+                           AlarmNote.ci_id.in_(related),
+                           AlarmNote.status != 'resolved',
+                           opened_at.between(min(times) - window, max(times) + window)
+                       )]
+
+        adopted = correlate(graph, new_alarms, open_alarms, window, max_depth)
+        for row, alarm in zip(rows, new_alarms):
+            row['parent_alarm_id'] = alarm['parent']
+        if adopted:
+            self._reparent(adopted)
+        return sum(1 for a in new_alarms if a['parent'])
+
+    @staticmethod
+    def _reparent(adopted):
+        """One UPDATE moving each adopted root, and its children, under its new root."""
+        table = AlarmNote.__table__
+        values = db.values(
+            db.column('old_root', db.String),
+            db.column('new_root', db.String),
+            name='adopted'
+        ).data(list(adopted.items()))
+        db.session.execute(
+            table.update()
+            .where(db.or_(table.c.alarm_id == values.c.old_root, table.c.parent_alarm_id == values.c.old_root))
+            .values(parent_alarm_id=values.c.new_root)
+        )
+
+
+correlation_engine = CorrelationEngine()
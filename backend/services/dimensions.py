@@ -0,0 +1,108 @@
+"""
+Ticket Dimensions
+Tickets store status, priority, category and request_type as SMALLINT keys into
+small lookup tables (models.ticket.TicketStatus, ...); customer and engineer
+names live in `customers` / `engineers`, keyed by the ticket's ids.
+
+Each process holds the lookup tables in memory (DimensionCache). The sync
+encodes names to keys through it, creating missing keys in bulk; reports group
+by the keys and turn them back into names at the edge. Lookup tables are
+append-only, so a cache only reloads when it meets a name or key it has not
+seen (e.g. one added by the sync of another worker).
+"""
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.ticket import db, Engineer, TicketStatus, TicketPriority, TicketCategory, TicketRequestType
+
+
+class DimensionCache:
+    """name <-> key of one lookup table."""
+
+    def __init__(self, model):
+        self.model = model
+        self.keys = {}  # name -> key
+        self.names = {}  # key -> name
+
+    def load(self, connection=None):
+        rows = (connection or db.session).execute(db.select(self.model.id, self.model.name)).all()
+        # Replace both maps at once so concurrent readers never see a partial load
+        self.keys, self.names = {r.name: r.id for r in rows}, {r.id: r.name for r in rows}
+
+    def key(self, name):
+        """Key of a name, None for NULL or a name no ticket has."""
+        if name is None:
+            return None
+        if name not in self.keys:
+            self.load()
+        return self.keys.get(name)
+
+    def keys_of(self, names):
+        """Keys of the known names, for IN filters (unknown names match nothing)."""
+        if any(n not in self.keys for n in names):
+            self.load()
+        return [self.keys[n] for n in names if n in self.keys]
+
+    def name(self, key):
+        if key is None:
+            return None
+        if key not in self.names:
+            self.load()
+        return self.names.get(key)
+
+    def matching(self, fragment):
+        """Keys whose name contains `fragment`, case-insensitive (lower(name) LIKE '%fragment%')."""
+        self.load()
+        fragment = fragment.lower()
+        return [key for name, key in self.keys.items() if fragment in name.lower()]
+
+    def ensure(self, names):
+        """
+        Make sure every (non-NULL) name has a key. Missing names are inserted and
+        committed on their own connection, so the keys stay valid whatever happens
+        to the caller's transaction.
+        """
+        missing = {n for n in names if n is not None and n not in self.keys}
+        if not missing:
+            return
+        with db.engine.begin() as connection:
+            stmt = pg_insert(self.model).values([{'name': n} for n in sorted(missing)])
+            connection.execute(stmt.on_conflict_do_nothing(index_elements=['name']))
+            self.load(connection)
+
+
+class TicketDimensions:
+    """The lookup tables of the tickets table, by ticket field ('status' -> tickets.status_id)."""
+
+    def __init__(self):
+        self.status = DimensionCache(TicketStatus)
+        self.priority = DimensionCache(TicketPriority)
+        self.category = DimensionCache(TicketCategory)
+        self.request_type = DimensionCache(TicketRequestType)
+        self.fields = {
+            'status': self.status,
+            'priority': self.priority,
+            'category': self.category,
+            'request_type': self.request_type,
+        }
+
+    def encode(self, tickets):
+        """
+        Ticket dicts carrying names (status, priority, ...) -> dicts carrying the
+        keys (status_id, priority_id, ...), ready for the tickets table.
+        """
+        for field, cache in self.fields.items():
+            cache.ensure({t.get(field) for t in tickets})
+        return [{
+            **{k: v for k, v in t.items() if k not in self.fields},
+            **{f'{field}_id': cache.keys.get(t.get(field)) for field, cache in self.fields.items()}
+        } for t in tickets]
+
+    def decode(self, field, key):
+        return self.fields[field].name(key)
+
+
+def engineer_named(column, name):
+    """Filter on an engineer id column by the engineer's display name."""
+    return column.in_(db.select(Engineer.id).where(Engineer.name == name).scalar_subquery())
+
+
+ticket_dimensions = TicketDimensions()
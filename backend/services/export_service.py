@@ -0,0 +1,235 @@
+"""
+Export Service
+Streams tickets, or the rows behind a report, as CSV or Parquet.
+
+Ticket rows come from a server-side cursor in chunks of EXPORT_CHUNK_SIZE and
+each chunk is encoded and yielded before the next one is fetched, so memory
+stays flat regardless of the export size. Parquet (one row group per chunk)
+needs the optional `pyarrow` package.
+"""
+import csv
+import io
+from datetime import datetime
+from models.ticket import db, Ticket
+from services.itsm_service import report_window
+from services.dimensions import ticket_dimensions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for format=parquet
+    pa = None
+    pq = None
+
+EXPORT_CHUNK_SIZE = 5000
+FORMATS = ('csv', 'parquet')
+
+# Name columns are read from the dimension tables (Ticket.join_dimensions)
+_NAMES = {c.key: c for c in Ticket.list_columns()}
+TICKET_COLUMNS = [
+    ('ticket_id', Ticket.id, 'string'),
+    ('title', Ticket.title, 'string'),
+    ('customer_id', Ticket.customer_id, 'string'),
+    ('customer_name', _NAMES['customer_name'], 'string'),
+    ('engineer_id', Ticket.engineer_id, 'string'),
+    ('engineer_name', _NAMES['engineer_name'], 'string'),
+    ('status', _NAMES['status'], 'string'),
+    ('priority', _NAMES['priority'], 'string'),
+    ('category', _NAMES['category'], 'string'),
+    ('request_type', _NAMES['request_type'], 'string'),
+    ('is_service_request', Ticket.is_service_request, 'bool'),
+    ('created_at', Ticket.created_at, 'timestamp'),
+    ('response_time_minutes', Ticket.response_time_minutes, 'int'),
+    ('resolve_time_hours', Ticket.resolve_time_hours, 'float'),
+    ('time_elapsed_minutes', Ticket.time_elapsed_minutes, 'int'),
+    ('is_overdue', Ticket.is_overdue, 'bool'),
+]
+DESCRIPTION_COLUMN = ('description', Ticket.description, 'string')
+
+
+def iter_ticket_chunks(columns, customer_id=None, engineer_id=None, status=None, priority=None,
+                       date_from=None, date_to=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of row tuples from a server-side cursor, oldest tickets first."""
+    query = Ticket.join_dimensions(db.select(*[expr for _, expr, _ in columns]))
+    if customer_id:
+        query = query.where(Ticket.customer_id == customer_id)
+    if engineer_id:
+        query = query.where(Ticket.engineer_id == engineer_id)
+    if status:
+        query = query.where(Ticket.status_id.in_(ticket_dimensions.status.keys_of(status)))
+    if priority:
+        query = query.where(Ticket.priority_id.in_(ticket_dimensions.priority.keys_of(priority)))
+    if date_from:
+        query = query.where(Ticket.created_at >= date_from)
+    if date_to:
+        query = query.where(Ticket.created_at < date_to)
+    query = query.order_by(Ticket.created_at, Ticket.id)
+
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    try:
+        for rows in result.partitions():
+            yield [tuple(r) for r in rows]
+    finally:
+        result.close()
+
+
+def iter_dict_chunks(records, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Chunk a list of report dicts into row tuples (report rows are already aggregated)."""
+    for i in range(0, len(records), chunk_size):
+        yield [tuple(rec.get(name) for name in columns) for rec in records[i:i + chunk_size]]
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def csv_stream(column_names, chunks):
+    """CSV bytes per chunk. Starts with a UTF-8 BOM so Excel shows Vietnamese text correctly."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column_names)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def _arrow_type(kind):
+    return {
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'timestamp': pa.timestamp('us'),
+    }[kind]
+
+
+def parquet_stream(column_names, chunks, kinds=None):
+    """
+    Parquet bytes, one row group per chunk. `kinds` gives column types
+    ('string', 'int', ...); without it the schema is inferred from the first chunk.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+
+    schema = pa.schema([(n, _arrow_type(k)) for n, k in zip(column_names, kinds)]) if kinds else None
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for chunk in chunks:
+            columns = list(zip(*chunk)) if chunk else [[] for _ in column_names]
+            if schema is None:
+                table = pa.table({n: list(c) for n, c in zip(column_names, columns)})
+                schema = table.schema
+            else:
+                table = pa.Table.from_arrays(
+                    [pa.array(list(c), type=f.type) for c, f in zip(columns, schema)], schema=schema
+                )
+            if writer is None:
+                writer = pq.ParquetWriter(sink, schema, compression='snappy')
+            writer.write_table(table)
+            yield sink.drain()
+        if writer is None:
+            if schema is None:
+                schema = pa.schema([(n, pa.string()) for n in column_names])
+            writer = pq.ParquetWriter(sink, schema)
+        writer.close()
+        writer = None
+        yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def encode(fmt, column_names, chunks, kinds=None):
+    if fmt == 'parquet':
+        return parquet_stream(column_names, chunks, kinds)
+    return csv_stream(column_names, chunks)
+
+
+class ExportService:
+    """
+    Builds (filename, byte generator) pairs for the export endpoint.
+    tickets: raw rows (no window unless period/from/to is given);
+    customers / engineers / percentiles: the rows of those report endpoints (default 30d).
+    """
+    DATASETS = ('tickets', 'customers', 'engineers', 'percentiles')
+
+    def __init__(self, itsm_service):
+        self.itsm_service = itsm_service
+
+    def export(self, dataset, fmt, include_description=False, period=None, group_by=None,
+               customer_id=None, engineer_id=None, engineer_name=None, status=None, priority=None,
+               date_from=None, date_to=None):
+        """
+        Raises:
+            ValueError: unknown dataset/format, or parquet without pyarrow
+        """
+        if dataset not in self.DATASETS:
+            raise ValueError(f"dataset must be one of: {', '.join(self.DATASETS)}")
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        if fmt == 'parquet' and pa is None:
+            raise ValueError("format=parquet is not available: install pyarrow")
+
+        filename = f"{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+        if dataset == 'tickets':
+            if period:
+                date_from, date_to = report_window(period, date_from, date_to)
+            columns = TICKET_COLUMNS + ([DESCRIPTION_COLUMN] if include_description else [])
+            chunks = iter_ticket_chunks(
+                columns, customer_id=customer_id, engineer_id=engineer_id, status=status,
+                priority=priority, date_from=date_from, date_to=date_to
+            )
+            return filename, encode(fmt, [c[0] for c in columns], chunks, [c[2] for c in columns])
+
+        if dataset == 'customers':
+            records = self.itsm_service.get_customers(engineer_name, period or '30d',
+                                                      date_from=date_from, date_to=date_to)
+        elif dataset == 'engineers':
+            records = self.itsm_service.get_engineers()
+        else:
+            data = self.itsm_service.get_percentiles(
+                group_by or 'customer', period or '30d', date_from, date_to,
+                customer_id=customer_id, engineer_id=engineer_id
+            )['data']
+            records = [flatten(rec) for rec in data]
+
+        column_names = list(records[0].keys()) if records else []
+        return filename, encode(fmt, column_names, iter_dict_chunks(records, column_names))
+
+
+def flatten(record, prefix=''):
+    """{'a': {'b': 1}} -> {'a_b': 1} for tabular formats."""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}_"))
+        else:
+            flat[name] = value
+    return flat
@@ -0,0 +1,215 @@
+"""
+Flap Detector
+Keeps, per Alertmanager fingerprint, the firing <-> resolved changes of the last
+ALARM_FLAP_WINDOW_MINUTES in memory. At ALARM_FLAP_THRESHOLD changes the alarm
+is flagged flapping (AlarmNote.flapping): services/alarm_ingest.py then holds
+it open and stops writing a 'reopened'/'resolved' history row for every change.
+It stabilizes when at most ALARM_FLAP_CLEAR_THRESHOLD changes are left in the
+window; the alarm then takes the last status Alertmanager reported.
+
+Only status changes need the state: re-sends of an alert in the status its
+alarm already has never touch it. States are loaded for the fingerprints of a
+batch in one query and written back (one upsert) every
+ALARM_FLAP_PERSIST_SECONDS, so a restarted worker, or another process, picks up
+where this one left off. Changes are identified by their alert time (startsAt
+of a firing, endsAt of a resolved alert), which makes merging the copies of two
+workers, or replaying a payload, idempotent.
+"""
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.ticket import db
+from models.alarm import AlarmFlapState
+from services.correlation_engine import as_utc_naive
+
+logger = logging.getLogger(__name__)
+
+
+def alert_time(alert, status, now):
+    """Time of an alert's status change (startsAt when firing, endsAt when resolved), naive UTC, never after now."""
+    value = alert.get('startsAt' if status == 'firing' else 'endsAt')
+    try:
+        at = as_utc_naive(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    except (AttributeError, ValueError):
+        return now
+    return min(at, now)
+
+
+class FlapState:
+    """Status changes of one fingerprint inside the window, oldest first (at most `threshold` kept)."""
+    __slots__ = ('observed', 'transitions', 'flapping', 'flapping_since', 'flag_changed_at',
+                 'suppressed', 'synced_at', 'dirty', 'persisted')
+
+    def __init__(self, observed, transitions=(), flapping=False, flapping_since=None,
+                 flag_changed_at=None, suppressed=0):
+        self.observed = observed
+        self.transitions = sorted(transitions)
+        self.flapping = flapping
+        self.flapping_since = flapping_since
+        self.flag_changed_at = flag_changed_at
+        self.suppressed = suppressed
+        self.synced_at = 0  # time.time() of the last merge with the persisted copy
+        self.dirty = False
+        self.persisted = False
+
+    def prune(self, now, window):
+        del self.transitions[:bisect.bisect_right(self.transitions, now - window)]
+
+    def record(self, status, at, now, window, threshold, clear_threshold):
+        """
+        Apply an alert status ('firing' | 'resolved') reported at `at`.
+
+        Returns:
+            'started' / 'stopped' when the fingerprint started / stopped flapping, else None
+        """
+        if status != self.observed:
+            self.observed = status
+            if at not in self.transitions:
+                bisect.insort(self.transitions, at)
+                del self.transitions[:-threshold]
+            if self.flapping:
+                self.suppressed += 1
+            self.dirty = True
+        return self.evaluate(now, window, threshold, clear_threshold)
+
+    def evaluate(self, now, window, threshold, clear_threshold):
+        """Start or stop flapping on the changes left in the window; same returns as record()."""
+        self.prune(now, window)
+        if not self.flapping and len(self.transitions) >= threshold:
+            self.flapping, self.flapping_since, self.suppressed = True, now, 0
+        elif self.flapping and len(self.transitions) <= clear_threshold:
+            self.flapping = False
+        else:
+            return None
+        self.flag_changed_at = now
+        self.dirty = True
+        return 'started' if self.flapping else 'stopped'
+
+    def merge(self, other, threshold):
+        """Fold in the persisted copy: union of the changes, flag and status of whichever changed last."""
+        if other.transitions and (not self.transitions or other.transitions[-1] > self.transitions[-1]):
+            self.observed = other.observed
+        self.transitions = sorted(set(self.transitions) | set(other.transitions))[-threshold:]
+        if other.flag_changed_at and (self.flag_changed_at is None or other.flag_changed_at > self.flag_changed_at):
+            self.flapping, self.flapping_since, self.flag_changed_at = \
+                other.flapping, other.flapping_since, other.flag_changed_at
+        self.suppressed = max(self.suppressed, other.suppressed)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.observed, [datetime.fromisoformat(t) for t in row.transitions or ()],
+                   row.flapping, row.flapping_since, row.flag_changed_at, row.suppressed or 0)
+
+    def to_row(self, fingerprint, now):
+        return {
+            'fingerprint': fingerprint,
+            'observed': self.observed,
+            'transitions': [t.isoformat() for t in self.transitions],
+            'flapping': self.flapping,
+            'flapping_since': self.flapping_since,
+            'flag_changed_at': self.flag_changed_at,
+            'suppressed': self.suppressed,
+            'updated_at': now,
+        }
+
+
+class FlapDetector:
+    """Process-wide FlapStates; batches of one fingerprint are serialized by the ingest advisory locks."""
+
+    def __init__(self):
+        self.states = {}  # fingerprint -> FlapState
+        self.last_persist = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def settings():
+        config = current_app.config
+        return (timedelta(minutes=config.get('ALARM_FLAP_WINDOW_MINUTES', 10)),
+                config.get('ALARM_FLAP_THRESHOLD', 6),
+                config.get('ALARM_FLAP_CLEAR_THRESHOLD', 1))
+
+    def load(self, fingerprints, force=()):
+        """
+        Make the states of `fingerprints` current: the ones this process does not
+        hold, has not synced for ALARM_FLAP_PERSIST_SECONDS or that are in `force`
+        are read (one query) and merged with the persisted copy.
+        """
+        max_staleness = current_app.config.get('ALARM_FLAP_PERSIST_SECONDS', 30)
+        threshold = self.settings()[1]
+        with self._lock:
+            stale = [fp for fp in fingerprints
+                     if fp not in self.states or fp in force
+                     or time.time() - self.states[fp].synced_at >= max_staleness]
+        if not stale:
+            return
+        rows = AlarmFlapState.query.filter(AlarmFlapState.fingerprint.in_(stale)).all()
+        with self._lock:
+            for row in rows:
+                persisted = FlapState.from_row(row)
+                state = self.states.get(row.fingerprint)
+                if state is None:
+                    self.states[row.fingerprint] = state = persisted
+                else:
+                    state.merge(persisted, threshold)
+                state.persisted = True
+            for fp in stale:
+                if fp in self.states:
+                    self.states[fp].synced_at = time.time()
+
+    def get(self, fingerprint, observed):
+        """State of a fingerprint (load() it first); a new one starts from the `observed` status of its alarm."""
+        with self._lock:
+            state = self.states.get(fingerprint)
+            if state is None:
+                state = self.states[fingerprint] = FlapState(observed)
+                state.synced_at = time.time()
+            return state
+
+    def settle_candidates(self, now):
+        """Flapping fingerprints that may have stabilized (load() them with force before deciding)."""
+        window, _, clear_threshold = self.settings()
+        cutoff = now - window
+        with self._lock:
+            return [fp for fp, state in self.states.items()
+                    if state.flapping
+                    and len(state.transitions) - bisect.bisect_right(state.transitions, cutoff) <= clear_threshold]
+
+    def persist(self, now, force=False):
+        """
+        Write the changed states (one upsert) and drop the quiet ones, at most every
+        ALARM_FLAP_PERSIST_SECONDS unless forced. The caller commits.
+        """
+        if not force and time.time() - self.last_persist < current_app.config.get('ALARM_FLAP_PERSIST_SECONDS', 30):
+            return 0
+        cutoff = now - self.settings()[0]
+        with self._lock:
+            self.last_persist = time.time()
+            rows, evicted = [], []
+            for fp, state in list(self.states.items()):
+                if not state.flapping and bisect.bisect_right(state.transitions, cutoff) == len(state.transitions):
+                    del self.states[fp]
+                    if state.persisted:
+                        evicted.append(fp)
+                elif state.dirty:
+                    rows.append(state.to_row(fp, now))
+                    state.dirty = False
+                    state.persisted = True
+        if rows:
+            stmt = pg_insert(AlarmFlapState).values(sorted(rows, key=lambda r: r['fingerprint']))
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['fingerprint'],
+                set_={name: stmt.excluded[name] for name in rows[0] if name != 'fingerprint'}
+            ))
+        if evicted:
+            AlarmFlapState.query.filter(AlarmFlapState.fingerprint.in_(evicted)).delete(synchronize_session=False)
+        if rows or evicted:
+            logger.info(f"Flap detector persisted {len(rows)} states, dropped {len(evicted)} "
+                        f"({len(self.states)} in memory)")
+        return len(rows)
+
+
+flap_detector = FlapDetector()
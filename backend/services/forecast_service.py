@@ -0,0 +1,251 @@
+"""
+Forecast Service
+Vectorized ticket volume / SLA forecasting over monthly series.
+
+The monthly series of every requested customer is loaded with one grouped query
+and fitted in a single pass with NumPy (rows = customers, columns = months), so
+forecasting the whole portfolio costs about the same as forecasting one customer.
+"""
+import threading
+import numpy as np
+from datetime import datetime
+from sqlalchemy import func
+from models.ticket import db, Ticket
+from models.data_version import DataVersion
+
+
+def month_index(year, month):
+    """Months since year 0, so consecutive months differ by exactly 1."""
+    return year * 12 + (month - 1)
+
+
+def month_start(index):
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def forward_fill(values, initial):
+    """Replace NaN with the last valid value to the left (row-wise), `initial` before the first one."""
+    values = np.array(values, dtype=float)
+    values[:, 0] = np.where(np.isnan(values[:, 0]), initial, values[:, 0])
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return values[np.arange(values.shape[0])[:, None], idx]
+
+
+def exponential_smoothing(series, alpha=0.5, beta=0.2, gamma=0.3, damping=0.9,
+                          season_length=None, horizon=2):
+    """
+    Damped Holt smoothing (Holt-Winters additive when `season_length` is set and
+    at least two full seasons are available), fitted row-wise over a 2-D array.
+
+    Args:
+        series: array of shape (n_series, n_periods), oldest period first.
+            Leading zeros are treated as "no history yet" rather than real zeros.
+        horizon: number of periods to forecast after the last observation.
+
+    Returns:
+        array of shape (n_series, horizon)
+    """
+    y = np.atleast_2d(np.asarray(series, dtype=float))
+    n, periods = y.shape
+    if periods == 0:
+        return np.zeros((n, horizon))
+
+    seasonal = bool(season_length) and periods >= 2 * season_length
+    m = season_length if seasonal else 1
+    season = np.zeros((n, m))
+    trend = np.zeros(n)
+
+    if seasonal:
+        first = y[:, :m].mean(axis=1)
+        second = y[:, m:2 * m].mean(axis=1)
+        season = y[:, :m] - first[:, None]
+        level = first
+        trend = (second - first) / m
+        start = m
+        started = first > 0
+    else:
+        level = y[:, 0].copy()
+        start = 1
+        started = level > 0
+
+    for t in range(start, periods):
+        obs = y[:, t]
+        s = season[:, t % m]
+        level_new = alpha * (obs - s) + (1 - alpha) * (level + damping * trend)
+        trend_new = beta * (level_new - level) + (1 - beta) * damping * trend
+        season[:, t % m] = np.where(started, gamma * (obs - level_new) + (1 - gamma) * s, s)
+        # Series that have not started yet just track the observation
+        level = np.where(started, level_new, obs)
+        trend = np.where(started, trend_new, 0.0)
+        started = started | (obs > 0)
+
+    damped = np.cumsum(damping ** np.arange(1, horizon + 1))
+    steps = (periods - 1 + np.arange(1, horizon + 1)) % m
+    return level[:, None] + trend[:, None] * damped[None, :] + season[:, steps]
+
+
+class ForecastService:
+    """
+    Loads monthly volume/SLA series and fits forecasts for one or all customers.
+    Results are cached per `tickets` data version, which the sync bumps.
+    """
+    SEASON_LENGTH = 12
+    # Two full seasons of complete months plus the (possibly partial) target month
+    HISTORY_MONTHS = 2 * SEASON_LENGTH + 1
+    MAX_CACHE_ENTRIES = 10000
+
+    def __init__(self):
+        self._cache = {}
+        self._cache_version = None
+        self._lock = threading.Lock()
+
+    def load_monthly_series(self, year, month, months, customer_id=None):
+        """
+        Load `months` monthly buckets ending at (year, month) in one grouped query.
+
+        Returns:
+            (customer_ids, month_indexes, volume, sla_met) where volume and sla_met
+            are int arrays of shape (len(customer_ids), months).
+        """
+        end_idx = month_index(year, month)
+        start_idx = end_idx - months + 1
+        month_col = func.date_trunc('month', Ticket.created_at).label('month')
+
+        query = db.session.query(
+            Ticket.customer_id,
+            month_col,
+            func.count(Ticket.id).label('total'),
+            func.sum(db.case((Ticket.is_overdue == False, 1), else_=0)).label('met')
+        ).filter(
+            Ticket.created_at >= month_start(start_idx),
+            Ticket.created_at < month_start(end_idx + 1)
+        )
+        if customer_id:
+            query = query.filter(Ticket.customer_id == customer_id)
+        rows = query.group_by(Ticket.customer_id, month_col).all()
+
+        customer_ids = sorted({r.customer_id for r in rows})
+        if customer_id and not customer_ids:
+            customer_ids = [customer_id]
+        position = {cid: i for i, cid in enumerate(customer_ids)}
+
+        volume = np.zeros((len(customer_ids), months), dtype=np.int64)
+        sla_met = np.zeros((len(customer_ids), months), dtype=np.int64)
+        for r in rows:
+            col = month_index(r.month.year, r.month.month) - start_idx
+            volume[position[r.customer_id], col] = r.total
+            sla_met[position[r.customer_id], col] = r.met or 0
+
+        return customer_ids, np.arange(start_idx, end_idx + 1), volume, sla_met
+
+    def forecast(self, customer_id, year, month, seasonal=False):
+        """Forecast payload for one customer (same shape as ITSMService.get_forecast)."""
+        key = (customer_id, year, month, seasonal)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+        return self._compute(year, month, seasonal, customer_id)[customer_id]
+
+    def forecast_all(self, year, month, seasonal=False):
+        """Forecast payloads for every customer with tickets in the history window."""
+        return self._compute(year, month, seasonal)
+
+    def _get_cached(self, key):
+        version = DataVersion.current('tickets')
+        with self._lock:
+            if version != self._cache_version:
+                self._cache = {}
+                self._cache_version = version
+            return self._cache.get(key)
+
+    def _store(self, version, results, year, month, seasonal):
+        with self._lock:
+            if version != self._cache_version or len(self._cache) > self.MAX_CACHE_ENTRIES:
+                self._cache = {}
+                self._cache_version = version
+            for cid, payload in results.items():
+                self._cache[(cid, year, month, seasonal)] = payload
+
+    def _compute(self, year, month, seasonal, customer_id=None):
+        version = DataVersion.current('tickets')
+        customer_ids, months, volume, sla_met = self.load_monthly_series(
+            year, month, self.HISTORY_MONTHS, customer_id
+        )
+        if not customer_ids:
+            return {}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sla = np.where(volume > 0, sla_met / volume * 100.0, np.nan)
+        sla_actual = np.where(volume > 0, np.round(sla, 2), 100.0)
+
+        # Fit on complete months only; the target month is usually still in progress
+        history = volume[:, :-1]
+        season_length = self.SEASON_LENGTH if seasonal else None
+        volume_fc = exponential_smoothing(history, season_length=season_length).clip(min=0)
+        sla_fc = exponential_smoothing(
+            forward_fill(sla[:, :-1], 100.0), beta=0.1, horizon=2
+        ).clip(0.0, 100.0)
+
+        # No history at all: carry the current month forward
+        no_history = history.sum(axis=1) == 0
+        volume_fc[no_history] = volume[no_history, -1:]
+        sla_fc[no_history] = sla_actual[no_history, -1:]
+
+        labels = [month_start(i).strftime("%b %Y") for i in months]
+        next_label = month_start(months[-1] + 1).strftime("%b %Y")
+        method = 'holt_winters' if seasonal and history.shape[1] >= 2 * self.SEASON_LENGTH else 'holt'
+
+        results = {}
+        for i, cid in enumerate(customer_ids):
+            results[cid] = self._build_payload(
+                labels[-2], labels[-1], next_label,
+                int(volume[i, -2]), int(volume[i, -1]),
+                float(sla_actual[i, -2]), float(sla_actual[i, -1]),
+                volume_fc[i], sla_fc[i], method
+            )
+
+        self._store(version, results, year, month, seasonal)
+        return results
+
+    @staticmethod
+    def _build_payload(prev_label, curr_label, next_label, prev_volume, curr_volume,
+                       prev_sla, curr_sla, volume_fc, sla_fc, method):
+        forecast_sla = float(sla_fc[1])
+
+        chart_data = {
+            "volume": [
+                {"label": prev_label, "actual": prev_volume, "forecast": None},
+                {"label": curr_label, "actual": curr_volume, "forecast": int(round(volume_fc[0]))},
+                {"label": next_label, "actual": None, "forecast": int(round(volume_fc[1]))}
+            ],
+            "sla": [
+                {"label": prev_label, "actual": prev_sla, "forecast": None},
+                {"label": curr_label, "actual": curr_sla, "forecast": round(float(sla_fc[0]), 2)},
+                {"label": next_label, "actual": None, "forecast": round(forecast_sla, 2)}
+            ]
+        }
+
+        trend = "stable"
+        if curr_volume > prev_volume * 1.1:
+            trend = "increasing"
+        elif curr_volume < prev_volume * 0.9:
+            trend = "decreasing"
+
+        summary = f"Based on historical service trends, ticket volume is observed to be {trend}. " \
+                  f"SLA compliance is forecasted at approximately {forecast_sla:.1f}% for the coming month"
+        if forecast_sla >= 95.0:
+            summary += ", well within the agreed service thresholds for enterprise standards."
+        else:
+            summary += ", below the 95% enterprise service threshold."
+
+        return {
+            "chart_data": chart_data,
+            "insight_summary": summary,
+            "trend": trend,
+            "method": method
+        }
+
+
+forecast_service = ForecastService()
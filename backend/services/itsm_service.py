@@ -1,21 +1,61 @@
-from models.ticket import db, Ticket, Customer, Engineer
+from models.ticket import db, Ticket, Customer, Engineer, STATUS_KEYS
+from services.forecast_service import forecast_service
+from services.pagination import keyset_page, encode_cursor
+from services.analytics_engine import analytics_engine
+from services.rollup_service import rollup_service, totals
+from services.report_params import REPORT_PERIODS as PERIOD_DAYS
+from services.workload_service import workload_service
+from services.dimensions import ticket_dimensions, engineer_named
 from sqlalchemy import func
 from datetime import datetime, timedelta
 
+MONITORING_ALERTS = [
+    {"source": "Prometheus", "alert": "High CPU Usage", "severity": "Critical", "time": "2 mins ago"},
+    {"source": "Zabbix", "alert": "Network Latency", "severity": "Warning", "time": "5 mins ago"},
+    {"source": "Wazuh", "alert": "Brute Force Attempt", "severity": "High", "time": "12 mins ago"}
+]
+
+STATUS_OPEN = STATUS_KEYS['Open']
+STATUS_IN_PROGRESS = STATUS_KEYS['In Progress']
+STATUS_CLOSED = (STATUS_KEYS['Resolved'], STATUS_KEYS['Closed'])
+
+
+
+def report_window(period='30d', date_from=None, date_to=None, now=None):
+    """
+    [start, end) of a report: explicit dates win over the rolling `period`
+    (1d/7d/30d/...; anything else, e.g. 'all', has no lower bound).
+    """
+    now = now or datetime.now()
+    if date_from or date_to:
+        return date_from, date_to or now
+    if period in PERIOD_DAYS:
+        return now - timedelta(days=PERIOD_DAYS[period]), now
+    return None, now
+
+
 class ITSMService:
-    def get_summary(self, engineer_name=None):
+    @staticmethod
+    def _use_engine(use_engine):
+        # None = follow ANALYTICS_ENGINE_ENABLED, False = force SQL
+        return analytics_engine.enabled if use_engine is None else use_engine
+
+    def get_summary(self, engineer_name=None, use_engine=None):
+        if self._use_engine(use_engine):
+            return {**analytics_engine.summary(engineer_name), "monitoring_alerts": MONITORING_ALERTS}
+
         # High performance aggregation via SQL
         # Build filters
         base_filter = []
         if engineer_name:
-            base_filter.append(Ticket.engineer_name == engineer_name)
+            base_filter.append(engineer_named(Ticket.engineer_id, engineer_name))
         
         total = db.session.query(func.count(Ticket.id)).filter(*base_filter).scalar() or 0
-        open_t = db.session.query(func.count(Ticket.id)).filter(Ticket.status == 'Open', *base_filter).scalar() or 0
-        in_progress = db.session.query(func.count(Ticket.id)).filter(Ticket.status == 'In Progress', *base_filter).scalar() or 0
-        resolved = db.session.query(func.count(Ticket.id)).filter(Ticket.status.in_(['Resolved', 'Closed']), *base_filter).scalar() or 0
+        open_t = db.session.query(func.count(Ticket.id)).filter(Ticket.status_id == STATUS_OPEN, *base_filter).scalar() or 0
+        in_progress = db.session.query(func.count(Ticket.id)).filter(Ticket.status_id == STATUS_IN_PROGRESS, *base_filter).scalar() or 0
+        resolved = db.session.query(func.count(Ticket.id)).filter(Ticket.status_id.in_(STATUS_CLOSED), *base_filter).scalar() or 0
         
-        # SLA Calculation via is_overdue from ManageEngine
+        # SLA breaches: is_overdue is set by the business-hours sla_engine
         sla_breached = db.session.query(func.count(Ticket.id)).filter(
             Ticket.is_overdue == True, *base_filter
         ).scalar() or 0
@@ -49,48 +89,60 @@ class ITSMService:
                 "sla": sla_met
             })
         
+        # Group-bys run on the dimension keys; names are looked up for the final rows only
         # Priority distribution via SQL
         priority_dist = db.session.query(
-            Ticket.priority,
+            Ticket.priority_id,
             func.count(Ticket.id).label('count')
-        ).filter(*base_filter).group_by(Ticket.priority).all()
+        ).filter(*base_filter).group_by(Ticket.priority_id).all()
         
-        priority_data = {p.priority if p.priority else 'Medium': p.count for p in priority_dist}
+        # NULL priority is reported as Medium (merged with explicit Medium tickets)
+        priority_data = {}
+        for p in priority_dist:
+            name = ticket_dimensions.priority.name(p.priority_id) or 'Medium'
+            priority_data[name] = priority_data.get(name, 0) + p.count
 
         # Technician Performance (Summary for Dashboard)
-        tech_performance = db.session.query(
-            Ticket.engineer_name.label('name'),
+        tech_stats = db.session.query(
+            Ticket.engineer_id,
             func.count(Ticket.id).label('total'),
-            func.sum(db.case((Ticket.status == 'Open', 1), else_=0)).label('open'),
-            func.sum(db.case((Ticket.status.in_(['Resolved', 'Closed']), 1), else_=0)).label('closed'),
+            func.sum(db.case((Ticket.status_id == STATUS_OPEN, 1), else_=0)).label('open'),
+            func.sum(db.case((Ticket.status_id.in_(STATUS_CLOSED), 1), else_=0)).label('closed'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached'),
             func.avg(Ticket.resolve_time_hours).label('avg_mttr')
-        ).filter(*base_filter).group_by(Ticket.engineer_name).order_by(func.count(Ticket.id).desc()).limit(10).all()
+        ).filter(*base_filter).group_by(Ticket.engineer_id).order_by(func.count(Ticket.id).desc()).limit(10).subquery()
+        tech_performance = db.session.query(
+            func.coalesce(Engineer.name, tech_stats.c.engineer_id).label('name'), tech_stats
+        ).select_from(tech_stats).outerjoin(Engineer, Engineer.id == tech_stats.c.engineer_id)\
+         .order_by(tech_stats.c.total.desc()).all()
 
         # Category Distribution
         category_dist = db.session.query(
-            Ticket.category,
+            Ticket.category_id,
             func.count(Ticket.id).label('count')
-        ).filter(*base_filter).group_by(Ticket.category).order_by(func.count(Ticket.id).desc()).limit(10).all()
+        ).filter(*base_filter).group_by(Ticket.category_id).order_by(func.count(Ticket.id).desc()).limit(10).all()
 
         # Top 10 High-Load Customers (Last 30 days + engineer filter)
         thirty_days_ago = datetime.now() - timedelta(days=30)
         top_customer_filter = [Ticket.created_at >= thirty_days_ago] + base_filter
-        top_customers = db.session.query(
+        customer_stats = db.session.query(
             Ticket.customer_id,
-            Ticket.customer_name.label('name'),
             func.count(Ticket.id).label('total'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached')
         ).filter(
             *top_customer_filter
-        ).group_by(Ticket.customer_id, Ticket.customer_name).order_by(func.count(Ticket.id).desc()).limit(10).all()
+        ).group_by(Ticket.customer_id).order_by(func.count(Ticket.id).desc()).limit(10).subquery()
+        top_customers = db.session.query(
+            func.coalesce(Customer.name, customer_stats.c.customer_id).label('name'), customer_stats
+        ).select_from(customer_stats).outerjoin(Customer, Customer.id == customer_stats.c.customer_id)\
+         .order_by(customer_stats.c.total.desc()).all()
 
         # Priority SLA Breakdown
         priority_sla_raw = db.session.query(
-            Ticket.priority,
+            Ticket.priority_id,
             func.count(Ticket.id).label('total'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached')
-        ).group_by(Ticket.priority).all()
+        ).group_by(Ticket.priority_id).all()
 
         return {
             "total": total,
@@ -101,9 +153,12 @@ class ITSMService:
             "avg_mttr_hours": round(float(avg_mttr), 1) if avg_mttr else 0,
             "trend": trend,
             "priority_distribution": [{"priority": k, "value": v} for k, v in priority_data.items()],
-            "category_distribution": [{"name": c.category or 'Others', "value": c.count} for c in category_dist],
+            "category_distribution": [{
+                "name": ticket_dimensions.category.name(c.category_id) or 'Others',
+                "value": c.count
+            } for c in category_dist],
             "priority_sla": [{
-                "priority": p.priority or 'Medium',
+                "priority": ticket_dimensions.priority.name(p.priority_id) or 'Medium',
                 "sla_percent": round((p.total - (p.breached or 0)) / p.total * 100, 1) if p.total > 0 else 100
             } for p in priority_sla_raw],
             "top_customers": [{
@@ -119,57 +174,63 @@ class ITSMService:
                 "sla_percent": round((t.total - t.breached) / t.total * 100, 1) if t.total > 0 else 100,
                 "avg_mttr": round(float(t.avg_mttr or 0), 1)
             } for t in tech_performance],
-            "monitoring_alerts": [
-                {"source": "Prometheus", "alert": "High CPU Usage", "severity": "Critical", "time": "2 mins ago"},
-                {"source": "Zabbix", "alert": "Network Latency", "severity": "Warning", "time": "5 mins ago"},
-                {"source": "Wazuh", "alert": "Brute Force Attempt", "severity": "High", "time": "12 mins ago"}
-            ]
+            "monitoring_alerts": MONITORING_ALERTS
         }
 
-    def get_customers(self, engineer_name=None, period='30d'):
-        # Group by calculation for all customers with period filter
-        # Calculate date filter based on period
-        now = datetime.now()
-        base_filter = []
-        
-        if period == '1d':
-            start_date = now - timedelta(days=1)
-            base_filter.append(Ticket.created_at >= start_date)
-        elif period == '7d':
-            start_date = now - timedelta(days=7)
-            base_filter.append(Ticket.created_at >= start_date)
-        elif period == '30d':
-            start_date = now - timedelta(days=30)
-            base_filter.append(Ticket.created_at >= start_date)
-        # If 'all', no date filter
-        
-        if engineer_name:
-            base_filter.append(Ticket.engineer_name == engineer_name)
-        
-        results = db.session.query(
-            Ticket.customer_id,
-            Ticket.customer_name,
-            func.count(Ticket.id).label('total'),
-            func.sum(db.case((Ticket.status == 'Open', 1), else_=0)).label('open'),
-            func.sum(db.case((Ticket.status.in_(['Resolved', 'Closed']), 1), else_=0)).label('closed'),
-            func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached'),
-            func.avg(Ticket.resolve_time_hours).label('avg_reso')
-        ).filter(
-            *base_filter
-        ).group_by(Ticket.customer_id, Ticket.customer_name).all()
-        
-        return [{
-            "customer_id": r.customer_id,
-            "customer_name": r.customer_name,
-            "total_tickets": r.total,
-            "open": int(r.open),
-            "closed": int(r.closed),
-            "sla_breached": int(r.breached),
-            "sla_percent": round((r.total - r.breached) / r.total * 100, 1) if r.total > 0 else 100,
-            "avg_resolve_hours": round(float(r.avg_reso), 1) if r.avg_reso else 0
-        } for r in results]
+    def get_customers(self, engineer_name=None, period='30d', use_engine=None, date_from=None, date_to=None):
+        """
+        Per-customer totals for tickets created in the window (see report_window).
+        Answered from the rollups; the in-memory engine serves rolling windows ending now.
+        """
+        start, end = report_window(period, date_from, date_to)
+        if self._use_engine(use_engine) and (period in PERIOD_DAYS or period == 'all'):
+            return analytics_engine.customers(engineer_name, start)
+
+        groups = rollup_service.aggregate('customer', start, end, engineer_name=engineer_name, digests=False)
+        results = []
+        for customer_id, g in groups.items():
+            t = totals(g)
+            results.append({
+                "customer_id": customer_id or None,
+                "customer_name": g['label'],
+                "total_tickets": t['total_tickets'],
+                "open": t['status_breakdown']['open'],
+                "closed": t['status_breakdown']['resolved'],
+                "sla_breached": t['sla_breached'],
+                "sla_percent": t['sla_percent'],
+                "avg_resolve_hours": round(g['resolve_hours_sum'] / g['resolve_count'], 1) if g['resolve_count'] else 0
+            })
+        return results
+
+    def get_engineers(self, use_engine=None, exact=False):
+        """
+        Ticket totals and distinct customers of every engineer. Totals come from the
+        rollups and customers_supported from merged HyperLogLog sketches (about 1.6%
+        error on large counts); exact=True counts over the tickets table, for audits.
+        """
+        if exact:
+            return self._get_engineers_exact()
+        if self._use_engine(use_engine):
+            return analytics_engine.engineers()
 
-    def get_engineers(self):
+        groups = rollup_service.aggregate('engineer', digests=False)
+        customers = rollup_service.distinct_customers()
+        results = []
+        for r in db.session.query(Engineer.id, Engineer.name, Engineer.group, Engineer.level).all():
+            t = totals(groups.get(r.id))
+            results.append({
+                "engineer_id": r.id,
+                "engineer_name": r.name,
+                "group": r.group,
+                "level": r.level,
+                "total_tickets": t['total_tickets'],
+                "sla_percent": t['sla_percent'],
+                "customers_supported": customers.get(r.id, 0)
+            })
+        return results
+
+    @staticmethod
+    def _get_engineers_exact():
         results = db.session.query(
             Engineer.id,
             Engineer.name,
@@ -195,24 +256,27 @@ class ITSMService:
         # Summary for specific customer
         summary = db.session.query(
             func.count(Ticket.id).label('total'),
-            func.sum(db.case((Ticket.status == 'Open', 1), else_=0)).label('open'),
-            func.sum(db.case((Ticket.status.in_(['Resolved', 'Closed']), 1), else_=0)).label('closed'),
+            func.sum(db.case((Ticket.status_id == STATUS_OPEN, 1), else_=0)).label('open'),
+            func.sum(db.case((Ticket.status_id.in_(STATUS_CLOSED), 1), else_=0)).label('closed'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached')
         ).filter(Ticket.customer_id == customer_id).first()
         
         # Get customer name
-        cust_info = db.session.query(Ticket.customer_name).filter(Ticket.customer_id == customer_id).first()
-        cust_name = cust_info.customer_name if cust_info else "Unknown Client"
+        cust = db.session.get(Customer, customer_id)
+        cust_name = cust.name if cust else "Unknown Client"
         
         if not summary or summary.total == 0:
             return None
             
-        techs = db.session.query(
-            Ticket.engineer_name.label('name'),
+        tech_stats = db.session.query(
+            Ticket.engineer_id,
             func.count(Ticket.id).label('handled'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached'),
             func.avg(Ticket.resolve_time_hours).label('avg_reso')
-        ).filter(Ticket.customer_id == customer_id).group_by(Ticket.engineer_name).all()
+        ).filter(Ticket.customer_id == customer_id).group_by(Ticket.engineer_id).subquery()
+        techs = db.session.query(
+            func.coalesce(Engineer.name, tech_stats.c.engineer_id).label('name'), tech_stats
+        ).select_from(tech_stats).outerjoin(Engineer, Engineer.id == tech_stats.c.engineer_id).all()
         
         # Try to get customer contact info from CustomerContact table
         from models.modules import CustomerContact
@@ -252,23 +316,29 @@ class ITSMService:
         
         summary = db.session.query(
             func.count(Ticket.id).label('total'),
-            func.sum(db.case((Ticket.status == 'Open', 1), else_=0)).label('open'),
-            func.sum(db.case((Ticket.status.in_(['Resolved', 'Closed']), 1), else_=0)).label('closed'),
+            func.sum(db.case((Ticket.status_id == STATUS_OPEN, 1), else_=0)).label('open'),
+            func.sum(db.case((Ticket.status_id.in_(STATUS_CLOSED), 1), else_=0)).label('closed'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached')
         ).filter(*base_filter).first()
         
         priority_dist = db.session.query(
-            Ticket.priority,
+            Ticket.priority_id,
             func.count(Ticket.id).label('count')
-        ).filter(*base_filter).group_by(Ticket.priority).all()
+        ).filter(*base_filter).group_by(Ticket.priority_id).all()
         
-        cust_breakdown = db.session.query(
-            Ticket.customer_name,
+        cust_stats = db.session.query(
+            Ticket.customer_id,
             func.count(Ticket.id).label('handled'),
             func.sum(db.case((Ticket.is_overdue == True, 1), else_=0)).label('breached')
-        ).filter(*base_filter).group_by(Ticket.customer_name).order_by(func.count(Ticket.id).desc()).all()
+        ).filter(*base_filter).group_by(Ticket.customer_id).subquery()
+        cust_breakdown = db.session.query(
+            func.coalesce(Customer.name, cust_stats.c.customer_id).label('customer_name'), cust_stats
+        ).select_from(cust_stats).outerjoin(Customer, Customer.id == cust_stats.c.customer_id)\
+         .order_by(cust_stats.c.handled.desc()).all()
         
         total_tickets = summary.total or 0
+        workload = workload_service.engineer(engineer_id)
+        windows = workload['windows'] if workload else {}
         return {
             "summary": {
                 "name": eng.name,
@@ -278,155 +348,172 @@ class ITSMService:
                 "sla_percent": round((total_tickets - (summary.breached or 0)) / total_tickets * 100, 1) if total_tickets > 0 else 100
             },
             "workload": {
-                "tickets_per_day": round(total_tickets / 30, 1),
-                "overload": (total_tickets / 30) > 15
+                "tickets_per_day": windows['30d']['tickets_per_day'] if windows else 0,
+                "overload": workload['overloaded'] if workload else False,
+                "windows": windows
             },
             "customers": [{
                 "customer_name": c.customer_name,
                 "handled": c.handled,
                 "sla_breached": int(c.breached or 0)
             } for c in cust_breakdown],
-            "priority_distribution": [{"priority": p.priority, "count": p.count} for p in priority_dist],
+            "priority_distribution": [{
+                "priority": ticket_dimensions.priority.name(p.priority_id),
+                "count": p.count
+            } for p in priority_dist],
             "trend": []
         }
 
-    def get_customer_tickets(self, customer_id):
-        tickets = Ticket.query.filter_by(customer_id=customer_id).limit(100).all()
-        return [t.to_dict() for t in tickets]
+    def get_engineer_workload(self):
+        """Team-wide rolling workload with overload flags (services/workload_service.py)."""
+        return workload_service.team()
 
-    def get_customer_performance(self, customer_id, period='30d'):
+    def get_customer_tickets(self, customer_id, **params):
+        return self.list_tickets(Ticket.customer_id == customer_id, **params)
+
+    def get_customer_performance(self, customer_id, period='30d', date_from=None, date_to=None):
         """
-        Get customer performance statistics with time filter.
-        Period: 1d (24h), 7d (week), 30d (month)
+        Customer performance statistics for tickets created in the window
+        (rolling 1d/7d/30d/..., or explicit dates), from the rollups.
         """
-        from datetime import datetime, timedelta
-        
-        # Calculate date filter
-        now = datetime.now()
-        if period == '1d':
-            start_date = now - timedelta(days=1)
-        elif period == '7d':
-            start_date = now - timedelta(days=7)
-        else:  # 30d default
-            start_date = now - timedelta(days=30)
-        
-        # Base query with date filter
-        base_query = Ticket.query.filter(
-            Ticket.customer_id == customer_id,
-            Ticket.created_at >= start_date
-        )
-        
+        start, end = report_window(period, date_from, date_to)
+
         # Get customer info
-        cust = db.session.query(Ticket.customer_name).filter(
-            Ticket.customer_id == customer_id
-        ).first()
-        cust_name = cust.customer_name if cust else "Unknown"
-        
-        # Total tickets
-        total_tickets = base_query.count()
-        
-        # SLA Met (is_overdue = False)
-        sla_met = base_query.filter(Ticket.is_overdue == False).count()
-        
-        # SLA Breached (is_overdue = True)
-        sla_breached = base_query.filter(Ticket.is_overdue == True).count()
-        
-        # Status breakdown
-        open_count = base_query.filter(Ticket.status == 'Open').count()
-        in_progress = base_query.filter(Ticket.status == 'In Progress').count()
-        resolved = base_query.filter(Ticket.status.in_(['Resolved', 'Closed'])).count()
-        
-        # Calculate SLA percentage
-        sla_percent = round((sla_met / total_tickets) * 100, 1) if total_tickets > 0 else 100
-        
+        cust = db.session.get(Customer, customer_id)
+        cust_name = cust.name if cust else "Unknown"
+
+        groups = rollup_service.aggregate(None, start, end, customer_id=customer_id)
         return {
             "customer_id": customer_id,
             "customer_name": cust_name,
             "period": period,
-            "period_start": start_date.isoformat(),
-            "period_end": now.isoformat(),
+            "period_start": start.isoformat() if start else None,
+            "period_end": end.isoformat(),
             "metrics": {
-                "total_tickets": total_tickets,
-                "sla_met": sla_met,
-                "sla_breached": sla_breached,
-                "sla_percent": sla_percent,
-                "status_breakdown": {
-                    "open": open_count,
-                    "in_progress": in_progress,
-                    "resolved": resolved
-                }
+                **totals(groups.get(None)),
+                # Resolve/response distributions over the same window
+                "percentiles": rollup_service.percentiles(groups=groups)
             }
         }
 
-    def get_engineer_tickets(self, engineer_id):
-        tickets = Ticket.query.filter_by(engineer_id=engineer_id).limit(100).all()
-        return [t.to_dict() for t in tickets]
+    def get_engineer_tickets(self, engineer_id, **params):
+        return self.list_tickets(Ticket.engineer_id == engineer_id, **params)
 
-    def get_engineer_performance(self, engineer_id, period='30d'):
+    def list_tickets(self, *criteria, status=None, priority=None, date_from=None, date_to=None,
+                     descending=True, cursor=None, limit=50):
         """
-        Get engineer performance statistics with time filter.
-        Period: 1d (24h), 7d (week), 30d (month)
+        One keyset page of tickets ordered by (created_at, id).
+        Rows are projected without `description`; use get_ticket_detail for the body.
+
+        Returns:
+            {"data": [...], "next_cursor": str | None, "limit": int}
         """
-        from datetime import datetime, timedelta
-        
-        # Calculate date filter
-        now = datetime.now()
-        if period == '1d':
-            start_date = now - timedelta(days=1)
-        elif period == '7d':
-            start_date = now - timedelta(days=7)
-        else:  # 30d default
-            start_date = now - timedelta(days=30)
-        
-        # Base query with date filter
-        base_query = Ticket.query.filter(
-            Ticket.engineer_id == engineer_id,
-            Ticket.created_at >= start_date
+        query = Ticket.join_dimensions(db.session.query(*Ticket.list_columns())).filter(*criteria)
+        query = self._ticket_filters(query, status, priority, date_from, date_to)
+
+        rows, has_more = keyset_page(
+            query, [Ticket.created_at, Ticket.id], cursor, descending=descending, limit=limit
         )
-        
+
+        return {
+            "data": [Ticket.list_row_to_dict(r) for r in rows],
+            "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+            "limit": limit
+        }
+
+    @staticmethod
+    def _ticket_filters(query, status=None, priority=None, date_from=None, date_to=None):
+        """status/priority names (matched through their dimension keys) and the created_at window."""
+        if status:
+            query = query.filter(Ticket.status_id.in_(ticket_dimensions.status.keys_of(status)))
+        if priority:
+            query = query.filter(Ticket.priority_id.in_(ticket_dimensions.priority.keys_of(priority)))
+        if date_from:
+            query = query.filter(Ticket.created_at >= date_from)
+        if date_to:
+            query = query.filter(Ticket.created_at < date_to)
+        return query
+
+    def search_tickets(self, q, customer_id=None, engineer_id=None, status=None, priority=None,
+                       date_from=None, date_to=None, cursor=None, limit=50):
+        """
+        Full-text search over title and description (accent-insensitive), ranked
+        by ts_rank_cd with title matches weighted above description matches.
+        Keyset-paginated on (rank, created_at, id).
+
+        Returns:
+            {"data": [...], "next_cursor": str | None, "limit": int}
+        """
+        ts_query = func.websearch_to_tsquery(db.literal_column("'simple'::regconfig"), func.immutable_unaccent(q))
+        # float8 so the rank survives the JSON cursor round trip exactly
+        rank = db.cast(func.ts_rank_cd(Ticket.search_vector, ts_query), db.Float).label('rank')
+
+        criteria = [Ticket.search_vector.op('@@')(ts_query)]
+        if customer_id:
+            criteria.append(Ticket.customer_id == customer_id)
+        if engineer_id:
+            criteria.append(Ticket.engineer_id == engineer_id)
+
+        query = Ticket.join_dimensions(db.session.query(*Ticket.list_columns(), rank)).filter(*criteria)
+        query = self._ticket_filters(query, status, priority, date_from, date_to)
+
+        rows, has_more = keyset_page(
+            query, [rank, Ticket.created_at, Ticket.id], cursor, descending=True, limit=limit
+        )
+
+        return {
+            "data": [{**Ticket.list_row_to_dict(r), "rank": round(r.rank, 4)} for r in rows],
+            "next_cursor": encode_cursor(rows[-1].rank, rows[-1].created_at, rows[-1].id) if has_more else None,
+            "limit": limit
+        }
+
+    def get_engineer_performance(self, engineer_id, period='30d', date_from=None, date_to=None):
+        """
+        Engineer performance statistics for tickets created in the window
+        (rolling 1d/7d/30d/..., or explicit dates), from the rollups.
+        """
+        start, end = report_window(period, date_from, date_to)
+
         # Get engineer info
         eng = Engineer.query.get(engineer_id)
         eng_name = eng.name if eng else "Unknown"
-        
-        # Total tickets
-        total_tickets = base_query.count()
-        
-        # SLA Met (is_overdue = False)
-        sla_met = base_query.filter(Ticket.is_overdue == False).count()
-        
-        # SLA Breached (is_overdue = True)
-        sla_breached = base_query.filter(Ticket.is_overdue == True).count()
-        
-        # Status breakdown
-        open_count = base_query.filter(Ticket.status == 'Open').count()
-        in_progress = base_query.filter(Ticket.status == 'In Progress').count()
-        resolved = base_query.filter(Ticket.status.in_(['Resolved', 'Closed'])).count()
-        
-        # Calculate SLA percentage
-        sla_percent = round((sla_met / total_tickets) * 100, 1) if total_tickets > 0 else 100
-        
+
+        groups = rollup_service.aggregate(None, start, end, engineer_id=engineer_id)
         return {
             "engineer_id": engineer_id,
             "engineer_name": eng_name,
             "period": period,
-            "period_start": start_date.isoformat(),
-            "period_end": now.isoformat(),
+            "period_start": start.isoformat() if start else None,
+            "period_end": end.isoformat(),
             "metrics": {
-                "total_tickets": total_tickets,
-                "sla_met": sla_met,
-                "sla_breached": sla_breached,
-                "sla_percent": sla_percent,
-                "status_breakdown": {
-                    "open": open_count,
-                    "in_progress": in_progress,
-                    "resolved": resolved
-                }
+                **totals(groups.get(None)),
+                # Resolve/response distributions over the same window
+                "percentiles": rollup_service.percentiles(groups=groups)
             }
         }
 
+    def get_percentiles(self, group_by=None, period='30d', date_from=None, date_to=None,
+                        customer_id=None, engineer_id=None, priority=None):
+        """
+        p50/p90/p99 (and avg) of resolve and response times from the rollups.
+        An explicit date_from/date_to overrides period.
+        """
+        start, end = report_window(period, date_from, date_to)
+        data = rollup_service.percentiles(
+            group_by, start=start, end=end,
+            customer_id=customer_id, engineer_id=engineer_id, priority=priority
+        )
+        return {
+            "group_by": group_by,
+            "period": period,
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat(),
+            "data": data
+        }
+
     def get_ticket_detail(self, ticket_id, app):
         import requests
-        ticket = Ticket.query.get(ticket_id)
+        ticket = Ticket.query.filter_by(id=ticket_id).first()
         if not ticket: 
             return None
         
@@ -476,7 +563,9 @@ class ITSMService:
             except Exception as e:
                 print(f"Error fetching ticket {ticket_id}: {e}")
                 
-        return ticket.to_dict()
+        row = Ticket.join_dimensions(db.session.query(*Ticket.list_columns(), Ticket.description))\
+            .filter(Ticket.id == ticket.id, Ticket.created_at == ticket.created_at).one()
+        return Ticket.list_row_to_dict(row)
 
     def get_stats_for_range(self, customer_id, from_dt, to_dt):
         """
@@ -494,13 +583,16 @@ class ITSMService:
         total = db.session.query(func.count(Ticket.id)).filter(*base_filter).scalar() or 0
         
         # Breakdown by pre-classified fields (Updated by sync/backfill)
+        # request_type / category names are matched against the dimension tables
+        request_types = ticket_dimensions.request_type
+        categories = ticket_dimensions.category
         incidents = db.session.query(func.count(Ticket.id)).filter(
             *base_filter,
             db.or_(
-                Ticket.request_type == 'Incident',
+                Ticket.request_type_id.in_(request_types.keys_of(['Incident'])),
                 db.and_(
                     Ticket.is_service_request == False,
-                    func.lower(Ticket.category).like('%incident%')
+                    Ticket.category_id.in_(categories.matching('incident'))
                 )
             )
         ).scalar() or 0
@@ -509,16 +601,16 @@ class ITSMService:
             *base_filter,
             db.or_(
                 Ticket.is_service_request == True,
-                Ticket.request_type == 'Service Request',
-                func.lower(Ticket.category).like('%service request%')
+                Ticket.request_type_id.in_(request_types.keys_of(['Service Request'])),
+                Ticket.category_id.in_(categories.matching('service request'))
             )
         ).scalar() or 0
         
         changes = db.session.query(func.count(Ticket.id)).filter(
             *base_filter,
             db.or_(
-                func.lower(Ticket.category).like('%change%'),
-                Ticket.request_type == 'Change Request'
+                Ticket.category_id.in_(categories.matching('change')),
+                Ticket.request_type_id.in_(request_types.keys_of(['Change Request']))
             )
         ).scalar() or 0
 
@@ -556,84 +648,9 @@ class ITSMService:
             "avg_resolve_time_hours": round(float(avg_resolve_time), 2)
         }
 
-    def get_forecast(self, customer_id, year, month):
+    def get_forecast(self, customer_id, year, month, seasonal=False):
         """
-        Generates comparison and forecast data based on 3-month moving average.
+        Generates comparison and forecast data from exponential smoothing over
+        the customer's monthly series (see services.forecast_service).
         """
-        import calendar
-        from dateutil.relativedelta import relativedelta
-        
-        target_date = datetime(year, month, 1)
-        # We need historical data for the last 3-4 months if available
-        history_data = []
-        
-        # Look back 4 months to get 3 actual months before current
-        for i in range(4, -1, -1):
-            dt = target_date - relativedelta(months=i)
-            _, last_day = calendar.monthrange(dt.year, dt.month)
-            from_dt = dt.replace(day=1, hour=0, minute=0, second=0)
-            to_dt = dt.replace(day=last_day, hour=23, minute=59, second=59)
-            
-            stats = self.get_stats_for_range(customer_id, from_dt, to_dt)
-            history_data.append({
-                "month": dt.strftime("%b %Y"),
-                "date": dt,
-                "volume": stats["total_tickets"],
-                "sla": stats["sla"]["percentage"]
-            })
-
-        # Calculate Moving Average (excluding current month)
-        past_3_months = history_data[:-1]
-        valid_history = [m for m in past_3_months if m["volume"] > 0]
-        
-        if valid_history:
-            avg_volume = sum(m["volume"] for m in valid_history) / len(valid_history)
-            avg_sla = sum(m["sla"] for m in valid_history) / len(valid_history)
-        else:
-            # Fallback if no history
-            current = history_data[-1]
-            avg_volume = current["volume"] or 10
-            avg_sla = current["sla"] or 100.0
-
-        # Forecast for Current (if it was 0) and Next
-        # Conservative forecast: avoid spikes
-        forecast_volume = round(avg_volume * 1.05) # Assume 5% growth or stability
-        forecast_sla = min(100.0, max(95.0, avg_sla)) # Keep between 95 and 100
-        
-        next_dt = target_date + relativedelta(months=1)
-        
-        # Prepare Chart Data
-        # We want: Prev Month (Actual), Current Month (Actual), Next Month (Forecast)
-        prev_actual = history_data[-2]
-        curr_actual = history_data[-1]
-        
-        chart_data = {
-            "volume": [
-                {"label": prev_actual["month"], "actual": prev_actual["volume"], "forecast": None},
-                {"label": curr_actual["month"], "actual": curr_actual["volume"], "forecast": round(avg_volume)},
-                {"label": next_dt.strftime("%b %Y"), "actual": None, "forecast": forecast_volume}
-            ],
-            "sla": [
-                {"label": prev_actual["month"], "actual": prev_actual["sla"], "forecast": None},
-                {"label": curr_actual["month"], "actual": curr_actual["sla"], "forecast": round(avg_sla, 2)},
-                {"label": next_dt.strftime("%b %Y"), "actual": None, "forecast": round(forecast_sla, 2)}
-            ]
-        }
-
-        # Insights
-        trend = "stable"
-        if curr_actual["volume"] > prev_actual["volume"] * 1.1:
-            trend = "increasing"
-        elif curr_actual["volume"] < prev_actual["volume"] * 0.9:
-            trend = "decreasing"
-            
-        summary = f"Based on historical service trends, ticket volume is observed to be {trend}. " \
-                  f"SLA compliance is forecasted to remain stable at approximately {forecast_sla:.1f}% for the coming month, " \
-                  f"well within the agreed service thresholds for enterprise standards."
-
-        return {
-            "chart_data": chart_data,
-            "insight_summary": summary,
-            "trend": trend
-        }
-
+        return forecast_service.forecast(customer_id, year, month, seasonal=seasonal)
@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row of a page, encoded as URL-safe base64
+JSON. The next page is fetched with a row-value comparison on that key, e.g.
+`(created_at, id) < (:created_at, :id)`, which an index on the same columns
+answers directly, so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(*values):
+    """Encode the sort key of a row into an opaque cursor string."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: cursor string from the client
+        types: tuple of expected value types (datetime, str, int, float)
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for value, typ in zip(values, types):
+        try:
+            decoded.append(datetime.fromisoformat(value) if typ is datetime else typ(value))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    return decoded
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """Clamp a client supplied page size to [1, maximum]."""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def keyset_page(query, columns, cursor_values=None, descending=True, limit=DEFAULT_LIMIT):
+    """
+    Apply keyset ordering/filtering to a query and fetch one page.
+
+    Args:
+        query: SQLAlchemy query selecting at least `columns`
+        columns: sort key columns, most significant first (last one must be unique)
+        cursor_values: decoded cursor of the previous page, or None for the first page
+        descending: sort direction applied to every key column
+
+    Returns:
+        (rows, has_more)
+    """
+    if cursor_values is not None:
+        key = tuple_(*columns)
+        values = tuple_(*cursor_values)
+        query = query.filter(key < values if descending else key > values)
+
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
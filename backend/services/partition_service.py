@@ -0,0 +1,156 @@
+"""
+Ticket Partition Service
+`tickets` is range-partitioned by month on created_at (migration 007).
+Keeps monthly partitions created ahead of time and detaches/archives old ones.
+
+Rows outside every monthly partition land in `tickets_default`; creating the
+partition for that month later moves them out of the default partition.
+"""
+import logging
+from datetime import date
+from sqlalchemy import text
+from models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'tickets'
+REMOVED_DATASET = 'tickets_removed'
+DEFAULT_PARTITION = 'tickets_default'
+
+
+def partition_name(year, month):
+    return f'tickets_p{year:04d}{month:02d}'
+
+
+def add_months(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def month_bounds(year, month):
+    next_year, next_month = add_months(year, month, 1)
+    return date(year, month, 1), date(next_year, next_month, 1)
+
+
+def list_partitions(connection):
+    """[(name, bound expression)] of the partitions attached to tickets, in name order."""
+    rows = connection.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+        ORDER BY c.relname
+    """), {'parent': PARENT_TABLE}).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+def stored_columns(connection):
+    """Columns of tickets that can be copied (generated columns are recomputed)."""
+    return connection.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :parent AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """), {'parent': PARENT_TABLE}).scalars().all()
+
+
+def create_default_partition(connection):
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT'
+    ))
+
+
+def create_month_partition(connection, year, month):
+    """
+    Create and attach the partition of one month if it does not exist.
+    Rows of that month sitting in the default partition are moved into it.
+
+    Returns:
+        True if a partition was created
+    """
+    name = partition_name(year, month)
+    attached = {n for n, _ in list_partitions(connection)}
+    if name in attached:
+        return False
+
+    start, end = month_bounds(year, month)
+    params = {'start': start, 'end': end}
+    has_default = DEFAULT_PARTITION in attached
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {name} '
+        f'(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)'
+    ))
+    if has_default:
+        columns = ', '.join(stored_columns(connection))
+        connection.execute(text(
+            f'INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} '
+            f'WHERE created_at >= :start AND created_at < :end'
+        ), params)
+        moved = connection.execute(text(
+            f'DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end'
+        ), params).rowcount
+        if moved:
+            logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+    connection.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return True
+
+
+def ensure_partitions(connection, months_ahead=3, start=None, today=None):
+    """
+    Make sure the default partition and one partition per month from `start`
+    (default: the current month) to `months_ahead` months ahead exist.
+
+    Returns:
+        names of the partitions created
+    """
+    today = today or date.today()
+    create_default_partition(connection)
+    year, month = (start.year, start.month) if start else (today.year, today.month)
+    last = add_months(today.year, today.month, months_ahead)
+    created = []
+    while (year, month) <= last:
+        if create_month_partition(connection, year, month):
+            created.append(partition_name(year, month))
+        year, month = add_months(year, month, 1)
+    return created
+
+
+def detach_partitions(connection, before, archive_schema=None, drop=False):
+    """
+    Detach monthly partitions whose whole range is before `before` (a date).
+    Detached tables are kept (optionally moved to `archive_schema`) or dropped.
+    Bumps the 'tickets' and 'tickets_removed' data versions when anything was
+    detached, so in-process ticket caches reload instead of refreshing
+    incrementally. The caller commits.
+
+    Returns:
+        names of the detached partitions
+    """
+    detached = []
+    for name, _ in list_partitions(connection):
+        if name == DEFAULT_PARTITION or not name.startswith('tickets_p'):
+            continue
+        year, month = int(name[9:13]), int(name[13:15])
+        if month_bounds(year, month)[1] > before:
+            continue
+        connection.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}'))
+        if drop:
+            connection.execute(text(f'DROP TABLE {name}'))
+        elif archive_schema:
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS {archive_schema}'))
+            connection.execute(text(f'ALTER TABLE {name} SET SCHEMA {archive_schema}'))
+        detached.append(name)
+    if detached:
+        DataVersion.bump('tickets', connection)
+        DataVersion.bump(REMOVED_DATASET, connection)
+    return detached
+
+
+def is_partitioned(connection):
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :parent)"
+    ), {'parent': PARENT_TABLE}).scalar()
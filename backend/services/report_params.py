@@ -0,0 +1,166 @@
+"""
+Query-string parsing shared by the report endpoints.
+Parsers raise ValueError with a client-facing message; routes turn it into a 400.
+"""
+import re
+from datetime import datetime, timedelta
+from services.pagination import decode_cursor, parse_limit
+
+# Rolling report periods (days back from now); 'all' has no lower bound
+REPORT_PERIODS = {'1d': 1, '7d': 7, '30d': 30, '90d': 90, '365d': 365}
+QUARTER_PATTERN = re.compile(r'^(\d{4})-?Q([1-4])$', re.IGNORECASE)
+
+TICKET_SORTS = {
+    '-created_at': True,  # newest first (default)
+    'created_at': False,  # oldest first
+}
+
+
+def parse_engine_arg(args):
+    """
+    ?engine=sql forces the SQL path, ?engine=memory the in-memory analytics engine.
+    None (absent/unknown) follows ANALYTICS_ENGINE_ENABLED.
+    """
+    return {'sql': False, 'memory': True}.get(args.get('engine'))
+
+
+def parse_datetime_arg(value, name, end_of_day=False):
+    """
+    Parse an ISO date or datetime query parameter.
+    A bare date used as an upper bound (end_of_day=True) covers the whole day.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD) or datetime")
+    if end_of_day and len(value) == 10:
+        parsed = parsed + timedelta(days=1)
+    return parsed
+
+
+def parse_report_range(args, default_period='30d', now=None):
+    """
+    Report window from the query string, as {'period', 'start', 'end'} with a
+    half-open [start, end) range (start None = no lower bound). One of:
+        from / to      ISO dates or datetimes (a bare `to` date is inclusive)
+        quarter        2026-Q3
+        year           2026
+        period         1d | 7d | 30d | 90d | 365d (rolling, ending now) | all
+    """
+    now = now or datetime.now()
+    if sum(1 for names in (('from', 'to'), ('quarter',), ('year',)) if any(args.get(n) for n in names)) > 1:
+        raise ValueError("use only one of from/to, quarter or year")
+
+    if args.get('from') or args.get('to'):
+        start = parse_datetime_arg(args.get('from'), 'from')
+        end = parse_datetime_arg(args.get('to'), 'to', end_of_day=True) or now
+        if start and start >= end:
+            raise ValueError("from must be before to")
+        return {'period': 'custom', 'start': start, 'end': end}
+
+    if args.get('quarter'):
+        match = QUARTER_PATTERN.match(args['quarter'].strip())
+        if not match:
+            raise ValueError("quarter must look like 2026-Q3")
+        year, quarter = int(match.group(1)), int(match.group(2))
+        start = datetime(year, 3 * quarter - 2, 1)
+        end = datetime(year + 1, 1, 1) if quarter == 4 else datetime(year, 3 * quarter + 1, 1)
+        return {'period': f"{year}-Q{quarter}", 'start': start, 'end': end}
+
+    if args.get('year'):
+        value = args['year'].strip()
+        if not (value.isdigit() and len(value) == 4):
+            raise ValueError("year must be a 4-digit year")
+        return {'period': value, 'start': datetime(int(value), 1, 1), 'end': datetime(int(value) + 1, 1, 1)}
+
+    period = args.get('period') or default_period
+    if period == 'all':
+        return {'period': period, 'start': None, 'end': now}
+    if period not in REPORT_PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(REPORT_PERIODS)}, all")
+    return {'period': period, 'start': now - timedelta(days=REPORT_PERIODS[period]), 'end': now}
+
+
+def parse_list_arg(value):
+    """Comma separated values -> list (None when absent)."""
+    if not value:
+        return None
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def parse_ticket_filters(args):
+    """Filters common to ticket list endpoints: status, priority, from, to."""
+    return {
+        'status': parse_list_arg(args.get('status')),
+        'priority': parse_list_arg(args.get('priority')),
+        'date_from': parse_datetime_arg(args.get('from'), 'from'),
+        'date_to': parse_datetime_arg(args.get('to'), 'to', end_of_day=True),
+    }
+
+
+def parse_ticket_search_args(args):
+    """Full-text query `q` plus ticket filters, customer_id/engineer_id and keyset pagination."""
+    q = (args.get('q') or '').strip()
+    if not q:
+        raise ValueError("q is required")
+    if len(q) > 200:
+        raise ValueError("q must be at most 200 characters")
+
+    cursor = args.get('cursor')
+    return {
+        'q': q,
+        **parse_ticket_filters(args),
+        'customer_id': args.get('customer_id'),
+        'engineer_id': args.get('engineer_id'),
+        'cursor': decode_cursor(cursor, (float, datetime, str)) if cursor else None,
+        'limit': parse_limit(args.get('limit')),
+    }
+
+
+def parse_ticket_list_args(args):
+    """Filters plus keyset pagination parameters (cursor, limit, sort)."""
+    sort = args.get('sort', '-created_at')
+    if sort not in TICKET_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(TICKET_SORTS)}")
+
+    cursor = args.get('cursor')
+    return {
+        **parse_ticket_filters(args),
+        'descending': TICKET_SORTS[sort],
+        'cursor': decode_cursor(cursor, (datetime, str)) if cursor else None,
+        'limit': parse_limit(args.get('limit')),
+    }
+
+
+def parse_fields_arg(value, allowed):
+    """?fields=a,b -> list of field names (None when absent = every field)."""
+    fields = parse_list_arg(value)
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return list(dict.fromkeys(fields))
+
+
+def parse_alarm_list_args(args, fields):
+    """
+    Alarm list filters (status, severity: comma separated; source, customer_id,
+    roots_only; from/to on the time the list is sorted by), keyset pagination (cursor, limit)
+    and the sparse field projection (`fields`, from the given allowed names).
+    """
+    cursor = args.get('cursor')
+    return {
+        'status': parse_list_arg(args.get('status')),
+        'severity': parse_list_arg(args.get('severity')),
+        'source': args.get('source'),
+        'customer_id': args.get('customer_id'),
+        'roots_only': args.get('roots_only', 'false').lower() == 'true',
+        'date_from': parse_datetime_arg(args.get('from'), 'from'),
+        'date_to': parse_datetime_arg(args.get('to'), 'to', end_of_day=True),
+        'cursor': decode_cursor(cursor, (datetime, int)) if cursor else None,
+        'limit': parse_limit(args.get('limit')),
+        'fields': parse_fields_arg(args.get('fields'), fields),
+    }
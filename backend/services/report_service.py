@@ -0,0 +1,217 @@
+"""
+Monthly Report Service
+Builds month-end reports for one or all customers in a few set-based passes
+and stores them as immutable snapshots (models.report.MonthlyReport).
+"""
+import calendar
+import logging
+from datetime import datetime
+from sqlalchemy import func
+from models.ticket import db, Ticket
+from models.report import MonthlyReport, ReportJob
+from services.forecast_service import forecast_service
+from services.dimensions import ticket_dimensions
+
+logger = logging.getLogger(__name__)
+
+
+def month_weeks(year, month):
+    """Week buckets used by the monthly report: days 1-7, 8-14, 15-21, 22-28 and 29-end."""
+    _, last_day = calendar.monthrange(year, month)
+    ranges = [(1, 7), (8, 14), (15, 21), (22, 28)]
+    if last_day >= 29:
+        ranges.append((29, last_day))
+    return last_day, [{
+        "week_number": i,
+        "from_date": f"{year:04d}-{month:02d}-{start:02d}",
+        "to_date": f"{year:04d}-{month:02d}-{end:02d}"
+    } for i, (start, end) in enumerate(ranges, 1)]
+
+
+def _count_if(condition):
+    return func.sum(db.case((condition, 1), else_=0))
+
+
+class MonthlyReportService:
+    """Set-based monthly report builder, snapshot store and batch job runner"""
+    INSERT_CHUNK_SIZE = 200
+
+    def build_monthly_reports(self, year, month, customer_ids=None):
+        """
+        Build the weekly breakdown for many customers with one grouped query.
+        Classification and SLA rules match ITSMService.get_stats_for_range.
+
+        Returns:
+            dict customer_id -> payload of /api/v1/reports/itsm/monthly
+        """
+        last_day, weeks = month_weeks(year, month)
+        from_dt = datetime(year, month, 1)
+        to_dt = datetime(year + month // 12, month % 12 + 1, 1)
+
+        day = func.extract('day', Ticket.created_at)
+        week_col = func.cast(func.floor((day - 1) / 7) + 1, db.Integer).label('week')
+        # request_type / category names are matched against the dimension tables
+        request_types = ticket_dimensions.request_type
+        categories = ticket_dimensions.category
+
+        query = db.session.query(
+            Ticket.customer_id,
+            week_col,
+            func.count(Ticket.id).label('total'),
+            _count_if(db.or_(
+                Ticket.request_type_id.in_(request_types.keys_of(['Incident'])),
+                db.and_(Ticket.is_service_request == False, Ticket.category_id.in_(categories.matching('incident')))
+            )).label('incidents'),
+            _count_if(db.or_(
+                Ticket.is_service_request == True,
+                Ticket.request_type_id.in_(request_types.keys_of(['Service Request'])),
+                Ticket.category_id.in_(categories.matching('service request'))
+            )).label('service_requests'),
+            _count_if(db.or_(
+                Ticket.category_id.in_(categories.matching('change')),
+                Ticket.request_type_id.in_(request_types.keys_of(['Change Request']))
+            )).label('changes'),
+            _count_if(Ticket.is_overdue == False).label('sla_met'),
+            func.avg(db.case(
+                (Ticket.time_elapsed_minutes > 0, Ticket.time_elapsed_minutes / 60.0),
+                else_=None
+            )).label('avg_resolve')
+        ).filter(
+            Ticket.created_at >= from_dt,
+            Ticket.created_at < to_dt
+        )
+        if customer_ids is not None:
+            query = query.filter(Ticket.customer_id.in_(customer_ids))
+        rows = query.group_by(Ticket.customer_id, week_col).all()
+
+        by_customer = {}
+        for r in rows:
+            by_customer.setdefault(r.customer_id, {})[r.week] = r
+
+        reports = {}
+        for cid in (customer_ids if customer_ids is not None else by_customer.keys()):
+            cust_weeks = by_customer.get(cid, {})
+            reports[cid] = {
+                "customer_id": cid,
+                "year": year,
+                "month": month,
+                "total_days": last_day,
+                "weekly_breakdown": [{
+                    **week,
+                    "summary": self._week_stats(cust_weeks.get(week["week_number"]))
+                } for week in weeks]
+            }
+        return reports
+
+    @staticmethod
+    def _week_stats(row):
+        total = row.total if row else 0
+        incidents = int(row.incidents or 0) if row else 0
+        service_requests = int(row.service_requests or 0) if row else 0
+        changes = int(row.changes or 0) if row else 0
+        sla_met = int(row.sla_met or 0) if row else 0
+        avg_resolve = row.avg_resolve if row and row.avg_resolve else 0
+
+        return {
+            "incidents": incidents,
+            "service_requests": service_requests,
+            "changes": changes,
+            "others": total - (incidents + service_requests + changes),
+            "total_tickets": total,
+            "sla": {
+                "met": sla_met,
+                "breached": total - sla_met,
+                "percentage": round((sla_met / total * 100), 2) if total > 0 else 100.0
+            },
+            "avg_resolve_time_hours": round(float(avg_resolve), 2)
+        }
+
+    def get_snapshot(self, customer_id, year, month):
+        """Latest snapshot for a customer/month, or None."""
+        return MonthlyReport.query.filter_by(
+            customer_id=customer_id, year=year, month=month
+        ).order_by(MonthlyReport.revision.desc()).first()
+
+    def create_job(self, year, month, created_by=None):
+        job = ReportJob(year=year, month=month, status='pending', created_by=created_by)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def run_job(self, job_id, progress_callback=None):
+        """
+        Generate snapshots for every customer active in the forecast window:
+        one query for forecasts, one for the weekly breakdown, one for existing
+        revisions, then chunked multi-row inserts with progress updates.
+        """
+        job = ReportJob.query.get(job_id)
+        if not job:
+            return None
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            forecasts = forecast_service.forecast_all(job.year, job.month)
+            customer_ids = sorted(forecasts.keys())
+            reports = self.build_monthly_reports(job.year, job.month, customer_ids)
+
+            revisions = dict(db.session.query(
+                MonthlyReport.customer_id,
+                func.max(MonthlyReport.revision)
+            ).filter(
+                MonthlyReport.year == job.year,
+                MonthlyReport.month == job.month
+            ).group_by(MonthlyReport.customer_id).all())
+
+            job.total = len(customer_ids)
+            db.session.commit()
+            self._report_progress(job, progress_callback)
+
+            generated_at = datetime.utcnow()
+            for i in range(0, len(customer_ids), self.INSERT_CHUNK_SIZE):
+                chunk = customer_ids[i:i + self.INSERT_CHUNK_SIZE]
+                db.session.execute(MonthlyReport.__table__.insert(), [{
+                    'customer_id': cid,
+                    'year': job.year,
+                    'month': job.month,
+                    'revision': (revisions.get(cid) or 0) + 1,
+                    'report': reports[cid],
+                    'forecast': forecasts[cid],
+                    'job_id': job.id,
+                    'generated_at': generated_at
+                } for cid in chunk])
+                job.processed = i + len(chunk)
+                db.session.commit()
+                self._report_progress(job, progress_callback)
+
+            job.status = 'completed'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.info(f"Monthly report job {job.id} complete: {job.processed} customers.")
+
+        except Exception as e:
+            db.session.rollback()
+            job = ReportJob.query.get(job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.error(f"Monthly report job {job_id} failed: {e}")
+
+        return job
+
+    @staticmethod
+    def _report_progress(job, progress_callback):
+        if progress_callback:
+            progress_callback(job.processed, job.total)
+
+
+monthly_report_service = MonthlyReportService()
+
+
+def run_monthly_report_job(app, job_id):
+    """Helper function to run a generation job in a background thread."""
+    with app.app_context():
+        return monthly_report_service.run_job(job_id)
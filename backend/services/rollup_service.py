@@ -0,0 +1,474 @@
+"""
+Rollup Service
+Maintains models.rollup.TicketDailyRollup / TicketMonthlyRollup and answers
+report aggregates (counts, status breakdown, avg + p50/p90/p99 of resolve and
+response times) for any [start, end) range.
+
+A range is split by split_range(): whole months are read from the monthly
+rollups, the remaining whole days from the daily rollups, and the partial days
+at either edge from `tickets` directly, so a 12-month window reads about as many
+rows as a 30-day one and edges are still exact.
+
+The same buckets hold a HyperLogLog of the customers of each engineer
+(EngineerDailySketch / EngineerMonthlySketch), so customers-per-engineer over
+any range is a merge of sketches instead of a count(distinct) over tickets.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from models.ticket import db, Ticket
+from models.rollup import TicketDailyRollup, TicketMonthlyRollup, EngineerDailySketch, EngineerMonthlySketch
+from services.sketch import HyperLogLog, merge_serialized, merge_hll
+from services.dimensions import ticket_dimensions, engineer_named
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (0.5, 0.9, 0.99)
+CLOSED_STATUSES = ('Resolved', 'Closed')
+
+# Additive rollup columns (same names on both rollup tables)
+COUNTERS = ('ticket_count', 'breached_count', 'open_count', 'in_progress_count', 'resolved_count',
+            'resolve_hours_sum', 'resolve_count', 'response_minutes_sum', 'response_count',
+            'effort_minutes_sum')
+
+# group_by name -> (key column, label column) on the rollup tables and tickets
+GROUPS = {
+    'customer': ('customer_id', 'customer_name'),
+    'engineer': ('engineer_id', 'engineer_name'),
+    'priority': ('priority', None),
+}
+
+# Ticket fields read into the rollups; names come from the dimension tables
+TICKET_FIELDS = ('created_at', 'customer_id', 'customer_name', 'engineer_id', 'engineer_name',
+                 'priority', 'status', 'is_overdue', 'resolve_time_hours', 'response_time_minutes',
+                 'time_elapsed_minutes')
+
+
+def day_ranges(days):
+    """Collapse a set of dates into [start, end) datetime ranges of consecutive days."""
+    ranges = []
+    for day in sorted(set(days)):
+        start = datetime.combine(day, datetime.min.time())
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + timedelta(days=1)
+        else:
+            ranges.append([start, start + timedelta(days=1)])
+    return [tuple(r) for r in ranges]
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def split_range(start, end):
+    """
+    Split [start, end) (datetimes, None = unbounded) into the parts answered by
+    each source.
+
+    Returns:
+        (raw, days, months): datetime ranges of partial edge days (read from
+        tickets), date ranges of whole days (daily rollups) and of whole months
+        (monthly rollups). All ranges are half-open; None bounds are unbounded.
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() if end is not None else None
+
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        return ([(start, end)] if start < end else []), [], []
+
+    raw = []
+    if start is not None and datetime.combine(first_day, time.min) > start:
+        raw.append((start, datetime.combine(first_day, time.min)))
+    if end is not None and datetime.combine(last_day, time.min) < end:
+        raw.append((datetime.combine(last_day, time.min), end))
+
+    first_month = None
+    if first_day is not None:
+        first_month = first_day if first_day.day == 1 else next_month(first_day)
+    last_month = month_start(last_day) if last_day is not None else None
+
+    if first_month is None or last_month is None or first_month < last_month:
+        days = []
+        if first_day is not None and first_day < first_month:
+            days.append((first_day, first_month))
+        if last_day is not None and last_month < last_day:
+            days.append((last_month, last_day))
+        return raw, days, [(first_month, last_month)]
+    return raw, [(first_day, last_day)], []
+
+
+def _range_filter(column, ranges):
+    clauses = []
+    for low, high in ranges:
+        bounds = []
+        if low is not None:
+            bounds.append(column >= low)
+        if high is not None:
+            bounds.append(column < high)
+        clauses.append(db.and_(*bounds) if bounds else db.true())
+    return db.or_(*clauses)
+
+
+def new_group():
+    return {**dict.fromkeys(COUNTERS, 0), 'label': None, 'customer_name': None, 'engineer_name': None,
+            'resolve_digests': [], 'response_digests': [], 'resolve_values': [], 'response_values': []}
+
+
+def add_ticket(g, t):
+    """Add one raw ticket row to a group."""
+    g['ticket_count'] += 1
+    g['breached_count'] += 1 if t.is_overdue else 0
+    g['open_count'] += 1 if t.status == 'Open' else 0
+    g['in_progress_count'] += 1 if t.status == 'In Progress' else 0
+    g['resolved_count'] += 1 if t.status in CLOSED_STATUSES else 0
+    if t.resolve_time_hours is not None:
+        g['resolve_hours_sum'] += t.resolve_time_hours
+        g['resolve_count'] += 1
+        g['resolve_values'].append(t.resolve_time_hours)
+    if t.response_time_minutes is not None:
+        g['response_minutes_sum'] += t.response_time_minutes
+        g['response_count'] += 1
+        g['response_values'].append(t.response_time_minutes)
+    g['effort_minutes_sum'] += t.time_elapsed_minutes or 0
+
+
+def add_rollup_row(g, r):
+    """Add one rollup row (or per-group SUMs of rollup rows) to a group."""
+    for name in COUNTERS:
+        g[name] += getattr(r, name) or 0
+    g['resolve_digests'].append(getattr(r, 'resolve_digest', None))
+    g['response_digests'].append(getattr(r, 'response_digest', None))
+
+
+def group_sketch(g, metric):
+    """DDSketch of one metric ('resolve' or 'response') over rollup digests and raw values."""
+    sketch = merge_serialized(g[f'{metric}_digests'])
+    if g[f'{metric}_values']:
+        sketch.add(g[f'{metric}_values'])
+    return sketch
+
+
+def _digest(g, metric):
+    sketch = group_sketch(g, metric)
+    return sketch.to_bytes() if sketch.count else None
+
+
+def distribution(sketch, total, count, digits=2):
+    """avg and percentiles of one metric, in the unit the sketch was built with."""
+    values = sketch.quantiles(PERCENTILES)
+    result = {"count": count, "avg": round(total / count, digits) if count else None}
+    for q, v in zip(PERCENTILES, values):
+        result[f"p{int(q * 100)}"] = round(v, digits) if v is not None else None
+    return result
+
+
+def totals(g):
+    """Counts, SLA and status breakdown of a group in the report schema."""
+    g = g or new_group()
+    total = g['ticket_count']
+    breached = g['breached_count']
+    return {
+        "total_tickets": total,
+        "sla_met": total - breached,
+        "sla_breached": breached,
+        "sla_percent": round((total - breached) / total * 100, 1) if total > 0 else 100,
+        "status_breakdown": {
+            "open": g['open_count'],
+            "in_progress": g['in_progress_count'],
+            "resolved": g['resolved_count'],
+        },
+    }
+
+
+class RollupService:
+    DAY_CHUNK = 31  # days rebuilt per statement batch
+
+    def refresh_days(self, days):
+        """
+        Rebuild the daily rollup rows of the given creation days from `tickets`,
+        then the monthly rows of their months. The caller commits (the sync does
+        it together with the ticket upserts).
+
+        Returns:
+            number of daily rollup rows written
+        """
+        days = sorted(set(days))
+        written = 0
+        for i in range(0, len(days), self.DAY_CHUNK):
+            written += self._refresh_chunk(days[i:i + self.DAY_CHUNK])
+        self.refresh_months({month_start(d) for d in days})
+        return written
+
+    def _refresh_chunk(self, days):
+        ranges = day_ranges(days)
+        window = db.or_(*[db.and_(Ticket.created_at >= start, Ticket.created_at < end) for start, end in ranges])
+
+        rows = self._ticket_query().filter(window).all()
+
+        groups = {}
+        customers = defaultdict(list)  # (day, engineer_id) -> customer ids
+        for r in rows:
+            key = (r.created_at.date(), r.customer_id or '', r.engineer_id or '', r.priority or '')
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = new_group()
+                g['customer_name'], g['engineer_name'] = r.customer_name, r.engineer_name
+            add_ticket(g, r)
+            if r.engineer_id:
+                customers[(key[0], r.engineer_id)].append(r.customer_id)
+
+        TicketDailyRollup.query.filter(TicketDailyRollup.day.in_(days)).delete(synchronize_session=False)
+        EngineerDailySketch.query.filter(EngineerDailySketch.day.in_(days)).delete(synchronize_session=False)
+        self._insert_sketches(EngineerDailySketch, 'day', {
+            key: HyperLogLog.from_values(ids) for key, ids in customers.items()
+        })
+        return self._insert(TicketDailyRollup, 'day', groups)
+
+    def refresh_months(self, months):
+        """Rebuild the monthly rollup rows of the given months (first days) from the daily rollups."""
+        written = 0
+        for month in sorted(set(months)):
+            rows = TicketDailyRollup.query.filter(
+                TicketDailyRollup.day >= month, TicketDailyRollup.day < next_month(month)
+            ).all()
+            groups = {}
+            for r in rows:
+                key = (month, r.customer_id, r.engineer_id, r.priority)
+                g = groups.get(key)
+                if g is None:
+                    g = groups[key] = new_group()
+                g['customer_name'] = r.customer_name or g['customer_name']
+                g['engineer_name'] = r.engineer_name or g['engineer_name']
+                add_rollup_row(g, r)
+
+            TicketMonthlyRollup.query.filter(TicketMonthlyRollup.month == month).delete(synchronize_session=False)
+            written += self._insert(TicketMonthlyRollup, 'month', groups)
+
+            sketches = defaultdict(list)
+            for r in db.session.query(EngineerDailySketch.engineer_id, EngineerDailySketch.customer_hll).filter(
+                EngineerDailySketch.day >= month, EngineerDailySketch.day < next_month(month)
+            ):
+                sketches[r.engineer_id].append(r.customer_hll)
+            EngineerMonthlySketch.query.filter(EngineerMonthlySketch.month == month).delete(synchronize_session=False)
+            self._insert_sketches(EngineerMonthlySketch, 'month', {
+                (month, engineer_id): merge_hll(blobs) for engineer_id, blobs in sketches.items()
+            })
+        return written
+
+    @staticmethod
+    def _insert(model, bucket_column, groups):
+        now = datetime.utcnow()
+        mappings = []
+        for (bucket, customer_id, engineer_id, priority), g in groups.items():
+            mappings.append({
+                bucket_column: bucket,
+                'customer_id': customer_id,
+                'engineer_id': engineer_id,
+                'priority': priority,
+                'customer_name': g['customer_name'],
+                'engineer_name': g['engineer_name'],
+                **{name: g[name] for name in COUNTERS},
+                'resolve_digest': _digest(g, 'resolve'),
+                'response_digest': _digest(g, 'response'),
+                'updated_at': now,
+            })
+        if mappings:
+            db.session.execute(model.__table__.insert(), mappings)
+        return len(mappings)
+
+    @staticmethod
+    def _insert_sketches(model, bucket_column, sketches):
+        """sketches: {(bucket, engineer_id): HyperLogLog of customer ids}"""
+        now = datetime.utcnow()
+        mappings = [{
+            bucket_column: bucket,
+            'engineer_id': engineer_id,
+            'customer_hll': sketch.to_bytes(),
+            'updated_at': now,
+        } for (bucket, engineer_id), sketch in sketches.items()]
+        if mappings:
+            db.session.execute(model.__table__.insert(), mappings)
+
+    def rebuild(self, start_day=None, end_day=None, progress_callback=None):
+        """Rebuild every day that has tickets (optionally within [start_day, end_day]), committing per chunk."""
+        day_col = db.func.date(Ticket.created_at)
+        query = db.session.query(day_col).filter(Ticket.created_at.isnot(None))
+        if start_day:
+            query = query.filter(Ticket.created_at >= datetime.combine(start_day, datetime.min.time()))
+        if end_day:
+            query = query.filter(Ticket.created_at < datetime.combine(end_day + timedelta(days=1), datetime.min.time()))
+        days = [d for (d,) in query.distinct().order_by(day_col).all()]
+
+        written = 0
+        for i in range(0, len(days), self.DAY_CHUNK):
+            written += self._refresh_chunk(days[i:i + self.DAY_CHUNK])
+            db.session.commit()
+            if progress_callback:
+                progress_callback(min(i + self.DAY_CHUNK, len(days)), len(days))
+        for month in sorted({month_start(d) for d in days}):
+            self.refresh_months([month])
+            db.session.commit()
+        return written
+
+    # ==================== QUERIES ====================
+
+    def aggregate(self, group_by=None, start=None, end=None, customer_id=None, engineer_id=None,
+                  engineer_name=None, priority=None, digests=True):
+        """
+        Aggregate the tickets created in [start, end) (datetimes, None = unbounded)
+        from the monthly/daily rollups plus the raw partial edge days.
+
+        Args:
+            group_by: None (one group), 'customer', 'engineer' or 'priority'
+            digests: also collect resolve/response digests (needed for percentiles);
+                without them rollup rows are summed in SQL
+
+        Returns:
+            {group key: group dict} (key None without group_by, '' for NULL values)
+        """
+        if group_by is not None and group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}")
+        key_name, label_name = GROUPS[group_by] if group_by else (None, None)
+        raw, days, months = split_range(start, end)
+        groups = {}
+
+        def group_of(key, label):
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = new_group()
+            if label:
+                g['label'] = label
+            return g
+
+        for model, bucket, ranges in ((TicketMonthlyRollup, 'month', months), (TicketDailyRollup, 'day', days)):
+            if not ranges:
+                continue
+            columns = [getattr(model, key_name).label('group_key') if key_name else db.null().label('group_key')]
+            if label_name:
+                label = getattr(model, label_name)
+                columns.append((label if digests else db.func.max(label)).label('group_label'))
+            else:
+                columns.append(db.null().label('group_label'))
+            if digests:
+                columns += [getattr(model, name) for name in COUNTERS] + [model.resolve_digest, model.response_digest]
+            else:
+                columns += [db.func.sum(getattr(model, name)).label(name) for name in COUNTERS]
+
+            query = db.session.query(*columns).filter(_range_filter(getattr(model, bucket), ranges))
+            query = self._filter(query, model, customer_id, engineer_id, engineer_name, priority)
+            if not digests and key_name:
+                query = query.group_by(getattr(model, key_name))
+            for r in query.all():
+                if r.ticket_count:
+                    add_rollup_row(group_of(r.group_key, r.group_label), r)
+
+        if raw:
+            query = self._ticket_query().filter(_range_filter(Ticket.created_at, raw))
+            query = self._filter(query, Ticket, customer_id, engineer_id, engineer_name, priority)
+            for t in query.all():
+                key = (getattr(t, key_name) or '') if key_name else None
+                add_ticket(group_of(key, getattr(t, label_name) if label_name else None), t)
+
+        return groups
+
+    def distinct_customers(self, start=None, end=None):
+        """
+        Estimated count(distinct customer_id) per engineer over the tickets created
+        in [start, end), from the engineer sketches plus the raw partial edge days.
+
+        Returns:
+            {engineer_id: distinct customer estimate}
+        """
+        raw, days, months = split_range(start, end)
+        blobs = defaultdict(list)
+        raw_ids = defaultdict(list)
+        for model, bucket, ranges in ((EngineerMonthlySketch, 'month', months), (EngineerDailySketch, 'day', days)):
+            if not ranges:
+                continue
+            query = db.session.query(model.engineer_id, model.customer_hll).filter(
+                _range_filter(getattr(model, bucket), ranges)
+            )
+            for r in query:
+                blobs[r.engineer_id].append(r.customer_hll)
+        if raw:
+            query = db.session.query(Ticket.engineer_id, Ticket.customer_id).filter(
+                _range_filter(Ticket.created_at, raw), Ticket.engineer_id.isnot(None)
+            )
+            for r in query:
+                raw_ids[r.engineer_id].append(r.customer_id)
+        return {
+            engineer_id: merge_hll(blobs[engineer_id]).add(raw_ids[engineer_id]).estimate()
+            for engineer_id in set(blobs) | set(raw_ids)
+        }
+
+    @staticmethod
+    def _ticket_query():
+        columns = {c.key: c for c in Ticket.list_columns()}
+        return Ticket.join_dimensions(db.session.query(*[columns[name] for name in TICKET_FIELDS]))
+
+    @staticmethod
+    def _filter(query, model, customer_id, engineer_id, engineer_name, priority):
+        if customer_id:
+            query = query.filter(model.customer_id == customer_id)
+        if engineer_id:
+            query = query.filter(model.engineer_id == engineer_id)
+        if model is Ticket:
+            # tickets carry dimension keys, the rollups the names
+            if engineer_name:
+                query = query.filter(engineer_named(Ticket.engineer_id, engineer_name))
+            if priority:
+                query = query.filter(Ticket.priority_id.in_(ticket_dimensions.priority.keys_of([priority])))
+            return query
+        if engineer_name:
+            query = query.filter(model.engineer_name == engineer_name)
+        if priority:
+            query = query.filter(model.priority == priority)
+        return query
+
+    def percentiles(self, group_by=None, start=None, end=None,
+                    customer_id=None, engineer_id=None, priority=None, groups=None):
+        """
+        Resolve/response time distributions of the tickets created in [start, end).
+        `groups` reuses the result of an aggregate() call with the same arguments.
+
+        Args:
+            group_by: None (one overall result), 'customer', 'engineer' or 'priority'
+
+        Returns:
+            dict for group_by=None, otherwise a list of dicts sorted by ticket count
+        """
+        if groups is None:
+            groups = self.aggregate(group_by, start, end, customer_id=customer_id,
+                                    engineer_id=engineer_id, priority=priority)
+        if group_by is None:
+            return self._result(groups.get(None))
+
+        key_name, label_name = GROUPS[group_by]
+        results = []
+        for key, g in sorted(groups.items(), key=lambda item: -item[1]['ticket_count']):
+            entry = {key_name: key or None}
+            if label_name:
+                entry[label_name] = g['label']
+            entry.update(self._result(g))
+            results.append(entry)
+        return results
+
+    @staticmethod
+    def _result(g):
+        g = g or new_group()
+        return {
+            "total_tickets": g['ticket_count'],
+            "sla_breached": g['breached_count'],
+            "resolve_hours": distribution(group_sketch(g, 'resolve'), g['resolve_hours_sum'], g['resolve_count']),
+            "response_minutes": distribution(group_sketch(g, 'response'), g['response_minutes_sum'],
+                                             g['response_count'], digits=1),
+        }
+
+
+rollup_service = RollupService()
@@ -0,0 +1,262 @@
+"""
+DDSketch - mergeable quantile sketch with relative-error guarantees.
+
+Values are counted in logarithmic buckets: bucket i covers (gamma^(i-1), gamma^i]
+with gamma = (1 + alpha) / (1 - alpha), so any quantile is returned within a
+relative error of `alpha`. Two sketches with the same alpha merge by adding
+bucket counts, which is what lets daily rollups be combined into any period.
+
+Reference: Masson, Rim, Lee - "DDSketch: A Fast and Fully-Mergeable Quantile
+Sketch with Relative-Error Guarantees" (VLDB 2019).
+
+HyperLogLog - mergeable distinct-count sketch, for count(distinct ...) over
+rollups. Each value is hashed to 64 bits; the first `precision` bits pick one
+of 2^precision registers, which keeps the longest run of leading zeros seen in
+the rest. Merging is a register-wise max, so daily sketches combine into any
+period; the standard error is about 1.04 / sqrt(2^precision) (1.6% at 12), and
+small counts (linear counting) are close to exact.
+
+Reference: Flajolet, Fusy, Gandouet, Meunier - "HyperLogLog: the analysis of a
+near-optimal cardinality estimation algorithm" (AofA 2007).
+"""
+import hashlib
+import math
+import struct
+import numpy as np
+
+DEFAULT_ALPHA = 0.01
+MAX_BINS = 2048
+MIN_VALUE = 1e-9  # values at or below this are counted as zero
+
+_HEADER = struct.Struct('<BdQdI')  # version, alpha, zero_count, sum, n_bins
+_VERSION = 1
+
+
+class DDSketch:
+    """Bucket indices and counts are kept as sorted NumPy arrays."""
+
+    def __init__(self, alpha=DEFAULT_ALPHA, max_bins=MAX_BINS):
+        self.alpha = alpha
+        self.max_bins = max_bins
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = np.log(self.gamma)
+        self.keys = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.sum = 0.0
+
+    @classmethod
+    def from_values(cls, values, alpha=DEFAULT_ALPHA):
+        sketch = cls(alpha)
+        sketch.add(values)
+        return sketch
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    def add(self, values):
+        """Add an array of non-negative values (NaN/None are ignored)."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        values = np.maximum(values, 0)
+        self.sum += float(values.sum())
+        positive = values[values > MIN_VALUE]
+        self.zero_count += int(len(values) - len(positive))
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int32)
+            self._merge_bins(keys, np.ones(len(keys), dtype=np.int64))
+        return self
+
+    def merge(self, other):
+        """Merge another sketch (same alpha) into this one."""
+        if other is None:
+            return self
+        if abs(other.alpha - self.alpha) > 1e-12:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        self.sum += other.sum
+        self._merge_bins(other.keys, other.counts)
+        return self
+
+    def _merge_bins(self, keys, counts):
+        all_keys = np.concatenate([self.keys, keys])
+        all_counts = np.concatenate([self.counts, counts])
+        self.keys, inverse = np.unique(all_keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=all_counts, minlength=len(self.keys)).astype(np.int64)
+        if len(self.keys) > self.max_bins:
+            # Collapse the lowest buckets: accuracy is kept for the upper quantiles
+            excess = len(self.keys) - self.max_bins + 1
+            collapsed = self.counts[:excess].sum()
+            self.keys = self.keys[excess - 1:].copy()
+            self.counts = self.counts[excess - 1:].copy()
+            self.counts[0] = collapsed
+        self.keys = self.keys.astype(np.int32)
+
+    def quantile(self, q):
+        """Value at quantile q in [0, 1], or None for an empty sketch."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        total = self.count
+        if total == 0:
+            return [None for _ in qs]
+        ranks = np.asarray(qs, dtype=float) * (total - 1)
+        cumulative = self.zero_count + np.cumsum(self.counts)
+        results = []
+        for rank in ranks:
+            if rank < self.zero_count:
+                results.append(0.0)
+                continue
+            i = int(np.searchsorted(cumulative, rank, side='right'))
+            i = min(i, len(self.keys) - 1)
+            # Bucket midpoint (in the relative-error sense)
+            results.append(float(2 * self.gamma ** self.keys[i] / (self.gamma + 1)))
+        return results
+
+    def to_bytes(self):
+        header = _HEADER.pack(_VERSION, self.alpha, self.zero_count, self.sum, len(self.keys))
+        return header + self.keys.astype('<i4').tobytes() + self.counts.astype('<i8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        alpha, zero_count, total, keys, counts = _decode(data)
+        sketch = cls(alpha)
+        sketch.keys = keys.astype(np.int32)
+        sketch.counts = counts.astype(np.int64)
+        sketch.zero_count = zero_count
+        sketch.sum = total
+        return sketch
+
+
+def _decode(data):
+    """Serialized sketch -> (alpha, zero_count, sum, keys, counts) without building a DDSketch."""
+    version, alpha, zero_count, total, n_bins = _HEADER.unpack_from(data)
+    if version != _VERSION:
+        raise ValueError(f"Unsupported sketch version {version}")
+    offset = _HEADER.size
+    keys = np.frombuffer(data, dtype='<i4', count=n_bins, offset=offset)
+    counts = np.frombuffer(data, dtype='<i8', count=n_bins, offset=offset + 4 * n_bins)
+    return alpha, zero_count, total, keys, counts
+
+
+def merge_serialized(blobs, alpha=DEFAULT_ALPHA):
+    """Merge serialized sketches (None entries are skipped) with a single bucket aggregation."""
+    sketch = DDSketch(alpha)
+    keys, counts = [], []
+    for blob in blobs:
+        if not blob:
+            continue
+        part_alpha, zero_count, total, part_keys, part_counts = _decode(blob)
+        if abs(part_alpha - alpha) > 1e-12:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        sketch.zero_count += zero_count
+        sketch.sum += total
+        keys.append(part_keys)
+        counts.append(part_counts)
+    if keys:
+        sketch._merge_bins(np.concatenate(keys), np.concatenate(counts))
+    return sketch
+
+
+HLL_PRECISION = 12
+
+_HLL_HEADER = struct.Struct('<BBBI')  # version, precision, encoding, n_entries
+_HLL_VERSION = 1
+_SPARSE, _DENSE = 0, 1  # (index, rank) pairs of the non-zero registers / every register
+
+
+def _hash64(value):
+    """Stable 64-bit hash of a value's string form (the same in every process)."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'little')
+
+
+class HyperLogLog:
+    """Registers are a uint8 NumPy array of 2^precision entries."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_values(cls, values, precision=HLL_PRECISION):
+        sketch = cls(precision)
+        sketch.add(values)
+        return sketch
+
+    def add(self, values):
+        """Add an iterable of values (None entries are skipped, as in count(distinct))."""
+        width = 64 - self.precision
+        low_mask = (1 << width) - 1
+        indices, ranks = [], []
+        for value in values:
+            if value is None:
+                continue
+            h = _hash64(value)
+            indices.append(h >> width)
+            ranks.append(width - (h & low_mask).bit_length() + 1)
+        if indices:
+            np.maximum.at(self.registers, np.asarray(indices, dtype=np.int64), np.asarray(ranks, dtype=np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Estimated number of distinct values added."""
+        m = len(self.registers)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if zeros == m:
+            return 0
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """Sparse (index, rank) pairs while few registers are set, the raw registers otherwise."""
+        nonzero = np.flatnonzero(self.registers)
+        if 3 * len(nonzero) < len(self.registers):
+            header = _HLL_HEADER.pack(_HLL_VERSION, self.precision, _SPARSE, len(nonzero))
+            return header + nonzero.astype('<u2').tobytes() + self.registers[nonzero].tobytes()
+        header = _HLL_HEADER.pack(_HLL_VERSION, self.precision, _DENSE, len(self.registers))
+        return header + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        precision = _HLL_HEADER.unpack_from(data)[1]
+        sketch = cls(precision)
+        sketch._merge_serialized(data)
+        return sketch
+
+    def _merge_serialized(self, data):
+        version, precision, encoding, n = _HLL_HEADER.unpack_from(data)
+        if version != _HLL_VERSION:
+            raise ValueError(f"Unsupported sketch version {version}")
+        if precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        offset = _HLL_HEADER.size
+        if encoding == _DENSE:
+            registers = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset)
+            np.maximum(self.registers, registers, out=self.registers)
+        else:
+            indices = np.frombuffer(data, dtype='<u2', count=n, offset=offset)
+            ranks = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset + 2 * n)
+            np.maximum.at(self.registers, indices.astype(np.int64), ranks)
+
+
+def merge_hll(blobs, precision=HLL_PRECISION):
+    """Merge serialized HyperLogLogs (None entries are skipped) into one sketch."""
+    sketch = HyperLogLog(precision)
+    for blob in blobs:
+        if blob:
+            sketch._merge_serialized(blob)
+    return sketch
@@ -0,0 +1,313 @@
+"""
+SLA Engine
+Computes response and resolution SLA compliance from ticket timestamps, in
+business time of the customer's support calendar (24x7, 8x5, ...).
+
+Targets come from the SLA attached to the customer's active service
+(models.cmdb: CustomerService.custom_sla_id, else Service.sla_id), per
+priority; customers without one use Config.SLA_RESPONSE_MINUTES /
+SLA_RESOLVE_HOURS on the SLA_DEFAULT_SUPPORT_HOURS calendar.
+
+Business time is computed for a whole batch at once: each timestamp is mapped to
+"business minutes since a fixed epoch" with np.busday_count, and a delta is the
+difference of two such values. The sync evaluates every batch it upserts and
+re-evaluates the open tickets whose `sla_due_at` falls before its next run, so
+`is_overdue` no longer depends on the source.
+
+`sla_due_at` maps the business minutes a clock has left back onto the calendar
+(SupportCalendar.wall_time), so a ticket evaluated on Friday evening with an
+hour left on an 8x5 calendar is not looked at again before Monday morning.
+"""
+import logging
+import re
+import numpy as np
+from datetime import datetime
+from flask import current_app
+from models.ticket import db, Ticket
+from models.cmdb import SLA, Service, CustomerService
+from services.dimensions import ticket_dimensions
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = ('Resolved', 'Closed')
+OPEN_STATUSES = ('Open', 'In Progress')  # clock running (On Hold tickets are not re-evaluated)
+PRIORITY_LEVELS = ('critical', 'high', 'medium', 'low')
+EPOCH = np.datetime64('2000-01-03', 'D')  # a Monday; business minutes are counted from here
+RECOMPUTE_CHUNK_SIZE = 5000
+
+SLA_FIELDS = ('sla_id', 'sla_response_business_minutes', 'sla_resolve_business_hours',
+              'sla_response_breached', 'sla_resolve_breached', 'is_overdue', 'sla_due_at')
+
+
+def priority_level(priority):
+    """Map a ticket priority name onto the SLA target levels (default: medium)."""
+    name = (priority or '').strip().lower()
+    if name in ('p1', 'urgent') or 'critical' in name:
+        return 'critical'
+    if name == 'p2' or 'high' in name:
+        return 'high'
+    if name == 'p4' or 'low' in name:
+        return 'low'
+    return 'medium'
+
+
+class SupportCalendar:
+    """
+    Support hours as "<hours per day>x<days per week>": '24x7', '8x5' (Mon-Fri,
+    from day_start_hour), '12x6' (Mon-Sat), ... Holidays only apply to calendars
+    that are not 24x7.
+    """
+    SPEC = re.compile(r'^\s*(\d{1,2})\s*[xX]\s*([1-7])\s*$')
+
+    def __init__(self, hours_per_day=24, days_per_week=7, day_start_hour=8, holidays=()):
+        if not 1 <= hours_per_day <= 24:
+            raise ValueError("hours_per_day must be between 1 and 24")
+        if hours_per_day == 24:
+            day_start_hour = 0
+        if day_start_hour + hours_per_day > 24:
+            raise ValueError("support hours must end before midnight")
+        self.open_minute = day_start_hour * 60
+        self.minutes_per_day = hours_per_day * 60
+        always_open = hours_per_day == 24 and days_per_week == 7
+        self.calendar = np.busdaycalendar(
+            weekmask=[1] * days_per_week + [0] * (7 - days_per_week),
+            holidays=[] if always_open else list(holidays)
+        )
+
+    @classmethod
+    def parse(cls, spec, day_start_hour=8, holidays=()):
+        match = cls.SPEC.match(spec or '')
+        if not match:
+            raise ValueError(f"Invalid support hours '{spec}' (expected e.g. 24x7 or 8x5)")
+        return cls(int(match.group(1)), int(match.group(2)), day_start_hour, holidays)
+
+    def cumulative_minutes(self, times):
+        """Business minutes between EPOCH and each datetime64 in `times` (no NaT)."""
+        days = times.astype('datetime64[D]')
+        minute_of_day = (times - days).astype('timedelta64[s]').astype(np.float64) / 60.0
+        whole_days = np.busday_count(EPOCH, days, busdaycal=self.calendar)
+        today = np.clip(minute_of_day - self.open_minute, 0, self.minutes_per_day)
+        return whole_days * float(self.minutes_per_day) + np.where(
+            np.is_busday(days, busdaycal=self.calendar), today, 0.0
+        )
+
+    def wall_time(self, minutes):
+        """Inverse of cumulative_minutes: the earliest datetime64 at which each value is reached."""
+        whole_days = np.floor(minutes / self.minutes_per_day)
+        days = np.busday_offset(EPOCH, whole_days.astype(np.int64), roll='forward', busdaycal=self.calendar)
+        seconds = np.round((self.open_minute + minutes - whole_days * self.minutes_per_day) * 60.0)
+        return days.astype('datetime64[s]') + seconds.astype(np.int64).astype('timedelta64[s]')
+
+    def business_minutes(self, start, end):
+        """Vectorized business minutes from start to end; NaN where either is NaT."""
+        start = np.asarray(start, dtype='datetime64[s]')
+        end = np.asarray(end, dtype='datetime64[s]')
+        result = np.full(start.shape, np.nan)
+        valid = ~(np.isnat(start) | np.isnat(end))
+        if valid.any():
+            delta = self.cumulative_minutes(end[valid]) - self.cumulative_minutes(start[valid])
+            result[valid] = np.maximum(delta, 0.0)
+        return result
+
+
+class SLATarget:
+    """Response (minutes) and resolution (hours) targets per priority level, on one calendar."""
+
+    def __init__(self, sla_id, support_hours, response_minutes, resolve_hours):
+        self.sla_id = sla_id
+        self.support_hours = support_hours
+        self.response_minutes = response_minutes
+        self.resolve_hours = resolve_hours
+
+    @classmethod
+    def uniform(cls, support_hours, response_minutes, resolve_hours):
+        return cls(None, support_hours,
+                   dict.fromkeys(PRIORITY_LEVELS, response_minutes),
+                   dict.fromkeys(PRIORITY_LEVELS, resolve_hours))
+
+    @classmethod
+    def from_sla(cls, sla, default_support_hours='24x7'):
+        return cls(
+            sla.id, sla.support_hours or default_support_hours,
+            {level: getattr(sla, f'response_{level}') for level in PRIORITY_LEVELS},
+            {level: getattr(sla, f'resolution_{level}') for level in PRIORITY_LEVELS},
+        )
+
+
+def _offsets(created, values, seconds_per_unit):
+    """created + values (float array in the given unit); NaT where the value is missing."""
+    missing = np.isnan(values)
+    seconds = np.round(np.where(missing, 0.0, values) * seconds_per_unit).astype(np.int64)
+    result = created + seconds.astype('timedelta64[s]')
+    result[missing] = np.datetime64('NaT')
+    return result
+
+
+class SLAEngine:
+
+    def load_targets(self):
+        """
+        Returns:
+            (default SLATarget, {customer_id: SLATarget}) from the active customer services
+        """
+        config = current_app.config
+        default_hours = config.get('SLA_DEFAULT_SUPPORT_HOURS', '24x7')
+        default = SLATarget.uniform(default_hours, config.get('SLA_RESPONSE_MINUTES', 30),
+                                    config.get('SLA_RESOLVE_HOURS', 4))
+
+        now = datetime.utcnow()
+        rows = db.session.query(
+            CustomerService.customer_id, CustomerService.custom_sla_id, Service.sla_id
+        ).outerjoin(Service, Service.id == CustomerService.service_id).filter(
+            CustomerService.status == 'Active',
+            db.or_(CustomerService.end_date.is_(None), CustomerService.end_date >= now)
+        ).order_by(CustomerService.id).all()
+
+        slas = {s.id: SLATarget.from_sla(s, default_hours) for s in SLA.query.all()}
+        by_customer = {}
+        for r in rows:
+            target = slas.get(r.custom_sla_id or r.sla_id)
+            # A customer-specific override wins over the SLA of a service
+            if target and (r.customer_id not in by_customer or r.custom_sla_id):
+                by_customer[r.customer_id] = target
+        return default, by_customer
+
+    def _calendar(self, spec, cache):
+        calendar = cache.get(spec)
+        if calendar is None:
+            config = current_app.config
+            try:
+                calendar = SupportCalendar.parse(
+                    spec, config.get('SLA_BUSINESS_DAY_START_HOUR', 8), config.get('SLA_HOLIDAYS', []))
+            except ValueError as e:
+                logger.warning(f"{e}; using 24x7")
+                calendar = SupportCalendar()
+            cache[spec] = calendar
+        return calendar
+
+    def evaluate(self, tickets, now=None, targets=None, calendars=None):
+        """
+        SLA fields for a batch of tickets (mappings with created_at, customer_id,
+        status, priority, response_time_minutes, resolve_time_hours).
+
+        A missing response counts up to the resolution, or up to `now` while the
+        ticket is open; closed tickets without timestamps are never breached.
+
+        Returns:
+            list of dicts with the SLA_FIELDS, in input order
+        """
+        if not tickets:
+            return []
+        default, by_customer = targets or self.load_targets()
+        calendars = {} if calendars is None else calendars
+        now = np.datetime64(now or datetime.now(), 's')
+
+        created = np.array([t['created_at'] for t in tickets], dtype='datetime64[s]')
+        response = np.array([np.nan if t['response_time_minutes'] is None else t['response_time_minutes']
+                             for t in tickets], dtype=np.float64)
+        resolve = np.array([np.nan if t['resolve_time_hours'] is None else t['resolve_time_hours']
+                            for t in tickets], dtype=np.float64)
+        is_open = np.array([t['status'] not in CLOSED_STATUSES for t in tickets])
+
+        resolved_at = _offsets(created, resolve, 3600)
+        responded_at = _offsets(created, response, 60)
+        running = np.where(is_open, now, np.datetime64('NaT'))
+        resolve_end = np.where(np.isnat(resolved_at), running, resolved_at)
+        response_end = np.where(np.isnat(responded_at), resolve_end, responded_at)
+
+        ticket_targets = [by_customer.get(t['customer_id'], default) for t in tickets]
+        levels = [priority_level(t['priority']) for t in tickets]
+        response_target = np.array([tt.response_minutes[lv] for tt, lv in zip(ticket_targets, levels)],
+                                   dtype=np.float64)
+        resolve_target = np.array([tt.resolve_hours[lv] for tt, lv in zip(ticket_targets, levels)],
+                                  dtype=np.float64) * 60.0
+
+        response_minutes = np.full(len(tickets), np.nan)
+        resolve_minutes = np.full(len(tickets), np.nan)
+        specs = np.array([tt.support_hours for tt in ticket_targets])
+        for spec in set(specs.tolist()):
+            mask = specs == spec
+            calendar = self._calendar(spec, calendars)
+            response_minutes[mask] = calendar.business_minutes(created[mask], response_end[mask])
+            resolve_minutes[mask] = calendar.business_minutes(created[mask], resolve_end[mask])
+
+        response_breached = response_minutes > response_target  # NaN compares False
+        resolve_breached = resolve_minutes > resolve_target
+
+        # Business minutes left on the clocks still running (NaN: stopped, breached or no target)
+        resolve_running = is_open & np.isnat(resolved_at)
+        left = np.fmin(
+            np.where(resolve_running & np.isnat(responded_at) & ~response_breached,
+                     response_target - response_minutes, np.nan),
+            np.where(resolve_running & ~resolve_breached, resolve_target - resolve_minutes, np.nan),
+        )
+        due_at = np.full(len(tickets), np.datetime64('NaT'), dtype='datetime64[s]')
+        for spec in set(specs[~np.isnan(left)].tolist()):
+            mask = (specs == spec) & ~np.isnan(left)
+            calendar = self._calendar(spec, calendars)
+            due_at[mask] = calendar.wall_time(calendar.cumulative_minutes(np.array([now])) + left[mask])
+        due_at = due_at.tolist()
+
+        results = []
+        for target, response, resolve, response_b, resolve_b, due in zip(
+                ticket_targets, response_minutes.tolist(), resolve_minutes.tolist(),
+                response_breached.tolist(), resolve_breached.tolist(), due_at):
+            results.append({
+                'sla_id': target.sla_id,
+                'sla_response_business_minutes': None if np.isnan(response) else int(round(response)),
+                'sla_resolve_business_hours': None if np.isnan(resolve) else round(resolve / 60.0, 2),
+                'sla_response_breached': response_b,
+                'sla_resolve_breached': resolve_b,
+                'is_overdue': response_b or resolve_b,
+                'sla_due_at': due,
+            })
+        return results
+
+    def due_before(self, horizon):
+        """Criterion for tickets whose SLA can breach before `horizon` (or never evaluated)."""
+        return db.or_(Ticket.sla_due_at.is_(None), Ticket.sla_due_at <= horizon)
+
+    def recompute(self, *criteria, now=None, chunk_size=RECOMPUTE_CHUNK_SIZE):
+        """
+        Re-evaluate stored tickets matching `criteria` and write the SLA fields.
+        The caller commits.
+
+        Returns:
+            (tickets updated, creation days whose is_overdue changed)
+        """
+        T = Ticket.__table__
+        query = db.select(
+            T.c.id, T.c.created_at, T.c.customer_id, T.c.status_id, T.c.priority_id,
+            T.c.response_time_minutes, T.c.resolve_time_hours, T.c.is_overdue
+        ).where(*criteria).order_by(T.c.created_at, T.c.id)
+        update = T.update().where(
+            T.c.id == db.bindparam('b_id'), T.c.created_at == db.bindparam('b_created_at')
+        ).values({name: db.bindparam(name) for name in SLA_FIELDS})
+
+        targets = self.load_targets()
+        calendars = {}
+        updated, changed_days = 0, set()
+        last = None
+        while True:
+            # Keyset chunks on (created_at, id): the updates run between the reads
+            page = query if last is None else query.where(db.tuple_(T.c.created_at, T.c.id) > last)
+            chunk = db.session.execute(page.limit(chunk_size)).all()
+            if not chunk:
+                break
+            last = (chunk[-1].created_at, chunk[-1].id)
+            evaluated = self.evaluate([{
+                **r._mapping,
+                'status': ticket_dimensions.decode('status', r.status_id),
+                'priority': ticket_dimensions.decode('priority', r.priority_id),
+            } for r in chunk], now, targets, calendars)
+            params = []
+            for r, fields in zip(chunk, evaluated):
+                params.append({'b_id': r.id, 'b_created_at': r.created_at, **fields})
+                if bool(r.is_overdue) != fields['is_overdue']:
+                    changed_days.add(r.created_at.date())
+            db.session.execute(update, params)
+            updated += len(params)
+        return updated, changed_days
+
+
+sla_engine = SLAEngine()
@@ -7,6 +7,12 @@ import json
 import time
 from datetime import datetime, timedelta
 from models.ticket import db, Ticket, Customer, Engineer
+from models.data_version import DataVersion
+from services.analytics_engine import analytics_engine
+from services.rollup_service import rollup_service
+from services.partition_service import ensure_partitions, is_partitioned
+from services.sla_engine import sla_engine, OPEN_STATUSES
+from services.dimensions import ticket_dimensions
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy import create_engine, text
 import urllib.parse
@@ -128,35 +134,56 @@ def parse_time_elapsed(val):
         return 0
 
 
-def upsert_ticket(ticket_data):
+def upsert_ticket(ticket_data, moved_from=()):
     """
     Insert or update a ticket using PostgreSQL upsert.
-    Returns True if successful.
+    `ticket_data` carries dimension keys (see TicketDimensions.encode).
+
+    created_at is part of the primary key: `moved_from` are the other created_at
+    values the ticket is stored under (see stored_created_ats); those rows are
+    deleted in the same transaction instead of leaving a duplicate behind.
     """
-    stmt = pg_insert(Ticket).values(ticket_data)
+    if moved_from:
+        Ticket.query.filter(Ticket.id == ticket_data['id'], Ticket.created_at.in_(moved_from))\
+            .delete(synchronize_session=False)
+
+    stmt = pg_insert(Ticket).values({**ticket_data, 'synced_at': datetime.utcnow()})
     stmt = stmt.on_conflict_do_update(
-        index_elements=['id'],
+        index_elements=['id', 'created_at'],  # primary key of the partitioned table
         set_={
             'title': stmt.excluded.title,
             'description': stmt.excluded.description,
             'customer_id': stmt.excluded.customer_id,
-            'customer_name': stmt.excluded.customer_name,
             'engineer_id': stmt.excluded.engineer_id,
-            'engineer_name': stmt.excluded.engineer_name,
-            'status': stmt.excluded.status,
-            'priority': stmt.excluded.priority,
-            'category': stmt.excluded.category,
-            'request_type': stmt.excluded.request_type,
+            'status_id': stmt.excluded.status_id,
+            'priority_id': stmt.excluded.priority_id,
+            'category_id': stmt.excluded.category_id,
+            'request_type_id': stmt.excluded.request_type_id,
             'is_service_request': stmt.excluded.is_service_request,
             'response_time_minutes': stmt.excluded.response_time_minutes,
             'resolve_time_hours': stmt.excluded.resolve_time_hours,
             'time_elapsed_minutes': stmt.excluded.time_elapsed_minutes,
             'is_overdue': stmt.excluded.is_overdue,
+            'sla_id': stmt.excluded.sla_id,
+            'sla_response_business_minutes': stmt.excluded.sla_response_business_minutes,
+            'sla_resolve_business_hours': stmt.excluded.sla_resolve_business_hours,
+            'sla_response_breached': stmt.excluded.sla_response_breached,
+            'sla_resolve_breached': stmt.excluded.sla_resolve_breached,
+            'sla_due_at': stmt.excluded.sla_due_at,
+            'synced_at': stmt.excluded.synced_at,
         }
     )
     db.session.execute(stmt)
 
 
+def stored_created_ats(ticket_ids):
+    """id -> created_at values stored for the already synced tickets among `ticket_ids` (one query)."""
+    stored = {}
+    for ticket_id, created_at in db.session.query(Ticket.id, Ticket.created_at).filter(Ticket.id.in_(ticket_ids)):
+        stored.setdefault(ticket_id, []).append(created_at)
+    return stored
+
+
 def fetch_from_sql(app, limit=500):
     """
     Fetches ticket data directly from SDP MSSQL database using the user's optimized query.
@@ -197,6 +224,8 @@ def fetch_from_sql(app, limit=500):
                 wo.CREATEDTIME          AS [created_at_ms],
                 wo.DUEBYTIME            AS [due_by_ms],
                 wo.COMPLETEDTIME        AS [completed_at_ms],
+                wo.RESPONDEDTIME        AS [responded_at_ms],
+                wo.RESOLVEDTIME         AS [resolved_at_ms],
 
                 /* Accurate Timespent Calculation (minutes) */
                 (
@@ -237,8 +266,10 @@ def fetch_from_sql(app, limit=500):
                     'created_time': {'value': row.created_at_ms},
                     'due_by_time': {'value': row.due_by_ms},
                     'completed_time': {'value': row.completed_at_ms},
-                    'time_elapsed': {'value': int(math.floor(float(row.timespent_minutes) + 0.5)) if row.timespent_minutes is not None else 0},
-                    'is_overdue': False # Hard to get from this query alone without complex logic
+                    'responded_time': {'value': row.responded_at_ms},
+                    'resolved_time': {'value': row.resolved_at_ms},
+                    'time_elapsed': {'value': int(math.floor(float(row.timespent_minutes) + 0.5)) if row.timespent_minutes is not None else 0}
+                    # SLA status is computed by the sla_engine from these timestamps
                 })
             return tickets
     except Exception as e:
@@ -264,15 +295,27 @@ def sync_tickets(app):
             print("No data fetched from any source.")
             return {'success': False, 'error': 'No data'}
         
+        # Monthly partitions for the current and upcoming months must exist before upserting
+        connection = db.session.connection()
+        if is_partitioned(connection):
+            created = ensure_partitions(connection, months_ahead=app.config.get('TICKET_PARTITION_MONTHS_AHEAD', 3))
+            if created:
+                print(f"Created ticket partitions: {', '.join(created)}")
+
         unique_customers = {}
         unique_engineers = {}
+        touched_days = set()  # creation days whose daily rollups must be rebuilt
+        batch = []
         synced_count = 0
         error_count = 0
+        stored = stored_created_ats({str(sdp_t.get('id')) for sdp_t in sdp_tickets})
         
         for sdp_t in sdp_tickets:
             try:
                 created_ms = get_val(sdp_t, ['created_time', 'value'])
-                created_at = datetime.fromtimestamp(float(created_ms) / 1000.0) if created_ms else datetime.now()
+                # created_at is part of the primary key: without a source value keep the stored one
+                created_at = datetime.fromtimestamp(float(created_ms) / 1000.0) if created_ms \
+                    else min(stored.get(str(sdp_t.get('id')), ()), default=None) or datetime.now()
 
                 cust_id = str(get_val(sdp_t, ['account', 'id'], 'N/A'))
                 cust_name = get_val(sdp_t, ['account', 'name'], 'General')
@@ -325,12 +368,6 @@ def sync_tickets(app):
                     time_elapsed_raw = sdp_t.get('time_elapsed')
                 time_elapsed = parse_time_elapsed(time_elapsed_raw)
 
-                # Get is_overdue from ManageEngine (determines SLA status)
-                is_overdue = sdp_t.get('is_overdue', False)
-                # Handle case where it might be a string "true"/"false"
-                if isinstance(is_overdue, str):
-                    is_overdue = is_overdue.lower() == 'true'
-
                 # Heuristic Classification for 'Others'
                 req_type_obj = sdp_t.get('request_type')
                 req_type = req_type_obj.get('name') if isinstance(req_type_obj, dict) else 'Others'
@@ -367,9 +404,7 @@ def sync_tickets(app):
                     'title': sdp_t.get('subject', 'No Subject')[:500],
                     'description': sdp_t.get('description', 'No description provided.'),
                     'customer_id': cust_id,
-                    'customer_name': cust_name,
                     'engineer_id': eng_id,
-                    'engineer_name': eng_name,
                     'status': status,
                     'priority': get_val(sdp_t, ['priority', 'name'], 'Medium'),
                     'category': category,
@@ -378,16 +413,13 @@ def sync_tickets(app):
                     'created_at': created_at,
                     'response_time_minutes': response_time,
                     'resolve_time_hours': resolve_time,
-                    'time_elapsed_minutes': time_elapsed,
-                    'is_overdue': is_overdue
+                    'time_elapsed_minutes': time_elapsed
                 }
+                batch.append(ticket_data)
                 
-                upsert_ticket(ticket_data)
-                synced_count += 1
-                
-                # Collect unique customers/engineers
-                if cust_id != 'N/A':
-                    unique_customers[cust_id] = cust_name
+                # Collect unique customers/engineers (the names' dimension tables);
+                # 'Unassigned' stays out of the engineers list and is labelled by its id
+                unique_customers[cust_id] = cust_name
                 if eng_id != 'Unassigned':
                     unique_engineers[eng_id] = eng_name
                     
@@ -395,6 +427,31 @@ def sync_tickets(app):
                 error_count += 1
                 if error_count <= 3:
                     print(f"Error processing ticket: {e}")
+
+        # Business-hours SLA of the whole batch (vectorized), stored with the upsert.
+        # Status, priority, ... are stored as dimension keys (new names get keys in bulk).
+        for ticket_data, sla in zip(ticket_dimensions.encode(batch), sla_engine.evaluate(batch)):
+            try:
+                moved_from = [created_at for created_at in stored.get(ticket_data['id'], ())
+                              if created_at != ticket_data['created_at']]
+                upsert_ticket({**ticket_data, **sla}, moved_from)
+                touched_days.add(ticket_data['created_at'].date())
+                touched_days.update(created_at.date() for created_at in moved_from)
+                synced_count += 1
+            except Exception as e:
+                error_count += 1
+                if error_count <= 3:
+                    print(f"Error upserting ticket: {e}")
+
+        # Tickets still open breach as time passes even when the source did not change them;
+        # only those whose SLA can pass before the next sync need re-evaluating now
+        horizon = datetime.now() + timedelta(seconds=app.config.get('SYNC_INTERVAL_SECONDS', 300))
+        _, changed_days = sla_engine.recompute(
+            Ticket.status_id.in_(ticket_dimensions.status.keys_of(OPEN_STATUSES)),
+            Ticket.sla_resolve_breached.isnot(True),
+            sla_engine.due_before(horizon)
+        )
+        touched_days |= changed_days
         
         # Upsert customers
         for cid, cname in unique_customers.items():
@@ -420,7 +477,19 @@ def sync_tickets(app):
             except:
                 pass
         
+        # Rebuild daily rollups (counts + percentile digests) of the days this batch touched
+        rollup_service.refresh_days(touched_days)
+
+        # Invalidate version-keyed caches (forecasts, ...) in every worker
+        DataVersion.bump('tickets')
         db.session.commit()
+
+        # Pull the rows this sync touched into the in-memory engine right away
+        if app.config.get('ANALYTICS_ENGINE_ENABLED', False):
+            try:
+                analytics_engine.refresh()
+            except Exception as e:
+                print(f"Analytics engine refresh failed: {e}")
         
         result = {
             'success': True,
@@ -0,0 +1,128 @@
+"""
+Time Spent Rollup
+Maintains models.time_spent.TechTimeSpentRollup and answers the time spent
+summaries (per technician, category and group, and the overall stats) from it.
+
+Distinct ticket counts are merged from the per-row HyperLogLog of request ids,
+so the endpoints read one row per (technician, group, category) however many
+entries have been synced. The exact count(distinct) queries stay in the routes
+behind ?exact=true for audits.
+"""
+from collections import defaultdict
+from models.ticket import db
+from models.time_spent import TechTimeSpent, TechTimeSpentRollup
+from services.sketch import HyperLogLog, merge_hll
+
+
+def new_group():
+    return {'entry_count': 0, 'total_minutes': 0, 'request_hlls': [], 'technicians': set()}
+
+
+def add_rollup_row(g, r):
+    g['entry_count'] += r.entry_count
+    g['total_minutes'] += r.minutes_sum
+    g['request_hlls'].append(r.request_hll)
+    if r.technician:
+        g['technicians'].add(r.technician)
+
+
+def group_result(g):
+    """Totals of a group, with the field names of the exact SQL rows."""
+    return {
+        'ticket_count': merge_hll(g['request_hlls']).estimate(),
+        'entry_count': g['entry_count'],
+        'total_minutes': g['total_minutes'],
+        'technician_count': len(g['technicians']),
+    }
+
+
+class TimeSpentRollupService:
+    def refresh(self):
+        """
+        Rebuild the rollup from tech_time_spent. Entries carry no work date and an
+        upsert can move one to another technician, so the whole rollup is rebuilt
+        (once per sync instead of on every request). The caller commits.
+
+        Returns:
+            number of rollup rows written
+        """
+        rows = db.session.query(
+            TechTimeSpent.technician,
+            TechTimeSpent.group_name,
+            TechTimeSpent.category,
+            TechTimeSpent.request_id,
+            db.func.count(TechTimeSpent.id).label('entry_count'),
+            db.func.coalesce(db.func.sum(TechTimeSpent.time_spent_minutes), 0).label('minutes_sum'),
+            db.func.max(TechTimeSpent.synced_at).label('last_synced_at')
+        ).group_by(
+            TechTimeSpent.technician, TechTimeSpent.group_name, TechTimeSpent.category, TechTimeSpent.request_id
+        ).all()
+
+        groups = defaultdict(lambda: {'entry_count': 0, 'minutes_sum': 0, 'request_ids': [], 'last_synced_at': None})
+        for r in rows:
+            g = groups[(r.technician or '', r.group_name or '', r.category or '')]
+            g['entry_count'] += r.entry_count
+            g['minutes_sum'] += int(r.minutes_sum)
+            g['request_ids'].append(r.request_id)
+            if r.last_synced_at and (g['last_synced_at'] is None or r.last_synced_at > g['last_synced_at']):
+                g['last_synced_at'] = r.last_synced_at
+
+        TechTimeSpentRollup.query.delete(synchronize_session=False)
+        mappings = [{
+            'technician': technician,
+            'group_name': group_name,
+            'category': category,
+            'entry_count': g['entry_count'],
+            'minutes_sum': g['minutes_sum'],
+            'request_hll': HyperLogLog.from_values(g['request_ids']).to_bytes(),
+            'last_synced_at': g['last_synced_at'],
+        } for (technician, group_name, category), g in groups.items()]
+        if mappings:
+            db.session.execute(TechTimeSpentRollup.__table__.insert(), mappings)
+        return len(mappings)
+
+    @staticmethod
+    def _grouped(key, *filters):
+        """{key value: group} over the rollup rows, `key` a function of a rollup row."""
+        query = db.session.query(
+            TechTimeSpentRollup.technician,
+            TechTimeSpentRollup.group_name,
+            TechTimeSpentRollup.category,
+            TechTimeSpentRollup.entry_count,
+            TechTimeSpentRollup.minutes_sum,
+            TechTimeSpentRollup.request_hll
+        ).filter(*filters)
+        groups = defaultdict(new_group)
+        for r in query:
+            add_rollup_row(groups[key(r)], r)
+        return groups
+
+    @staticmethod
+    def _sorted(rows):
+        return sorted(rows, key=lambda row: -row['total_minutes'])
+
+    def summary(self, group=None):
+        """Per (technician, group): distinct tickets, entries and minutes, most minutes first."""
+        filters = [TechTimeSpentRollup.technician != '']
+        if group:
+            filters.append(TechTimeSpentRollup.group_name.ilike(f'%{group}%'))
+        groups = self._grouped(lambda r: (r.technician, r.group_name), *filters)
+        return self._sorted({
+            'technician': technician, 'group_name': group_name or None, **group_result(g)
+        } for (technician, group_name), g in groups.items())
+
+    def by_category(self):
+        groups = self._grouped(lambda r: r.category, TechTimeSpentRollup.category != '')
+        return self._sorted({'category': category, **group_result(g)} for category, g in groups.items())
+
+    def by_group(self):
+        groups = self._grouped(lambda r: r.group_name, TechTimeSpentRollup.group_name != '')
+        return self._sorted({'group_name': group_name, **group_result(g)} for group_name, g in groups.items())
+
+    def stats(self):
+        g = self._grouped(lambda r: None).get(None) or new_group()
+        last_sync = db.session.query(db.func.max(TechTimeSpentRollup.last_synced_at)).scalar()
+        return {**group_result(g), 'last_sync': last_sync}
+
+
+time_spent_rollup = TimeSpentRollupService()
@@ -11,6 +11,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from models.ticket import db
 from models.time_spent import TechTimeSpent
+from services.time_spent_rollup import time_spent_rollup
 
 logger = logging.getLogger(__name__)
 
@@ -176,6 +177,8 @@ class TimeSpentSyncService:
                     if error_count <= 5:
                         logger.error(f"Error processing record: {e}")
             
+            # Summaries read the rollup; rebuild it in the same transaction
+            time_spent_rollup.refresh()
             db.session.commit()
             
             result = {
@@ -0,0 +1,118 @@
+"""
+Workload Service
+Rolling 1/7/30-day ticket counts and effort (time_elapsed) per engineer, read
+from the daily rollups in one grouped query, with overload flags against
+Config.OVERLOAD_TICKETS_PER_DAY / OVERLOAD_EFFORT_HOURS_PER_DAY.
+
+Windows are whole days ending today (the 7d window is today and the six days
+before). Results are cached per `tickets` data version and day.
+"""
+import threading
+from datetime import date, timedelta
+from flask import current_app
+from models.ticket import db, Engineer
+from models.rollup import TicketDailyRollup
+from models.data_version import DataVersion
+
+WINDOWS = (1, 7, 30)
+
+
+def window_load(tickets, effort_minutes, days, tickets_per_day, effort_hours_per_day):
+    """Per-day rates of one window and whether either exceeds its threshold."""
+    rate = tickets / days
+    effort_rate = effort_minutes / 60.0 / days
+    return {
+        "tickets": tickets,
+        "effort_hours": round(effort_minutes / 60.0, 1),
+        "tickets_per_day": round(rate, 1),
+        "effort_hours_per_day": round(effort_rate, 1),
+        "overloaded": rate > tickets_per_day or effort_rate > effort_hours_per_day,
+    }
+
+
+class WorkloadService:
+
+    def __init__(self):
+        self._cache_key = None
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def thresholds(self):
+        config = current_app.config
+        return {
+            "tickets_per_day": config.get('OVERLOAD_TICKETS_PER_DAY', 15),
+            "effort_hours_per_day": config.get('OVERLOAD_EFFORT_HOURS_PER_DAY', 8),
+        }
+
+    def team(self, today=None):
+        """
+        Workload of every engineer (known engineers without tickets included),
+        most loaded (7d tickets) first.
+        """
+        today = today or date.today()
+        key = (DataVersion.current('tickets'), today)
+        with self._lock:
+            if key == self._cache_key:
+                return self._cache
+
+        result = self._compute(today)
+        with self._lock:
+            self._cache_key, self._cache = key, result
+        return result
+
+    def engineer(self, engineer_id, today=None):
+        """Workload entry of one engineer, or None if unknown and without tickets."""
+        for entry in self.team(today)['engineers']:
+            if entry['engineer_id'] == engineer_id:
+                return entry
+        return None
+
+    def _compute(self, today):
+        R = TicketDailyRollup
+        longest = max(WINDOWS)
+        columns = []
+        for days in WINDOWS:
+            in_window = R.day >= today - timedelta(days=days - 1)
+            columns.append(db.func.sum(db.case((in_window, R.ticket_count), else_=0)).label(f'tickets_{days}'))
+            columns.append(db.func.sum(db.case((in_window, R.effort_minutes_sum), else_=0)).label(f'effort_{days}'))
+
+        load = db.session.query(
+            R.engineer_id, db.func.max(R.engineer_name).label('engineer_name'), *columns
+        ).filter(
+            R.day >= today - timedelta(days=longest - 1), R.day <= today,
+            R.engineer_id.notin_(['', 'Unassigned'])
+        ).group_by(R.engineer_id).subquery()
+
+        # One statement: rollup sums joined with the engineer list (idle engineers show as 0)
+        rows = db.session.query(
+            db.func.coalesce(load.c.engineer_id, Engineer.id).label('engineer_id'),
+            db.func.coalesce(Engineer.name, load.c.engineer_name).label('engineer_name'),
+            *[load.c[c.key] for c in columns]
+        ).select_from(load).join(Engineer, Engineer.id == load.c.engineer_id, full=True).all()
+
+        thresholds = self.thresholds()
+        engineers = []
+        for r in rows:
+            windows = {
+                f"{days}d": window_load(
+                    int(getattr(r, f'tickets_{days}') or 0), int(getattr(r, f'effort_{days}') or 0), days,
+                    thresholds['tickets_per_day'], thresholds['effort_hours_per_day']
+                ) for days in WINDOWS
+            }
+            engineers.append({
+                "engineer_id": r.engineer_id,
+                "engineer_name": r.engineer_name,
+                "windows": windows,
+                "overloaded": any(w['overloaded'] for w in windows.values()),
+            })
+        engineers.sort(key=lambda e: (-e['windows']['7d']['tickets'], e['engineer_name'] or ''))
+
+        return {
+            "as_of": today.isoformat(),
+            "thresholds": thresholds,
+            "overloaded_count": sum(1 for e in engineers if e['overloaded']),
+            "engineers": engineers,
+        }
+
+
+workload_service = WorkloadService()
@@ -0,0 +1,83 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
+from models.ticket import db
+from services.alarm_dedup import AlarmDedupCache
+
+NOW = datetime(2026, 10, 20, 12, 0)
+
+# Changes apply when the session commits; flush() fails here (no alarm table)
+app = Flask(__name__)
+app.config.update(ALARM_DEDUP_CACHE_SIZE=2, ALARM_DEDUP_TTL_SECONDS=60, SQLALCHEMY_DATABASE_URI='sqlite://')
+db.init_app(app)
+
+
+def alert(fingerprint, status='firing'):
+    return {'fingerprint': fingerprint, 'status': status}
+
+
+def test_repeats_are_counted_in_memory():
+    cache = AlarmDedupCache()
+    with app.app_context():
+        cache.put('f1', 'ALM-0001', 'open')
+        cache.put('f2', 'ALM-0002', 'resolved')
+        rest, firing = cache.absorb([alert('f1'), alert('f2', 'resolved'), alert('f1'), alert('f3')], NOW)
+        assert rest == [alert('f3')] and firing == 2
+        cache.absorb([alert('f1')], NOW + timedelta(minutes=1))
+        assert cache.pending == {}
+        db.session.commit()
+        assert cache.pending == {'ALM-0001': [3, NOW + timedelta(minutes=1)]}
+
+
+def test_status_changes_take_the_regular_path():
+    cache = AlarmDedupCache()
+    with app.app_context():
+        cache.put('f1', 'ALM-0001', 'in_progress')
+        cache.put('f2', 'ALM-0002', 'open', flapping=True)
+        batch = [alert('f1'), alert('f1', 'resolved'), alert('f2')]
+        assert cache.absorb(batch, NOW) == (batch, 0)
+        assert cache.pending == {}
+
+
+def test_lru_eviction_and_forget():
+    cache = AlarmDedupCache()
+    with app.app_context():
+        cache.put('f1', 'ALM-0001', 'open')
+        cache.put('f2', 'ALM-0002', 'open')
+        assert cache.get('f1')
+        cache.put('f3', 'ALM-0003', 'open')
+        assert cache.get('f2') is None and cache.get('f1') and cache.get('f3')
+        cache.forget('f1')
+        assert cache.get('f1') is None
+
+
+def test_rolled_back_batch_changes_nothing_and_its_retry_counts_once():
+    cache = AlarmDedupCache()
+    with app.app_context():
+        cache.put('f1', 'ALM-0001', 'open')
+        cache.pending = {'ALM-0009': [2, NOW]}
+
+        # The batch caches a new alarm, absorbs re-sends and writes the pending counts, then rolls back
+        cache.put_on_commit('f2', 'ALM-0002', 'open')
+        cache.absorb([alert('f1'), alert('f1')], NOW)
+        with pytest.raises(SQLAlchemyError):
+            cache.flush(NOW, force=True)
+        db.session.rollback()
+        assert cache.get('f2') is None
+        assert cache.pending == {'ALM-0009': [2, NOW]}
+
+        # Retried payload by payload
+        cache.absorb([alert('f1')], NOW)
+        db.session.commit()
+        cache.absorb([alert('f1')], NOW + timedelta(seconds=1))
+        cache.put_on_commit('f2', 'ALM-0002', 'open')
+        db.session.commit()
+        assert cache.get('f2').alarm_id == 'ALM-0002'
+        assert cache.pending == {'ALM-0009': [2, NOW], 'ALM-0001': [2, NOW + timedelta(seconds=1)]}
@@ -0,0 +1,115 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from services.alarm_ingest import alarm_ingest, finish_new_alarm, new_alarm_row, parse_fired_at
+from services.flap_detector import flap_detector
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def test_parse_fired_at():
+    assert parse_fired_at({'startsAt': '2026-10-19T10:00:00Z'}, NOW) == datetime(2026, 10, 19, 10, tzinfo=timezone.utc)
+    assert parse_fired_at({}, NOW) is None
+    assert parse_fired_at({'startsAt': 'yesterday'}, NOW) == NOW
+
+
+def test_new_alarm_row_from_labels_and_annotations():
+    row = new_alarm_row({
+        'labels': {'alertname': 'NodeDown', 'host': 'db01', 'job': 'node'},
+        'annotations': {'summary': 'Node is down'},
+    }, 'fp1', NOW)
+    assert row['external_id'] == 'fp1'
+    assert row['alertname'] == 'NodeDown'
+    assert row['target'] == 'db01' and row['instance'] is None
+    assert row['note'] == 'Node is down'
+    assert (row['status'], row['occurrence_count'], row['last_occurrence']) == ('open', 1, NOW)
+
+
+# ---- batched state machine (AlarmIngestService._apply), against an in-memory "table" ----
+
+app = Flask(__name__)
+
+
+@pytest.fixture(autouse=True)
+def fresh_flap_states():
+    flap_detector.states.clear()
+    with app.app_context():
+        yield
+    flap_detector.states.clear()
+
+
+def alert(fingerprint, status='firing'):
+    return {'fingerprint': fingerprint, 'status': status, 'labels': {'alertname': 'NodeDown', 'severity': 'critical'}}
+
+
+def lookup(table, alerts):
+    """States of the stored alarms of a batch, like AlarmIngestService._lookup."""
+    return {fp: {'id': row['id'], 'alarm_id': row['alarm_id'], 'status': row['status'], 'occurrences': 0,
+                 'last_occurrence': None, 'resolved_at': None, 'flapping': row['flapping'], 'changed': False,
+                 'before': {}}
+            for fp, row in table.items() if fp in {a['fingerprint'] for a in alerts}}
+
+
+def ingest(table, alerts):
+    """Apply one batch and write it back to `table`. Returns (created, updated, suppressed, history actions)."""
+    states = lookup(table, alerts)
+    history = []
+    new_alarms, created, updated, suppressed = alarm_ingest._apply(alerts, states, history, NOW)
+    for state in new_alarms:
+        finish_new_alarm(state, f'ALM-{len(table) + 1:04d}')
+        row = state['row']
+        table[row['external_id']] = {'id': len(table) + 1, 'alarm_id': row['alarm_id'], 'status': row['status'],
+                                     'occurrence_count': row['occurrence_count'], 'flapping': row['flapping']}
+    for fp, state in states.items():
+        if state['changed'] and state.get('row') is None:
+            table[fp].update(status=state['status'], flapping=state['flapping'])
+            table[fp]['occurrence_count'] += state['occurrences']
+    return created, updated, suppressed, [(state['alarm_id'], row['action']) for state, row in history]
+
+
+def test_duplicate_fingerprints_in_one_payload_make_one_alarm():
+    table = {}
+    assert ingest(table, [alert('a'), alert('a'), alert('a')]) == (1, 2, 0, [('ALM-0001', 'created')])
+    assert table['a']['occurrence_count'] == 3 and table['a']['status'] == 'open'
+
+
+def test_firing_after_resolve_reopens_the_alarm():
+    table = {}
+    ingest(table, [alert('a')])
+    assert ingest(table, [alert('a', 'resolved')]) == (0, 1, 0, [('ALM-0001', 'resolved')])
+    assert ingest(table, [alert('a')]) == (0, 1, 0, [('ALM-0001', 'reopened')])
+    assert (table['a']['status'], table['a']['occurrence_count']) == ('open', 2)
+
+
+def test_resolve_of_an_unknown_fingerprint_is_ignored():
+    table = {}
+    assert ingest(table, [alert('x', 'resolved')]) == (0, 0, 0, [])
+    assert table == {}
+
+
+def test_batched_counts_equal_applying_the_alerts_one_by_one():
+    alerts = [alert('a'), alert('a'), alert('b', 'resolved'), alert('a', 'resolved'), alert('c'),
+              alert('a'), alert('c', 'resolved'), alert('c', 'resolved'), alert('b'), alert('a')]
+    batched = {}
+    created, updated, suppressed, history = ingest(batched, alerts)
+
+    flap_detector.states.clear()
+    one_by_one = {}
+    totals = [0, 0, 0]
+    history_one_by_one = []
+    for a in alerts:
+        *counts, actions = ingest(one_by_one, [a])
+        totals = [t + c for t, c in zip(totals, counts)]
+        history_one_by_one += actions
+
+    assert [created, updated, suppressed] == totals == [3, 5, 0]
+    assert history == history_one_by_one
+    assert {fp: (r['alarm_id'], r['status'], r['occurrence_count']) for fp, r in batched.items()} == \
+        {fp: (r['alarm_id'], r['status'], r['occurrence_count']) for fp, r in one_by_one.items()}
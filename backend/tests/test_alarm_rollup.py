@@ -0,0 +1,51 @@
+import os
+import sys
+from datetime import date, datetime
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.alarm_rollup import contribution, group_result, rollup_deltas
+
+CREATED = datetime(2026, 10, 19, 14, 25)
+
+
+def alarm(**changes):
+    return {'created_at': CREATED, 'customer_id': 'C1', 'customer_name': 'Acme', 'ci_id': None,
+            'severity': 'critical', 'source': 'alertmanager', 'status': 'open',
+            'acknowledged_at': None, 'resolved_at': None, **changes}
+
+
+def test_contribution_buckets_by_creation_hour_and_current_status():
+    hourly, daily, counters = contribution(alarm(status='resolved', acknowledged_at=datetime(2026, 10, 19, 14, 30),
+                                                 resolved_at=datetime(2026, 10, 19, 15, 25)))
+    assert hourly == (datetime(2026, 10, 19, 14), 'C1', '', 'critical', 'alertmanager', 'resolved')
+    assert daily == (date(2026, 10, 19), 'C1', 'critical', 'alertmanager', 'resolved')
+    assert counters == {'alarm_count': 1, 'acknowledged_count': 1, 'ack_seconds_sum': 300.0,
+                        'resolved_count': 1, 'resolve_seconds_sum': 3600.0}
+    # A reopened alarm keeps its old resolved_at but is not resolved
+    assert contribution(alarm(resolved_at=datetime(2026, 10, 19, 15)))[2]['resolved_count'] == 0
+    assert contribution(alarm(created_at=None)) is None
+
+
+def test_deltas_move_an_alarm_between_status_rows():
+    before = alarm()
+    after = alarm(status='in_progress', acknowledged_at=datetime(2026, 10, 19, 14, 35))
+    hourly, daily, names = rollup_deltas([(before, after)])
+    assert hourly[(datetime(2026, 10, 19, 14), 'C1', '', 'critical', 'alertmanager', 'open')]['alarm_count'] == -1
+    moved = hourly[(datetime(2026, 10, 19, 14), 'C1', '', 'critical', 'alertmanager', 'in_progress')]
+    assert (moved['alarm_count'], moved['acknowledged_count'], moved['ack_seconds_sum']) == (1, 1, 600.0)
+    assert len(daily) == 2 and names == {'C1': 'Acme'}
+
+
+def test_unchanged_alarms_and_deletes():
+    assert rollup_deltas([(alarm(), alarm())])[:2] == ({}, {})
+    hourly, daily, _ = rollup_deltas([(alarm(), None), (None, alarm())])
+    assert hourly == {} and daily == {}
+
+
+def test_group_result_averages_in_minutes():
+    result = group_result({'alarm_count': 4, 'acknowledged_count': 2, 'ack_seconds_sum': 900.0,
+                           'resolved_count': 0, 'resolve_seconds_sum': 0})
+    assert result == {'alarm_count': 4, 'acknowledged_count': 2, 'mtta_minutes': 7.5,
+                      'resolved_count': 0, 'mttr_minutes': None}
@@ -0,0 +1,69 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.alarm_actions import Claim, lease_seconds, retry_delay, ticket_request
+from services.alarm_rule_engine import RuleSet, rule_actions
+
+
+def rule(rule_id, pattern=None, severity=None, customer_id=None, ci_type=None, create_ticket=True, webhook=None):
+    return SimpleNamespace(id=rule_id, name=f'rule {rule_id}', alertname_pattern=pattern, severity=severity,
+                           customer_id=customer_id, ci_type=ci_type, create_ticket=create_ticket,
+                           ticket_priority='High', ticket_category=None, assign_to=None, notify_webhook=webhook)
+
+
+RULES = RuleSet([
+    rule(5, 'Down$', severity='critical', customer_id='C1', ci_type='Host'),
+    rule(3, '^Disk', severity='Critical'),
+    rule(4, None, customer_id='C2', create_ticket=False, webhook='https://hooks.example.com/c2'),
+    rule(1, 'Latency', create_ticket=False, webhook='https://hooks.example.com/noc'),
+    rule(2, '(', severity='critical'),  # invalid pattern: skipped
+])
+
+
+def test_candidates_come_from_the_severity_customer_buckets():
+    assert RULES.count == 4
+    assert [r.id for r in RULES.candidates('critical', 'C1')] == [1, 3, 5]
+    assert [r.id for r in RULES.candidates('warning', 'C2')] == [1, 4]
+    assert [r.id for r in RULES.candidates('warning', None)] == [1]
+
+
+def test_match_applies_pattern_and_ci_type():
+    assert [r.id for r in RULES.match('HostDown', 'critical', 'C1', 'host')] == [5]
+    assert RULES.match('HostDown', 'critical', 'C1', 'VM') == []
+    assert [r.id for r in RULES.match('DiskFull', 'CRITICAL', 'C2')] == [3, 4]
+    assert [r.id for r in RULES.match('HighLatency', 'warning', None)] == [1]
+
+
+def test_rule_actions_create_one_ticket_and_one_notification_per_url():
+    matched = RuleSet([
+        rule(1, webhook='https://a'), rule(2, webhook='https://a'), rule(3, webhook='https://b')
+    ]).match('X', 'critical', None)
+    actions = rule_actions('ALM-0001', matched)
+    assert [(a['action'], a['rule_id']) for a in actions] == [
+        ('create_ticket', 1), ('notify_webhook', 1), ('notify_webhook', 3)
+    ]
+    assert actions[0]['params'] == {'rule': 'rule 1', 'ticket_priority': 'High', 'ticket_category': None,
+                                    'assign_to': None}
+
+
+def test_retries_back_off_exponentially_up_to_the_cap():
+    assert [retry_delay(attempts, 30, 3600) for attempts in (1, 2, 3, 4, 8, 20)] == [30, 60, 120, 240, 3600, 3600]
+
+
+def test_ticket_subject_carries_the_alarm_id_for_idempotent_retries():
+    alarm = {'alarm_id': 'ALM-0007', 'severity': 'critical', 'alertname': 'HostDown', 'target': None,
+             'ci_id': None, 'note': None, 'customer_name': None}
+    request = ticket_request(alarm, {'rule': 'r', 'ticket_priority': None, 'assign_to': 'noc@example.com'})
+    assert request['subject'] == '[CRITICAL] HostDown [ALM-0007]'
+    assert request['priority'] == {'name': 'High'}
+    assert request['technician'] == {'email_id': 'noc@example.com'}
+
+
+def test_lease_covers_the_lookup_of_retried_tickets():
+    claims = [Claim(1, 'ALM-1', 'create_ticket', {}, 0, False), Claim(2, 'ALM-2', 'create_ticket', {}, 1, False),
+              Claim(3, 'ALM-3', 'create_ticket', {}, 0, True), Claim(4, 'ALM-3', 'notify_webhook', {}, 2, False)]
+    assert lease_seconds(claims, 10) == 10 * (1 + 2 + 2 + 1 + 1)
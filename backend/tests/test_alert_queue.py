@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import text
+from models.ticket import db
+from models.alarm import AlertQueueEntry
+from routes.alarm_routes import alarm_bp
+from services.alarm_ingest import alarm_ingest
+from services.alert_queue import AlertQueue, QueueFull
+from services.flap_detector import flap_detector
+
+# SQLite stand-in for the queue table (an INTEGER key so ids are assigned); ingestion is faked
+app = Flask(__name__)
+app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', ALERT_QUEUE_WORKERS=1, ALERT_QUEUE_HIGH_WATER_MARK=2,
+                  ALERT_QUEUE_MAX_ATTEMPTS=2)
+db.init_app(app)
+app.register_blueprint(alarm_bp, name='alarm_queue_test')
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    batches = []
+
+    def ingest(alerts, settle=None):
+        batches.append([a['fingerprint'] for a in alerts])
+        if any(a['fingerprint'] == 'bad' for a in alerts):
+            raise ValueError('bad payload')
+        return {}
+
+    monkeypatch.setattr(alarm_ingest, 'ingest', ingest)
+    monkeypatch.setattr(AlertQueue, '_lock_fingerprints', staticmethod(lambda fingerprints: None))
+    monkeypatch.setattr(flap_detector, 'settle_candidates', lambda now: [])
+    with app.app_context():
+        db.session.execute(text('DROP TABLE IF EXISTS alert_queue'))
+        db.session.execute(text('CREATE TABLE alert_queue (id INTEGER PRIMARY KEY, payload JSON NOT NULL, '
+                                'alert_count INTEGER NOT NULL, received_at DATETIME NOT NULL, '
+                                'attempts INTEGER NOT NULL, last_error TEXT)'))
+        db.session.commit()
+        yield AlertQueue(), batches
+
+
+def payload(*fingerprints):
+    return {'alerts': [{'fingerprint': fp} for fp in fingerprints]}
+
+
+def test_drain_once_ingests_a_batch_in_one_transaction(queue):
+    alert_queue, batches = queue
+    for fingerprints in (('a', 'b'), ('c',), ('d',)):
+        alert_queue.enqueue(payload(*fingerprints), 10, 2)
+    assert alert_queue.drain_once(2, 2) == 2
+    assert batches == [['a', 'b', 'c']]
+    assert alert_queue.metrics(2)['depth'] == 1
+    assert alert_queue.drain_once(2, 2) == 1 and alert_queue.drain_once(2, 2) == 0
+
+
+def test_failed_batch_is_retried_payload_by_payload_then_dead_lettered(queue):
+    alert_queue, batches = queue
+    for fingerprint in ('a', 'bad', 'c'):
+        alert_queue.enqueue(payload(fingerprint), 10, 2)
+    assert alert_queue.drain_once(10, 2) == 2
+    assert batches == [['a', 'bad', 'c'], ['a'], ['bad'], ['c']]
+    entry = AlertQueueEntry.query.one()
+    assert (entry.attempts, entry.last_error) == (1, 'bad payload')
+
+    assert alert_queue.drain_once(10, 2) == 0
+    assert alert_queue.drain_once(10, 2) == 0 and len(batches) == 5
+    assert alert_queue.metrics(2)['depth'] == 0 and alert_queue.metrics(2)['dead_letters'] == 1
+
+    assert alert_queue.requeue_dead_letters(2) == 1
+    assert alert_queue.metrics(2)['depth'] == 1
+    alert_queue.drain_once(10, 2)
+    alert_queue.drain_once(10, 2)
+    assert alert_queue.purge_dead_letters(2, ids=[entry.id]) == 1
+    assert AlertQueueEntry.query.count() == 0
+
+
+def test_webhook_answers_503_at_the_high_water_mark_not_counting_dead_letters(queue):
+    alert_queue, _ = queue
+    client = app.test_client()
+    assert [client.post('/api/webhooks/alertmanager', json=payload('a')).status_code for _ in range(2)] == [202, 202]
+    with pytest.raises(QueueFull):
+        alert_queue.enqueue(payload('a'), 2, 2)
+    response = client.post('/api/webhooks/alertmanager', json=payload('a'))
+    assert response.status_code == 503 and response.headers['Retry-After'] == '30'
+
+    AlertQueueEntry.query.update({AlertQueueEntry.attempts: 2})
+    db.session.commit()
+    assert client.post('/api/webhooks/alertmanager', json=payload('a')).status_code == 202
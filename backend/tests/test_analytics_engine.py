@@ -0,0 +1,79 @@
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.analytics_engine import Dictionary, TicketColumnStore
+
+Row = namedtuple('Row', 'id created_at customer_id customer_name engineer_id engineer_name '
+                        'status priority category request_type is_overdue resolve_time_hours')
+Eng = namedtuple('Eng', 'id name group level')
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def make_store():
+    store = TicketColumnStore(capacity=2)  # force growth
+    store.upsert([
+        Row('1', NOW - timedelta(days=1), 'C1', 'Cust 1', 'E1', 'Eng 1', 'Open', 'High', 'Network', 'Incident', False, None),
+        Row('2', NOW - timedelta(days=2), 'C1', 'Cust 1', 'E1', 'Eng 1', 'Closed', None, None, 'Incident', True, 4.0),
+        Row('3', NOW - timedelta(days=40), 'C2', 'Cust 2', 'E2', 'Eng 2', 'Resolved', 'Medium', 'Network', 'Change', False, 2.0),
+        Row('4', NOW - timedelta(hours=3), 'C2', 'Cust 2', 'E1', 'Eng 1', 'In Progress', 'Low', None, 'Incident', None, None),
+    ])
+    return store
+
+
+def test_dictionary_reserves_null():
+    d = Dictionary()
+    assert d.encode(None) == 0
+    assert d.encode('a') == 1 and d.encode('a') == 1
+    assert d.code_of('missing') == -1
+
+
+def test_summary_counts():
+    result = make_store().summary(now=NOW)
+    assert (result['total'], result['open'], result['in_progress'], result['resolved']) == (4, 1, 1, 2)
+    assert result['sla_breached'] == 1
+    assert result['avg_mttr_hours'] == 3.0
+    assert {p['priority']: p['value'] for p in result['priority_distribution']} == {'High': 1, 'Medium': 2, 'Low': 1}
+    assert {c['name']: c['value'] for c in result['category_distribution']} == {'Network': 2, 'Others': 2}
+    assert sum(day['tickets'] for day in result['trend']) == 3
+    assert [c['id'] for c in result['top_customers']] == ['C1', 'C2']
+
+
+def test_summary_engineer_filter():
+    result = make_store().summary('Eng 2', now=NOW)
+    assert result['total'] == 1
+    assert result['technician_performance'][0]['name'] == 'Eng 2'
+    assert make_store().summary('Unknown', now=NOW)['total'] == 0
+
+
+def test_upsert_replaces_existing_row():
+    store = make_store()
+    store.upsert([Row('1', NOW - timedelta(days=1), 'C1', 'Cust 1', 'E1', 'Eng 1', 'Closed', 'High', 'Network', 'Incident', True, 1.0)])
+    assert store.size == 4
+    result = store.summary(now=NOW)
+    assert result['open'] == 0
+    assert result['sla_breached'] == 2
+
+
+def test_customers_period_filter():
+    store = make_store()
+    customers = {c['customer_id']: c for c in store.customers(start=NOW - timedelta(days=30))}
+    assert customers['C1']['total_tickets'] == 2
+    assert customers['C1']['sla_percent'] == 50.0
+    assert customers['C2']['total_tickets'] == 1
+    assert customers['C2']['avg_resolve_hours'] == 0
+    assert {c['customer_id'] for c in store.customers('Eng 2')} == {'C2'}
+
+
+def test_engineers():
+    rows = [Eng('E1', 'Eng 1', 'Support', None), Eng('E9', 'Eng 9', 'Support', None)]
+    engineers = {e['engineer_id']: e for e in make_store().engineers(rows)}
+    assert engineers['E1']['total_tickets'] == 3
+    assert engineers['E1']['customers_supported'] == 2
+    assert engineers['E9'] == {'engineer_id': 'E9', 'engineer_name': 'Eng 9', 'group': 'Support', 'level': None,
+                               'total_tickets': 0, 'sla_percent': 100, 'customers_supported': 0}
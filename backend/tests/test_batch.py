@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from routes.batch_routes import parse_sections
+
+
+def test_parse_sections_defaults_ids_and_params():
+    parsed = parse_sections({"sections": [
+        "summary",
+        {"id": "perf", "section": "customer_performance", "params": {"customer_id": "C1", "period": "90d"}},
+    ]}, max_sections=12)
+    assert parsed == [
+        ("summary", "summary", {}),
+        ("perf", "customer_performance", {"customer_id": "C1", "period": "90d"}),
+    ]
+
+
+@pytest.mark.parametrize("body", [
+    None,
+    {},
+    {"sections": []},
+    {"sections": ["nope"]},
+    {"sections": [{"section": "customers", "params": ["30d"]}]},
+    {"sections": ["summary", "summary"]},
+    {"sections": ["summary", "engineers", "alarm_stats"]},
+])
+def test_parse_sections_rejects_invalid_bodies(body):
+    with pytest.raises(ValueError):
+        parse_sections(body, max_sections=2)
+
+
+def test_concurrent_batches_wait_for_a_slot_instead_of_exhausting_the_pool(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from flask import Flask, jsonify
+    from sqlalchemy import text
+    from models.ticket import db
+    from routes import batch_routes
+
+    # Exporting connection of one batch + two sections: the whole pool
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'batch.db'}",
+                      SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 3, 'max_overflow': 0, 'pool_timeout': 2},
+                      BATCH_MAX_WORKERS=2, BATCH_MAX_CONCURRENT=1)
+    db.init_app(app)
+    app.register_blueprint(batch_routes.batch_bp)
+    monkeypatch.setattr(batch_routes, '_executor', None)
+    monkeypatch.setattr(batch_routes, '_slots', None)
+
+    @app.route('/api/summary', endpoint='get_summary')
+    def summary():
+        db.session.execute(text('SELECT 1'))
+        time.sleep(0.02)
+        return jsonify({'ok': True})
+
+    def post(_):
+        with app.test_client() as client:
+            return client.post('/api/batch', json={'sections': [
+                {'id': str(i), 'section': 'summary'} for i in range(3)
+            ]})
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(post, range(6)))
+    assert [r.status_code for r in responses] == [200] * 6
+    assert all(r.get_json()['results']['2'] == {'status': 200, 'data': {'ok': True}} for r in responses)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ci_resolver import CIIndex, instance_host
+
+
+def build_index():
+    index = CIIndex()
+    index.add('CI-HOST', '10.0.1.15', 'esx01.dc1.example.com', 'ESX01', 'C1', 'Acme')
+    index.add('CI-VM', '10.0.1.20', None, 'web01', 'C1', 'Acme')
+    index.add('CI-NET', '10.0.0.0/16', None, 'DC1 LAN', 'C2', 'Globex')
+    index.add('CI-RACK', '10.0.9.0/24', None, 'Rack 9', 'C3', 'Initech')
+    return index
+
+
+def test_instance_host_strips_port_scheme_and_brackets():
+    assert instance_host('10.0.0.5:9100') == '10.0.0.5'
+    assert instance_host('[fe80::1]:9100') == 'fe80::1'
+    assert instance_host('fe80::1') == 'fe80::1'
+    assert instance_host('https://Web01.example.com:8443/health') == 'web01.example.com'
+    assert instance_host('db01.') == 'db01'
+    assert instance_host('') is None and instance_host(None) is None
+
+
+def test_lookup_by_ip_hostname_and_short_name():
+    index = build_index()
+    assert index.lookup('10.0.1.15:9100').ci_id == 'CI-HOST'
+    assert index.lookup('esx01.dc1.example.com:443').ci_id == 'CI-HOST'
+    assert index.lookup('esx01').ci_id == 'CI-HOST'
+    assert index.lookup('web01.example.com:80') == ('CI-VM', 'C1', 'Acme')
+    assert index.lookup('db99:9100') is None
+
+
+def test_lookup_falls_back_to_the_longest_matching_subnet():
+    index = build_index()
+    assert index.lookup('10.0.9.7:9100').ci_id == 'CI-RACK'
+    assert index.lookup('10.0.200.1').ci_id == 'CI-NET'
+    assert index.lookup('192.168.1.1') is None
+
+
+def test_updating_a_ci_replaces_its_keys():
+    index = build_index()
+    index.add('CI-VM', '10.0.1.21', None, 'web02', 'C1', 'Acme')
+    assert index.lookup('10.0.1.20').ci_id == 'CI-NET'
+    assert index.lookup('web01') is None
+    assert index.lookup('web02:80').ci_id == 'CI-VM'
+    index.remove('CI-VM')
+    assert index.lookup('web02') is None and len(index) == 3
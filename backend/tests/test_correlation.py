@@ -0,0 +1,47 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.correlation_engine import DependencyGraph, correlate
+
+NOW = datetime(2026, 10, 19, 12, 0)
+WINDOW = timedelta(minutes=10)
+
+# vm1, vm2 run on host1; host1 connects to switch1; app1 depends on vm1; vm3 is monitored by host1
+GRAPH = DependencyGraph([
+    ('vm1', 'host1', 'runs_on', 'forward'),
+    ('vm2', 'host1', 'runs_on', 'forward'),
+    ('host1', 'switch1', 'connects_to', 'forward'),
+    ('vm1', 'app1', 'depends_on', 'backward'),
+    ('vm3', 'host1', 'monitored_by', 'forward'),
+])
+
+
+def alarm(alarm_id, ci_id, minutes=0, parent=None):
+    return {'alarm_id': alarm_id, 'ci_id': ci_id, 'at': NOW + timedelta(minutes=minutes), 'parent': parent}
+
+
+def test_graph_walks_dependencies_only():
+    assert GRAPH.ancestors('app1', 4) == {'app1': 0, 'vm1': 1, 'host1': 2, 'switch1': 3}
+    assert GRAPH.ancestors('app1', 1) == {'app1': 0, 'vm1': 1}
+    assert set(GRAPH.descendants('host1', 4)) == {'host1', 'vm1', 'vm2', 'app1'}
+    assert GRAPH.ancestors('vm3', 4) == {'vm3': 0}
+
+
+def test_new_alarms_join_the_most_upstream_open_alarm():
+    stored = [alarm('A1', 'host1'), alarm('A2', 'switch1', 1)]
+    new = [alarm('A3', 'vm1', 2), alarm('A4', 'app1', 3), alarm('A5', 'vm3', 3), alarm('A6', 'vm2', 30)]
+    assert correlate(GRAPH, new, stored, WINDOW, 4) == {}
+    assert [a['parent'] for a in new] == ['A2', 'A2', None, None]
+
+
+def test_upstream_alarm_arriving_late_adopts_roots_and_their_children():
+    stored = [alarm('A1', 'vm1'), alarm('A2', 'app1', parent='A1'), alarm('A3', 'vm2')]
+    new = [alarm('A4', 'vm2', 1), alarm('A5', 'host1', 2), alarm('A6', 'switch1', 3)]
+    adopted = correlate(GRAPH, new, stored, WINDOW, 4)
+    assert [a['parent'] for a in new] == ['A6', 'A6', None]
+    assert adopted == {'A1': 'A6', 'A3': 'A6'}
+    assert {a['alarm_id']: a['parent'] for a in stored} == {'A1': 'A6', 'A2': 'A6', 'A3': 'A6'}
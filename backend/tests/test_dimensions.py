@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.ticket import STATUS_KEYS
+from services.dimensions import TicketDimensions
+
+
+def _loaded(dimensions, field, names):
+    cache = dimensions.fields[field]
+    cache.keys = {name: key for key, name in enumerate(names, start=1)}
+    cache.names = {key: name for name, key in cache.keys.items()}
+
+
+def test_encode_replaces_names_with_keys():
+    dims = TicketDimensions()
+    _loaded(dims, 'status', STATUS_KEYS)
+    _loaded(dims, 'priority', ['High', 'Low'])
+    _loaded(dims, 'category', ['Network'])
+    _loaded(dims, 'request_type', ['Incident'])
+
+    rows = dims.encode([
+        {'id': '1', 'status': 'Closed', 'priority': 'Low', 'category': 'Network', 'request_type': 'Incident'},
+        {'id': '2', 'status': 'Open', 'priority': None, 'category': None, 'request_type': 'Incident'},
+    ])
+    assert rows == [
+        {'id': '1', 'status_id': STATUS_KEYS['Closed'], 'priority_id': 2, 'category_id': 1, 'request_type_id': 1},
+        {'id': '2', 'status_id': STATUS_KEYS['Open'], 'priority_id': None, 'category_id': None, 'request_type_id': 1},
+    ]
+
+
+def test_keys_and_names():
+    dims = TicketDimensions()
+    _loaded(dims, 'status', STATUS_KEYS)
+    assert dims.status.keys_of(['Resolved', 'Closed']) == [3, 4]
+    assert dims.status.key(None) is None
+    assert dims.decode('status', STATUS_KEYS['In Progress']) == 'In Progress'
+    assert dims.decode('status', None) is None
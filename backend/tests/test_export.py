@@ -0,0 +1,42 @@
+import csv
+import io
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.export_service import csv_stream, flatten, iter_dict_chunks, parquet_stream
+
+
+def test_csv_stream_yields_header_then_one_part_per_chunk():
+    chunks = [[('1', 'Sự cố', datetime(2026, 1, 2, 3, 4))], [('2', 'a,b', None)]]
+    parts = list(csv_stream(['id', 'title', 'created_at'], chunks))
+    assert len(parts) == 3
+    assert parts[0].startswith('﻿'.encode('utf-8'))
+    rows = list(csv.reader(io.StringIO(b''.join(parts).decode('utf-8-sig'))))
+    assert rows == [['id', 'title', 'created_at'], ['1', 'Sự cố', '2026-01-02 03:04:00'], ['2', 'a,b', '']]
+
+
+def test_flatten_nested_report_rows():
+    record = {'customer_id': 'C1', 'resolve_hours': {'p50': 1.5, 'p90': 4.0}}
+    assert flatten(record) == {'customer_id': 'C1', 'resolve_hours_p50': 1.5, 'resolve_hours_p90': 4.0}
+
+
+def test_iter_dict_chunks():
+    records = [{'a': i, 'b': -i} for i in range(5)]
+    assert list(iter_dict_chunks(records, ['b', 'a'], chunk_size=2)) == [
+        [(0, 0), (-1, 1)], [(-2, 2), (-3, 3)], [(-4, 4)]
+    ]
+
+
+def test_parquet_stream_row_groups():
+    pq = pytest.importorskip('pyarrow.parquet')
+    chunks = [[('1', 2.5), ('2', None)], [('3', 1.0)]]
+    data = b''.join(parquet_stream(['id', 'hours'], chunks, ['string', 'float']))
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.read().to_pydict() == {'id': ['1', '2', '3'], 'hours': [2.5, None, 1.0]}
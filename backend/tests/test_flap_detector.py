@@ -0,0 +1,67 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.flap_detector import FlapState, alert_time
+
+NOW = datetime(2026, 10, 20, 12, 0)
+WINDOW = timedelta(minutes=10)
+
+
+def flap(state, statuses, start=0):
+    """Alternate `statuses` one minute apart; the changes returned by record()."""
+    return [state.record(status, NOW + timedelta(minutes=start + i), NOW + timedelta(minutes=start + i),
+                         WINDOW, 4, 1)
+            for i, status in enumerate(statuses)]
+
+
+def test_flapping_starts_at_threshold_and_counts_suppressed_changes():
+    state = FlapState('firing')
+    assert flap(state, ['resolved', 'firing', 'resolved', 'firing', 'firing']) == [None, None, None, 'started', None]
+    assert state.flapping and state.flapping_since == NOW + timedelta(minutes=3)
+    flap(state, ['resolved', 'firing'], start=5)
+    assert state.suppressed == 2
+    # Only the last `threshold` changes are kept
+    assert len(state.transitions) == 4
+
+
+def test_flapping_stops_when_the_window_goes_quiet():
+    state = FlapState('firing')
+    flap(state, ['resolved', 'firing', 'resolved', 'firing', 'resolved'])
+    assert state.flapping and state.observed == 'resolved'
+    assert state.evaluate(NOW + timedelta(minutes=12), WINDOW, 4, 1) is None
+    assert state.evaluate(NOW + timedelta(minutes=13, seconds=30), WINDOW, 4, 1) == 'stopped'
+    assert not state.flapping and state.transitions == [NOW + timedelta(minutes=4)]
+
+
+def test_replayed_changes_are_counted_once():
+    state = FlapState('firing')
+    at = NOW - timedelta(minutes=1)
+    state.record('resolved', at, NOW, WINDOW, 4, 1)
+    state.observed = 'firing'
+    state.record('resolved', at, NOW, WINDOW, 4, 1)
+    assert state.transitions == [at]
+
+
+def test_merge_takes_union_and_latest_flag():
+    mine = FlapState('resolved', [NOW, NOW + timedelta(minutes=2)])
+    theirs = FlapState('firing', [NOW + timedelta(minutes=1), NOW + timedelta(minutes=3)], flapping=True,
+                       flapping_since=NOW, flag_changed_at=NOW + timedelta(minutes=3), suppressed=2)
+    mine.merge(theirs, threshold=3)
+    assert mine.transitions == [NOW + timedelta(minutes=m) for m in (1, 2, 3)]
+    assert mine.observed == 'firing' and mine.flapping and mine.suppressed == 2
+    # A stale copy does not undo a later flag change
+    stale = FlapState('resolved', flapping=False, flag_changed_at=NOW)
+    mine.merge(stale, threshold=3)
+    assert mine.flapping
+
+
+def test_alert_time():
+    assert alert_time({'startsAt': '2026-10-20T13:00:00+02:00'}, 'firing', NOW) == datetime(2026, 10, 20, 11, 0)
+    assert alert_time({'endsAt': '2026-10-20T11:30:00Z'}, 'resolved', NOW) == datetime(2026, 10, 20, 11, 30)
+    # Never in the future, `now` when missing
+    assert alert_time({'startsAt': '2026-10-20T13:00:00Z'}, 'firing', NOW) == NOW
+    assert alert_time({}, 'resolved', NOW) == NOW
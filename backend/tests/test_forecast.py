@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.forecast_service import exponential_smoothing, forward_fill, month_index, month_start
+
+
+def test_constant_series_forecasts_constant():
+    fc = exponential_smoothing([[10] * 12], horizon=2)
+    assert np.allclose(fc, 10)
+
+
+def test_rows_are_fitted_independently():
+    fc = exponential_smoothing([[5] * 6, [20] * 6])
+    assert fc.shape == (2, 2)
+    assert np.allclose(fc[0], 5)
+    assert np.allclose(fc[1], 20)
+
+
+def test_upward_trend_is_extrapolated():
+    fc = exponential_smoothing([[10, 20, 30, 40, 50, 60]])
+    assert fc[0, 0] > 60
+    assert fc[0, 1] > fc[0, 0]
+
+
+def test_leading_zeros_are_not_history():
+    fc = exponential_smoothing([[0, 0, 0, 0, 30, 30]])
+    assert np.allclose(fc, 30)
+
+
+def test_seasonal_pattern_is_repeated():
+    season = [10, 10, 10, 10, 10, 40, 10, 10, 10, 10, 10, 10]
+    fc = exponential_smoothing([season * 3], season_length=12, horizon=12)
+    assert np.argmax(fc[0]) == 5
+
+
+def test_forward_fill():
+    filled = forward_fill([[np.nan, 90.0, np.nan, 80.0]], 100.0)
+    assert filled.tolist() == [[100.0, 90.0, 90.0, 80.0]]
+
+
+def test_month_index_roundtrip():
+    idx = month_index(2025, 12)
+    assert month_start(idx + 1).year == 2026
+    assert month_start(idx + 1).month == 1
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.id_allocator import ASSET_SEQUENCES, SEQUENCES
+
+
+def test_ids_keep_the_existing_formats():
+    assert SEQUENCES['alarm'].format(42) == 'ALM-0042'
+    assert SEQUENCES['legacy_alarm'].format(7) == 'ALM-007'
+    assert SEQUENCES['asset_vm'].format(12345) == 'VM-12345'
+    assert SEQUENCES[ASSET_SEQUENCES['vCenter']].format(1) == 'VC-001'
+
+
+def test_every_prefix_has_its_own_sequence():
+    names = [seq.sequence for seq in SEQUENCES.values()]
+    assert len(set(names)) == len(names)
@@ -0,0 +1,89 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.pagination import encode_cursor, decode_cursor, parse_limit
+from services.report_params import (
+    parse_report_range, parse_ticket_search_args, parse_alarm_list_args, parse_fields_arg
+)
+
+
+def test_cursor_roundtrip():
+    created = datetime(2026, 1, 19, 11, 40, 5, 123)
+    cursor = encode_cursor(created, '12345')
+    assert decode_cursor(cursor, (datetime, str)) == [created, '12345']
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2026, 1, 1), 'a/b+c?d')
+    assert all(c.isalnum() or c in '-_' for c in cursor)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor', (datetime, str))
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor('x'), (datetime, str))
+
+
+def test_parse_limit_is_clamped():
+    assert parse_limit(None) == 50
+    assert parse_limit('0') == 1
+    assert parse_limit('100000') == 500
+
+
+def test_search_args_require_query():
+    with pytest.raises(ValueError):
+        parse_ticket_search_args({'q': '  '})
+
+
+def test_search_cursor_keeps_float_rank():
+    cursor = encode_cursor(0.060792699456214905, datetime(2026, 1, 2), '7')
+    params = parse_ticket_search_args({'q': 'sự cố', 'cursor': cursor, 'customer_id': 'C1'})
+    assert params['cursor'] == [0.060792699456214905, datetime(2026, 1, 2), '7']
+    assert params['customer_id'] == 'C1' and params['limit'] == 50
+
+
+def test_report_range_forms():
+    now = datetime(2026, 10, 19, 12)
+    assert parse_report_range({}, now=now) == {'period': '30d', 'start': datetime(2026, 9, 19, 12), 'end': now}
+    assert parse_report_range({'quarter': '2026-Q3'}, now=now) == {
+        'period': '2026-Q3', 'start': datetime(2026, 7, 1), 'end': datetime(2026, 10, 1)}
+    assert parse_report_range({'year': '2025'}, now=now)['end'] == datetime(2026, 1, 1)
+    custom = parse_report_range({'from': '2026-02-01', 'to': '2026-02-28'}, now=now)
+    assert (custom['start'], custom['end']) == (datetime(2026, 2, 1), datetime(2026, 3, 1))
+    assert parse_report_range({'period': 'all'}, now=now)['start'] is None
+
+
+@pytest.mark.parametrize('args', [
+    {'period': '45d'},
+    {'quarter': '2026-Q5'},
+    {'year': '26'},
+    {'from': '2026-03-01', 'to': '2026-02-01'},
+    {'from': '2026-03-01', 'year': '2026'},
+])
+def test_report_range_rejects_invalid(args):
+    with pytest.raises(ValueError):
+        parse_report_range(args)
+
+
+def test_alarm_list_args():
+    cursor = encode_cursor(datetime(2026, 10, 1, 8, 30), 42)
+    params = parse_alarm_list_args({'status': 'open,in_progress', 'roots_only': 'true', 'to': '2026-10-19',
+                                    'cursor': cursor, 'fields': 'alarm_id,status,alarm_id'}, ('alarm_id', 'status'))
+    assert params['status'] == ['open', 'in_progress'] and params['severity'] is None
+    assert params['roots_only'] is True
+    assert params['date_to'] == datetime(2026, 10, 20)
+    assert params['cursor'] == [datetime(2026, 10, 1, 8, 30), 42]
+    assert params['fields'] == ['alarm_id', 'status']
+    assert parse_alarm_list_args({}, ('alarm_id',))['fields'] is None
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        parse_fields_arg('alarm_id,labels', ('alarm_id', 'status'))
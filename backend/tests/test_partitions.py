@@ -0,0 +1,21 @@
+import os
+import sys
+from datetime import date
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.partition_service import add_months, month_bounds, partition_name
+
+
+def test_partition_name():
+    assert partition_name(2026, 3) == 'tickets_p202603'
+
+
+def test_add_months_across_years():
+    assert add_months(2026, 11, 3) == (2027, 2)
+    assert add_months(2026, 1, -1) == (2025, 12)
+
+
+def test_month_bounds():
+    assert month_bounds(2026, 12) == (date(2026, 12, 1), date(2027, 1, 1))
@@ -0,0 +1,101 @@
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.sketch import DDSketch, HyperLogLog, merge_hll, merge_serialized
+from services.rollup_service import day_ranges, distribution, split_range
+
+
+def test_quantiles_within_relative_error():
+    values = np.random.default_rng(7).lognormal(mean=2, sigma=1.2, size=20000)
+    sketch = DDSketch.from_values(values, alpha=0.01)
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+
+
+def test_merge_equals_single_sketch():
+    rng = np.random.default_rng(1)
+    a, b = rng.exponential(10, 500), rng.exponential(50, 300)
+    merged = DDSketch.from_values(a).merge(DDSketch.from_values(b))
+    single = DDSketch.from_values(np.concatenate([a, b]))
+    assert merged.count == single.count == 800
+    assert merged.quantiles([0.5, 0.9, 0.99]) == single.quantiles([0.5, 0.9, 0.99])
+
+
+def test_serialization_roundtrip_and_merge():
+    a = DDSketch.from_values([0, 0, 1.5, 3, 120])
+    b = DDSketch.from_values([2, 8])
+    restored = DDSketch.from_bytes(a.to_bytes())
+    assert restored.zero_count == 2 and restored.count == 5 and restored.sum == pytest.approx(124.5)
+    merged = merge_serialized([a.to_bytes(), None, b.to_bytes()])
+    assert merged.count == 7
+    assert merged.quantile(0) == 0.0
+    assert merged.quantile(1) == pytest.approx(120, rel=0.01)
+
+
+def test_nan_ignored_and_empty():
+    sketch = DDSketch.from_values([np.nan, 4.0])
+    assert sketch.count == 1
+    assert DDSketch().quantile(0.5) is None
+    assert distribution(DDSketch(), 0, 0) == {"count": 0, "avg": None, "p50": None, "p90": None, "p99": None}
+
+
+def test_bin_limit_collapses_low_buckets():
+    sketch = DDSketch(alpha=0.01, max_bins=64)
+    sketch.add(np.geomspace(1e-3, 1e6, 5000))
+    assert len(sketch.keys) <= 64
+    assert sketch.count == 5000
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(np.geomspace(1e-3, 1e6, 5000), 0.99), rel=0.02)
+
+
+def test_hll_small_counts_exact_and_large_within_error():
+    assert HyperLogLog().estimate() == 0
+    assert HyperLogLog.from_values(['a', 'b', 'a', None]).estimate() == 2
+    for n in (100, 50000):
+        estimate = HyperLogLog.from_values(f'request-{i}' for i in range(n)).estimate()
+        assert abs(estimate - n) / n <= 0.05
+
+
+def test_hll_merge_is_union_and_roundtrips():
+    a = HyperLogLog.from_values(range(3000))
+    b = HyperLogLog.from_values(range(2000, 6000))
+    union = HyperLogLog.from_values(range(6000))
+    merged = merge_hll([a.to_bytes(), None, b.to_bytes()])
+    assert np.array_equal(merged.registers, union.registers)
+    for sketch in (HyperLogLog.from_values(range(10)), union):  # sparse and dense encodings
+        assert np.array_equal(HyperLogLog.from_bytes(sketch.to_bytes()).registers, sketch.registers)
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=10))
+
+
+def test_day_ranges_merges_consecutive_days():
+    ranges = day_ranges([date(2026, 3, 2), date(2026, 3, 1), date(2026, 3, 5)])
+    assert ranges == [
+        (datetime(2026, 3, 1), datetime(2026, 3, 3)),
+        (datetime(2026, 3, 5), datetime(2026, 3, 6)),
+    ]
+
+
+def test_split_range_uses_months_days_and_raw_edges():
+    raw, days, months = split_range(datetime(2026, 1, 15, 9, 30), datetime(2026, 4, 3, 12))
+    assert raw == [
+        (datetime(2026, 1, 15, 9, 30), datetime(2026, 1, 16)),
+        (datetime(2026, 4, 3), datetime(2026, 4, 3, 12)),
+    ]
+    assert days == [(date(2026, 1, 16), date(2026, 2, 1)), (date(2026, 4, 1), date(2026, 4, 3))]
+    assert months == [(date(2026, 2, 1), date(2026, 4, 1))]
+
+
+def test_split_range_short_and_unbounded():
+    assert split_range(datetime(2026, 3, 5), datetime(2026, 3, 20)) == ([], [(date(2026, 3, 5), date(2026, 3, 20))], [])
+    assert split_range(datetime(2026, 3, 5, 8), datetime(2026, 3, 5, 17)) == (
+        [(datetime(2026, 3, 5, 8), datetime(2026, 3, 5, 17))], [], [])
+    raw, days, months = split_range(None, datetime(2026, 3, 5))
+    assert raw == [] and days == [(date(2026, 3, 1), date(2026, 3, 5))] and months == [(None, date(2026, 3, 1))]
@@ -0,0 +1,85 @@
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.sla_engine import SLAEngine, SLATarget, SupportCalendar, priority_level
+
+
+def minutes(calendar, start, end):
+    return calendar.business_minutes(np.array([start], dtype='datetime64[s]'),
+                                     np.array([end], dtype='datetime64[s]'))[0]
+
+
+def test_8x5_skips_nights_and_weekends():
+    calendar = SupportCalendar.parse('8x5', day_start_hour=8)
+    # Fri 2026-10-16 15:00 -> Mon 2026-10-19 10:30: 1h Friday + 2h30 Monday
+    assert minutes(calendar, datetime(2026, 10, 16, 15, 0), datetime(2026, 10, 19, 10, 30)) == 210
+    # Entirely outside support hours
+    assert minutes(calendar, datetime(2026, 10, 17, 9, 0), datetime(2026, 10, 18, 23, 0)) == 0
+
+
+def test_holidays_and_24x7():
+    calendar = SupportCalendar.parse('8x5', holidays=['2026-10-19'])
+    assert minutes(calendar, datetime(2026, 10, 16, 15, 0), datetime(2026, 10, 19, 10, 30)) == 60
+    always = SupportCalendar.parse('24x7', holidays=['2026-10-19'])
+    assert minutes(always, datetime(2026, 10, 16, 15, 0), datetime(2026, 10, 19, 10, 30)) == 67.5 * 60
+
+
+def test_wall_time_inverts_cumulative_minutes():
+    calendar = SupportCalendar.parse('8x5', holidays=['2026-10-19'])
+    friday = calendar.cumulative_minutes(np.array(['2026-10-16T15:30'], dtype='datetime64[s]'))
+    # 30 minutes left on Friday, the next 30 on Tuesday (Monday is a holiday)
+    assert calendar.wall_time(friday + 60).tolist() == [datetime(2026, 10, 20, 8, 30)]
+    assert calendar.wall_time(friday).tolist() == [datetime(2026, 10, 16, 15, 30)]
+
+
+def test_business_minutes_missing_and_invalid():
+    calendar = SupportCalendar()
+    result = calendar.business_minutes(np.array(['2026-10-19T10:00', 'NaT'], dtype='datetime64[s]'),
+                                       np.array(['2026-10-19T09:00', '2026-10-19T12:00'], dtype='datetime64[s]'))
+    assert result[0] == 0 and np.isnan(result[1])
+    with pytest.raises(ValueError):
+        SupportCalendar.parse('forever')
+    with pytest.raises(ValueError):
+        SupportCalendar.parse('12x5', day_start_hour=18)
+
+
+def test_priority_level():
+    assert [priority_level(p) for p in ('Critical', 'P2', 'low', None, 'Normal')] == \
+        ['critical', 'high', 'low', 'medium', 'medium']
+
+
+def test_evaluate_uses_customer_sla_and_running_clock():
+    gold = SLATarget('GOLD', '8x5', dict.fromkeys(('critical', 'high', 'medium', 'low'), 60),
+                     dict.fromkeys(('critical', 'high', 'medium', 'low'), 4))
+    default = SLATarget.uniform('24x7', 30, 4)
+    calendars = {'8x5': SupportCalendar.parse('8x5'), '24x7': SupportCalendar()}
+    friday = datetime(2026, 10, 16, 15, 0)
+    tickets = [
+        # Gold, responded after 90 wall-clock minutes (1h business) and still open on Monday 10:30
+        {'created_at': friday, 'customer_id': 'C1', 'status': 'Open', 'priority': 'High',
+         'response_time_minutes': 90, 'resolve_time_hours': None},
+        # Default 24x7 targets, resolved after 5h without a recorded response
+        {'created_at': friday, 'customer_id': 'C2', 'status': 'Closed', 'priority': 'High',
+         'response_time_minutes': None, 'resolve_time_hours': 5.0},
+        # Closed without timestamps: not evaluable
+        {'created_at': friday, 'customer_id': 'C2', 'status': 'Closed', 'priority': 'Low',
+         'response_time_minutes': None, 'resolve_time_hours': None},
+    ]
+    result = SLAEngine().evaluate(tickets, now=datetime(2026, 10, 19, 10, 30),
+                                  targets=(default, {'C1': gold}), calendars=calendars)
+
+    assert result[0] == {'sla_id': 'GOLD', 'sla_response_business_minutes': 60, 'sla_resolve_business_hours': 3.5,
+                         'sla_response_breached': False, 'sla_resolve_breached': False, 'is_overdue': False,
+                         'sla_due_at': datetime(2026, 10, 19, 11, 0)}
+    assert result[1]['sla_id'] is None and result[1]['sla_response_business_minutes'] == 300
+    assert result[1]['sla_response_breached'] and result[1]['sla_resolve_breached'] and result[1]['is_overdue']
+    assert result[2]['sla_resolve_business_hours'] is None and not result[2]['is_overdue']
+    # Only running clocks can still breach
+    assert result[1]['sla_due_at'] is None and result[2]['sla_due_at'] is None
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Ensure backend dir is importable as package root for tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.workload_service import window_load
+
+
+def test_window_load_rates():
+    load = window_load(70, 2940, 7, tickets_per_day=15, effort_hours_per_day=8)
+    assert load == {"tickets": 70, "effort_hours": 49.0, "tickets_per_day": 10.0,
+                    "effort_hours_per_day": 7.0, "overloaded": False}
+
+
+def test_window_load_overload_on_either_threshold():
+    assert window_load(16, 0, 1, tickets_per_day=15, effort_hours_per_day=8)['overloaded']
+    assert window_load(2, 9 * 60, 1, tickets_per_day=15, effort_hours_per_day=8)['overloaded']
+    assert not window_load(15, 8 * 60, 1, tickets_per_day=15, effort_hours_per_day=8)['overloaded']
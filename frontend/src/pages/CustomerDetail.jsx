@@ -170,13 +170,9 @@ const CustomerDetail = () => {
     const [period, setPeriod] = useState('30d');
 
     useEffect(() => {
-        Promise.all([
-            itsmService.getCustomerDetail(id),
-            itsmService.getCustomerTickets(id),
-            itsmService.getCustomerPerformance(id, period)
-        ]).then(([detail, ticketList, perfData]) => {
+        itsmService.getCustomerPage(id, period).then(({ detail, tickets: ticketList, performance: perfData }) => {
             setData(detail);
-            setTickets(ticketList);
+            setTickets(ticketList.data);
             setPerformance(perfData);
             setLoading(false);
         });
@@ -95,7 +95,7 @@ const EngineerDetail = () => {
             itsmService.getEngineerTickets(id)
         ]).then(([detail, ticketList]) => {
             setData(detail);
-            setTickets(ticketList);
+            setTickets(ticketList.data);
             setLoading(false);
         });
     }, [id]);
@@ -27,13 +27,20 @@ const TimeSpent = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const [statsRes, summaryRes, categoryRes, groupRes, recordsRes] = await Promise.all([
-                fetch(`${API_BASE}/api/time-spent/stats`).then(r => r.json()),
-                fetch(`${API_BASE}/api/time-spent/summary`).then(r => r.json()),
-                fetch(`${API_BASE}/api/time-spent/by-category`).then(r => r.json()),
-                fetch(`${API_BASE}/api/time-spent/by-group`).then(r => r.json()),
-                fetch(`${API_BASE}/api/time-spent?per_page=100`).then(r => r.json())
-            ]);
+            // All five sections in one round trip (POST /api/batch)
+            const { results } = await fetch(`${API_BASE}/api/batch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    sections: [
+                        'time_spent_stats', 'time_spent_summary', 'time_spent_by_category', 'time_spent_by_group',
+                        { section: 'time_spent', params: { per_page: 100 } }
+                    ]
+                })
+            }).then(r => r.json());
+            const [statsRes, summaryRes, categoryRes, groupRes, recordsRes] = [
+                'time_spent_stats', 'time_spent_summary', 'time_spent_by_category', 'time_spent_by_group', 'time_spent'
+            ].map(id => results[id].data);
 
             if (statsRes.success) setStats(statsRes.stats);
             if (summaryRes.success) setSummary(summaryRes.data);
@@ -29,23 +29,45 @@ export const userService = {
   delete: (id) => api.delete(`/users/${id}`).then(res => res.data),
 };
 
+// Report window: a period string ('30d', 'all') or { from, to } / { quarter } / { year }
+const reportRange = (range) => (typeof range === 'string' ? { period: range } : range);
+
+// Several report sections in one round trip: [{ id, section, params }] -> { id: data }.
+// Rejects with the first failed section's error (as the separate call would).
+export const getBatch = (sections) => api.post('/batch', { sections }).then(res => {
+  const results = res.data.results;
+  const failed = Object.entries(results).find(([, r]) => r.status >= 400);
+  if (failed) {
+    throw new Error(`${failed[0]}: ${failed[1].data?.error || failed[1].status}`);
+  }
+  return Object.fromEntries(Object.entries(results).map(([id, r]) => [id, r.data]));
+});
+
 export const itsmService = {
   getSummary: () => api.get('/report/summary').then(res => res.data),
-  getCustomers: (period = '30d') => api.get(`/report/customers?period=${period}`).then(res => res.data),
+  getCustomers: (range = '30d') => api.get('/report/customers', { params: reportRange(range) }).then(res => res.data),
   getCustomerDetail: (id) => api.get(`/report/customers/${id}`).then(res => res.data),
-  getCustomerTickets: (id) => api.get(`/report/customers/${id}/tickets`).then(res => res.data),
-  getCustomerPerformance: (id, period = '30d') => api.get(`/report/customers/${id}/performance?period=${period}`).then(res => res.data),
+  getCustomerTickets: (id, params = {}) => api.get(`/report/customers/${id}/tickets`, { params }).then(res => res.data),
+  getCustomerPerformance: (id, range = '30d') => api.get(`/report/customers/${id}/performance`, { params: reportRange(range) }).then(res => res.data),
   getEngineers: () => api.get('/report/engineers').then(res => res.data),
+  getEngineerWorkload: () => api.get('/report/engineers/workload').then(res => res.data),
   getEngineerDetail: (id) => api.get(`/report/engineers/${id}`).then(res => res.data),
-  getEngineerTickets: (id) => api.get(`/report/engineers/${id}/tickets`).then(res => res.data),
-  getEngineerPerformance: (id, period = '30d') => api.get(`/report/engineers/${id}/performance?period=${period}`).then(res => res.data),
+  getEngineerTickets: (id, params = {}) => api.get(`/report/engineers/${id}/tickets`, { params }).then(res => res.data),
+  getEngineerPerformance: (id, range = '30d') => api.get(`/report/engineers/${id}/performance`, { params: reportRange(range) }).then(res => res.data),
   getTicketDetail: (id) => api.get(`/report/tickets/${id}`).then(res => res.data),
+  searchTickets: (q, params = {}) => api.get('/report/tickets/search', { params: { q, ...params } }).then(res => res.data),
   getMonthlyReport: (customerId, year, month) => api.get(`/v1/reports/itsm/monthly`, {
     params: { customer_id: customerId, year, month }
   }).then(res => res.data),
   getForecast: (customerId, year, month) => api.get(`/v1/reports/itsm/forecast`, {
     params: { customer_id: customerId, year, month }
   }).then(res => res.data),
+  // Customer detail page load (detail, tickets, performance) in one request
+  getCustomerPage: (id, range = '30d') => getBatch([
+    { id: 'detail', section: 'customer_detail', params: { customer_id: id } },
+    { id: 'tickets', section: 'customer_tickets', params: { customer_id: id } },
+    { id: 'performance', section: 'customer_performance', params: { customer_id: id, ...reportRange(range) } },
+  ]),
 };
 
 export const memberService = {